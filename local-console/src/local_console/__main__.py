@@ -78,6 +78,7 @@ def main(
         except Exception as e:
             logger.warning(f"Error while getting version from Python package: {e}")
 
+    # Only the invoked plugin has been loaded at this point
     loaded_commands = ctx.obj
     for name, command_class in loaded_commands.items():
         command_class.pre_setup_callback(config_paths)
@@ -0,0 +1,4 @@
+
+listener ${mqtt_port}
+socket_domain ipv4
+mount_point ${mount_point}
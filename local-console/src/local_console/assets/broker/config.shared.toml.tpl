@@ -0,0 +1,6 @@
+listener ${hub_port} 127.0.0.1
+socket_domain ipv4
+connection_messages true
+log_timestamp false
+
+allow_anonymous true
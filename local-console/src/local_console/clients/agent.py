@@ -22,6 +22,7 @@ from typing import Optional
 import paho.mqtt.client as paho
 import trio
 from local_console.clients.trio_paho_mqtt import AsyncClient
+from local_console.core.config import Config
 from paho.mqtt.client import MQTT_ERR_SUCCESS
 
 logger = logging.getLogger(__name__)
@@ -47,7 +48,15 @@ class Agent:
             async with trio.open_nursery() as nursery:
 
                 self.nursery = nursery
-                self.client = AsyncClient(self.mqttc, self.nursery)
+                params = Config().data.config.mqtt_client
+                self.client = AsyncClient(
+                    self.mqttc,
+                    self.nursery,
+                    max_buffer=params.buffer,
+                    overflow=params.overflow,
+                    read_batch=params.read_batch,
+                    send_buffer=params.send_buffer,
+                )
                 try:
                     self.client.connect(Agent.HOST, self.port)
                     for topic in subs_topics:
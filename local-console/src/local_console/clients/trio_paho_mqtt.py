@@ -29,18 +29,62 @@
 # the forked code:
 # - Added typing annotations
 # - Added methods for publish and wait
+# - Read as many packets as available on each wakeup
+# - Added configurable overflow policies and message counters
 #
 # SPDX-License-Identifier: Apache-2.0
+import logging
+import select
 import socket
 from collections import defaultdict
+from collections import deque
 from collections.abc import AsyncIterator
 from typing import Any
 from typing import Optional
 
 import paho.mqtt.client as mqtt
 import trio
+from local_console.core.schemas.schemas import MQTTOverflowPolicy
+from local_console.core.schemas.schemas import READ_BATCH
+from pydantic import BaseModel
 from trio_util import trio_async_generator
 
+logger = logging.getLogger(__name__)
+
+
+class MessageStats(BaseModel):
+    received: int
+    dropped: int
+    queued: int
+    high_water: int
+
+
+class MessageCounters:
+    def __init__(self) -> None:
+        self.received = 0
+        self.dropped = 0
+        self.high_water = 0
+
+    def record(self, queued: int) -> None:
+        self.received += 1
+        self.high_water = max(self.high_water, queued)
+
+    def stats(self, queued: int) -> MessageStats:
+        return MessageStats(
+            received=self.received,
+            dropped=self.dropped,
+            queued=queued,
+            high_water=self.high_water,
+        )
+
+
+def _readable(sock: socket.socket | mqtt.WebsocketWrapper) -> bool:
+    try:
+        return bool(select.select([sock], [], [], 0)[0])
+    except (OSError, ValueError):
+        # The socket was closed
+        return False
+
 
 class AsyncClient:
     def __init__(
@@ -48,9 +92,19 @@ class AsyncClient:
         sync_client: mqtt.Client,
         parent_nursery: trio.Nursery,
         max_buffer: int = 100,
+        overflow: MQTTOverflowPolicy = MQTTOverflowPolicy.DROP_OLDEST,
+        read_batch: int = READ_BATCH,
+        send_buffer: Optional[int] = None,
     ) -> None:
         self._client = sync_client
         self._nursery = parent_nursery
+        self._overflow = overflow
+        self._read_batch = read_batch
+        self._send_buffer = send_buffer
+        self._misc_interval = 1.0
+        self._counters = MessageCounters()
+        # Messages received past a full channel, under the BLOCK policy
+        self._backlog: deque[mqtt.MQTTMessage] = deque()
 
         self.socket = self._client.socket()
 
@@ -105,8 +159,10 @@ class AsyncClient:
         self._cancel_scopes.append(cs)
         await self._event_connect.wait()
         with cs:
+            # Only keepalive is handled here, so there is no need
+            # to run it much more often than the keepalive period
             while self._client.loop_misc() == mqtt.MQTT_ERR_SUCCESS:
-                await trio.sleep(1)
+                await trio.sleep(self._misc_interval)
 
     async def _loop_read(self) -> None:
         cs = trio.CancelScope()
@@ -115,7 +171,20 @@ class AsyncClient:
             while True:
                 await self._event_should_read.wait()
                 await trio.lowlevel.wait_readable(self.socket)  # type: ignore  # silence useless type check
-                self._client.loop_read()
+                self._read_available()
+
+    def _read_available(self) -> None:
+        """
+        Reads packets while the socket has data and reading is allowed,
+        up to the read batch, instead of a single one per wakeup.
+        """
+        for _ in range(self._read_batch):
+            if self._client.loop_read() != mqtt.MQTT_ERR_SUCCESS:
+                return
+            if not self._event_should_read.is_set():
+                return
+            if not _readable(self.socket):
+                return
 
     async def _loop_write(self) -> None:
         cs = trio.CancelScope()
@@ -136,6 +205,7 @@ class AsyncClient:
         clean_start: int = mqtt.MQTT_CLEAN_START_FIRST_ONLY,
         properties: Optional[mqtt.Properties] = None,
     ) -> None:
+        self._misc_interval = max(1.0, keepalive / 4)
         self._start_all_loop()
         self._client.connect(
             host,
@@ -157,22 +227,56 @@ class AsyncClient:
         self._event_should_read.set()
         while True:
             msg = await self._msg_receive_channel.receive()
+            self._refill()
             yield msg
-            self._event_should_read.set()
+
+    def _refill(self) -> None:
+        # Moves messages held back by the BLOCK policy into the channel,
+        # resuming reads once all of them fit
+        while self._backlog:
+            try:
+                self._msg_send_channel.send_nowait(self._backlog[0])
+            except trio.WouldBlock:
+                return
+            self._backlog.popleft()
+        self._event_should_read.set()
+
+    def _queued(self) -> int:
+        statistics = self._msg_send_channel.statistics()
+        return int(statistics.current_buffer_used) + len(self._backlog)
+
+    def stats(self) -> MessageStats:
+        return self._counters.stats(self._queued())
 
     def _on_message(
         self, client: mqtt.Client, userdata: Any, msg: mqtt.MQTTMessage
     ) -> None:
-        try:
-            self._msg_send_channel.send_nowait(msg)
-        except trio.WouldBlock:
-            print("Buffer full. Discarding an old msg!")
+        if self._backlog:
+            self._backlog.append(msg)
+        else:
+            try:
+                self._msg_send_channel.send_nowait(msg)
+            except trio.WouldBlock:
+                self._overflowed(msg)
+        self._counters.record(self._queued())
+
+    def _overflowed(self, msg: mqtt.MQTTMessage) -> None:
+        if self._overflow == MQTTOverflowPolicy.BLOCK:
+            # Stop reading until the messages are read off the mem channel.
+            # The packets already read in the current batch are kept aside.
+            self._backlog.append(msg)
+            self._event_should_read = trio.Event()
+            return
+
+        self._counters.dropped += 1
+        if self._counters.dropped == 1 or self._counters.dropped % 1000 == 0:
+            logger.warning(
+                f"Message buffer full, {self._counters.dropped} messages discarded"
+            )
+        if self._overflow == MQTTOverflowPolicy.DROP_OLDEST:
             # Take the old msg off the channel, discard it, and put the new msg on
             _ = self._msg_receive_channel.receive_nowait()
-            # TODO: Store this old msg?
             self._msg_send_channel.send_nowait(msg)
-            # Stop reading until the messages are read off the mem channel
-            self._event_should_read = trio.Event()
 
     def disconnect(
         self, reasoncode: Optional[mqtt.ReasonCodes] = None, properties: Any = None
@@ -188,7 +292,10 @@ class AsyncClient:
         self, client: mqtt.Client, userdata: Any, sock: socket.socket
     ) -> None:
         self.socket = sock
-        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 2048)
+        if self._send_buffer:
+            self.socket.setsockopt(
+                socket.SOL_SOCKET, socket.SO_SNDBUF, self._send_buffer
+            )
 
     def _on_socket_close(
         self, client: mqtt.Client, userdata: Any, sock: socket.socket
@@ -0,0 +1,149 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import logging
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Annotated
+from typing import Optional
+
+import typer
+from local_console.commands.utils import find_device_config
+from local_console.core.camera.streaming import inference_dir_for
+from local_console.core.error.base import UserException
+from local_console.core.files.decoding import archive_sources
+from local_console.core.files.decoding import decode_sources
+from local_console.core.files.decoding import DecodingSettings
+from local_console.core.files.decoding import directory_sources
+from local_console.core.files.decoding import encode
+from local_console.core.files.decoding import ExportFormat
+from local_console.core.files.decoding import Source
+from local_console.core.files.decoding import TimeRange
+from local_console.plugin import PluginBase
+
+logger = logging.getLogger(__name__)
+
+app = typer.Typer()
+
+
+@app.command(
+    help=(
+        "Decode the stored inferences of a device within a time range, "
+        "using the schema and labels configured for it"
+    )
+)
+def decode(
+    device: Annotated[
+        Optional[str],
+        typer.Option(
+            "--device",
+            "-d",
+            help="The name of the device whose inferences to decode.",
+        ),
+    ] = None,
+    port: Annotated[
+        Optional[int],
+        typer.Option(
+            help="An alternative to --device, using the port to identify the device instead of its name. Ignored if the --device option is specified."
+        ),
+    ] = None,
+    start: Annotated[
+        Optional[str],
+        typer.Option(
+            help="Only decode inferences taken at or after this time, as YYYYMMDDHHMMSSfff or any prefix of it."
+        ),
+    ] = None,
+    end: Annotated[
+        Optional[str],
+        typer.Option(
+            help="Only decode inferences taken at or before this time, as YYYYMMDDHHMMSSfff or any prefix of it."
+        ),
+    ] = None,
+    output_format: Annotated[
+        ExportFormat,
+        typer.Option("--format", "-f", help="Output format"),
+    ] = ExportFormat.JSONL,
+    output: Annotated[
+        Optional[Path],
+        typer.Option(
+            "--output", "-o", help="File to write the output to. Default: stdout"
+        ),
+    ] = None,
+    archive: Annotated[
+        Optional[Path],
+        typer.Option(
+            help="Zip archive of inference files to decode, instead of the ones stored for the device."
+        ),
+    ] = None,
+    schema: Annotated[
+        Optional[Path],
+        typer.Option(help="FlatBuffers schema to use instead of the configured one."),
+    ] = None,
+    labels: Annotated[
+        Optional[Path],
+        typer.Option(help="Labels file to use instead of the configured one."),
+    ] = None,
+    workers: Annotated[
+        Optional[int],
+        typer.Option(
+            min=1,
+            help="Number of processes decoding in parallel. Default: number of CPUs",
+        ),
+    ] = None,
+) -> None:
+    device_config = find_device_config(device, port)
+    persist = device_config.persist
+    try:
+        settings = DecodingSettings.load(
+            schema or persist.vapp_schema_file, labels or persist.vapp_labels_file
+        )
+        time_range = TimeRange(start, end)
+        if archive:
+            with archive.open("rb") as archive_file:
+                sources = archive_sources(archive_file, time_range)
+                _write(sources, settings, output_format, output, workers)
+        else:
+            folder = inference_dir_for(device_config.id)
+            if not folder or not folder.is_dir():
+                raise SystemExit(
+                    f"No inferences stored for device {device_config.name}"
+                )
+            sources = directory_sources(folder, time_range)
+            _write(sources, settings, output_format, output, workers)
+    except UserException as e:
+        raise SystemExit(str(e))
+
+
+def _write(
+    sources: Iterator[Source],
+    settings: DecodingSettings,
+    output_format: ExportFormat,
+    output: Path | None,
+    workers: int | None,
+) -> None:
+    chunks = encode(decode_sources(sources, settings, workers), output_format)
+    if output:
+        with output.open("wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+    else:
+        for chunk in chunks:
+            sys.stdout.buffer.write(chunk)
+        sys.stdout.buffer.flush()
+
+
+class DecodeCommand(PluginBase):
+    implementer = app
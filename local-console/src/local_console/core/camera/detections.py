@@ -0,0 +1,359 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+"""
+Columnar representation of object detection results, for processing
+large amounts of detections with NumPy instead of one object each.
+
+Detections are read straight from FlatBuffers payloads serialized with
+an object detection schema (see `objectdetection.fbs`), gathering every
+field of every detection in a handful of vectorized operations.
+"""
+from collections.abc import Iterable
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from local_console.core.camera.fbs_decoder import DecodeError
+from local_console.core.camera.fbs_decoder import DECODER_CACHE_SIZE
+from local_console.core.camera.fbs_decoder import FieldDef
+from local_console.core.camera.fbs_decoder import get_decoder
+from local_console.core.camera.fbs_decoder import ObjectDef
+from local_console.core.camera.fbs_decoder import SCALARS
+from local_console.core.camera.fbs_decoder import Schema
+from local_console.core.camera.fbs_decoder import SchemaError
+
+UNKNOWN_CLASS = "Unknown"
+BBOX_FIELDS = ("left", "top", "right", "bottom")
+
+_U8 = np.dtype("u1")
+_U16 = np.dtype("<u2")
+_I32 = np.dtype("<i4")
+_U32 = np.dtype("<u4")
+
+# struct format character: NumPy dtype
+_DTYPES = {
+    "?": "?",
+    "b": "i1",
+    "B": "u1",
+    "h": "<i2",
+    "H": "<u2",
+    "i": "<i4",
+    "I": "<u4",
+    "q": "<i8",
+    "Q": "<u8",
+    "f": "<f4",
+    "d": "<f8",
+}
+
+
+@dataclass(frozen=True)
+class Detections:
+    """
+    Detections as parallel arrays, one element (or row) per detection.
+    """
+
+    class_id: np.ndarray  # uint32
+    score: np.ndarray  # float32
+    bbox: np.ndarray  # int32, shape (n, 4) as left, top, right, bottom
+
+    @classmethod
+    def empty(cls) -> "Detections":
+        return cls(
+            np.empty(0, np.uint32),
+            np.empty(0, np.float32),
+            np.empty((0, 4), np.int32),
+        )
+
+    @classmethod
+    def concat(cls, parts: Iterable["Detections"]) -> "Detections":
+        parts = [*parts, cls.empty()]
+        return cls(
+            np.concatenate([p.class_id for p in parts]),
+            np.concatenate([p.score for p in parts]),
+            np.concatenate([p.bbox for p in parts]),
+        )
+
+    @classmethod
+    def from_json(cls, decoded: dict[str, Any]) -> "Detections":
+        """
+        Builds detections from an already decoded object detection result.
+        """
+        objects = decoded.get("perception", {}).get("object_detection_list") or []
+        if not objects:
+            return cls.empty()
+        boxes = [o.get("bounding_box") or {} for o in objects]
+        return cls(
+            np.array([o.get("class_id", 0) for o in objects], np.uint32),
+            np.array([o.get("score", 0) for o in objects], np.float32),
+            np.array([[b.get(k, 0) for k in BBOX_FIELDS] for b in boxes], np.int32),
+        )
+
+    def __len__(self) -> int:
+        return len(self.class_id)
+
+    def _take(self, selection: np.ndarray) -> "Detections":
+        return Detections(
+            self.class_id[selection], self.score[selection], self.bbox[selection]
+        )
+
+    def filter(self, min_score: float) -> "Detections":
+        """
+        Keeps detections scoring at least `min_score`.
+        """
+        return self._take(self.score >= min_score)
+
+    def class_names(self, labels: dict[int, str] | None) -> np.ndarray:
+        """
+        Maps class IDs to their labels, like `add_class_names` does.
+        """
+        names = np.full(len(self), UNKNOWN_CLASS, dtype=object)
+        if not labels:
+            return names
+        lookup = np.full(max(labels) + 1, UNKNOWN_CLASS, dtype=object)
+        lookup[list(labels)] = list(labels.values())
+        known = self.class_id < len(lookup)
+        names[known] = lookup[self.class_id[known]]
+        return names
+
+    def counts(self) -> dict[int, int]:
+        """
+        Number of detections of each class.
+        """
+        classes, counts = np.unique(self.class_id, return_counts=True)
+        return dict(zip(classes.tolist(), counts.tolist()))
+
+    def dedup(self, iou_threshold: float = 0.5) -> "Detections":
+        """
+        Removes duplicate detections of the same object, i.e. those
+        overlapping a higher scoring detection of the same class by more
+        than `iou_threshold` (non-maximum suppression). Meant to be applied
+        to the detections of a single frame. Order is kept.
+        """
+        if len(self) < 2:
+            return self
+        order = np.argsort(-self.score, kind="stable")
+        boxes = self.bbox[order].astype(np.float64)
+        # Shift each class to its own region, so that classes never overlap
+        span = boxes.max() - boxes.min() + 1
+        boxes += (self.class_id[order].astype(np.float64) * span)[:, None]
+        overlaps = iou(boxes, boxes) > iou_threshold
+
+        keep = np.zeros(len(order), bool)
+        suppressed = np.zeros(len(order), bool)
+        for i in range(len(order)):
+            if suppressed[i]:
+                continue
+            keep[i] = True
+            suppressed |= overlaps[i]
+        return self._take(np.sort(order[keep]))
+
+
+def iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Intersection over union of every box in `a` with every box in `b`,
+    given as (left, top, right, bottom) rows.
+    """
+    a = a.astype(np.float64)
+    b = b.astype(np.float64)
+    width = np.minimum(a[:, None, 2], b[None, :, 2]) - np.maximum(
+        a[:, None, 0], b[None, :, 0]
+    )
+    height = np.minimum(a[:, None, 3], b[None, :, 3]) - np.maximum(
+        a[:, None, 1], b[None, :, 1]
+    )
+    intersection = np.clip(width, 0, None) * np.clip(height, 0, None)
+    area_a = np.clip(a[:, 2] - a[:, 0], 0, None) * np.clip(a[:, 3] - a[:, 1], 0, None)
+    area_b = np.clip(b[:, 2] - b[:, 0], 0, None) * np.clip(b[:, 3] - b[:, 1], 0, None)
+    union = area_a[:, None] + area_b[None, :] - intersection
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(union > 0, intersection / union, 0.0)
+
+
+@dataclass(frozen=True)
+class _Scalar:
+    slot: int
+    dtype: np.dtype
+    default: Any
+
+
+@dataclass(frozen=True)
+class _Layout:
+    """
+    Where the fields of a detection are found, per the schema.
+    """
+
+    perception: int
+    object_list: int
+    class_id: _Scalar
+    score: _Scalar
+    bbox_type: _Scalar
+    bbox: int
+    bbox_member: int
+    bbox_fields: tuple[_Scalar, ...]
+
+
+def _table_field(obj: ObjectDef, name: str) -> FieldDef:
+    for f in obj.fields:
+        if f.name == name:
+            return f
+    raise SchemaError(f"Table {obj.name} has no field {name}")
+
+
+def _scalar(schema: Schema, obj: ObjectDef, name: str) -> _Scalar:
+    f = _table_field(obj, name)
+    type_name = f.type.name
+    enum = schema.enums.get(type_name)
+    if enum is not None:
+        type_name = enum.underlying
+    if f.type.vector or type_name not in SCALARS:
+        raise SchemaError(f"Field {obj.name}.{name} is not a scalar")
+    fmt = SCALARS[type_name][0]
+    return _Scalar(f.slot, np.dtype(_DTYPES[fmt[-1]]), f.default or 0)
+
+
+def _table(schema: Schema, name: str) -> ObjectDef:
+    obj = schema.objects.get(name)
+    if obj is None or obj.is_struct:
+        raise SchemaError(f"{name} is not a table")
+    return obj
+
+
+def _has_box_fields(obj: ObjectDef) -> bool:
+    return not obj.is_struct and {f.name for f in obj.fields}.issuperset(BBOX_FIELDS)
+
+
+@lru_cache(maxsize=DECODER_CACHE_SIZE)
+def _layout(schema: Schema) -> _Layout:
+    perception = _table_field(schema.root, "perception")
+    data = _table(schema, perception.type.name)
+    object_list = _table_field(data, "object_detection_list")
+    if not object_list.type.vector:
+        raise SchemaError("object_detection_list is not a vector")
+    detection = _table(schema, object_list.type.name)
+
+    bbox = _table_field(detection, "bounding_box")
+    union = schema.enums.get(bbox.type.name)
+    if union is None or not union.is_union:
+        raise SchemaError("bounding_box is not a union")
+    members = (
+        (value, schema.objects.get(name)) for value, name in union.members.items()
+    )
+    box = next(
+        (
+            (value, obj)
+            for value, obj in members
+            if obj is not None and _has_box_fields(obj)
+        ),
+        None,
+    )
+    if box is None:
+        raise SchemaError("bounding_box has no member with box coordinates")
+    member_value, obj = box
+
+    return _Layout(
+        perception=perception.slot,
+        object_list=object_list.slot,
+        class_id=_scalar(schema, detection, "class_id"),
+        score=_scalar(schema, detection, "score"),
+        bbox_type=_Scalar(bbox.slot - 1, _U8, 0),
+        bbox=bbox.slot,
+        bbox_member=member_value,
+        bbox_fields=tuple(_scalar(schema, obj, name) for name in BBOX_FIELDS),
+    )
+
+
+class _Reader:
+    """
+    Reads the same field of many tables at once. Positions of absent
+    fields are 0, which is never a valid field position.
+    """
+
+    def __init__(self, data: bytes) -> None:
+        self.buf = np.frombuffer(data, np.uint8)
+
+    def read(self, positions: np.ndarray, dtype: np.dtype) -> np.ndarray:
+        if positions.size and (
+            positions.min() < 0 or positions.max() + dtype.itemsize > len(self.buf)
+        ):
+            raise DecodeError("Field outside of the buffer")
+        raw = self.buf[positions[:, None] + np.arange(dtype.itemsize)]
+        values: np.ndarray = raw.view(dtype)[:, 0]
+        return values
+
+    def deref(self, positions: np.ndarray) -> np.ndarray:
+        return positions + self.read(positions, _U32).astype(np.int64)
+
+    def field(self, tables: np.ndarray, slot: int) -> np.ndarray:
+        vtables: np.ndarray = tables - self.read(tables, _I32).astype(np.int64)
+        entry = 4 + 2 * slot
+        present = self.read(vtables, _U16) >= entry + 2
+        offsets = self.read(np.where(present, vtables + entry, 0), _U16)
+        offsets = np.where(present, offsets, 0).astype(np.int64)
+        return np.where(offsets > 0, tables + offsets, 0)
+
+    def scalar(self, tables: np.ndarray, scalar: _Scalar) -> np.ndarray:
+        positions = self.field(tables, scalar.slot)
+        values = self.read(positions, scalar.dtype)
+        return np.where(positions > 0, values, scalar.default)
+
+    def single_table(self, table: int, slot: int) -> int:
+        position = int(self.field(np.array([table]), slot)[0])
+        return int(self.deref(np.array([position]))[0]) if position else 0
+
+
+def decode_detections(schema_file: Path, data: bytes) -> Detections:
+    """
+    Reads the detections of a FlatBuffers payload serialized with
+    the object detection schema `schema_file`.
+    """
+    layout = _layout(get_decoder(schema_file).schema)
+    try:
+        return _decode(layout, _Reader(data))
+    except (IndexError, ValueError) as e:
+        raise DecodeError(f"Malformed payload: {e}") from e
+
+
+def _decode(layout: _Layout, reader: _Reader) -> Detections:
+    root = int(reader.deref(np.array([0]))[0])
+    perception = reader.single_table(root, layout.perception)
+    if not perception:
+        return Detections.empty()
+    vector = reader.single_table(perception, layout.object_list)
+    if not vector:
+        return Detections.empty()
+
+    length = int(reader.read(np.array([vector]), _U32)[0])
+    if vector + 4 + 4 * length > len(reader.buf):
+        raise DecodeError(f"Vector at {vector} overflows the buffer")
+    tables = reader.deref(vector + 4 + 4 * np.arange(length, dtype=np.int64))
+
+    bbox = np.zeros((length, 4), np.int32)
+    is_box = reader.scalar(tables, layout.bbox_type) == layout.bbox_member
+    if is_box.any():
+        positions = reader.field(tables, layout.bbox)
+        is_box &= positions > 0
+        boxes = reader.deref(positions[is_box])
+        bbox[is_box] = np.stack(
+            [reader.scalar(boxes, f) for f in layout.bbox_fields], axis=1
+        )
+
+    return Detections(
+        reader.scalar(tables, layout.class_id).astype(np.uint32),
+        reader.scalar(tables, layout.score).astype(np.float32),
+        bbox,
+    )
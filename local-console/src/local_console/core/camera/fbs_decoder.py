@@ -0,0 +1,626 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+"""
+In-process decoder for FlatBuffers payloads, driven by `.fbs` schema files.
+
+The output mimics what `flatc --json --defaults-json --strict-json` produces,
+so that it can be used as a drop-in replacement of spawning `flatc`.
+"""
+import re
+import struct
+from dataclasses import dataclass
+from dataclasses import field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+# Number of compiled schemas kept in memory
+DECODER_CACHE_SIZE = 32
+
+
+class SchemaError(Exception):
+    """
+    The schema could not be parsed, or uses features this decoder lacks
+    """
+
+
+class DecodeError(Exception):
+    """
+    The payload is not a valid buffer for the schema
+    """
+
+
+# name: (struct format, size)
+SCALARS: dict[str, tuple[str, int]] = {
+    "bool": ("<?", 1),
+    "byte": ("<b", 1),
+    "int8": ("<b", 1),
+    "ubyte": ("<B", 1),
+    "uint8": ("<B", 1),
+    "short": ("<h", 2),
+    "int16": ("<h", 2),
+    "ushort": ("<H", 2),
+    "uint16": ("<H", 2),
+    "int": ("<i", 4),
+    "int32": ("<i", 4),
+    "uint": ("<I", 4),
+    "uint32": ("<I", 4),
+    "long": ("<q", 8),
+    "int64": ("<q", 8),
+    "ulong": ("<Q", 8),
+    "uint64": ("<Q", 8),
+    "float": ("<f", 4),
+    "float32": ("<f", 4),
+    "double": ("<d", 8),
+    "float64": ("<d", 8),
+}
+
+# Decimal digits printed by flatc for each floating point width
+FLOAT_PRECISION = {4: 6, 8: 12}
+
+
+@dataclass
+class TypeRef:
+    name: str
+    vector: bool = False
+    array_length: int = 0
+
+
+@dataclass
+class FieldDef:
+    name: str
+    type: TypeRef
+    default: Any = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    # Filled in when the schema is resolved
+    slot: int = 0
+    offset: int = 0
+    union_type: bool = False
+
+
+@dataclass
+class EnumDef:
+    name: str
+    underlying: str
+    values: dict[str, int]
+    is_union: bool = False
+    bit_flags: bool = False
+    # Union members, by value
+    members: dict[int, str] = field(default_factory=dict)
+
+    def name_of(self, value: int) -> str | int:
+        for name, v in self.values.items():
+            if v == value:
+                return name
+        if self.bit_flags and value:
+            names = [n for n, v in self.values.items() if v and value & v == v]
+            covered = 0
+            for n in names:
+                covered |= self.values[n]
+            if covered == value:
+                return " ".join(names)
+        return value
+
+
+@dataclass
+class ObjectDef:
+    name: str
+    is_struct: bool
+    fields: list[FieldDef]
+    attributes: dict[str, Any] = field(default_factory=dict)
+    # Struct layout, filled in when the schema is resolved
+    size: int = 0
+    align: int = 1
+
+
+_TOKEN = re.compile(
+    r"""
+    (?P<string>"(?:[^"\\]|\\.)*")
+    | (?P<number>[-+]?(?:0[xX][0-9a-fA-F]+|(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?))
+    | (?P<ident>[A-Za-z_][A-Za-z0-9_.]*)
+    | (?P<punct>[{}\[\]():;,=])
+    """,
+    re.VERBOSE,
+)
+_COMMENTS = re.compile(r"//[^\n]*|/\*.*?\*/", re.DOTALL)
+
+
+def _tokenize(text: str) -> list[str]:
+    text = _COMMENTS.sub(" ", text)
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        if text[pos].isspace():
+            pos += 1
+            continue
+        match = _TOKEN.match(text, pos)
+        if not match:
+            raise SchemaError(f"Unexpected character {text[pos]!r} in schema")
+        tokens.append(match.group())
+        pos = match.end()
+    return tokens
+
+
+def _literal(token: str) -> Any:
+    if token.startswith('"'):
+        return token[1:-1]
+    if token in ("true", "false"):
+        return token == "true"
+    try:
+        return int(token, 0)
+    except ValueError:
+        pass
+    try:
+        return float(token)
+    except ValueError:
+        return token
+
+
+class _Parser:
+    def __init__(self) -> None:
+        self.objects: dict[str, ObjectDef] = {}
+        self.enums: dict[str, EnumDef] = {}
+        self.root_type: str | None = None
+        self.root_namespace = ""
+        self.namespace = ""
+        self.included: set[Path] = set()
+        self.tokens: list[str] = []
+        self.pos = 0
+
+    def parse_file(self, path: Path) -> None:
+        path = path.resolve()
+        if path in self.included:
+            return
+        self.included.add(path)
+
+        saved = (self.tokens, self.pos, self.namespace)
+        self.tokens, self.pos, self.namespace = _tokenize(path.read_text()), 0, ""
+        while self.pos < len(self.tokens):
+            self._statement(path.parent)
+        self.tokens, self.pos, self.namespace = saved
+
+    def _peek(self) -> str:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else ""
+
+    def _next(self) -> str:
+        if self.pos >= len(self.tokens):
+            raise SchemaError("Unexpected end of schema")
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def _expect(self, expected: str) -> None:
+        token = self._next()
+        if token != expected:
+            raise SchemaError(f"Expected {expected!r} but found {token!r}")
+
+    def _qualify(self, name: str) -> str:
+        return f"{self.namespace}.{name}" if self.namespace else name
+
+    def _statement(self, directory: Path) -> None:
+        keyword = self._next()
+        if keyword == "namespace":
+            self.namespace = self._next()
+            self._expect(";")
+        elif keyword in ("include", "native_include"):
+            included = _literal(self._next())
+            self._expect(";")
+            if keyword == "include":
+                self.parse_file(directory / included)
+        elif keyword in ("attribute", "file_identifier", "file_extension"):
+            self._next()
+            self._expect(";")
+        elif keyword == "root_type":
+            self.root_type = self._next()
+            self.root_namespace = self.namespace
+            self._expect(";")
+        elif keyword in ("table", "struct"):
+            self._object(keyword == "struct")
+        elif keyword in ("enum", "union"):
+            self._enum(keyword == "union")
+        elif keyword == "rpc_service":
+            self._next()
+            self._skip_block()
+        elif keyword == ";":
+            pass
+        else:
+            raise SchemaError(f"Unsupported schema statement {keyword!r}")
+
+    def _skip_block(self) -> None:
+        self._expect("{")
+        depth = 1
+        while depth:
+            token = self._next()
+            depth += {"{": 1, "}": -1}.get(token, 0)
+
+    def _attributes(self) -> dict[str, Any]:
+        attributes: dict[str, Any] = {}
+        if self._peek() != "(":
+            return attributes
+        self._next()
+        while self._peek() != ")":
+            name = self._next()
+            value: Any = True
+            if self._peek() == ":":
+                self._next()
+                value = _literal(self._next())
+            attributes[name] = value
+            if self._peek() == ",":
+                self._next()
+        self._next()
+        return attributes
+
+    def _type(self) -> TypeRef:
+        if self._peek() != "[":
+            return TypeRef(self._next())
+        self._next()
+        ref = TypeRef(self._next(), vector=True)
+        if self._peek() == ":":
+            self._next()
+            ref.vector = False
+            ref.array_length = int(self._next(), 0)
+        self._expect("]")
+        return ref
+
+    def _object(self, is_struct: bool) -> None:
+        name = self._qualify(self._next())
+        attributes = self._attributes()
+        self._expect("{")
+        fields = []
+        while self._peek() != "}":
+            field_name = self._next()
+            self._expect(":")
+            ref = self._type()
+            default = None
+            if self._peek() == "=":
+                self._next()
+                default = _literal(self._next())
+            fields.append(FieldDef(field_name, ref, default, self._attributes()))
+            self._expect(";")
+        self._next()
+        self.objects[name] = ObjectDef(name, is_struct, fields, attributes)
+
+    def _enum(self, is_union: bool) -> None:
+        name = self._qualify(self._next())
+        underlying = "ubyte"
+        if not is_union:
+            self._expect(":")
+            underlying = self._next()
+        attributes = self._attributes()
+        bit_flags = bool(attributes.get("bit_flags"))
+        self._expect("{")
+        enum = EnumDef(name, underlying, {}, is_union, bit_flags)
+        if is_union:
+            enum.values["NONE"] = 0
+        value = 0 if not bit_flags else -1
+        while self._peek() != "}":
+            member = self._next()
+            member_type = member
+            if is_union and self._peek() == ":":
+                self._next()
+                member_type = self._next()
+            if self._peek() == "=":
+                self._next()
+                value = int(self._next(), 0)
+            else:
+                value = value + 1 if is_union or bit_flags or enum.values else 0
+            # Values of bit flags are bit positions
+            enum.values[member] = 1 << value if bit_flags else value
+            if is_union:
+                enum.members[value] = member_type
+            self._attributes()
+            if self._peek() == ",":
+                self._next()
+        self._next()
+        self.enums[name] = enum
+
+
+class Schema:
+    """
+    A parsed `.fbs` schema, with types resolved and struct layouts computed.
+    """
+
+    def __init__(self, parser: _Parser) -> None:
+        self.objects = parser.objects
+        self.enums = parser.enums
+        if not parser.root_type:
+            raise SchemaError("Schema does not declare a root_type")
+        root = self._lookup(parser.root_type, parser.root_namespace)
+        if not isinstance(root, ObjectDef) or root.is_struct:
+            raise SchemaError(f"root_type {parser.root_type} is not a table")
+        self.root = root
+
+        self._resolving: set[str] = set()
+        self._resolved: set[str] = set()
+        for obj in self.objects.values():
+            self._resolve(obj)
+        for enum in self.enums.values():
+            if enum.is_union:
+                namespace = enum.name.rpartition(".")[0]
+                for value, member in enum.members.items():
+                    enum.members[value] = self._qualified(member, namespace)
+
+    def _lookup(self, name: str, namespace: str) -> ObjectDef | EnumDef | None:
+        qualified = self._qualified(name, namespace)
+        return self.objects.get(qualified) or self.enums.get(qualified)
+
+    def _qualified(self, name: str, namespace: str) -> str:
+        # Search from the innermost namespace outwards, like flatc does
+        parts = namespace.split(".") if namespace else []
+        while True:
+            candidate = ".".join([*parts, name])
+            if candidate in self.objects or candidate in self.enums:
+                return candidate
+            if not parts:
+                raise SchemaError(f"Unknown type {name}")
+            parts.pop()
+
+    def _resolve(self, obj: ObjectDef) -> None:
+        if obj.name in self._resolved or obj.name in self._resolving:
+            return
+        self._resolving.add(obj.name)
+        namespace = obj.name.rpartition(".")[0]
+        for f in obj.fields:
+            if f.type.name not in SCALARS and f.type.name != "string":
+                f.type.name = self._qualified(f.type.name, namespace)
+        if obj.is_struct:
+            self._layout(obj)
+        else:
+            self._assign_slots(obj)
+        self._resolving.discard(obj.name)
+        self._resolved.add(obj.name)
+
+    def _layout(self, obj: ObjectDef) -> None:
+        offset = 0
+        align = 1
+        for f in obj.fields:
+            if f.type.vector or f.type.name == "string":
+                raise SchemaError(f"Struct {obj.name} has non-inline field {f.name}")
+            size, field_align = self._inline_size(f.type.name)
+            count = f.type.array_length or 1
+            offset = -(-offset // field_align) * field_align
+            f.offset = offset
+            offset += size * count
+            align = max(align, field_align)
+        align = max(align, int(obj.attributes.get("force_align", 1)))
+        obj.align = align
+        obj.size = max(-(-offset // align) * align, 1)
+
+    def _inline_size(self, name: str) -> tuple[int, int]:
+        if name in SCALARS:
+            size = SCALARS[name][1]
+            return size, size
+        if name in self.enums and not self.enums[name].is_union:
+            size = SCALARS[self.enums[name].underlying][1]
+            return size, size
+        obj = self.objects.get(name)
+        if obj is None or not obj.is_struct:
+            raise SchemaError(f"Type {name} cannot be stored inline in a struct")
+        if obj.name in self._resolving:
+            raise SchemaError(f"Struct {obj.name} contains itself")
+        self._resolve(obj)
+        return obj.size, obj.align
+
+    def _assign_slots(self, obj: ObjectDef) -> None:
+        expanded = []
+        explicit_ids = any("id" in f.attributes for f in obj.fields)
+        slot = 0
+        for f in obj.fields:
+            enum = self.enums.get(f.type.name)
+            if enum is not None and enum.is_union:
+                if f.type.vector:
+                    raise SchemaError(f"Vectors of unions are not supported ({f.name})")
+                value_slot = int(f.attributes["id"]) if explicit_ids else slot + 1
+                type_field = FieldDef(
+                    f"{f.name}_type",
+                    TypeRef(enum.name),
+                    slot=value_slot - 1,
+                    union_type=True,
+                )
+                f.slot = value_slot
+                expanded += [type_field, f]
+                slot = value_slot + 1
+            else:
+                f.slot = int(f.attributes["id"]) if explicit_ids else slot
+                expanded.append(f)
+                slot = f.slot + 1
+        obj.fields = expanded
+
+
+class FlatbufferDecoder:
+    """
+    Decodes payloads serialized with the root type of a schema.
+    """
+
+    def __init__(self, schema: Schema) -> None:
+        self.schema = schema
+
+    def decode(self, data: bytes) -> dict[str, Any]:
+        buf = memoryview(data)
+        try:
+            return self._table(buf, self._uoffset(buf, 0), self.schema.root)
+        except DecodeError:
+            raise
+        except (struct.error, IndexError, ValueError, RecursionError) as e:
+            raise DecodeError(f"Malformed payload: {e}") from e
+
+    def _uoffset(self, buf: memoryview, pos: int) -> int:
+        target: int = pos + struct.unpack_from("<I", buf, pos)[0]
+        if target >= len(buf):
+            raise DecodeError(f"Offset at {pos} points outside of the buffer")
+        return target
+
+    def _scalar(self, buf: memoryview, pos: int, name: str) -> Any:
+        fmt, size = SCALARS[name]
+        value = struct.unpack_from(fmt, buf, pos)[0]
+        if size in FLOAT_PRECISION and fmt[-1] in "fd":
+            return _float(value, FLOAT_PRECISION[size])
+        return value
+
+    def _enum_or_scalar(self, buf: memoryview, pos: int, name: str) -> Any:
+        enum = self.schema.enums.get(name)
+        if enum is None:
+            return self._scalar(buf, pos, name)
+        return enum.name_of(self._scalar(buf, pos, enum.underlying))
+
+    def _default(self, f: FieldDef) -> Any:
+        enum = self.schema.enums.get(f.type.name)
+        default = f.default
+        if enum is not None:
+            if isinstance(default, str):
+                return default
+            return enum.name_of(default or 0)
+        if f.type.name == "bool":
+            return bool(default)
+        if SCALARS[f.type.name][0][-1] in "fd":
+            return _float(float(default or 0), FLOAT_PRECISION[SCALARS[f.type.name][1]])
+        return default or 0
+
+    def _field_position(self, buf: memoryview, table: int, slot: int) -> int:
+        vtable = table - struct.unpack_from("<i", buf, table)[0]
+        vtable_size = struct.unpack_from("<H", buf, vtable)[0]
+        entry = 4 + 2 * slot
+        if entry + 2 > vtable_size:
+            return 0
+        offset: int = struct.unpack_from("<H", buf, vtable + entry)[0]
+        return table + offset if offset else 0
+
+    def _table(self, buf: memoryview, pos: int, obj: ObjectDef) -> dict[str, Any]:
+        result: dict[str, Any] = {}
+        for f in obj.fields:
+            if f.attributes.get("deprecated"):
+                continue
+            field_pos = self._field_position(buf, pos, f.slot)
+            ref = f.type
+            enum = self.schema.enums.get(ref.name)
+            is_union = enum is not None and enum.is_union
+            if not ref.vector and (
+                ref.name in SCALARS or (enum and not is_union) or f.union_type
+            ):
+                if field_pos:
+                    value = self._enum_or_scalar(buf, field_pos, ref.name)
+                elif f.default == "null":
+                    continue
+                else:
+                    value = self._default(f)
+                result[f.name] = value
+                continue
+
+            if not field_pos:
+                continue
+            if ref.vector:
+                result[f.name] = self._vector(buf, self._uoffset(buf, field_pos), ref)
+            elif ref.name == "string":
+                result[f.name] = self._string(buf, self._uoffset(buf, field_pos))
+            elif is_union:
+                member = result.get(f"{f.name}_type")
+                decoded = self._union(buf, field_pos, ref.name, member)
+                if decoded is not None:
+                    result[f.name] = decoded
+            else:
+                target = self.schema.objects[ref.name]
+                if target.is_struct:
+                    result[f.name] = self._struct(buf, field_pos, target)
+                else:
+                    result[f.name] = self._table(
+                        buf, self._uoffset(buf, field_pos), target
+                    )
+        return result
+
+    def _union(self, buf: memoryview, pos: int, name: str, member: Any) -> Any:
+        enum = self.schema.enums[name]
+        if not isinstance(member, str) or member == "NONE":
+            return None
+        member_type = enum.members[enum.values[member]]
+        if member_type == "string":
+            return self._string(buf, self._uoffset(buf, pos))
+        target = self.schema.objects[member_type]
+        if target.is_struct:
+            return self._struct(buf, self._uoffset(buf, pos), target)
+        return self._table(buf, self._uoffset(buf, pos), target)
+
+    def _struct(self, buf: memoryview, pos: int, obj: ObjectDef) -> dict[str, Any]:
+        result: dict[str, Any] = {}
+        for f in obj.fields:
+            field_pos = pos + f.offset
+            if f.type.array_length:
+                size = self.schema._inline_size(f.type.name)[0]
+                result[f.name] = [
+                    self._inline(buf, field_pos + i * size, f.type.name)
+                    for i in range(f.type.array_length)
+                ]
+            else:
+                result[f.name] = self._inline(buf, field_pos, f.type.name)
+        return result
+
+    def _inline(self, buf: memoryview, pos: int, name: str) -> Any:
+        obj = self.schema.objects.get(name)
+        if obj is not None:
+            return self._struct(buf, pos, obj)
+        return self._enum_or_scalar(buf, pos, name)
+
+    def _string(self, buf: memoryview, pos: int) -> str:
+        length = struct.unpack_from("<I", buf, pos)[0]
+        start = pos + 4
+        if start + length > len(buf):
+            raise DecodeError(f"String at {pos} overflows the buffer")
+        return bytes(buf[start : start + length]).decode("utf-8", errors="replace")
+
+    def _vector(self, buf: memoryview, pos: int, ref: TypeRef) -> list[Any]:
+        length = struct.unpack_from("<I", buf, pos)[0]
+        start = pos + 4
+        name = ref.name
+        obj = self.schema.objects.get(name)
+        if name == "string" or (obj is not None and not obj.is_struct):
+            stride = 4
+        else:
+            stride = self.schema._inline_size(name)[0]
+        if start + length * stride > len(buf):
+            raise DecodeError(f"Vector at {pos} overflows the buffer")
+
+        positions = range(start, start + length * stride, stride)
+        if name == "string":
+            return [self._string(buf, self._uoffset(buf, p)) for p in positions]
+        if obj is not None and not obj.is_struct:
+            return [self._table(buf, self._uoffset(buf, p), obj) for p in positions]
+        return [self._inline(buf, p, name) for p in positions]
+
+
+def _float(value: float, precision: int) -> float:
+    # flatc prints floats with a fixed number of decimals
+    if value != value or value in (float("inf"), float("-inf")):
+        return value
+    return float(f"{value:.{precision}f}")
+
+
+@lru_cache(maxsize=DECODER_CACHE_SIZE)
+def _compile(fbs: Path, mtime_ns: int, size: int) -> FlatbufferDecoder:
+    """
+    File modification time and size are part of the cache key,
+    so that edited schemas get compiled again.
+    """
+    parser = _Parser()
+    parser.parse_file(fbs)
+    return FlatbufferDecoder(Schema(parser))
+
+
+def get_decoder(fbs: Path) -> FlatbufferDecoder:
+    """
+    Returns the decoder for the schema at `fbs`, compiling it on first use.
+    """
+    fbs = fbs.resolve()
+    stats = fbs.stat()
+    return _compile(fbs, stats.st_mtime_ns, stats.st_size)
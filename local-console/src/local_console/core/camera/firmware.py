@@ -16,6 +16,11 @@
 import enum
 import logging
 import shutil
+import tempfile
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Callable
 from typing import Optional
@@ -26,6 +31,8 @@ from local_console.core.camera.enums import OTAUpdateStatus
 from local_console.core.camera.schemas import PropertiesReport
 from local_console.core.error.base import UserException
 from local_console.core.error.code import ErrorCodes
+from local_console.core.files.digests import file_digest
+from local_console.utils.singleton import Singleton
 from pydantic import BaseModel
 from pydantic import field_validator
 from pydantic import ValidationInfo
@@ -101,25 +108,106 @@ def remove_header(tmp: Path, firmware: Path) -> Path:
             return without_header_file
 
 
+def read_header(firmware: Path) -> FirmwareHeader | None:
+    with firmware.open("rb") as file:
+        try:
+            return FirmwareHeader.parse(file.read(32).decode("utf-8"))
+        except UnicodeDecodeError:
+            return None
+
+
 def process_firmware_file(
     tmp: Path, firmware_info: FirmwareInfo
 ) -> tuple[Path, FirmwareHeader | None]:
     if not firmware_info.path.is_file() or not firmware_info.path.exists():
         return Path(), None
-    with firmware_info.path.open("rb") as file:
-        try:
-            first_32_header_chars = file.read(32).decode("utf-8")
-            header = FirmwareHeader.parse(first_32_header_chars)
-            if header:
-                tmp_firmware = remove_header(tmp, firmware_info.path)
-                return (tmp_firmware, header)
-        except UnicodeDecodeError:
-            pass
+    header = read_header(firmware_info.path)
+    if header:
+        return remove_header(tmp, firmware_info.path), header
     tmp_firmware = tmp / firmware_info.path.name
     shutil.copy(firmware_info.path, tmp_firmware)
     return tmp_firmware, None
 
 
+@dataclass
+class PreparedFirmware:
+    """
+    Firmware file as served to devices: the original file, or a copy
+    of it without its header when it has one.
+    """
+
+    path: Path
+    header: FirmwareHeader | None
+    key: str | None = None
+
+
+class PreparedFirmwares(metaclass=Singleton):
+    """
+    Firmware files prepared for OTA, shared by all devices being updated
+    with the same content. Files are keyed by their digest, so a header
+    is parsed and stripped once per firmware, and the copy is removed
+    once the last update using it releases it.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._dir: Path | None = None
+        self._prepared: dict[str, tuple[PreparedFirmware, int]] = {}
+
+    def acquire(self, firmware_info: FirmwareInfo) -> PreparedFirmware:
+        path = firmware_info.path
+        if not path.is_file():
+            return PreparedFirmware(Path(), None)
+
+        key = file_digest(path).hex
+        with self._lock:
+            if key in self._prepared:
+                prepared, refs = self._prepared[key]
+                self._prepared[key] = (prepared, refs + 1)
+                return prepared
+
+            header = read_header(path)
+            if header:
+                folder = self._folder() / key[:16]
+                folder.mkdir(exist_ok=True)
+                path = remove_header(folder, path)
+            prepared = PreparedFirmware(path, header, key)
+            self._prepared[key] = (prepared, 1)
+            return prepared
+
+    def release(self, prepared: PreparedFirmware) -> None:
+        if prepared.key is None:
+            return
+        with self._lock:
+            current, refs = self._prepared[prepared.key]
+            if refs > 1:
+                self._prepared[prepared.key] = (current, refs - 1)
+                return
+            del self._prepared[prepared.key]
+            if current.header:
+                shutil.rmtree(current.path.parent, ignore_errors=True)
+
+    def references(self, prepared: PreparedFirmware) -> int:
+        with self._lock:
+            current = self._prepared.get(prepared.key or "")
+            return current[1] if current else 0
+
+    def _folder(self) -> Path:
+        if self._dir is None or not self._dir.is_dir():
+            self._dir = Path(tempfile.mkdtemp(prefix="local-console-firmware-"))
+        return self._dir
+
+
+@contextmanager
+def prepared_firmware(firmware_info: FirmwareInfo) -> Iterator[PreparedFirmware]:
+    store = PreparedFirmwares()
+    prepared = store.acquire(firmware_info)
+    try:
+        yield prepared
+    finally:
+        store.release(prepared)
+
+
 def validate_firmware_file(
     file_path: Path,
     file_type: OTAUpdateModule,
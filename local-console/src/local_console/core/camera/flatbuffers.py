@@ -25,6 +25,9 @@ from tempfile import TemporaryDirectory
 from typing import Any
 from typing import Optional
 
+from local_console.core.camera.fbs_decoder import DecodeError
+from local_console.core.camera.fbs_decoder import get_decoder
+
 logger = logging.getLogger(__file__)
 
 
@@ -101,10 +104,32 @@ def flatbuffer_binary_to_json(
     """
     Converts a flatbuffers object to a python object via its JSON representation.
 
+    The schema is compiled once into an in-process decoder. If that is not
+    possible (e.g. it uses unsupported features), `flatc` is used instead.
+
     :param fbs: FlatBuffer schema file.
     :inference_data: base64-decoded, flatbuffer-serialized payload to deserialize
     :return: True if success.
     """
+    try:
+        decoder = get_decoder(fbs)
+    except Exception as e:
+        logger.debug(f"Falling back to flatc for schema {fbs}: {e}")
+        return flatc_binary_to_json(fbs, inference_data)
+
+    try:
+        return decoder.decode(inference_data)
+    except DecodeError as e:
+        raise FlatbufferError(f"Unexpected error decoding flatbuffers: {e}")
+
+
+def flatc_binary_to_json(
+    fbs: Path,
+    inference_data: bytes,
+) -> dict[str, Any]:
+    """
+    Same as `flatbuffer_binary_to_json`, by spawning `flatc`.
+    """
     flatc_path = get_flatc()
     try:
         with TemporaryDirectory() as tempdir:
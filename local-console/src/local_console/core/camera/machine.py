@@ -20,6 +20,7 @@ from typing import Callable
 from typing import Optional
 
 import trio
+from local_console.clients.trio_paho_mqtt import MessageStats
 from local_console.core.camera.enums import ConnectionState
 from local_console.core.camera.firmware import FirmwareInfo
 from local_console.core.camera.schemas import PropertiesReport
@@ -55,6 +56,8 @@ from local_console.core.schemas.schemas import DeviceID
 from local_console.core.schemas.schemas import DeviceType
 from local_console.core.schemas.schemas import Persist
 from local_console.core.schemas.utils import setup_device_dir_path
+from local_console.core.storage_budget import StorageBudget
+from local_console.servers.broker import SharedBroker
 from local_console.servers.webserver import AsyncWebserver
 from local_console.servers.webserver import FileInbox
 from local_console.utils.fstools import StorageSizeWatcher
@@ -86,10 +89,11 @@ class Camera:
         file_inbox: FileInbox,
         trio_token: TrioToken,
         on_report_received: Callable[[DeviceID, PropertiesReport], None],
+        broker: Optional[SharedBroker] = None,
     ) -> None:
         self._common_properties = BaseStateProperties(
             id=config.id,
-            mqtt_drv=MQTTDriver(config),
+            mqtt_drv=MQTTDriver(config, broker),
             webserver=webserver,
             file_inbox=file_inbox,
             transition_fn=self._transition_to_state,
@@ -250,6 +254,7 @@ class Camera:
             # This may raise exceptions
             await nursery.start(self._common_properties.mqtt_drv.setup)
             self._common_properties.dirs_watcher.start()
+            StorageBudget().register(self.id, self._common_properties.dirs_watcher)
 
             # Kickstart the state transitions
             initial_state = DisconnectedCamera(self._common_properties)
@@ -263,14 +268,18 @@ class Camera:
 
     def shutdown(self) -> None:
         self._should_exit.set()
-        if self._started.is_set():
-            assert self._cancel_scope
-            self._common_properties.dirs_watcher.stop()
+        StorageBudget().unregister(self.id)
+        # The watcher may be running even if setup did not complete
+        self._common_properties.dirs_watcher.stop()
+        if self._cancel_scope:
             self._cancel_scope.cancel()
 
     def current_storage_usage(self) -> int:
         return self._common_properties.dirs_watcher.size()
 
+    def mqtt_stats(self) -> MessageStats | None:
+        return self._common_properties.mqtt_drv.stats()
+
     def update_storage_config(self, new_config: Persist) -> None:
         self._common_properties.dirs_watcher.apply(new_config, self.id)
 
@@ -147,12 +147,11 @@ class QRService:
         )
 
     def _update_device_with_qr(self, qr: QRInfo) -> None:
-        for device in Config().data.devices:
-            if device.mqtt.port == qr.mqtt_port:
-                device.qr = qr
-                device.mqtt.host = qr.mqtt_host
-                Config().save_config()
-                break
+        device = Config().find_device_config_by_port(qr.mqtt_port)
+        if device is not None:
+            device.qr = qr
+            device.mqtt.host = qr.mqtt_host
+            Config().mark_dirty()
 
     def _save_best_qr_on_disk(self, port: int, device_state: PropertiesReport) -> None:
         for qr in reversed(self.in_memory):
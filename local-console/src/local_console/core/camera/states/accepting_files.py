@@ -25,8 +25,11 @@ from local_console.core.config import Config
 from local_console.core.notifications import Notification
 from local_console.core.schemas.schemas import DeviceID
 from local_console.core.schemas.utils import setup_device_dir_path
-from local_console.utils.fstools import check_and_create_directory
+from local_console.core.storage_budget import StorageBudget
+from local_console.servers.webserver import IncomingFile
 from local_console.utils.fstools import StorageSizeWatcher
+from local_console.utils.fswriter import storage_writer
+from local_console.utils.fswriter import StorageWriter
 from trio import MemorySendChannel
 from trio.lowlevel import TrioToken
 
@@ -86,24 +89,71 @@ class AcceptingFilesMixin(Protocol):
             inference_dir.mkdir(parents=True, exist_ok=True)
 
     async def _save_into_input_directory(
-        self, file_name: str, content: bytes, target_dir: Path
+        self, file_name: str, content: bytes | IncomingFile, target_dir: Path
     ) -> Path | None:
         auto_delete = Config().get_persistent_attr(self._id, "auto_deletion")
 
-        if not auto_delete and not self._dirs_watcher.can_accept():
-            await self.on_full(file_name, len(content))
+        can_accept = self._dirs_watcher.can_accept() and StorageBudget().can_accept()
+        if not auto_delete and not can_accept:
+            size = content.size if isinstance(content, IncomingFile) else len(content)
+            await self.on_full(file_name, size)
             logger.warning(
                 f"Cannot accept file {file_name} as it exceeds storage usage limit"
             )
             return None
 
         final = target_dir / file_name
-        check_and_create_directory(final.parent)
-        final.write_bytes(content)
-        self._dirs_watcher.incoming(final, auto_delete)
+        writer = storage_writer()
+        await writer.run(self._store_file, writer, final, content, auto_delete)
+        if target_dir == self.inference_dir:
+            await self._decode_on_ingest(final)
+            await self._rollup_on_ingest(final)
 
         return final
 
+    async def _decode_on_ingest(self, path: Path) -> None:
+        if not Config().data.config.inference.decode_on_ingest:
+            return
+        from local_console.core.files.decoded import DecodedInferences
+
+        decoded = DecodedInferences.for_device(self._id)
+        if decoded is None:
+            return
+        try:
+            await storage_writer().run(decoded.decode, path)
+        except Exception as e:
+            # Inferences will be decoded on demand instead
+            logger.warning(f"Could not decode incoming inference {path}", exc_info=e)
+
+    async def _rollup_on_ingest(self, path: Path) -> None:
+        from local_console.core.files.rollup import InferenceRollups
+
+        rollups = InferenceRollups()
+        if self._id not in rollups:
+            return
+        try:
+            # Decoding stays off the storage writer, whose threads are
+            # shared by all cameras for storing their files
+            await trio.to_thread.run_sync(rollups.ingest, self._id, path)
+        except Exception as e:
+            logger.warning(f"Could not add {path} to inference analytics", exc_info=e)
+
+    def _store_file(
+        self,
+        writer: StorageWriter,
+        path: Path,
+        content: bytes | IncomingFile,
+        prune_enabled: bool,
+    ) -> None:
+        # Runs in a storage writer thread. Bookkeeping of the size
+        # watcher is done here as well, as it may stat and prune files.
+        if isinstance(content, IncomingFile):
+            writer.store(path, content.move_to)
+        else:
+            writer.write(path, content)
+        self._dirs_watcher.incoming(path, prune_enabled)
+        StorageBudget().enforce()
+
     async def on_full(self, file_name: str, size: int) -> None:
         base_dir = self.base_dir
         assert base_dir
@@ -13,8 +13,9 @@
 # limitations under the License.
 #
 # SPDX-License-Identifier: Apache-2.0
-import json
 import logging
+from base64 import b64decode
+from collections.abc import AsyncIterable
 from collections.abc import Awaitable
 from collections.abc import Coroutine
 from dataclasses import dataclass
@@ -27,17 +28,27 @@ from typing import Self
 
 import trio
 from local_console.clients.agent import Agent
+from local_console.clients.trio_paho_mqtt import MessageStats
 from local_console.core.camera.enums import MQTTTopics
 from local_console.core.camera.schemas import PropertiesReport
+from local_console.core.camera.v2.edge_system_common import EdgeSystemCommon
+from local_console.core.commands.rpc_with_response import RPCChannel
+from local_console.core.schemas.edge_cloud_if_v1 import DeviceConfiguration
 from local_console.core.schemas.schemas import DeviceConnection
 from local_console.core.schemas.schemas import DeviceID
 from local_console.core.schemas.schemas import DeviceType
+from local_console.servers.broker import BROKER_LISTEN_TIMEOUT
+from local_console.servers.broker import BrokerException
+from local_console.servers.broker import MountedAgent
+from local_console.servers.broker import SharedBroker
 from local_console.servers.broker import spawn_broker
 from local_console.servers.webserver import AsyncWebserver
 from local_console.servers.webserver import FileInbox
+from local_console.utils import fastjson
 from local_console.utils.fstools import StorageSizeWatcher
 from local_console.utils.timing import now
 from pydantic import BaseModel
+from pydantic import PrivateAttr
 from trio import MemorySendChannel
 from trio import TASK_STATUS_IGNORED
 from trio.lowlevel import TrioToken
@@ -45,10 +56,49 @@ from trio.lowlevel import TrioToken
 logger = logging.getLogger(__name__)
 
 
+# MQTT constants
+V1_EA_STATE_TOPIC = "state/backdoor-EA_Main/placeholder"
+
+
 class MQTTEvent(BaseModel):
+    """
+    Message received from a device. The payload is decoded once by the
+    driver, and the typed reports it carries are parsed on first access,
+    so that all the handlers of the message share a single parse.
+    """
+
     topic: str
     payload: dict[str, Any]
 
+    _edge_system: EdgeSystemCommon | None = PrivateAttr(default=None)
+    _device_configuration: DeviceConfiguration | None = PrivateAttr(default=None)
+
+    @property
+    def edge_system(self) -> EdgeSystemCommon:
+        """
+        The v2 system report carried by the message.
+        """
+        if self._edge_system is None:
+            # Validation pops the edge app entries off the given dict
+            self._edge_system = EdgeSystemCommon.model_validate(dict(self.payload))
+        return self._edge_system
+
+    @property
+    def device_configuration(self) -> DeviceConfiguration | None:
+        """
+        The v1 state report carried by the message, if any. Raises
+        the decoding or validation error if the report is malformed.
+        """
+        if self._device_configuration is None and V1_EA_STATE_TOPIC in self.payload:
+            raw = self.payload[V1_EA_STATE_TOPIC]
+            try:
+                decoded = fastjson.loads(b64decode(raw))
+            except ValueError:
+                # Not base64-encoded
+                decoded = fastjson.loads(raw)
+            self._device_configuration = DeviceConfiguration.model_validate(decoded)
+        return self._device_configuration
+
 
 class State(Protocol):
     """
@@ -86,41 +136,103 @@ class MQTTDriver:
     possible states. It delegates message processing to a dynamically
     assigned function, which shall be provided by the implementation
     of the current camera state.
+
+    When a shared broker is given, the device is served by it instead
+    of by a broker of its own, and its messages are received from it.
+
+    RPC responses are taken by the RPC channel of the driver as soon
+    as they are received, so that they do not wait for the processing
+    of other messages, which may itself be waiting for an RPC.
     """
 
-    def __init__(self, config: DeviceConnection) -> None:
+    TOPICS = [
+        MQTTTopics.ATTRIBUTES.value,
+        MQTTTopics.ATTRIBUTES_REQ.value,
+        MQTTTopics.TELEMETRY.value,
+        MQTTTopics.RPC_RESPONSES.value,
+    ]
+
+    # Number of received messages that may wait for being processed
+    PENDING_MESSAGES = 100
+
+    def __init__(
+        self, config: DeviceConnection, broker: Optional[SharedBroker] = None
+    ) -> None:
         self._mqtt_port: int = config.mqtt.port
-        self.client = Agent(self._mqtt_port)
+        self._broker = broker
+        self.client = (
+            MountedAgent(self._mqtt_port, broker) if broker else Agent(self._mqtt_port)
+        )
+        self.rpc = RPCChannel(self.client)
         self._last_reception: Optional[datetime] = None
         self._message_handler: Optional[MQTTMessageFunc] = None
 
     async def setup(self, *, task_status: Any = TASK_STATUS_IGNORED) -> None:
+        if self._broker:
+            await self._setup_shared(self._broker, task_status)
+            return
+
         async with (
             trio.open_nursery() as nursery,
             spawn_broker(self._mqtt_port, nursery, False),
-            self.client.mqtt_scope(
-                [
-                    MQTTTopics.ATTRIBUTES.value,
-                    MQTTTopics.ATTRIBUTES_REQ.value,
-                    MQTTTopics.TELEMETRY.value,
-                ]
-            ),
+            self.client.mqtt_scope(self.TOPICS),
         ):
             assert self.client.client
             task_status.started(True)
             logger.debug(f"Broker started up and listening on port {self._mqtt_port}")
             async with self.client.client.messages() as mgen:
-                async for msg in mgen:
-                    self._last_reception = now()
-
-                    if self._message_handler:
-                        await self._message_handler(
-                            MQTTEvent(topic=msg.topic, payload=json.loads(msg.payload))
-                        )
+                await self._dispatch((msg.topic, msg.payload) async for msg in mgen)
+
+    async def _setup_shared(self, broker: SharedBroker, task_status: Any) -> None:
+        with broker.serve(self._mqtt_port) as messages:
+            try:
+                with trio.fail_after(BROKER_LISTEN_TIMEOUT):
+                    await broker.listening(self._mqtt_port)
+            except trio.TooSlowError:
+                raise BrokerException(
+                    f"Shared broker did not come up on port {self._mqtt_port}"
+                )
+            task_status.started(True)
+            logger.debug(f"Broker listening on port {self._mqtt_port}")
+            await self._dispatch(messages)
+
+    async def _dispatch(self, messages: AsyncIterable[tuple[str, bytes]]) -> None:
+        pending, received = trio.open_memory_channel[tuple[str, bytes]](
+            self.PENDING_MESSAGES
+        )
+        self.rpc.open()
+        try:
+            async with trio.open_nursery() as nursery:
+                nursery.start_soon(self._process, received)
+                async with pending:
+                    async for topic, payload in messages:
+                        self._last_reception = now()
+                        if not self.rpc.feed(topic, payload):
+                            await pending.send((topic, payload))
+        finally:
+            self.rpc.close()
+
+    async def _process(
+        self, received: trio.MemoryReceiveChannel[tuple[str, bytes]]
+    ) -> None:
+        async with received:
+            async for topic, payload in received:
+                if self._message_handler:
+                    await self._message_handler(
+                        MQTTEvent(topic=topic, payload=fastjson.loads(payload))
+                    )
 
     def set_handler(self, handler: MQTTMessageFunc) -> None:
         self._message_handler = handler
 
+    def stats(self) -> MessageStats | None:
+        """
+        Counters of the messages received from the device, if connected.
+        """
+        if self._broker:
+            return self._broker.stats_for(self._mqtt_port)
+        return self.client.client.stats() if self.client.client else None
+
 
 @dataclass
 class BaseStateProperties:
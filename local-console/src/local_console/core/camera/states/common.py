@@ -13,9 +13,7 @@
 # limitations under the License.
 #
 # SPDX-License-Identifier: Apache-2.0
-import json
 import logging
-from base64 import b64decode
 from typing import Any
 
 import trio
@@ -40,7 +38,6 @@ logger = logging.getLogger(__name__)
 
 
 # MQTT constants
-V1_EA_STATE_TOPIC = "state/backdoor-EA_Main/placeholder"
 SYSINFO_TOPIC = "systemInfo"
 
 
@@ -169,8 +166,8 @@ class IdentifyingCamera(ConnectedCameraState):
         #       When the right mechanism is available to stop/crash
         #       gracefully this check should be added.
         if message.topic == MQTTTopics.ATTRIBUTES.value:
-            self._v1_detect_from_attrs(message.payload)
-            await self._v2_detect_from_attrs(message.payload)
+            self._v1_detect_from_attrs(message)
+            await self._v2_detect_from_attrs(message)
 
         elif message.topic == MQTTTopics.TELEMETRY.value:
             self._v1_detect_from_telemetry(message.payload)
@@ -200,13 +197,14 @@ class IdentifyingCamera(ConnectedCameraState):
                     )
                 )
 
-    def _v1_detect_from_attrs(self, payload: dict[str, Any]) -> None:
+    def _v1_detect_from_attrs(self, message: MQTTEvent) -> None:
         try:
-            decoded = json.loads(b64decode(payload[V1_EA_STATE_TOPIC]))
-            self._v1_report = DeviceConfiguration.model_validate(decoded)
-        except (UnicodeDecodeError, ValidationError, KeyError):
+            if report := message.device_configuration:
+                self._v1_report = report
+        except ValueError:
             pass
 
+        payload = message.payload
         try:
             if SYSINFO_TOPIC not in payload:
                 return
@@ -218,9 +216,9 @@ class IdentifyingCamera(ConnectedCameraState):
         except ValidationError:
             pass
 
-    async def _v2_detect_from_attrs(self, payload: dict[str, Any]) -> None:
+    async def _v2_detect_from_attrs(self, message: MQTTEvent) -> None:
         try:
-            v2_update = EdgeSystemCommon(**payload)
+            v2_update = message.edge_system
             non_null = v2_update.model_dump(exclude_none=True)
             for key, value in non_null.items():
                 setattr(self._v2_report, key, value)
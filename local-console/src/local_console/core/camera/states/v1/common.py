@@ -15,7 +15,6 @@
 # SPDX-License-Identifier: Apache-2.0
 import json
 import logging
-from base64 import b64decode
 from base64 import b64encode
 from typing import Any
 from typing import TypeVar
@@ -58,16 +57,11 @@ class ConnectedCameraStateV1(ConnectedCameraState):
         await super().on_message_received(message)
 
         if message.topic == MQTTTopics.ATTRIBUTES.value:
-            if EA_STATE_TOPIC in message.payload:
-                await self._process_state_topic(message.payload)
+            device_report = message.device_configuration
+            if device_report:
+                await self._process_state_topic(device_report)
 
-    async def _process_state_topic(self, payload: dict[str, Any]) -> None:
-        try:
-            decoded = json.loads(b64decode(payload[EA_STATE_TOPIC]))
-        except UnicodeDecodeError:
-            decoded = json.loads(payload[EA_STATE_TOPIC])
-
-        device_report = DeviceConfiguration.model_validate(decoded)
+    async def _process_state_topic(self, device_report: DeviceConfiguration) -> None:
         self._refresh_from_report(device_report)
         await self._process_factory_reset(device_report)
 
@@ -101,7 +95,7 @@ class ConnectedCameraStateV1(ConnectedCameraState):
         # how to implement an RPC call which would trigger a state transition,
         # being able to fetch the RPC response from the new state's enter()
         self._rpc_response = await run_rpc_with_response(
-            self._mqtt._mqtt_port, module_id, method, params
+            self._mqtt._mqtt_port, module_id, method, params, channel=self._mqtt.rpc
         )
         return self._rpc_response
 
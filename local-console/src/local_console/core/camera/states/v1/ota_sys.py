@@ -29,8 +29,6 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 import logging
-from pathlib import Path
-from tempfile import TemporaryDirectory
 from typing import Any
 from typing import Callable
 
@@ -39,7 +37,7 @@ from local_console.clients.agent import Agent
 from local_console.core.camera.enums import MQTTTopics
 from local_console.core.camera.firmware import FirmwareInfo
 from local_console.core.camera.firmware import FirmwareValidationStatus
-from local_console.core.camera.firmware import process_firmware_file
+from local_console.core.camera.firmware import prepared_firmware
 from local_console.core.camera.firmware import progress_update_checkpoint
 from local_console.core.camera.firmware import validate_firmware_file
 from local_console.core.camera.states.base import BaseStateProperties
@@ -90,12 +88,9 @@ class UpdatingSysFirmwareCameraV1(ConnectedCameraStateV1):
     async def _update_firmware_task(
         self, *, task_status: Any = trio.TASK_STATUS_IGNORED
     ) -> None:
-        with TemporaryDirectory() as temporary_dir:
-            tmp_dir = Path(temporary_dir)
-
-            tmp_firmware, firmware_header = process_firmware_file(
-                tmp_dir, self.firmware_info
-            )
+        # Devices updated with the same firmware share the prepared file
+        with prepared_firmware(self.firmware_info) as prepared:
+            tmp_firmware, firmware_header = prepared.path, prepared.header
             if firmware_header:
                 self.firmware_info.version = firmware_header.firmware_version
 
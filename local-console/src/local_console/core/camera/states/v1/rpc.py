@@ -26,6 +26,7 @@ from local_console.core.commands.rpc_with_response import (
 from local_console.core.commands.rpc_with_response import (
     DirectCommandStatus as V2DirectCommandStatus,
 )
+from local_console.core.commands.rpc_with_response import RPCChannel
 from local_console.utils.random import random_id
 from pydantic import BaseModel
 from pydantic import Field
@@ -60,8 +61,11 @@ class RPCArgument:
 
 
 class RPCWithResponse:
-    def __init__(self, port: int, timeout: float) -> None:
-        self._mqtt_client = Agent(port)
+    def __init__(
+        self, port: int, timeout: float, channel: RPCChannel | None = None
+    ) -> None:
+        self._mqtt_client = Agent(port) if channel is None else None
+        self._channel = channel
         self._timeout = timeout
 
     async def run(self, rpc_argument: RPCArgument) -> DirectCommandResponse:
@@ -72,6 +76,15 @@ class RPCWithResponse:
             reqid="",
         )
 
+        if self._channel:
+            reqid, topic, payload = self._request_for(rpc_argument)
+            response = await self._channel.request(reqid, topic, payload, self._timeout)
+            if response is not None:
+                res = self._parse_response(res, response)
+                res.reqid = reqid
+            return res
+
+        assert self._mqtt_client
         with trio.move_on_after(self._timeout) as cs:
             # Open scope before sending RPC to ensure response is caught
             async with (
@@ -88,19 +101,30 @@ class RPCWithResponse:
                     logger.debug(f"Sent RPC, waiting for response: {reqid}")
                     async for msg in mgen:
                         if msg.topic.endswith(f"/{reqid}"):
-                            try:
-                                res = DirectCommandResponse.model_validate_json(
-                                    msg.payload
-                                )
-                            except ValidationError:
-                                res.response = msg.payload.decode()
-
+                            res = self._parse_response(res, msg.payload)
                             res.reqid = reqid
                             cs.cancel()
 
         return res
 
+    @staticmethod
+    def _parse_response(
+        res: DirectCommandResponse, payload: bytes
+    ) -> DirectCommandResponse:
+        try:
+            return DirectCommandResponse.model_validate_json(payload)
+        except ValidationError:
+            res.response = payload.decode()
+            return res
+
     async def _send_rpc(self, rpc_argument: RPCArgument) -> str:
+        assert self._mqtt_client
+        reqid, topic, payload = self._request_for(rpc_argument)
+        logger.debug(f"RPC: topic={topic}, payload={payload}")
+        await self._mqtt_client.publish(topic, payload)
+        return reqid
+
+    def _request_for(self, rpc_argument: RPCArgument) -> tuple[str, str, str]:
         reqid = random_id()
 
         payload_model = DirectCommandRequest(
@@ -113,9 +137,7 @@ class RPCWithResponse:
         payload = payload_model.model_dump_json(by_alias=True)
 
         topic = f"v1/devices/me/rpc/request/{reqid}"
-        logger.debug(f"RPC: topic={topic}, payload={payload}")
-        await self._mqtt_client.publish(topic, payload)
-        return reqid
+        return reqid, topic, payload
 
 
 async def run_rpc_with_response(
@@ -124,8 +146,9 @@ async def run_rpc_with_response(
     method: str,
     params: dict[str, Any],
     timeout: float = 60,
+    channel: RPCChannel | None = None,
 ) -> DirectCommandResponse:
-    rpc = RPCWithResponse(port=mqtt_port, timeout=timeout)
+    rpc = RPCWithResponse(port=mqtt_port, timeout=timeout, channel=channel)
     return await rpc.run(
         RPCArgument(
             module_id=module_id,
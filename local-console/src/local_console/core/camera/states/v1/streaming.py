@@ -46,6 +46,7 @@ from local_console.core.config import Config
 from local_console.core.error.base import UserException
 from local_console.core.error.code import ErrorCodes
 from local_console.core.schemas.edge_cloud_if_v1 import StartUploadInferenceData
+from local_console.servers.webserver import IncomingFile
 
 logger = logging.getLogger(__name__)
 config_obj = Config()
@@ -77,7 +78,7 @@ class StreamingCameraV1(ConnectedCameraStateV1, AcceptingFilesMixin):
 
         # Configure global webserver for pushing files to this camera
         upload_url = self._file_inbox.set_file_incoming_callable(
-            self._id, self._process_camera_upload
+            self._id, self._process_camera_upload, spool_dir=self.base_dir
         )
 
         image_dir = "images"
@@ -144,17 +145,19 @@ class StreamingCameraV1(ConnectedCameraStateV1, AcceptingFilesMixin):
     def preview_mode(self) -> PreviewBuffer:
         return self._preview
 
-    async def _process_camera_upload(self, data: bytes, url_path: str) -> None:
+    async def _process_camera_upload(
+        self, incoming: IncomingFile, url_path: str
+    ) -> None:
         incoming_file = PurePosixPath(url_path)
         name = incoming_file.name
         extension = incoming_file.suffix.lstrip(".")
 
         if incoming_file.parent.name == PREVIEW_TARGET:
             if extension == self._extension_images:
-                self._preview.update(data)
+                self._preview.update(incoming.read_bytes())
             else:
                 logger.warning(
-                    f"Got non-image payload of size {len(data)} while in preview mode, at {url_path}"
+                    f"Got non-image payload of size {incoming.size} while in preview mode, at {url_path}"
                 )
 
             # In preview mode, do not perform any operations on the file system
@@ -163,11 +166,11 @@ class StreamingCameraV1(ConnectedCameraStateV1, AcceptingFilesMixin):
         if extension == self._extension_infers:
             target_dir = self.inference_dir
             assert target_dir
-            await self._save_into_input_directory(name, data, target_dir)
+            await self._save_into_input_directory(name, incoming, target_dir)
         elif extension == self._extension_images:
             target_dir = self.image_dir
             assert target_dir
-            await self._save_into_input_directory(name, data, target_dir)
+            await self._save_into_input_directory(name, incoming, target_dir)
         else:
             logger.warning(f"Unknown incoming file: {incoming_file}")
 
@@ -67,7 +67,7 @@ class ConnectedCameraStateV2(ConnectedCameraState):
         await super().on_message_received(message)
 
         if message.topic == MQTTTopics.ATTRIBUTES.value:
-            update = EdgeSystemCommon.model_validate(message.payload)
+            update = message.edge_system
             self._refresh_from_report(update)
 
     def _refresh_from_report(self, report: EdgeSystemCommon) -> None:
@@ -87,7 +87,7 @@ class ConnectedCameraStateV2(ConnectedCameraState):
         # how to implement an RPC call which would trigger a state transition,
         # being able to fetch the RPC response from the new state's enter()
         self._rpc_response = await run_rpc_with_response(
-            self._mqtt._mqtt_port, module_id, method, params
+            self._mqtt._mqtt_port, module_id, method, params, channel=self._mqtt.rpc
         )
         return self._rpc_response
 
@@ -128,7 +128,7 @@ class ConnectedCameraStateV2(ConnectedCameraState):
         ):
             config.mqtt.host = report.private_endpoint_setting.endpoint_url
             config.mqtt.port = report.private_endpoint_setting.endpoint_port
-            Config().save_config()
+            Config().mark_dirty()
 
 
 def populate_properties(v2_report: EdgeSystemCommon) -> PropertiesReport:
@@ -13,8 +13,10 @@
 # limitations under the License.
 #
 # SPDX-License-Identifier: Apache-2.0
+import binascii
 import logging
-from base64 import b64decode
+from collections import deque
+from itertools import count
 from typing import Any
 
 import trio
@@ -29,14 +31,77 @@ from local_console.core.camera.v2.components.direct_get_image import (
     DirectGetImageResponse,
 )
 from local_console.core.commands.rpc_with_response import DirectCommandResponse
+from local_console.core.commands.rpc_with_response import DirectCommandResponseBody
+from local_console.core.commands.rpc_with_response import DirectCommandStatus
 from local_console.utils.timing import as_timestamp
 from local_console.utils.timing import now
+from pydantic import BaseModel
+from pydantic import ValidationError
 
 logger = logging.getLogger(__name__)
 
 MODULE = "$system"
 COMMAND = "direct_get_image"
 
+# Requests kept in flight by continuous capture, unless set by the caller
+CAPTURE_IN_FLIGHT = 3
+# Number of most recent frames the capture statistics are computed over
+CAPTURE_STATS_WINDOW = 30
+# Wait after a failed frame request, so that an unresponsive camera is not flooded
+CAPTURE_RETRY_DELAY = 1.0
+
+
+class CaptureStats(BaseModel):
+    frames: int = 0
+    errors: int = 0
+    in_flight: int = 0
+    fps: float = 0.0
+    rpc_ms: float = 0.0
+    decode_ms: float = 0.0
+    store_ms: float = 0.0
+
+
+class CaptureMeter:
+    """
+    Measures the throughput of continuous capture, and the latency of
+    each stage of a frame (RPC round trip, decoding and storing), over
+    the most recent frames.
+    """
+
+    def __init__(self, window: int = CAPTURE_STATS_WINDOW) -> None:
+        self.frames = 0
+        self.errors = 0
+        self._completions: deque[float] = deque(maxlen=window)
+        self._rpc: deque[float] = deque(maxlen=window)
+        self._decode: deque[float] = deque(maxlen=window)
+        self._store: deque[float] = deque(maxlen=window)
+
+    def record(self, rpc: float, decode: float, store: float) -> None:
+        self.frames += 1
+        self._completions.append(trio.current_time())
+        self._rpc.append(rpc)
+        self._decode.append(decode)
+        self._store.append(store)
+
+    def failed(self) -> None:
+        self.errors += 1
+
+    def stats(self, in_flight: int) -> CaptureStats:
+        fps = 0.0
+        if len(self._completions) > 1:
+            span = self._completions[-1] - self._completions[0]
+            if span > 0:
+                fps = (len(self._completions) - 1) / span
+        return CaptureStats(
+            frames=self.frames,
+            errors=self.errors,
+            in_flight=in_flight,
+            fps=fps,
+            rpc_ms=_mean_ms(self._rpc),
+            decode_ms=_mean_ms(self._decode),
+            store_ms=_mean_ms(self._store),
+        )
+
 
 class ImageCapturingCameraV2(ConnectedCameraStateV2, AcceptingFilesMixin):
 
@@ -52,11 +117,25 @@ class ImageCapturingCameraV2(ConnectedCameraStateV2, AcceptingFilesMixin):
         self._extra = extra
         self._preview = PreviewBuffer()
 
+        self._meter = CaptureMeter()
+        self._capture_scope = trio.CancelScope()
+        self._sequence = count()
+        self._shown = -1
+        self._in_flight = 0
+
     @property
     def in_preview_mode(self) -> bool:
         preview = bool(self._extra.get("preview", False))
         return preview
 
+    @property
+    def in_continuous_mode(self) -> bool:
+        return bool(self._extra.get("continuous", False))
+
+    @property
+    def capture_stats(self) -> CaptureStats:
+        return self._meter.stats(self._in_flight)
+
     @property
     def preview_mode(self) -> PreviewBuffer:
         return self._preview
@@ -68,11 +147,16 @@ class ImageCapturingCameraV2(ConnectedCameraStateV2, AcceptingFilesMixin):
         if self.in_preview_mode:
             self._preview.enable()
 
-        result = await self._get_frame(self._params)
-        self._rpc_response = result
+        if self.in_continuous_mode:
+            nursery.start_soon(self._capture)
+            self._rpc_response = self._stats_response()
+        else:
+            result = await self._get_frame(self._params)
+            self._rpc_response = result
 
     async def exit(self) -> None:
         await super().exit()
+        self._capture_scope.cancel()
         self._preview.disable()
 
     async def run_command(
@@ -85,6 +169,9 @@ class ImageCapturingCameraV2(ConnectedCameraStateV2, AcceptingFilesMixin):
         if module_id == MODULE and method == COMMAND:
             should_stop = extra.get("stop", False)
             if not should_stop:
+                if self.in_continuous_mode:
+                    # Frames are already flowing, so report how fast
+                    return self._stats_response()
                 return await self._get_frame(params)
             else:
                 await self._back_to_ready()
@@ -96,23 +183,91 @@ class ImageCapturingCameraV2(ConnectedCameraStateV2, AcceptingFilesMixin):
         params = DirectGetImageParameters.model_validate(raw_params)
         result = await super().run_command(MODULE, COMMAND, params.model_dump(), {})
 
-        image_response = DirectGetImageResponse.model_validate_json(
-            result.direct_command_response.response
-        )
-        data = b64decode(image_response.image.encode())
-
+        data = _decode_image(result)
         if self.in_preview_mode:
             self._preview.update(data)
         else:
-            image_dir = self.image_dir
-            assert image_dir
-
-            target_filename = as_timestamp(now()) + ".jpg"
-            await self._save_into_input_directory(target_filename, data, image_dir)
+            await self._store(data, next(self._sequence))
 
         return result
 
+    async def _capture(self) -> None:
+        """
+        Continuous capture: keeps several `direct_get_image` requests in
+        flight over the RPC channel of the device, so that the frame rate
+        is limited by the camera rather than by request round trips.
+        """
+        params = DirectGetImageParameters.model_validate(self._params).model_dump()
+        in_flight = max(1, int(self._extra.get("in_flight", CAPTURE_IN_FLIGHT)))
+        logger.info(f"Capturing continuously with {in_flight} requests in flight")
+
+        with self._capture_scope:
+            async with trio.open_nursery() as nursery:
+                for _ in range(in_flight):
+                    nursery.start_soon(self._capture_frames, params)
+
+    async def _capture_frames(self, params: dict[str, Any]) -> None:
+        while True:
+            sequence = next(self._sequence)
+            started = trio.current_time()
+            self._in_flight += 1
+            try:
+                result = await super().run_command(MODULE, COMMAND, params, {})
+            finally:
+                self._in_flight -= 1
+            received = trio.current_time()
+
+            try:
+                data = _decode_image(result)
+            except (ValidationError, ValueError) as e:
+                logger.warning(f"Could not get frame from camera: {e}")
+                self._meter.failed()
+                await trio.sleep(CAPTURE_RETRY_DELAY)
+                continue
+            decoded = trio.current_time()
+
+            if self.in_preview_mode:
+                # Responses may arrive out of order, so skip stale frames
+                if sequence > self._shown:
+                    self._shown = sequence
+                    self._preview.update(data)
+            else:
+                await self._store(data, sequence)
+            stored = trio.current_time()
+
+            self._meter.record(received - started, decoded - received, stored - decoded)
+
+    async def _store(self, data: bytes, sequence: int) -> None:
+        image_dir = self.image_dir
+        assert image_dir
+
+        # Timestamps have millisecond resolution, and responses of frames
+        # in flight may arrive together, so the sequence keeps names unique
+        target_filename = f"{as_timestamp(now())}_{sequence}.jpg"
+        await self._save_into_input_directory(target_filename, data, image_dir)
+
+    def _stats_response(self) -> DirectCommandResponse:
+        return DirectCommandResponse(
+            direct_command_response=DirectCommandResponseBody(
+                response=self.capture_stats.model_dump_json(),
+                reqid="",
+                status=DirectCommandStatus.OK,
+            )
+        )
+
     async def _back_to_ready(self) -> None:
         from local_console.core.camera.states.v2.ready import ReadyCameraV2
 
         await self._transit_to(ReadyCameraV2(self._state_properties))
+
+
+def _decode_image(result: DirectCommandResponse) -> bytes:
+    image_response = DirectGetImageResponse.model_validate_json(
+        result.direct_command_response.response
+    )
+    # Decodes straight from the JSON string, saving an intermediate copy
+    return binascii.a2b_base64(image_response.image)
+
+
+def _mean_ms(samples: deque[float]) -> float:
+    return 1000 * sum(samples) / len(samples) if samples else 0.0
@@ -120,7 +120,7 @@ class ClearingSensorModelCameraV2(ConnectedCameraStateV2):
                 int(ver != "") for ver in self._props_report.dnn_versions
             )
 
-        update = EdgeSystemCommon.model_validate(message.payload)
+        update = message.edge_system
         deploy_report: PrivateDeployAIModel | None = update.private_deploy_ai_model
 
         if not deploy_report:
@@ -225,7 +225,7 @@ class UpdateSensorModelCameraV2(ConnectedCameraStateV2):
         if message.topic != MQTTTopics.ATTRIBUTES.value:
             return
 
-        update = EdgeSystemCommon.model_validate(message.payload)
+        update = message.edge_system
         if not update.private_deploy_ai_model:
             return
 
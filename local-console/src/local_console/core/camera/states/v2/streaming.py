@@ -41,6 +41,7 @@ from local_console.core.camera.v2.components.edge_app import EdgeAppPortSettings
 from local_console.core.camera.v2.components.edge_app import EdgeAppSpec
 from local_console.core.camera.v2.components.edge_app import UploadMethod
 from local_console.core.camera.v2.components.edge_app import UploadSpec
+from local_console.servers.webserver import IncomingFile
 from pydantic import BaseModel
 from pydantic import ValidationError
 
@@ -70,7 +71,7 @@ class StreamingCameraV2(ConnectedCameraStateV2, AcceptingFilesMixin):
 
         # Configure global webserver for pushing files to this camera
         upload_url = self._file_inbox.set_file_incoming_callable(
-            self._id, self._process_camera_upload
+            self._id, self._process_camera_upload, spool_dir=self.base_dir
         )
         # simplest logic: blindly set all kinds of uploads as enabled
         upload_spec = UploadSpec(
@@ -132,7 +133,9 @@ class StreamingCameraV2(ConnectedCameraStateV2, AcceptingFilesMixin):
         if should_stop:
             await self._back_to_ready()
 
-    async def _process_camera_upload(self, data: bytes, url_path: str) -> None:
+    async def _process_camera_upload(
+        self, incoming: IncomingFile, url_path: str
+    ) -> None:
         incoming_file = PurePosixPath(url_path)
         name = incoming_file.name
         extension = incoming_file.suffix.lstrip(".")
@@ -140,11 +143,11 @@ class StreamingCameraV2(ConnectedCameraStateV2, AcceptingFilesMixin):
         if extension == EXT_INFERS:
             target_dir = self.inference_dir
             assert target_dir
-            await self._save_into_input_directory(name, data, target_dir)
+            await self._save_into_input_directory(name, incoming, target_dir)
         elif extension == EXT_IMAGES:
             target_dir = self.image_dir
             assert target_dir
-            await self._save_into_input_directory(name, data, target_dir)
+            await self._save_into_input_directory(name, incoming, target_dir)
         else:
             logger.warning(f"Unknown incoming file: {incoming_file}")
 
@@ -13,7 +13,6 @@
 # limitations under the License.
 #
 # SPDX-License-Identifier: Apache-2.0
-import json
 from typing import Any
 
 from local_console.core.camera.v2.components.device_capabilities import (
@@ -36,6 +35,7 @@ from local_console.core.camera.v2.components.system_info import SystemInfo
 from local_console.core.camera.v2.components.system_settings import SystemSettings
 from local_console.core.camera.v2.components.wireless_settings import WirelessSetting
 from local_console.core.config import Config
+from local_console.utils import fastjson
 from pydantic import BaseModel
 from pydantic import ConfigDict
 from pydantic import Field
@@ -146,7 +146,7 @@ class EdgeSystemCommon(BaseModel):
     def to_dict(cls, data: Any) -> Any:
         # Device reports attributes as strings. This methods converts the string into a JSON.
         if isinstance(data, str):
-            return json.loads(data)
+            return fastjson.loads(data)
         return data
 
     @model_validator(mode="before")
@@ -173,12 +173,9 @@ def update_not_none_fields(
 
 
 def update_mqtt_endpoint(edge_sys_common: EdgeSystemCommon) -> None:
-    if edge_sys_common.private_endpoint_setting:
-        for device in Config().data.devices:
-            if (
-                device.mqtt.port
-                == edge_sys_common.private_endpoint_setting.endpoint_port
-            ):
-                device.mqtt.host = edge_sys_common.private_endpoint_setting.endpoint_url
-                Config().save_config()
-                break
+    setting = edge_sys_common.private_endpoint_setting
+    if setting:
+        device = Config().find_device_config_by_port(setting.endpoint_port)
+        if device is not None and device.mqtt.host != setting.endpoint_url:
+            device.mqtt.host = setting.endpoint_url
+            Config().mark_dirty()
@@ -24,6 +24,7 @@ from typing import Optional
 
 from local_console.core.camera.enums import DeployStage
 from local_console.core.enums import ModuleExtension
+from local_console.core.files.digests import file_digest
 from local_console.core.schemas.schemas import Deployment
 from local_console.core.schemas.schemas import DeploymentManifest
 from local_console.core.schemas.schemas import DeviceID
@@ -185,9 +186,7 @@ def make_unique_module_ids(deploy_man: DeploymentManifest) -> None:
 
 
 def calculate_sha256(path: Path) -> str:
-    sha256_hash = hashlib.sha256()
-    sha256_hash.update(path.read_bytes())
-    return sha256_hash.hexdigest()
+    return file_digest(path).hex
 
 
 def deploy_status_empty(deploy_status: Optional[dict[str, Any]]) -> bool:
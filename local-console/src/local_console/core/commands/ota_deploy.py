@@ -13,20 +13,17 @@
 # limitations under the License.
 #
 # SPDX-License-Identifier: Apache-2.0
-from base64 import b64encode
 from pathlib import Path
 
-from cryptography.hazmat.primitives import hashes
 from local_console.core.camera.enums import OTAUpdateModule
 from local_console.core.enums import AiModelExtension
+from local_console.core.files.digests import file_digest
 from local_console.core.schemas.edge_cloud_if_v1 import DnnOta
 from local_console.core.schemas.edge_cloud_if_v1 import DnnOtaBody
 
 
 def get_package_hash(package_file: Path) -> str:
-    digest = hashes.Hash(hashes.SHA256())
-    digest.update(package_file.read_bytes())
-    return b64encode(digest.finalize()).decode()
+    return file_digest(package_file).base64
 
 
 def reverse_bytes_4(value: bytes) -> bytes:
@@ -35,7 +32,9 @@ def reverse_bytes_4(value: bytes) -> bytes:
 
 
 def get_package_version_pkg(package_file: Path) -> bytes:
-    return package_file.read_bytes()[0x30:0x40]
+    with package_file.open("rb") as f:
+        f.seek(0x30)
+        return f.read(0x10)
 
 
 def get_package_version_rpk(package_file: Path) -> bytes:
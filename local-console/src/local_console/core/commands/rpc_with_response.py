@@ -86,9 +86,86 @@ class RPCArgument:
     params: dict[str, Any]
 
 
+class RPCChannel:
+    """
+    Long-lived RPC channel to a device, over the MQTT client of its
+    driver, which is subscribed to RPC responses for its whole life.
+    Responses are correlated to their requests by the request ID in
+    their topic, so that many RPCs may be in flight at the same time,
+    each one costing just its round trip.
+
+    The driver must `feed()` all incoming messages into the channel,
+    and `close()` it once it stops receiving them, which fails all
+    RPCs in flight without waiting for their deadline.
+    """
+
+    def __init__(self, client: Agent) -> None:
+        self._client = client
+        self._pending: dict[str, trio.MemorySendChannel[bytes]] = {}
+        self._closed = False
+
+    def open(self) -> None:
+        self._closed = False
+
+    def close(self) -> None:
+        self._closed = True
+        for pending in self._pending.values():
+            pending.close()
+
+    def feed(self, topic: str, payload: bytes) -> bool:
+        """
+        Takes the message if it is an RPC response, returning whether it did.
+        """
+        if not MQTTTopics.topic_matches_pattern(topic, MQTTTopics.RPC_RESPONSES.value):
+            return False
+
+        reqid = topic.rsplit("/", 1)[-1]
+        pending = self._pending.get(reqid)
+        if pending:
+            try:
+                pending.send_nowait(payload)
+            except trio.WouldBlock:
+                logger.debug(f"Discarding repeated response to RPC {reqid}")
+        else:
+            logger.debug(f"Discarding response to unknown RPC {reqid}")
+        return True
+
+    async def request(
+        self, reqid: str, topic: str, payload: str, timeout: float
+    ) -> bytes | None:
+        """
+        Sends an RPC request and waits for its response, returning
+        its payload, or None if the deadline expired before.
+        """
+        if reqid in self._pending:
+            raise ValueError(f"RPC {reqid} is already in flight")
+        if self._closed:
+            logger.warning(f"Cannot send RPC {reqid}, as the device is not connected")
+            return None
+
+        response, responses = trio.open_memory_channel[bytes](1)
+        self._pending[reqid] = response
+        try:
+            with trio.move_on_after(timeout):
+                await self._client.publish(topic, payload)
+                return await responses.receive()
+            return None
+        except trio.EndOfChannel:
+            return None
+        finally:
+            del self._pending[reqid]
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+
 class RPCWithResponse:
-    def __init__(self, port: int, timeout: float) -> None:
-        self._mqtt_client = Agent(port)
+    def __init__(
+        self, port: int, timeout: float, channel: RPCChannel | None = None
+    ) -> None:
+        self._mqtt_client = Agent(port) if channel is None else None
+        self._channel = channel
         self._timeout = timeout
 
     async def run(self, rpc_argument: RPCArgument) -> DirectCommandResponse:
@@ -103,6 +180,14 @@ class RPCWithResponse:
             }
         )
 
+        if self._channel:
+            reqid, topic, payload = self._request_for(rpc_argument)
+            response = await self._channel.request(reqid, topic, payload, self._timeout)
+            if response is not None:
+                res = DirectCommandResponse.model_validate_json(response.decode())
+            return res
+
+        assert self._mqtt_client
         with trio.move_on_after(self._timeout) as cs:
             # Open scope before sending RPC to ensure response is caught
             async with (
@@ -128,6 +213,13 @@ class RPCWithResponse:
         return res
 
     async def _send_rpc(self, rpc_argument: RPCArgument) -> str:
+        assert self._mqtt_client
+        reqid, topic, payload = self._request_for(rpc_argument)
+        logger.debug(f"RPC: topic={topic}, payload={payload}")
+        await self._mqtt_client.publish(topic, payload)
+        return reqid
+
+    def _request_for(self, rpc_argument: RPCArgument) -> tuple[str, str, str]:
         reqid = random_id()
 
         payload_model = DirectCommandRequestRoot(
@@ -143,9 +235,7 @@ class RPCWithResponse:
         payload = payload_model.model_dump_json(by_alias=True)
 
         topic = f"v1/devices/me/rpc/request/{reqid}"
-        logger.debug(f"RPC: topic={topic}, payload={payload}")
-        await self._mqtt_client.publish(topic, payload)
-        return reqid
+        return reqid, topic, payload
 
 
 async def run_rpc_with_response(
@@ -154,11 +244,15 @@ async def run_rpc_with_response(
     method: str,
     params: dict[str, Any],
     timeout: float = 60,
+    channel: RPCChannel | None = None,
 ) -> DirectCommandResponse:
     """
     v2 version of run_rpc_with_response
+
+    If the RPC channel of the device is given, it is used instead
+    of a connection of its own.
     """
-    rpc = RPCWithResponse(port=port, timeout=timeout)  # type: ignore
+    rpc = RPCWithResponse(port=port, timeout=timeout, channel=channel)  # type: ignore
     return await rpc.run(
         RPCArgument(
             module_id=module_id,
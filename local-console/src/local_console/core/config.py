@@ -15,8 +15,12 @@
 # SPDX-License-Identifier: Apache-2.0
 import json
 import logging
+import os
+import tempfile
+import threading
 from abc import ABC
 from abc import abstractmethod
+from collections.abc import Callable
 from typing import Any
 
 from local_console.core.enums import config_paths
@@ -39,6 +43,9 @@ from pydantic import ValidationError
 
 logger = logging.getLogger(__name__)
 
+# Seconds during which configuration changes are coalesced into one write
+WRITE_BEHIND_DELAY = 1.0
+
 
 class ConfigError(Exception):
     """
@@ -73,18 +80,119 @@ class OnDisk(ConfigPersistency):
             raise ConfigError(f"Config file not well formed: {e}")
 
     def save_config(self, conf: GlobalConfiguration) -> None:
+        """
+        Writes to a temporary file that then replaces the configuration,
+        so that an interrupted write never leaves it truncated.
+        """
         logger.info("Storing configuration")
         config_path = config_paths.config_path
         try:
             config_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(config_path, "w") as f:
-                f.write(conf.model_dump_json(indent=2))
+            fd, tmp_name = tempfile.mkstemp(
+                dir=config_path.parent, prefix=f".{config_path.name}."
+            )
+            try:
+                with os.fdopen(fd, "w") as f:
+                    f.write(conf.model_dump_json(indent=2))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_name, config_path)
+            except BaseException:
+                os.unlink(tmp_name)
+                raise
         except Exception as e:
             raise ConfigError(
                 f"Error while generating folder {config_path.parent} or storing configuration: {e}"
             )
 
 
+class WriteBehind:
+    """
+    Background thread that stores the configuration after it is marked
+    as changed, coalescing the changes made within `delay` seconds into
+    a single write. Stopping it writes any pending change.
+    """
+
+    def __init__(self, save: Callable[[], None], delay: float) -> None:
+        self._save = save
+        self._delay = delay
+        self._cond = threading.Condition()
+        self._dirty = False
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self._run, name="config-write-behind", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def pending(self) -> bool:
+        with self._cond:
+            return self._dirty
+
+    def schedule(self) -> None:
+        with self._cond:
+            self._dirty = True
+            self._cond.notify()
+
+    def flush(self) -> None:
+        """
+        Writes the pending change, if any, without waiting for the delay.
+        """
+        with self._cond:
+            pending, self._dirty = self._dirty, False
+        if pending:
+            self._save()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._dirty or self._stopped)
+                self._cond.wait_for(lambda: self._stopped, self._delay)
+                pending, self._dirty = self._dirty, False
+                stopped = self._stopped
+            if pending:
+                try:
+                    self._save()
+                except Exception as e:
+                    logger.error(f"Could not store configuration: {e}")
+                    if not stopped:
+                        self.schedule()
+            if stopped:
+                return
+
+
+class _DeviceIndex:
+    """
+    Positions of the device entries by a key. Entries may be mutated or
+    replaced without notice, so a position is checked against the list
+    on lookup and the index is rebuilt when it is stale.
+    """
+
+    def __init__(self, key: Callable[[DeviceConnection], Any]) -> None:
+        self._key = key
+        self._positions: dict[Any, int] = {}
+
+    def find(
+        self, devices: list[DeviceConnection], value: Any
+    ) -> DeviceConnection | None:
+        pos = self._positions.get(value)
+        if pos is None or pos >= len(devices) or self._key(devices[pos]) != value:
+            # The first entry wins, like a linear scan would
+            self._positions = {
+                self._key(d): i for i, d in reversed(list(enumerate(devices)))
+            }
+            pos = self._positions.get(value)
+            if pos is None:
+                return None
+        return devices[pos]
+
+
 class Config(metaclass=Singleton):
 
     persistency_class: type[ConfigPersistency] = OnDisk
@@ -94,6 +202,11 @@ class Config(metaclass=Singleton):
             initial if initial else Config.get_default_config()
         )
         self._persistency_obj = Config.persistency_class()
+        self._save_lock = threading.Lock()
+        self._write_behind: WriteBehind | None = None
+        self._by_id = _DeviceIndex(lambda d: d.id)
+        self._by_name = _DeviceIndex(lambda d: d.name)
+        self._by_port = _DeviceIndex(lambda d: d.mqtt.port)
 
     @property
     def data(self) -> GlobalConfiguration:
@@ -113,55 +226,79 @@ class Config(metaclass=Singleton):
         )
 
     def read_config(self) -> None:
+        # Changes not yet written would be lost otherwise
+        if self._write_behind is not None:
+            self._write_behind.flush()
         self._config = self._persistency_obj.read_config()
 
     def save_config(self) -> None:
-        self._persistency_obj.save_config(self._config)
+        with self._save_lock:
+            self._persistency_obj.save_config(self._config)
+
+    def mark_dirty(self) -> None:
+        """
+        Signals a change to be stored. While the write-behind is running,
+        the write is left to it; otherwise it happens right away.
+        """
+        if self._write_behind is None:
+            self.save_config()
+        else:
+            self._write_behind.schedule()
+
+    def start_write_behind(self, delay: float = WRITE_BEHIND_DELAY) -> None:
+        if self._write_behind is None:
+            self._write_behind = WriteBehind(self.save_config, delay)
+
+    def stop_write_behind(self) -> None:
+        """
+        Stops the write-behind, storing any pending change.
+        """
+        write_behind, self._write_behind = self._write_behind, None
+        if write_behind is not None:
+            write_behind.stop()
 
     def get_config(self) -> GlobalConfiguration:
         return self._config
 
+    def find_device_config(self, key: DeviceID) -> DeviceConnection | None:
+        return self._by_id.find(self._config.devices, key)
+
+    def find_device_config_by_name(self, name: str) -> DeviceConnection | None:
+        return self._by_name.find(self._config.devices, name)
+
+    def find_device_config_by_port(self, port: int) -> DeviceConnection | None:
+        return self._by_port.find(self._config.devices, port)
+
     def get_device_config(self, key: DeviceID) -> DeviceConnection:
-        for device_config in self._config.devices:
-            if device_config.id == key:
-                return device_config
-        raise FileNotFound(
-            filename=str(key), message=f"Device for port {key} not found"
-        )
+        device_config = self.find_device_config(key)
+        if device_config is None:
+            raise FileNotFound(
+                filename=str(key), message=f"Device for port {key} not found"
+            )
+        return device_config
 
     def get_device_config_by_name(self, name: str) -> DeviceConnection:
-        for device_config in self._config.devices:
-            if device_config.name == name:
-                return device_config
-        raise FileNotFound(
-            filename=str(name), message=f"Device named '{name}' not found"
-        )
+        device_config = self.find_device_config_by_name(name)
+        if device_config is None:
+            raise FileNotFound(
+                filename=str(name), message=f"Device named '{name}' not found"
+            )
+        return device_config
 
     def get_persistent_attr(self, key: DeviceID, attr: str) -> Any:
         assert (
             attr in Persist.model_fields.keys()
         ), f"Attribute '{attr}' is not a persistent one."
 
-        for device_config in self._config.devices:
-            if device_config.id == key:
-                return getattr(device_config.persist, attr)
-        raise FileNotFound(
-            filename=str(key), message=f"Device for port {key} not found"
-        )
+        return getattr(self.get_device_config(key).persist, attr)
 
     def update_persistent_attr(self, key: DeviceID, attr: str, value: Any) -> None:
         assert (
             attr in Persist.model_fields.keys()
         ), f"Attribute '{attr}' is not a persistent one."
 
-        for device_config in self._config.devices:
-            if device_config.id == key:
-                setattr(device_config.persist, attr, value)
-                self.save_config()
-                return
-        raise FileNotFound(
-            filename=str(key), message=f"Device for port {key} not found"
-        )
+        setattr(self.get_device_config(key).persist, attr, value)
+        self.mark_dirty()
 
     def get_first_device_config(self) -> DeviceConnection:
         return self._config.devices[0]
@@ -171,9 +308,8 @@ class Config(metaclass=Singleton):
         self._create_device_config(new_name, key)
 
         # If not exceptions raised, then do rename.
-        entry: DeviceConnection = next(d for d in self._config.devices if d.id == key)
-        entry.name = new_name
-        self.save_config()
+        self.get_device_config(key).name = new_name
+        self.mark_dirty()
 
     def get_deployment(self) -> DeploymentManifest:
         try:
@@ -190,16 +326,14 @@ class Config(metaclass=Singleton):
             )
 
     def construct_device_record(self, name: str, key: DeviceID) -> DeviceConnection:
-        record_lookup = (dev for dev in self.data.devices if dev.id == key)
-        conn = next(record_lookup, None)
+        conn = self.find_device_config(key)
         if conn is None:
             conn = self._create_device_config(name, key)
 
         return conn
 
     def commit_device_record(self, device_conn: DeviceConnection) -> None:
-        record_lookup = (dev for dev in self.data.devices if dev.id == device_conn.id)
-        if next(record_lookup, None) is None:
+        if self.find_device_config(device_conn.id) is None:
             self._config.devices.append(device_conn)
 
     def remove_device(self, key: DeviceID) -> None:
@@ -0,0 +1,266 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+"""
+Rollout of a deployment configuration to many devices, in waves, so
+that a large fleet does not hit the file server all at once and a bad
+configuration is caught on a few devices first.
+"""
+import fnmatch
+import logging
+
+import trio
+from local_console.core.camera.enums import ConnectionState
+from local_console.core.deploy.config_deployer import ConfigDeployer
+from local_console.core.deploy.deployment_manager import DeploymentManager
+from local_console.core.deploy.tasks.base_task import Status
+from local_console.core.deploy.tasks.task_executors import TrioBackgroundTasks
+from local_console.core.device_services import DeviceServices
+from local_console.core.error.base import UserException
+from local_console.core.error.code import ErrorCodes
+from local_console.core.schemas.schemas import DeviceID
+from local_console.utils.enums import StrEnum
+from local_console.utils.random import random_id
+from pydantic import BaseModel
+from pydantic import Field
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the deployments in progress
+POLL_INTERVAL = 1.0
+
+
+class RolloutParams(BaseModel):
+    # Number of devices being deployed to at the same time
+    max_parallel: int = Field(default=4, ge=1)
+    # Number of devices in the first wave, deployed to before any other
+    canaries: int = Field(default=1, ge=0)
+    # Number of devices per wave after the canaries. Default: all of them
+    wave_size: int | None = Field(default=None, ge=1)
+    # Share of failed deployments above which the rollout pauses
+    max_failure_rate: float = Field(default=0.1, ge=0, le=1)
+
+
+class TargetSelector(BaseModel):
+    # Shell-style pattern on device names
+    name: str = "*"
+    connected_only: bool = False
+
+
+class RolloutStatus(StrEnum):
+    RUNNING = "Running"
+    PAUSED = "Paused"
+    COMPLETED = "Completed"
+    CANCELLED = "Cancelled"
+
+
+class WaveProgress(BaseModel):
+    canary: bool
+    pending: int
+    running: int
+    succeeded: int
+    failed: int
+    failed_devices: list[DeviceID]
+
+
+class RolloutProgress(BaseModel):
+    rollout_id: str
+    config_id: str
+    status: RolloutStatus
+    waves: list[WaveProgress]
+
+
+class Wave:
+    def __init__(self, devices: list[DeviceID], canary: bool) -> None:
+        self.canary = canary
+        self.pending = list(devices)
+        self.running: set[DeviceID] = set()
+        self.succeeded: list[DeviceID] = []
+        self.failed: list[DeviceID] = []
+
+    def progress(self) -> WaveProgress:
+        return WaveProgress(
+            canary=self.canary,
+            pending=len(self.pending),
+            running=len(self.running),
+            succeeded=len(self.succeeded),
+            failed=len(self.failed),
+            failed_devices=self.failed,
+        )
+
+
+def plan_waves(devices: list[DeviceID], params: RolloutParams) -> list[Wave]:
+    """
+    Splits the devices, in order, into the canary wave and the rest.
+    """
+    waves = []
+    if params.canaries:
+        waves.append(Wave(devices[: params.canaries], canary=True))
+    rest = devices[params.canaries :]
+    size = params.wave_size or len(rest) or 1
+    waves += [Wave(rest[i : i + size], canary=False) for i in range(0, len(rest), size)]
+    return [wave for wave in waves if wave.pending]
+
+
+def select_devices(devices: DeviceServices, selector: TargetSelector) -> list[DeviceID]:
+    return [
+        DeviceID(int(device.device_id))
+        for device in devices.list_devices()
+        if fnmatch.fnmatchcase(device.device_name, selector.name)
+        and (
+            not selector.connected_only
+            or device.connection_state == ConnectionState.CONNECTED
+        )
+    ]
+
+
+class Rollout:
+    """
+    Deploys a configuration to each device through the deployer, wave by
+    wave, with at most `max_parallel` deployments in progress. Once the
+    failure rate since the start (or the last resume) goes above
+    `max_failure_rate`, no more deployments are started and the rollout
+    pauses until resumed.
+    """
+
+    def __init__(
+        self,
+        config_id: str,
+        devices: list[DeviceID],
+        params: RolloutParams,
+        deployer: ConfigDeployer,
+        deployments: DeploymentManager,
+        poll_interval: float = POLL_INTERVAL,
+    ) -> None:
+        self.id = random_id()
+        self.config_id = config_id
+        self.params = params
+        self.waves = plan_waves(devices, params)
+        self.status = RolloutStatus.RUNNING
+        self._deployer = deployer
+        self._deployments = deployments
+        self._poll_interval = poll_interval
+        self._slots = trio.Semaphore(params.max_parallel)
+        self._resumed = trio.Event()
+        self._cancel_scope = trio.CancelScope()
+        # Finished and failed deployments when last started or resumed
+        self._baseline = (0, 0)
+
+    def _counts(self) -> tuple[int, int]:
+        failed = sum(len(wave.failed) for wave in self.waves)
+        succeeded = sum(len(wave.succeeded) for wave in self.waves)
+        return succeeded + failed, failed
+
+    def _failure_rate_exceeded(self) -> bool:
+        finished, failed = self._counts()
+        finished -= self._baseline[0]
+        failed -= self._baseline[1]
+        return finished > 0 and failed / finished > self.params.max_failure_rate
+
+    async def run(self) -> None:
+        with self._cancel_scope:
+            for index, wave in enumerate(self.waves):
+                while wave.pending:
+                    if self._failure_rate_exceeded():
+                        await self._pause()
+                    await self._run_wave(wave)
+                logger.info(
+                    f"Rollout {self.id} finished wave {index}: "
+                    f"{len(wave.succeeded)} succeeded, {len(wave.failed)} failed"
+                )
+            self.status = RolloutStatus.COMPLETED
+        if self._cancel_scope.cancelled_caught:
+            self.status = RolloutStatus.CANCELLED
+
+    async def _run_wave(self, wave: Wave) -> None:
+        async with trio.open_nursery() as nursery:
+            while wave.pending:
+                await self._slots.acquire()
+                if self._failure_rate_exceeded():
+                    self._slots.release()
+                    break
+                device_id = wave.pending.pop(0)
+                wave.running.add(device_id)
+                nursery.start_soon(self._deploy, wave, device_id)
+
+    async def _deploy(self, wave: Wave, device_id: DeviceID) -> None:
+        succeeded = False
+        # Cancelling the rollout lets the started deployments finish
+        with trio.CancelScope(shield=True):
+            try:
+                entity = await self._deployer.deploy(device_id, self.config_id)
+                self._deployments.add_device_to_deployment(entity.id, device_id)
+                while not entity.task.get_state().status.is_finished():
+                    await trio.sleep(self._poll_interval)
+                succeeded = entity.task.get_state() == Status.SUCCESS
+            except Exception as e:
+                logger.warning(
+                    f"Rollout {self.id} could not deploy to {device_id}: {e}"
+                )
+        self._slots.release()
+        wave.running.discard(device_id)
+        (wave.succeeded if succeeded else wave.failed).append(device_id)
+
+    async def _pause(self) -> None:
+        logger.warning(f"Rollout {self.id} paused due to its failure rate")
+        self.status = RolloutStatus.PAUSED
+        await self._resumed.wait()
+        self._resumed = trio.Event()
+        self._baseline = self._counts()
+        self.status = RolloutStatus.RUNNING
+
+    def resume(self) -> None:
+        if self.status != RolloutStatus.PAUSED:
+            raise UserException(
+                ErrorCodes.EXTERNAL_INVALID_METHOD_DURING_STATE,
+                f"Rollout {self.id} is not paused",
+            )
+        self._resumed.set()
+
+    def cancel(self) -> None:
+        """
+        Stops starting deployments. The rollout ends once those in
+        progress have finished.
+        """
+        self._cancel_scope.cancel()
+
+    def progress(self) -> RolloutProgress:
+        return RolloutProgress(
+            rollout_id=self.id,
+            config_id=self.config_id,
+            status=self.status,
+            waves=[wave.progress() for wave in self.waves],
+        )
+
+
+class Rollouts:
+    """
+    Rollouts started since the server started, run as background tasks.
+    """
+
+    def __init__(self, tasks: TrioBackgroundTasks) -> None:
+        self._tasks = tasks
+        self._rollouts: dict[str, Rollout] = {}
+
+    def start(self, rollout: Rollout) -> Rollout:
+        self._rollouts[rollout.id] = rollout
+        self._tasks.start_soon(rollout.run)
+        return rollout
+
+    def get(self, rollout_id: str) -> Rollout | None:
+        return self._rollouts.get(rollout_id)
+
+    def list(self) -> list[Rollout]:
+        return list(self._rollouts.values())
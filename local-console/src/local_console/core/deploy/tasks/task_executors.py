@@ -17,6 +17,9 @@ import logging
 from abc import ABC
 from abc import abstractmethod
 from collections.abc import AsyncGenerator
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Iterator
 from contextlib import asynccontextmanager
 from typing import Any
 
@@ -49,12 +52,18 @@ class TaskExecutor(ABC):
     async def add_task(self, task: Task) -> TaskEntity: ...
     @abstractmethod
     def list(self) -> list[TaskEntity]: ...
+    @abstractmethod
+    def __contains__(self, task_id: str) -> bool: ...
+    @abstractmethod
+    def iter_after(self, task_id: str | None) -> Iterator[TaskEntity]: ...
 
 
 class TrioBackgroundTasks(TaskExecutor):
     def __init__(self) -> None:
         self._pending_tasks: list[Task] = []
         self._task_history: list[TaskEntity] = []
+        # Position in the history of the first task with each ID
+        self._history_index: dict[str, int] = {}
         self._running_tasks: dict[str, TaskEntity] = {}
         self._task_available = trio.Condition()
         self._stop_event = trio.Event()
@@ -82,6 +91,7 @@ class TrioBackgroundTasks(TaskExecutor):
             id = task.id()
             entity = TaskEntity(id, task)
             await self._raise_if_running(entity)
+            self._history_index.setdefault(id, len(self._task_history))
             self._task_history.append(entity)
             logger.debug(f"Adding task {task.id()}")
             self._pending_tasks.append(task)
@@ -92,6 +102,21 @@ class TrioBackgroundTasks(TaskExecutor):
     def list(self) -> list[TaskEntity]:
         return self._task_history
 
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._history_index
+
+    def iter_after(self, task_id: str | None) -> Iterator[TaskEntity]:
+        start = 0 if task_id is None else self._history_index[task_id] + 1
+        history = self._task_history
+        return (history[i] for i in range(start, len(history)))
+
+    def start_soon(self, async_fn: Callable[..., Awaitable[None]], *args: Any) -> None:
+        """
+        Runs a coroutine alongside the tasks, until the executor stops.
+        """
+        assert self._running_on
+        self._running_on.start_soon(async_fn, *args)
+
     async def _sandbox_run(self, task: Task) -> None:
         try:
             with trio.fail_after(task.timeout().timeout_in_seconds):
@@ -14,12 +14,14 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 import logging
+import time
 
 import trio
 from local_console.core.camera.machine import Camera
 from local_console.core.camera.qr.qr import QRService
 from local_console.core.camera.schemas import assemble_device_state_info
 from local_console.core.camera.schemas import DeviceStateInformation
+from local_console.core.camera.states.base import MQTTDriver
 from local_console.core.config import Config
 from local_console.core.error.base import UserException
 from local_console.core.error.code import ErrorCodes
@@ -27,9 +29,12 @@ from local_console.core.schemas.schemas import DeviceConnection
 from local_console.core.schemas.schemas import DeviceID
 from local_console.core.schemas.schemas import DeviceListItem
 from local_console.core.schemas.schemas import OnWireProtocol
+from local_console.servers.broker import SharedBroker
 from local_console.servers.webserver import AsyncWebserver
 from local_console.servers.webserver import FileInbox
 from local_console.utils.local_network import is_port_open
+from pydantic import BaseModel
+from pydantic import Field
 
 logger = logging.getLogger(__name__)
 config_obj = Config()
@@ -39,6 +44,14 @@ config_obj = Config()
 MAX_INCOMING_SIZE: int = 500 * 1024
 
 
+class StartupProgress(BaseModel):
+    total: int = 0
+    ready: int = 0
+    failed: int = 0
+    # Seconds taken by each device to come up
+    durations: dict[DeviceID, float] = Field(default_factory=dict)
+
+
 class DeviceServices:
     DEFAULT_DEVICE_NAME = "Default"
     DEFAULT_DEVICE_PORT = 1883
@@ -58,8 +71,14 @@ class DeviceServices:
         self.webserver = webserver
         self.file_inbox = FileInbox(webserver)
         self.started = False
+        self.startup = StartupProgress()
         self.qr = QRService()
 
+        self.broker: SharedBroker | None = None
+        if config_obj.data.config.broker.shared:
+            self.broker = SharedBroker(MQTTDriver.TOPICS)
+            nursery.start_soon(self.broker.run)
+
     def __contains__(self, device_id: DeviceID) -> bool:
         return device_id in self.__cameras
 
@@ -77,11 +96,36 @@ class DeviceServices:
             await self.add_device(default_device.name, default_device.id)
             return
 
-        for device in device_configs:
-            await self.add_device_to_internals(device)
+        self.startup = StartupProgress(total=len(device_configs))
+        limiter = trio.CapacityLimiter(config_obj.data.config.startup.parallelism)
+        started_at = time.monotonic()
+        async with trio.open_nursery() as nursery:
+            for device in device_configs:
+                nursery.start_soon(self._bring_up, device, limiter)
+        config_obj.save_config()
 
+        logger.info(
+            f"Started {self.startup.ready} of {self.startup.total} devices "
+            f"in {time.monotonic() - started_at:.2f}s"
+        )
         self.started = True
 
+    async def _bring_up(
+        self, device: DeviceConnection, limiter: trio.CapacityLimiter
+    ) -> None:
+        async with limiter:
+            started_at = time.monotonic()
+            try:
+                await self.add_device_to_internals(device, persist=False)
+            except Exception as e:
+                self.startup.failed += 1
+                logger.error(f"Device {device.id} could not be started: {e}")
+                return
+            elapsed = time.monotonic() - started_at
+            self.startup.durations[device.id] = elapsed
+            self.startup.ready += 1
+            logger.info(f"Device {device.id} started in {elapsed:.2f}s")
+
     def get_device(self, device_id: DeviceID) -> DeviceStateInformation:
         for dev in config_obj.data.devices:
             dev_id = DeviceID(dev.id)
@@ -127,7 +171,9 @@ class DeviceServices:
             onwire_schema=self.DEFAULT_ONWIRE_SCHEMA,
         )
 
-    async def add_device_to_internals(self, device: DeviceConnection) -> Camera:
+    async def add_device_to_internals(
+        self, device: DeviceConnection, persist: bool = True
+    ) -> Camera:
         config_obj.commit_device_record(device)
         camera = Camera(
             device,
@@ -136,15 +182,23 @@ class DeviceServices:
             self.file_inbox,
             self.token,
             self.qr.persist_to,
+            self.broker,
         )
 
         auto_delete = config_obj.get_persistent_attr(device.id, "auto_deletion")
         if self.started:
             camera._common_properties.dirs_watcher.gather(auto_delete)
 
-        config_obj.save_config()
+        if persist:
+            config_obj.mark_dirty()
         self.set_camera(device.id, camera)
-        await self.nursery.start(camera.setup)
+        try:
+            await self.nursery.start(camera.setup)
+        except Exception:
+            # Do not leave a camera that is half set up behind
+            camera.shutdown()
+            self.remove_camera(device.id)
+            raise
 
         return camera
 
@@ -190,7 +244,7 @@ class DeviceServices:
         camera.shutdown()
         self.remove_camera(device_id)
         config_obj.remove_device(device_id)
-        config_obj.save_config()
+        config_obj.mark_dirty()
 
     def set_camera(self, device_id: DeviceID, state: Camera) -> None:
         self.__cameras[device_id] = state
@@ -227,7 +281,7 @@ class DeviceServices:
         config_obj.rename_entry(device_id, new_name)
 
     def _is_name_already_used(self, device_name: str) -> bool:
-        return any(d.name == device_name for d in config_obj.data.devices)
+        return config_obj.find_device_config_by_name(device_name) is not None
 
     def _is_port_already_used(self, device_port: int) -> bool:
-        return any(d.mqtt.port == device_port for d in config_obj.data.devices)
+        return config_obj.find_device_config_by_port(device_port) is not None
@@ -13,11 +13,14 @@
 # limitations under the License.
 #
 # SPDX-License-Identifier: Apache-2.0
+from collections.abc import Iterator
+
 from local_console.core.files.exceptions import FileNotFound
 from local_console.core.files.files import FilesManager
 from local_console.core.files.values import FileInfo
 from local_console.core.files.values import FileType
 from pydantic import BaseModel
+from sortedcontainers import SortedDict
 
 
 class PostEdgeAppsRequestIn(BaseModel):
@@ -34,7 +37,8 @@ class EdgeApp(BaseModel):
 
 class EdgeAppsManager:
     def __init__(self, file_manager: FilesManager) -> None:
-        self._edge_apps: dict[str, EdgeApp] = dict()
+        # Sorted by package ID, for listing and pagination
+        self._edge_apps: SortedDict = SortedDict()
         self._file_manager = file_manager
 
     def register(self, edge_app_info: PostEdgeAppsRequestIn) -> None:
@@ -50,7 +54,19 @@ class EdgeAppsManager:
     def get_all_edge_apps(self) -> list[EdgeApp]:
         return list(self._edge_apps.values())
 
+    def __contains__(self, edge_app_package_id: str) -> bool:
+        return edge_app_package_id in self._edge_apps
+
+    def iter_after(self, edge_app_package_id: str | None) -> Iterator[EdgeApp]:
+        if edge_app_package_id is None:
+            return iter(self._edge_apps.values())
+        keys = self._edge_apps.irange(
+            minimum=edge_app_package_id, inclusive=(False, True)
+        )
+        return (self._edge_apps[key] for key in keys)
+
     def get_by_id(self, edge_app_id: str) -> None | EdgeApp:
         if edge_app_id not in self._edge_apps:
             return None
-        return self._edge_apps[edge_app_id]
+        edge_app: EdgeApp = self._edge_apps[edge_app_id]
+        return edge_app
@@ -74,6 +74,7 @@ class ErrorCodes(Enum):
     EXTERNAL_FIRMWARE_INVALID_SENSOR_FIRMWARE = external(FIRMWARE, "008")  # 111008
     EXTERNAL_DEVICE_NAMES_TOO_LONG = external(FIRMWARE, "009")  # 111009
     EXTERNAL_CONFIG_UNITSIZE = external(CONFIG, "001")  # 121001
+    EXTERNAL_INFERENCE_DECODING = external(GENERIC, "009")  # 101009
 
     def is_internal(self) -> bool:
         return self.value.startswith(INTERNAL)
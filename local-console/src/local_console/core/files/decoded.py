@@ -0,0 +1,141 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+
+from local_console.core.config import Config
+from local_console.core.files.decoding import decode_source
+from local_console.core.files.decoding import DecodingSettings
+from local_console.core.schemas.schemas import DeviceID
+
+logger = logging.getLogger(__name__)
+
+# Subfolder of the inference folder holding the decoded forms. Being a
+# directory, it is left out of the listings of inference files.
+DECODED_DIR = ".decoded"
+
+
+def decoded_path_for(inference_path: Path) -> Path:
+    return inference_path.parent / DECODED_DIR / f"{inference_path.stem}.json"
+
+
+def fingerprint(schema: Path, labels: Path | None) -> str:
+    """
+    Identifies the schema and labels files, as well as their versions,
+    so that decoded forms become stale as soon as either changes.
+    """
+    parts = []
+    for file in (schema, labels):
+        if file is None:
+            parts.append("")
+            continue
+        stats = file.stat()
+        parts.append(f"{file.resolve()}:{stats.st_mtime_ns}:{stats.st_size}")
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()[:16]
+
+
+class DecodedInferences:
+    """
+    Decoded forms of the inference files of a device, stored next to
+    them, so that each inference is decoded once instead of per request.
+
+    A decoded form is only served if it was produced with the schema and
+    labels currently configured for the device. Otherwise, the inference
+    is decoded again and its decoded form replaced.
+    """
+
+    def __init__(self, schema: Path, labels: Path | None) -> None:
+        self.schema = schema
+        self.labels = labels
+        self.key = fingerprint(schema, labels)
+        self._settings: DecodingSettings | None = None
+
+    @classmethod
+    def for_device(cls, device_id: DeviceID) -> "DecodedInferences | None":
+        """
+        Returns None if the device has no usable schema configured.
+        """
+        persist = Config().get_device_config(device_id).persist
+        if not persist.vapp_schema_file:
+            return None
+        labels = persist.vapp_labels_file
+        try:
+            return cls(Path(persist.vapp_schema_file), Path(labels) if labels else None)
+        except OSError as e:
+            logger.debug(f"Cannot decode inferences of device {device_id}: {e}")
+            return None
+
+    @property
+    def settings(self) -> DecodingSettings:
+        if self._settings is None:
+            self._settings = DecodingSettings.load(self.schema, self.labels)
+        return self._settings
+
+    def load(self, inference_path: Path) -> list[Any] | None:
+        """
+        Returns the stored decoded form, or None if missing or stale.
+        """
+        try:
+            stored = json.loads(decoded_path_for(inference_path).read_bytes())
+        except (OSError, ValueError):
+            return None
+        if not isinstance(stored, dict) or stored.get("key") != self.key:
+            return None
+        inferences: list[Any] = stored["inferences"]
+        return inferences
+
+    def decode(self, inference_path: Path) -> list[Any] | None:
+        """
+        Decodes an inference file and stores its decoded form. Blocking.
+        Returns None, storing nothing, if any inference fails to decode.
+        """
+        records = decode_source(
+            (inference_path.name, inference_path),
+            self.settings.schema,
+            self.settings.labels,
+        )
+        if any("error" in record for record in records):
+            return None
+
+        decoded = [record["inference"] for record in records]
+        target = decoded_path_for(inference_path)
+        try:
+            target.parent.mkdir(exist_ok=True)
+            # Unique, as several requests may decode the same file at once
+            temp = target.with_name(f"{target.name}.{uuid4().hex}.tmp")
+            temp.write_text(
+                json.dumps(
+                    {"key": self.key, "inferences": decoded}, separators=(",", ":")
+                )
+            )
+            os.replace(temp, target)
+        except OSError as e:
+            logger.warning(f"Could not store decoded form of {inference_path}: {e}")
+        return decoded
+
+    def get(self, inference_path: Path) -> list[Any] | None:
+        """
+        Returns the decoded form of an inference file, decoding it on demand.
+        """
+        decoded = self.load(inference_path)
+        if decoded is None:
+            decoded = self.decode(inference_path)
+        return decoded
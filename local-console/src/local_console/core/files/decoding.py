@@ -0,0 +1,461 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+"""
+Batch decoding of stored inference results into tabular or JSON Lines output.
+"""
+import csv
+import io
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import zipfile
+from base64 import b64decode
+from collections import deque
+from collections.abc import Iterable
+from collections.abc import Iterator
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from itertools import chain
+from itertools import islice
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import IO
+
+from local_console.core.camera.flatbuffers import add_class_names
+from local_console.core.camera.flatbuffers import flatbuffer_binary_to_json
+from local_console.core.camera.flatbuffers import FlatbufferError
+from local_console.core.camera.flatbuffers import map_class_id_to_name
+from local_console.core.error.base import UserException
+from local_console.core.error.code import ErrorCodes
+from local_console.core.files.inference import InferenceType
+from local_console.utils.enums import StrEnum
+from local_console.utils.fsindex import directory_index
+from local_console.utils.singleton import Singleton
+
+logger = logging.getLogger(__name__)
+
+# Number of inference files decoded by a worker in one go
+CHUNK_SIZE = 64
+# Upper bound of the processes shared by the exports of the server
+SHARED_DECODING_WORKERS = 4
+# Rows used to determine the columns of CSV output
+CSV_HEADER_SAMPLE = 256
+# Rows per Parquet row group
+PARQUET_ROW_GROUP = 4096
+
+
+class ExportFormat(StrEnum):
+    JSONL = "jsonl"
+    CSV = "csv"
+    PARQUET = "parquet"
+
+    @property
+    def media_type(self) -> str:
+        return {
+            ExportFormat.JSONL: "application/jsonl",
+            ExportFormat.CSV: "text/csv",
+            ExportFormat.PARQUET: "application/vnd.apache.parquet",
+        }[self]
+
+
+@dataclass(frozen=True)
+class TimeRange:
+    """
+    Bounds are timestamps as in the names of inference files
+    (YYYYMMDDHHMMSSfff), or any prefix of them, and are inclusive.
+    """
+
+    start: str | None = None
+    end: str | None = None
+
+    def __contains__(self, name: str) -> bool:
+        before_start = self.start is not None and Path(name).stem < self.start
+        return not before_start and not self.past_end(name)
+
+    def past_end(self, name: str) -> bool:
+        return self.end is not None and Path(name).stem[: len(self.end)] > self.end
+
+
+@dataclass(frozen=True)
+class DecodingSettings:
+    schema: Path
+    labels: dict[int, str] | None = None
+
+    @classmethod
+    def load(
+        cls, schema_file: str | Path | None, labels_file: str | Path | None
+    ) -> "DecodingSettings":
+        """
+        Validates the schema of a device and reads its label map.
+        """
+        if not schema_file or not Path(schema_file).is_file():
+            raise UserException(
+                ErrorCodes.EXTERNAL_INFERENCE_DECODING,
+                "A flatbuffers schema file must be configured to decode inferences",
+            )
+        try:
+            labels = map_class_id_to_name(Path(labels_file) if labels_file else None)
+        except FlatbufferError as e:
+            raise UserException(ErrorCodes.EXTERNAL_INFERENCE_DECODING, str(e))
+        return cls(Path(schema_file), labels)
+
+
+# An inference file, as its name and either its path or its contents
+Source = tuple[str, Path | bytes]
+
+
+def _decode_entry(
+    entry: dict[str, Any], schema: Path, labels: dict[int, str] | None
+) -> Any:
+    if entry.get("F") == InferenceType.JSON:
+        decoded = entry["O"]
+    else:
+        decoded = flatbuffer_binary_to_json(schema, b64decode(entry["O"]))
+    if labels is not None:
+        add_class_names(decoded, labels)
+    return decoded
+
+
+def decode_source(
+    source: Source, schema: Path, labels: dict[int, str] | None
+) -> list[dict[str, Any]]:
+    """
+    Decodes every inference contained in an inference file into a record.
+    """
+    name, content = source
+    try:
+        raw = content.read_bytes() if isinstance(content, Path) else content
+        data = json.loads(raw)
+        entries = data["Inferences"]
+    except Exception as e:
+        logger.error(f"Could not parse inference file {name}: {e}")
+        return [{"id": name, "error": f"Could not parse inference file: {e}"}]
+
+    records = []
+    for entry in entries:
+        record: dict[str, Any] = {
+            "id": name,
+            "time": entry.get("T"),
+            "device_id": data.get("DeviceID"),
+            "model_id": data.get("ModelID"),
+        }
+        try:
+            record["inference"] = _decode_entry(entry, schema, labels)
+        except Exception as e:
+            logger.warning(f"Could not decode inference {name}: {e}")
+            record["error"] = str(e)
+        records.append(record)
+    return records
+
+
+def _decode_chunk(
+    sources: list[Source], settings: DecodingSettings
+) -> list[dict[str, Any]]:
+    return [
+        record
+        for source in sources
+        for record in decode_source(source, settings.schema, settings.labels)
+    ]
+
+
+def directory_sources(directory: Path, time_range: TimeRange) -> Iterator[Source]:
+    """
+    Iterates the inference files of a device folder in chronological order.
+    """
+    for name in directory_index(directory).oldest(time_range.start):
+        if time_range.past_end(name):
+            break
+        yield name, directory / name
+
+
+def archive_sources(archive: IO[bytes], time_range: TimeRange) -> Iterator[Source]:
+    """
+    Iterates the inference files of a zip archive in chronological order.
+    The archive is validated right away, and its members read lazily.
+    """
+    try:
+        zf = zipfile.ZipFile(archive)
+    except zipfile.BadZipFile as e:
+        raise UserException(
+            ErrorCodes.EXTERNAL_INFERENCE_DECODING, f"Invalid archive: {e}"
+        )
+    members = sorted(
+        (info for info in zf.infolist() if not info.is_dir()),
+        key=lambda info: Path(info.filename).name,
+    )
+
+    def read() -> Iterator[Source]:
+        with zf:
+            for info in members:
+                name = Path(info.filename).name
+                if name in time_range:
+                    yield name, zf.read(info)
+
+    return read()
+
+
+class DecodingPool(metaclass=Singleton):
+    """
+    Process pool shared by the exports of the server, so that concurrent
+    exports neither multiply processes nor each pay for starting them.
+    Processes are started on first use.
+    """
+
+    def __init__(self) -> None:
+        self.workers = min(SHARED_DECODING_WORKERS, os.cpu_count() or 1)
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = _process_pool(self.workers)
+            return self._executor
+
+    def discard(self, executor: ProcessPoolExecutor) -> None:
+        """
+        Drops a broken executor, so that the next export starts a new one.
+        """
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def decode_sources(
+    sources: Iterable[Source],
+    settings: DecodingSettings,
+    workers: int | None = None,
+    pool: DecodingPool | None = None,
+) -> Iterator[dict[str, Any]]:
+    """
+    Decodes inference files into records, keeping their order.
+
+    Small batches are decoded in the calling process. Larger ones are
+    split in chunks, decoded across the shared `pool` if given, or else
+    across a pool of `workers` processes of their own. A bounded number
+    of chunks is kept in flight so that memory stays bounded however
+    large the backlog is.
+    """
+    chunks = _chunked(sources, CHUNK_SIZE)
+    first = next(chunks, None)
+    if first is None:
+        return
+    second = next(chunks, None)
+    if second is None or (pool is None and workers == 1):
+        yield from _decode_chunk(first, settings)
+        for chunk in chain([second] if second else [], chunks):
+            yield from _decode_chunk(chunk, settings)
+        return
+
+    chunks = chain([first, second], chunks)
+    if pool is not None:
+        executor = pool.executor()
+        try:
+            yield from _decode_in(executor, pool.workers, chunks, settings)
+        except BrokenProcessPool:
+            pool.discard(executor)
+            raise
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with _process_pool(workers) as executor:
+        yield from _decode_in(executor, workers, chunks, settings)
+
+
+def _process_pool(workers: int) -> ProcessPoolExecutor:
+    context = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+
+def _decode_in(
+    executor: ProcessPoolExecutor,
+    workers: int,
+    chunks: Iterable[list[Source]],
+    settings: DecodingSettings,
+) -> Iterator[dict[str, Any]]:
+    pending: deque[Future] = deque()
+    try:
+        for chunk in chunks:
+            pending.append(executor.submit(_decode_chunk, chunk, settings))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        # Chunks of an abandoned export are not left to a shared pool
+        for future in pending:
+            future.cancel()
+
+
+def _chunked(sources: Iterable[Source], size: int) -> Iterator[list[Source]]:
+    iterator = iter(sources)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _flatten(
+    data: dict[str, Any],
+    prefix: str,
+    row: dict[str, Any],
+    lists: list[tuple[str, list]],
+) -> None:
+    for key, value in data.items():
+        column = f"{prefix}{key}"
+        if isinstance(value, dict):
+            _flatten(value, f"{column}.", row, lists)
+        elif isinstance(value, list) and value and isinstance(value[0], dict):
+            lists.append((column, value))
+        elif isinstance(value, list):
+            row[column] = json.dumps(value)
+        else:
+            row[column] = value
+
+
+def to_rows(record: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    """
+    Flattens a record into rows of scalar columns named by their path,
+    with one row per element of the first list of objects found in the
+    inference (i.e. one per detection or classification). Other lists
+    are kept as JSON strings.
+    """
+    row: dict[str, Any] = {}
+    lists: list[tuple[str, list]] = []
+    _flatten(record, "", row, lists)
+    if not lists:
+        yield row
+        return
+
+    (column, items), *others = lists
+    for other_column, other_items in others:
+        row[other_column] = json.dumps(other_items)
+    for item in items:
+        item_row = dict(row)
+        nested: list[tuple[str, list]] = []
+        _flatten(item, f"{column}.", item_row, nested)
+        for nested_column, nested_items in nested:
+            item_row[nested_column] = json.dumps(nested_items)
+        yield item_row
+
+
+def _jsonl(records: Iterable[dict[str, Any]]) -> Iterator[bytes]:
+    for record in records:
+        yield json.dumps(record).encode() + b"\n"
+
+
+def _csv(records: Iterable[dict[str, Any]]) -> Iterator[bytes]:
+    rows = (row for record in records for row in to_rows(record))
+    sample = list(islice(rows, CSV_HEADER_SAMPLE))
+    columns: dict[str, None] = {}
+    for row in sample:
+        columns.update(dict.fromkeys(row))
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(columns), extrasaction="ignore")
+    writer.writeheader()
+    for row in chain(sample, rows):
+        writer.writerow(row)
+        if buffer.tell() >= io.DEFAULT_BUFFER_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only file collecting what is written, to be drained as it goes.
+    """
+
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        chunk = bytes(data)
+        self.chunks.append(chunk)
+        self.position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _parquet(records: Iterable[dict[str, Any]]) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rows = (row for record in records for row in to_rows(record))
+    sink = _ChunkSink()
+    writer = None
+    while batch := list(islice(rows, PARQUET_ROW_GROUP)):
+        if writer is None:
+            table = pa.Table.from_pylist(batch)
+            writer = pq.ParquetWriter(sink, table.schema)
+        else:
+            table = pa.Table.from_pylist(batch, schema=writer.schema)
+        writer.write_table(table)
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
+
+
+def _require_pyarrow() -> None:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise UserException(
+            ErrorCodes.EXTERNAL_INFERENCE_DECODING,
+            "Parquet output requires the 'pyarrow' package to be installed. "
+            "Install local-console[parquet] to get it.",
+        )
+
+
+def encode(
+    records: Iterable[dict[str, Any]], output_format: ExportFormat
+) -> Iterator[bytes]:
+    """
+    Serializes records in the requested format, chunk by chunk.
+    Unavailable formats are reported before any output is produced.
+    """
+    encoders: dict[ExportFormat, Callable[..., Iterator[bytes]]] = {
+        ExportFormat.JSONL: _jsonl,
+        ExportFormat.CSV: _csv,
+        ExportFormat.PARQUET: _parquet,
+    }
+    if output_format == ExportFormat.PARQUET:
+        _require_pyarrow()
+    return encoders[output_format](records)
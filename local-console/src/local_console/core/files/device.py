@@ -16,7 +16,9 @@
 import logging
 from abc import ABC
 from abc import abstractmethod
+from collections.abc import Iterator
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
 
 from local_console.core.camera.machine import Camera
@@ -25,6 +27,7 @@ from local_console.core.camera.streaming import inference_dir_for
 from local_console.core.device_services import DeviceServices
 from local_console.core.files.exceptions import FileNotFound
 from local_console.core.schemas.schemas import DeviceID
+from local_console.utils.fsindex import directory_index
 
 logger = logging.getLogger(__name__)
 
@@ -50,15 +53,37 @@ class BaseFileManager(ABC):
         camera_state = self._find_device(device_id)
         return self._path_from(camera_state)
 
+    def folder_for(self, device_id: DeviceID) -> Path:
+        return self._base_folder(device_id)
+
     def list_for(self, device_id: DeviceID) -> list[Path]:
+        return list(islice(self.iter_for(device_id), 999))
+
+    def iter_for(
+        self, device_id: DeviceID, starting_after: str | None = None
+    ) -> Iterator[Path]:
+        """
+        Iterates the files of the device folder, newest first, and strictly
+        after `starting_after` if given. Only the consumed entries are visited.
+        """
         base_dir: Path = self._base_folder(device_id)
         logger.debug(f"Listing the contents of the folder: {base_dir}")
-        return sorted(
-            (file for file in base_dir.iterdir() if file.is_file()), reverse=True
-        )[0:999]
+        names = directory_index(base_dir).newest(starting_after)
+        return (base_dir / name for name in names)
+
+    def find_by_stem(self, device_id: DeviceID, stem: str) -> Path | None:
+        base_dir: Path = self._base_folder(device_id)
+        name = directory_index(base_dir).with_stem(stem)
+        return base_dir / name if name else None
+
+    def path_for(self, device_id: DeviceID, file_name: str) -> Path:
+        """
+        Resolves where a file of the device would be, without checking existence.
+        """
+        return self._base_folder(device_id) / file_name
 
     def get_file(self, device_id: DeviceID, file_name: str) -> Path:
-        file = self._base_folder(device_id) / file_name
+        file = self.path_for(device_id, file_name)
         if not file.is_file():
             raise FileNotFound(
                 filename=file_name, message=f"File '{file_name}' does not exist"
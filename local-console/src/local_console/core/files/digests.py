@@ -0,0 +1,105 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import hashlib
+import logging
+import threading
+from base64 import b64encode
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+from local_console.utils.singleton import Singleton
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of files whose digest is remembered
+DIGEST_CACHE_ENTRIES = 256
+
+
+@dataclass(frozen=True)
+class FileDigest:
+    """
+    SHA-256 digest of a file, in the forms required by each consumer.
+    """
+
+    raw: bytes
+
+    @property
+    def hex(self) -> str:
+        return self.raw.hex()
+
+    @property
+    def base64(self) -> str:
+        return b64encode(self.raw).decode()
+
+
+# A file is considered unchanged as long as all of these are equal
+_FileStamp = tuple[int, int, int, int]
+
+
+class DigestCache(metaclass=Singleton):
+    """
+    Remembers the digest of files, so that deploying the same
+    artifact (e.g. to every device of a fleet) hashes it only
+    once. Entries are invalidated whenever the size, modification
+    time or inode of the file changes.
+    """
+
+    def __init__(self, entries: int = DIGEST_CACHE_ENTRIES) -> None:
+        self._lock = threading.Lock()
+        self._entries = entries
+        self._cache: OrderedDict[Path, tuple[_FileStamp, FileDigest]] = OrderedDict()
+
+    def get(self, path: Path) -> FileDigest:
+        key = path.resolve()
+        stamp = _stamp_of(key)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached[0] == stamp:
+                self._cache.move_to_end(key)
+                return cached[1]
+
+        digest = _compute(key)
+        # The file may have changed while it was being read
+        if _stamp_of(key) != stamp:
+            logger.debug(f"{path} changed while computing its digest")
+            return digest
+
+        with self._lock:
+            self._cache[key] = (stamp, digest)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._entries:
+                self._cache.popitem(last=False)
+        return digest
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+def _stamp_of(path: Path) -> _FileStamp:
+    st = path.stat()
+    return st.st_size, st.st_mtime_ns, st.st_ino, st.st_dev
+
+
+def _compute(path: Path) -> FileDigest:
+    with path.open("rb") as f:
+        # Reads the file in chunks, so it is never held in memory
+        return FileDigest(hashlib.file_digest(f, "sha256").digest())
+
+
+def file_digest(path: Path) -> FileDigest:
+    return DigestCache().get(path)
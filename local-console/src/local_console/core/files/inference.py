@@ -14,10 +14,13 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 import logging
+from collections.abc import Iterator
 from enum import IntEnum
+from functools import lru_cache
 from pathlib import Path
 from typing import Annotated
 from typing import Any
+from typing import Callable
 
 from local_console.core.files.device import InferenceFileManager
 from local_console.core.files.exceptions import FileNotFound
@@ -74,13 +77,27 @@ class InferenceWithSource(BaseModel):
     inference: Inference
 
 
+# Number of parsed inference files kept in memory
+PARSED_CACHE_SIZE = 512
+
+
+@lru_cache(maxsize=PARSED_CACHE_SIZE)
+def _parse_inference(inference_path: Path, mtime_ns: int, size: int) -> Inference:
+    """
+    File modification time and size are part of the cache key,
+    so that rewritten files get parsed again.
+    """
+    return Inference.model_validate_json(inference_path.read_bytes())
+
+
 class InferenceManager:
     def __init__(self, files: InferenceFileManager) -> None:
         self.files = files
 
     def _inference_or_none(self, inference_path: Path) -> InferenceWithSource | None:
         try:
-            inf = Inference.model_validate_json(inference_path.read_text())
+            stats = inference_path.stat()
+            inf = _parse_inference(inference_path, stats.st_mtime_ns, stats.st_size)
             return InferenceWithSource(path=inference_path, inference=inf)
         except ValidationError as e:
             logger.error(f"Could not parse inference from {inference_path}", exc_info=e)
@@ -92,17 +109,32 @@ class InferenceManager:
         files = self.files.list_for(device_id)
         return [inf for f in files if (inf := self._inference_or_none(f))]
 
+    def iterate(
+        self,
+        device_id: DeviceID,
+        starting_after: str | None = None,
+        where: Callable[[Path], bool] | None = None,
+    ) -> Iterator[InferenceWithSource]:
+        """
+        Lazy version of `list`, which only parses the files being consumed.
+        If `where` is given, files for which it returns False are skipped
+        without being parsed.
+        """
+        files = self.files.iter_for(device_id, starting_after)
+        if where:
+            files = filter(where, files)
+        return (inf for f in files if (inf := self._inference_or_none(f)))
+
     def get(self, device_id: DeviceID, inference_id: str) -> InferenceWithSource:
-        inferences = [
-            inf for inf in self.list(device_id) if inf.path.name == inference_id
-        ]
-        if len(inferences) < 1:
+        inference_path = self.files.path_for(device_id, inference_id)
+        inference = (
+            self._inference_or_none(inference_path)
+            if inference_path.is_file()
+            else None
+        )
+        if not inference:
             raise FileNotFound(
                 filename=inference_id,
                 message=f"Inference file '{inference_id}' not found",
             )
-        elif len(inferences) > 1:
-            raise AssertionError(
-                f"Multiple inference files with id '{inference_id}' exist"
-            )
-        return inferences[0]
+        return inference
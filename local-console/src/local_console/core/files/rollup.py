@@ -0,0 +1,266 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+"""
+Per-device rollup of inference results into one bucket per minute, so
+that aggregates over time windows can be computed from the buckets
+instead of decoding every inference file again.
+"""
+import json
+import logging
+import os
+import threading
+from base64 import b64decode
+from collections import Counter
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from local_console.core.camera.detections import decode_detections
+from local_console.core.camera.detections import Detections
+from local_console.core.camera.fbs_decoder import SchemaError
+from local_console.core.camera.flatbuffers import flatbuffer_binary_to_json
+from local_console.core.files.decoded import fingerprint
+from local_console.core.files.decoding import TimeRange
+from local_console.core.files.inference import InferenceType
+from local_console.core.schemas.schemas import DeviceID
+from local_console.utils.fsindex import directory_index
+from local_console.utils.singleton import Singleton
+from sortedcontainers import SortedDict
+
+logger = logging.getLogger(__name__)
+
+# Length of the timestamp prefix identifying a minute (YYYYMMDDHHMM)
+MINUTE = 12
+SCORE_BINS = 10
+
+
+@dataclass
+class Bucket:
+    files: int = 0
+    frames: int = 0
+    empty_frames: int = 0
+    detections: Counter = field(default_factory=Counter)
+    scores: np.ndarray = field(default_factory=lambda: np.zeros(SCORE_BINS, np.int64))
+
+    def add_frame(self, detections: Detections) -> None:
+        self.frames += 1
+        if not len(detections):
+            self.empty_frames += 1
+            return
+        self.detections.update(detections.counts())
+        self.scores += score_histogram(detections.score)
+
+    def merge(self, other: "Bucket") -> None:
+        self.files += other.files
+        self.frames += other.frames
+        self.empty_frames += other.empty_frames
+        self.detections.update(other.detections)
+        self.scores += other.scores
+
+
+def score_histogram(scores: np.ndarray) -> np.ndarray:
+    """
+    Counts scores in SCORE_BINS equal bins over [0, 1].
+    """
+    bins = np.clip((scores * SCORE_BINS).astype(np.int64), 0, SCORE_BINS - 1)
+    return np.bincount(bins, minlength=SCORE_BINS)
+
+
+def _minute(timestamp: str) -> str | None:
+    minute = timestamp[:MINUTE]
+    return minute if len(minute) == MINUTE and minute.isdigit() else None
+
+
+def frame_detections(entry: dict[str, Any], schema: Path) -> Detections:
+    """
+    Detections of one inference. For classification results, the top
+    scoring class counts as the single detection of the frame.
+    """
+    if entry.get("F") == InferenceType.JSON:
+        decoded = entry["O"]
+    else:
+        payload = b64decode(entry["O"])
+        try:
+            return decode_detections(schema, payload)
+        except SchemaError:
+            decoded = flatbuffer_binary_to_json(schema, payload)
+
+    perception = decoded.get("perception", {}) if isinstance(decoded, dict) else {}
+    if "object_detection_list" in perception:
+        return Detections.from_json(decoded)
+    classes = perception.get("classification_list") or []
+    if not classes:
+        return Detections.empty()
+    top = max(classes, key=lambda c: c.get("score", 0))
+    return Detections(
+        np.array([top.get("class_id", 0)], np.uint32),
+        np.array([top.get("score", 0)], np.float32),
+        np.zeros((1, 4), np.int32),
+    )
+
+
+class InferenceRollup:
+    """
+    Buckets of the inferences of a device folder, by minute.
+
+    It covers the inference files from `covered_from` onwards. Querying
+    an earlier time range scans the files missing from it, once, while
+    newer files get added as they are ingested. Files are bucketed by
+    the minute in their name, and their inferences by the minute in
+    their timestamp.
+
+    Buckets are not updated when files are pruned, so that they keep
+    describing what was ingested.
+    """
+
+    def __init__(self, folder: Path, schema: Path) -> None:
+        self.folder = Path(os.path.abspath(folder))
+        self.schema = schema
+        self.buckets: SortedDict = SortedDict()
+        # None until first queried
+        self.covered_from: str | None = None
+        # Oldest name that ingested files are counted from, which moves
+        # back as soon as a scan of an earlier range starts
+        self._floor: str | None = None
+        # Names of the files in the buckets, as uploads of a device may
+        # be stored out of timestamp order
+        self._counted: set[str] = set()
+        # Guards the fields above. Files are read and decoded without it.
+        self._lock = threading.Lock()
+        # Serializes scans of the folder
+        self._cover_lock = threading.Lock()
+
+    def _read(self, name: str) -> dict[str, Bucket]:
+        minute = _minute(Path(name).stem)
+        if minute is None:
+            return {}
+        buckets = {minute: Bucket(files=1)}
+        try:
+            inferences = json.loads((self.folder / name).read_bytes())["Inferences"]
+        except Exception as e:
+            logger.debug(f"Could not read inference file {name}: {e}")
+            return buckets
+        for entry in inferences:
+            try:
+                detections = frame_detections(entry, self.schema)
+            except Exception as e:
+                logger.debug(f"Could not decode inference {name}: {e}")
+                continue
+            when = _minute(str(entry.get("T"))) or minute
+            buckets.setdefault(when, Bucket()).add_frame(detections)
+        return buckets
+
+    def _add_file(self, name: str) -> None:
+        """
+        Counts a file unless it already is. Must be called without the lock.
+        """
+        with self._lock:
+            if name in self._counted:
+                return
+            self._counted.add(name)
+        buckets = self._read(name)
+        with self._lock:
+            for minute, bucket in buckets.items():
+                self.buckets.setdefault(minute, Bucket()).merge(bucket)
+
+    def ingest(self, name: str) -> None:
+        """
+        Adds a newly stored inference file, if the rollup is in use.
+        Files older than the covered range are left to the scan that
+        covers them.
+        """
+        with self._lock:
+            if self._floor is None or name < self._floor:
+                return
+        self._add_file(name)
+
+    def _cover(self, start: str | None) -> None:
+        target = start or ""
+        with self._cover_lock:
+            with self._lock:
+                upper = self.covered_from
+                if upper is not None and target >= upper:
+                    return
+                self._floor = target
+            try:
+                names = directory_index(self.folder).oldest(start)
+            except FileNotFoundError:
+                names = iter(())
+            for name in names:
+                if upper is not None and name >= upper:
+                    break
+                self._add_file(name)
+            with self._lock:
+                self.covered_from = target
+
+    def windows(self, time_range: TimeRange, window: int) -> list[tuple[str, Bucket]]:
+        """
+        Merges buckets into windows of `window` minutes, aligned to the
+        start of the day and keyed by the minute they start at.
+        """
+        self._cover(time_range.start)
+        with self._lock:
+            minimum = time_range.start[:MINUTE] if time_range.start else None
+            result: dict[str, Bucket] = {}
+            for minute in self.buckets.irange(minimum=minimum):
+                if time_range.past_end(minute):
+                    break
+                day, time = minute[:8], minute[8:]
+                offset = int(time[:2]) * 60 + int(time[2:])
+                offset -= offset % window
+                key = f"{day}{offset // 60:02d}{offset % 60:02d}"
+                result.setdefault(key, Bucket()).merge(self.buckets[minute])
+            return list(result.items())
+
+
+class InferenceRollups(metaclass=Singleton):
+    """
+    Process-wide registry of rollups, created on first query.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._rollups: dict[DeviceID, tuple[str, InferenceRollup]] = {}
+
+    def get(self, device_id: DeviceID, folder: Path, schema: Path) -> InferenceRollup:
+        """
+        Returns the rollup of a device, started over if its schema changed.
+        """
+        key = f"{folder}|{fingerprint(schema, None)}"
+        with self._lock:
+            current = self._rollups.get(device_id)
+            if current is None or current[0] != key:
+                current = (key, InferenceRollup(folder, schema))
+                self._rollups[device_id] = current
+            return current[1]
+
+    def __contains__(self, device_id: DeviceID) -> bool:
+        with self._lock:
+            return device_id in self._rollups
+
+    def ingest(self, device_id: DeviceID, path: Path) -> None:
+        """
+        Updates the rollup of a device, if any, with a new inference file.
+        """
+        with self._lock:
+            current = self._rollups.get(device_id)
+        if current is None:
+            return
+        rollup = current[1]
+        if rollup.folder == Path(os.path.abspath(path.parent)):
+            rollup.ingest(path.name)
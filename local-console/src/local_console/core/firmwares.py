@@ -14,6 +14,7 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 import logging
+from collections.abc import Iterator
 
 from local_console.core.camera.enums import OTAUpdateModule
 from local_console.core.files.exceptions import FileNotFound
@@ -21,6 +22,7 @@ from local_console.core.files.files import FilesManager
 from local_console.core.files.values import FileInfo
 from local_console.core.files.values import FileType
 from pydantic import BaseModel
+from sortedcontainers import SortedDict
 
 logger = logging.getLogger(__name__)
 
@@ -41,7 +43,8 @@ class Firmware(BaseModel):
 class FirmwareManager:
     def __init__(self, files_manager: FilesManager):
         self._files_manager = files_manager
-        self._firmwares: dict[str, Firmware] = dict()
+        # Sorted by file ID, for listing and pagination
+        self._firmwares: SortedDict = SortedDict()
 
     def register(self, firmware_in: FirmwareIn) -> None:
         file_info: None | FileInfo = self._files_manager.get_file(
@@ -56,12 +59,22 @@ class FirmwareManager:
         )
 
     def get_all(self) -> list[Firmware]:
-        return sorted(list(self._firmwares.values()), key=lambda x: x.info.file_id)
+        return list(self._firmwares.values())
+
+    def __contains__(self, file_id: str) -> bool:
+        return file_id in self._firmwares
+
+    def iter_after(self, file_id: str | None) -> Iterator[Firmware]:
+        if file_id is None:
+            return iter(self._firmwares.values())
+        keys = self._firmwares.irange(minimum=file_id, inclusive=(False, True))
+        return (self._firmwares[key] for key in keys)
 
     def get_by_id(self, firmware_id: str) -> None | Firmware:
         if firmware_id not in self._firmwares:
             return None
-        return self._firmwares[firmware_id]
+        firmware: Firmware = self._firmwares[firmware_id]
+        return firmware
 
 
 def get_firmware_manager(files_manager: FilesManager) -> FirmwareManager:
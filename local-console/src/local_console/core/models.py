@@ -13,6 +13,8 @@
 # limitations under the License.
 #
 # SPDX-License-Identifier: Apache-2.0
+from collections.abc import Iterator
+
 from local_console.core.files.exceptions import FileNotFound
 from local_console.core.files.files import FilesManager
 from local_console.core.files.values import FileInfo
@@ -20,6 +22,7 @@ from local_console.core.files.values import FileType
 from pydantic import BaseModel
 from pydantic import ConfigDict
 from pydantic import Field
+from sortedcontainers import SortedDict
 
 
 # OpenAPI reflects 2 possible schemas:
@@ -40,7 +43,8 @@ class Model(BaseModel):
 
 class ModelManager:
     def __init__(self, file_manager: FilesManager) -> None:
-        self._models: dict[str, Model] = {}
+        # Sorted by model ID, for listing and pagination
+        self._models: SortedDict = SortedDict()
         self._file_manager = file_manager
 
     def register(self, info: PostModelsIn) -> None:
@@ -52,7 +56,17 @@ class ModelManager:
     def get_by_id(self, model_id: str) -> Model | None:
         if model_id not in self._models:
             return None
-        return self._models[model_id]
+        model: Model = self._models[model_id]
+        return model
 
     def get_all(self) -> list[Model]:
-        return [self._models[key] for key in sorted(self._models.keys())]
+        return list(self._models.values())
+
+    def __contains__(self, model_id: str) -> bool:
+        return model_id in self._models
+
+    def iter_after(self, model_id: str | None) -> Iterator[Model]:
+        if model_id is None:
+            return iter(self._models.values())
+        keys = self._models.irange(minimum=model_id, inclusive=(False, True))
+        return (self._models[key] for key in keys)
@@ -13,16 +13,31 @@
 # limitations under the License.
 #
 # SPDX-License-Identifier: Apache-2.0
+import logging
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
 from typing import Any
+from typing import Optional
 from typing import Protocol
 
 import trio
+from local_console.utils.enums import StrEnum
 from pydantic import BaseModel
 from trio import BrokenResourceError
+from trio import MemoryReceiveChannel
 from trio import MemorySendChannel
 from trio import RunFinishedError
+from trio import TASK_STATUS_IGNORED
 from trio.lowlevel import TrioToken
 
+logger = logging.getLogger(__name__)
+
+# Notifications that may wait for being fanned out to subscribers
+NOTIFICATION_BACKLOG = 64
+# Notifications that may wait for being sent to each subscriber
+SUBSCRIBER_CAPACITY = 64
+
 
 class Notification(BaseModel):
     kind: str
@@ -61,3 +76,164 @@ class NotificationsEmitter(Protocol):
             # from_thread.run be long-running, and when they
             # finish it raises this exception.
             pass
+
+
+class OverflowPolicy(StrEnum):
+    # Discard the oldest queued notification
+    DROP_OLDEST = "drop_oldest"
+    # Replace a queued notification of the same kind and device
+    COALESCE = "coalesce"
+
+
+class SubscriberStats(BaseModel):
+    delivered: int
+    dropped: int
+    queued: int
+
+
+class HubStats(BaseModel):
+    published: int
+    dropped: int
+    subscribers: list[SubscriberStats]
+
+
+def device_of(msg: Notification) -> Any:
+    return msg.data.get("device_id") if isinstance(msg.data, dict) else None
+
+
+class Subscription:
+    """
+    Bounded queue of serialized notifications for a single subscriber,
+    which never blocks the publisher. Once full, room is made according
+    to the overflow policy, and the discarded notifications are counted.
+    """
+
+    def __init__(
+        self,
+        capacity: int = SUBSCRIBER_CAPACITY,
+        policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        device_ids: Optional[set[str]] = None,
+        kinds: Optional[set[str]] = None,
+    ) -> None:
+        self.capacity = capacity
+        self.policy = policy
+        self.device_ids = device_ids
+        self.kinds = kinds
+        self.delivered = 0
+        self.dropped = 0
+        # Entries are [coalescing key, serialized notification]
+        self._queue: deque[list] = deque()
+        self._latest: dict[tuple[str, str], list] = {}
+        self._ready = trio.Event()
+
+    def accepts(self, msg: Notification) -> bool:
+        if self.kinds is not None and msg.kind not in self.kinds:
+            return False
+        # Notifications not tied to a device are of interest to everybody
+        device = device_of(msg)
+        return (
+            self.device_ids is None or device is None or str(device) in self.device_ids
+        )
+
+    def push(self, msg: Notification, serialized: str) -> None:
+        key = (msg.kind, str(device_of(msg)))
+        if self.policy == OverflowPolicy.COALESCE and key in self._latest:
+            self._latest[key][1] = serialized
+            self.dropped += 1
+            return
+
+        if len(self._queue) >= self.capacity:
+            self._forget(self._queue.popleft())
+            self.dropped += 1
+
+        entry = [key, serialized]
+        self._queue.append(entry)
+        if self.policy == OverflowPolicy.COALESCE:
+            self._latest[key] = entry
+        self._ready.set()
+
+    async def receive(self) -> str:
+        while not self._queue:
+            self._ready = trio.Event()
+            await self._ready.wait()
+        entry = self._queue.popleft()
+        self._forget(entry)
+        self.delivered += 1
+        return str(entry[1])
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __anext__(self) -> str:
+        return await self.receive()
+
+    def stats(self) -> SubscriberStats:
+        return SubscriberStats(
+            delivered=self.delivered, dropped=self.dropped, queued=len(self._queue)
+        )
+
+    def _forget(self, entry: list) -> None:
+        if self._latest.get(entry[0]) is entry:
+            del self._latest[entry[0]]
+
+
+class NotificationHub:
+    """
+    Broadcasts every notification to all the subscribers interested in
+    it. Each notification is serialized once, no matter the number of
+    subscribers, and a slow subscriber only loses its own notifications,
+    instead of blocking the publishers (i.e. the camera state machines).
+    """
+
+    def __init__(self) -> None:
+        self._subscriptions: set[Subscription] = set()
+        self.published = 0
+        self._dropped = 0
+
+    async def run(
+        self,
+        receiver: MemoryReceiveChannel[Notification],
+        *,
+        task_status: Any = TASK_STATUS_IGNORED,
+    ) -> None:
+        task_status.started()
+        async with receiver:
+            async for msg in receiver:
+                self.publish(msg)
+
+    def publish(self, msg: Notification) -> None:
+        self.published += 1
+        serialized: str | None = None
+        for subscription in self._subscriptions:
+            if subscription.accepts(msg):
+                if serialized is None:
+                    serialized = msg.model_dump_json()
+                subscription.push(msg, serialized)
+
+    @contextmanager
+    def subscribe(
+        self,
+        capacity: int = SUBSCRIBER_CAPACITY,
+        policy: OverflowPolicy = OverflowPolicy.DROP_OLDEST,
+        device_ids: Optional[set[str]] = None,
+        kinds: Optional[set[str]] = None,
+    ) -> Iterator[Subscription]:
+        subscription = Subscription(capacity, policy, device_ids, kinds)
+        self._subscriptions.add(subscription)
+        try:
+            yield subscription
+        finally:
+            self._subscriptions.discard(subscription)
+            self._dropped += subscription.dropped
+            if subscription.dropped:
+                logger.info(
+                    f"Subscriber dropped {subscription.dropped} of {subscription.dropped + subscription.delivered} notifications"
+                )
+
+    def stats(self) -> HubStats:
+        current = [s.stats() for s in self._subscriptions]
+        return HubStats(
+            published=self.published,
+            dropped=self._dropped + sum(s.dropped for s in current),
+            subscribers=current,
+        )
@@ -149,6 +149,8 @@ class MQTTParams(BaseModel, validate_assignment=True):
 class WebserverParams(BaseModel):
     host: str = IPAddress
     port: int = IPPortNumber
+    # Maximum number of concurrent file downloads, unbounded if unset
+    max_transfers: Optional[Annotated[int, Field(gt=0)]] = None
 
 
 DeviceName = Field(pattern=r"^[A-Za-z0-9\-_.]+$", min_length=1, max_length=255)
@@ -196,9 +198,76 @@ class DeploymentConfig(BaseModel):
     model: ModelDeploymentConfig = ModelDeploymentConfig()
 
 
+class EvictionPolicy(StrEnum):
+    OLDEST_FIRST = "oldest_first"
+    FAIR_SHARE = "fair_share"
+    IMAGES_FIRST = "images_first"
+
+
+class StorageBudgetConfig(BaseModel):
+    """
+    Storage limit shared by all devices, enforced on top of their own limits.
+    """
+
+    size: Annotated[int, Field(gt=0)]
+    unit: UnitScale = UnitScale.GB
+    policy: EvictionPolicy = EvictionPolicy.OLDEST_FIRST
+
+    @field_validator("unit", mode="before")
+    @classmethod
+    def unit_scale_validator(cls, v: str) -> UnitScale:
+        return UnitScale.from_value(v)
+
+
+class BrokerParams(BaseModel):
+    # Serve all devices from a single MQTT broker, instead of one per device
+    shared: bool = False
+
+
+# Maximum number of packets read from the socket on each wakeup
+READ_BATCH = 64
+
+
+class MQTTOverflowPolicy(StrEnum):
+    # Stop reading from the socket until messages are consumed,
+    # so that TCP flow control slows down the sender
+    BLOCK = "block"
+    # Discard the oldest message waiting to be consumed
+    DROP_OLDEST = "drop_oldest"
+    # Discard the incoming message
+    DROP_NEWEST = "drop_newest"
+
+
+class MQTTClientParams(BaseModel):
+    # Number of received messages waiting to be consumed, per client
+    buffer: int = Field(default=100, ge=1)
+    # What to do with incoming messages once the buffer is full
+    overflow: MQTTOverflowPolicy = MQTTOverflowPolicy.DROP_OLDEST
+    # Maximum number of packets read on each socket wakeup
+    read_batch: int = Field(default=READ_BATCH, ge=1)
+    # Socket send buffer size in bytes. Default: as set by the OS
+    send_buffer: Optional[int] = Field(default=None, ge=1024)
+
+
+class InferenceParams(BaseModel):
+    # Decode incoming inferences once, storing them next to the raw files,
+    # for devices that have a schema configured
+    decode_on_ingest: bool = False
+
+
+class StartupParams(BaseModel):
+    # Number of devices brought up concurrently when the server starts
+    parallelism: int = Field(default=8, ge=1)
+
+
 class LocalConsoleConfig(BaseModel):
     deployment: DeploymentConfig = DeploymentConfig()
     webserver: WebserverParams
+    storage: StorageBudgetConfig | None = None
+    broker: BrokerParams = BrokerParams()
+    mqtt_client: MQTTClientParams = MQTTClientParams()
+    inference: InferenceParams = InferenceParams()
+    startup: StartupParams = StartupParams()
 
 
 class GlobalConfiguration(BaseModel):
@@ -0,0 +1,142 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import logging
+import threading
+
+from local_console.core.config import Config
+from local_console.core.files.exceptions import FileNotFound
+from local_console.core.schemas.schemas import DeviceID
+from local_console.core.schemas.schemas import EvictionPolicy
+from local_console.core.schemas.schemas import StorageBudgetConfig
+from local_console.utils.fstools import size_unit_to_bytes
+from local_console.utils.fstools import StorageSizeWatcher
+from local_console.utils.singleton import Singleton
+
+logger = logging.getLogger(__name__)
+
+
+class StorageBudget(metaclass=Singleton):
+    """
+    Optional storage limit shared by all devices, which is enforced
+    on top of the limit of each device by deleting files across all
+    of them, in the order dictated by the configured policy:
+
+    - oldest_first: the oldest file among all devices.
+    - fair_share: the oldest file of the device using the most storage.
+    - images_first: the oldest image among all devices, and only once
+      there are no images left, the oldest inference file.
+
+    Usage is taken from the bookkeeping of the size watcher of each
+    device, so that no directories are scanned. Files of devices which
+    do not have automatic deletion enabled are never deleted; instead,
+    those devices do not accept files while the budget is exceeded.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._watchers: dict[DeviceID, StorageSizeWatcher] = {}
+        self.config: StorageBudgetConfig | None = None
+        self.limit: int | None = None
+
+    def configure(self, config: StorageBudgetConfig | None) -> None:
+        with self._lock:
+            self.config = config
+            self.limit = (
+                size_unit_to_bytes(config.size, config.unit) if config else None
+            )
+        logger.debug(f"Storage budget set to {self.limit} bytes")
+
+    def reset(self) -> None:
+        with self._lock:
+            self._watchers.clear()
+        self.configure(None)
+
+    def register(self, device_id: DeviceID, watcher: StorageSizeWatcher) -> None:
+        with self._lock:
+            self._watchers[device_id] = watcher
+
+    def unregister(self, device_id: DeviceID) -> None:
+        with self._lock:
+            self._watchers.pop(device_id, None)
+
+    def usage(self) -> dict[DeviceID, int]:
+        with self._lock:
+            return {
+                device_id: watcher.content.size
+                for device_id, watcher in self._watchers.items()
+            }
+
+    def total(self) -> int:
+        return sum(self.usage().values())
+
+    def can_accept(self) -> bool:
+        return self.limit is None or self.total() <= self.limit
+
+    def enforce(self) -> None:
+        """
+        Deletes files until the total usage fits in the budget.
+        """
+        if self.limit is None:
+            return
+
+        with self._lock:
+            total = self.total()
+            while total > self.limit:
+                victim = self._select()
+                if not victim:
+                    logger.warning(
+                        f"Storage budget exceeded ({total} > {self.limit} bytes), but no device has automatic deletion enabled"
+                    )
+                    return
+                watcher, images_only = victim
+                entry = watcher.evict(images_only)
+                if not entry:
+                    return
+                total -= entry.size
+
+    def _select(self) -> tuple[StorageSizeWatcher, bool] | None:
+        assert self.config
+        candidates = [
+            watcher
+            for device_id, watcher in self._watchers.items()
+            if watcher.oldest() and self._auto_deletion(device_id)
+        ]
+        if not candidates:
+            return None
+
+        policy = self.config.policy
+        if policy == EvictionPolicy.IMAGES_FIRST:
+            with_images = [w for w in candidates if w.oldest(images_only=True)]
+            if with_images:
+                return min(with_images, key=lambda w: _age(w, images_only=True)), True
+        elif policy == EvictionPolicy.FAIR_SHARE:
+            return max(candidates, key=lambda w: w.content.size), False
+
+        return min(candidates, key=lambda w: _age(w)), False
+
+    @staticmethod
+    def _auto_deletion(device_id: DeviceID) -> bool:
+        try:
+            return bool(Config().get_persistent_attr(device_id, "auto_deletion"))
+        except FileNotFound:
+            # Device no longer configured
+            return False
+
+
+def _age(watcher: StorageSizeWatcher, images_only: bool = False) -> int:
+    oldest = watcher.oldest(images_only)
+    assert oldest
+    return oldest.age
@@ -18,11 +18,13 @@ from typing import Annotated
 from fastapi import Depends
 from fastapi import Request
 from local_console.core.deploy.deployment_manager import DeploymentManager
+from local_console.core.deploy.rollout import Rollouts
 from local_console.core.deploy_config import DeployConfigManager
 from local_console.core.edge_apps import EdgeAppsManager
 from local_console.core.firmwares import FirmwareManager
 from local_console.core.models import ModelManager
 from local_console.fastapi.dependencies.commons import file_manager
+from local_console.fastapi.dependencies.commons import InjectDeployBackgroundTask
 from local_console.fastapi.dependencies.devices import InjectDeviceServices
 
 
@@ -76,6 +78,14 @@ def deployment_manager(
     return app.state.deployment_manager
 
 
+def rollouts(request: Request, tasks: InjectDeployBackgroundTask) -> Rollouts:
+    app = request.app
+    if not hasattr(app.state, "rollouts"):
+        app.state.rollouts = Rollouts(tasks)
+    assert isinstance(app.state.rollouts, Rollouts)
+    return app.state.rollouts
+
+
 InjectModelManager = Annotated[ModelManager, Depends(model_manager)]
 
 InjectFirmwareManager = Annotated[FirmwareManager, Depends(firmware_manager)]
@@ -87,3 +97,5 @@ InjectDeployConfigManager = Annotated[
 ]
 
 InjectDeploymentManager = Annotated[DeploymentManager, Depends(deployment_manager)]
+
+InjectRollouts = Annotated[Rollouts, Depends(rollouts)]
@@ -21,8 +21,14 @@ from typing import Any
 
 from fastapi import Depends
 from fastapi import FastAPI
+from fastapi import Request
+from fastapi import status
 from fastapi import WebSocket
 from fastapi import WebSocketDisconnect
+from local_console.core.notifications import NOTIFICATION_BACKLOG
+from local_console.core.notifications import NotificationHub
+from local_console.core.notifications import OverflowPolicy
+from local_console.core.notifications import Subscription
 from trio import CancelScope
 from trio import MemoryReceiveChannel
 from trio import MemorySendChannel
@@ -42,42 +48,70 @@ async def messages_channel(
     implementing notifications over websockets while maintaining
     the core camera logic agnostic with respect to this aspect.
     """
-    channels: tuple[MemorySendChannel, MemoryReceiveChannel] = open_memory_channel(0)
+    channels: tuple[MemorySendChannel, MemoryReceiveChannel] = open_memory_channel(
+        NOTIFICATION_BACKLOG
+    )
     sender_ch, receiver_ch = channels
     yield sender_ch, receiver_ch
 
 
 class WebSocketManager:
+    """
+    Relays the notifications received over the channel to every
+    connected websocket, by means of a notification hub. Clients may
+    narrow down what they get with the `device_id` and `kind` query
+    parameters (which may be repeated), and choose the `policy` to
+    apply when they fall behind.
+    """
+
     def __init__(self, nursery: Nursery, receiver_channel: MemoryReceiveChannel):
         self._nursery = nursery
-        self._recv_channel = receiver_channel
+        self.hub = NotificationHub()
+        nursery.start_soon(self.hub.run, receiver_channel)
 
         self.active_connections: list[WebSocket] = []
 
     async def loop_for(self, websocket: WebSocket) -> None:
-        await websocket.accept()
-        self.active_connections.append(websocket)
-
-        # Launch message listener in the background.
-        # About using .clone() below, see:
-        # https://trio.readthedocs.io/en/stable/reference-core.html#managing-multiple-producers-and-or-multiple-consumers
-        cancel_scope = await self._nursery.start(
-            self._push_from_channel, websocket, self._recv_channel.clone()
-        )
-        # Maintain connection alive, cancelling the listener upon disconnect
+        params = websocket.query_params
         try:
-            while True:
-                await websocket.receive_bytes()
-        except WebSocketDisconnect:
-            self.disconnect(websocket)
-        finally:
-            # Cause the receive channel listener task to finish
-            cancel_scope.cancel()
-
-    async def _push_from_channel(
+            policy = OverflowPolicy(
+                params.get("policy", OverflowPolicy.DROP_OLDEST.value)
+            )
+        except ValueError:
+            logger.warning(f"Rejecting websocket with policy {params.get('policy')}")
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+            return
+
+        device_ids = params.getlist("device_id")
+        kinds = params.getlist("kind")
+        await websocket.accept()
+        with self.hub.subscribe(
+            policy=policy,
+            device_ids=set(device_ids) if device_ids else None,
+            kinds=set(kinds) if kinds else None,
+        ) as subscription:
+            self.active_connections.append(websocket)
+            try:
+                # Launch message listener in the background.
+                cancel_scope = await self._nursery.start(
+                    self._push_from_subscription, websocket, subscription
+                )
+                # Maintain connection alive, cancelling the listener upon disconnect
+                try:
+                    while True:
+                        await websocket.receive_bytes()
+                except WebSocketDisconnect:
+                    pass
+                finally:
+                    # Cause the subscription listener task to finish
+                    cancel_scope.cancel()
+            finally:
+                self.disconnect(websocket)
+
+    async def _push_from_subscription(
         self,
         websocket: WebSocket,
-        receiver: MemoryReceiveChannel,
+        subscription: Subscription,
         *,
         task_status: Any = TASK_STATUS_IGNORED,
     ) -> None:
@@ -85,10 +119,9 @@ class WebSocketManager:
             # Stand ready for this task to be finished upon websocket termination
             task_status.started(scope)
 
-            async with receiver:
-                async for message in receiver:
-                    logger.debug(f"Notifying over websocket: {message}")
-                    await websocket.send_text(message.model_dump_json())
+            async for message in subscription:
+                logger.debug(f"Notifying over websocket: {message}")
+                await websocket.send_text(message)
 
     def disconnect(self, websocket: WebSocket) -> None:
         self.active_connections.remove(websocket)
@@ -106,4 +139,8 @@ def websockets_from_app(app: FastAPI) -> WebSocketManager:
     return app.state.websockets
 
 
-InjectWebSocketManager = Annotated[WebSocketManager, Depends(websockets_from_app)]
+def websockets(request: Request) -> WebSocketManager:
+    return websockets_from_app(request.app)
+
+
+InjectWebSocketManager = Annotated[WebSocketManager, Depends(websockets)]
@@ -21,6 +21,8 @@ import trio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from local_console.core.config import Config
+from local_console.core.files.decoding import DecodingPool
+from local_console.core.storage_budget import StorageBudget
 from local_console.fastapi.dependencies.commons import added_file_manager
 from local_console.fastapi.dependencies.commons import running_background_task
 from local_console.fastapi.dependencies.commons import stop_background_task
@@ -35,6 +37,7 @@ from local_console.fastapi.routes import files
 from local_console.fastapi.routes import firmwares
 from local_console.fastapi.routes import models
 from local_console.fastapi.routes import provisioning
+from local_console.fastapi.routes import storage
 from local_console.fastapi.routes.deploy_configs import router as deploy_configs
 from local_console.fastapi.routes.deploy_history import router as deploy_history
 from local_console.fastapi.routes.devices import router as devices
@@ -43,6 +46,7 @@ from local_console.fastapi.routes.images import router as images
 from local_console.fastapi.routes.inferenceresults import router as inferenceresults
 from local_console.fastapi.routes.interfaces import router as interfaces
 from local_console.fastapi.routes.notifications import router as notifications
+from local_console.fastapi.routes.rollouts import router as rollouts
 from local_console.servers.webserver import AsyncWebserver
 
 logger = logging.getLogger(__name__)
@@ -58,10 +62,12 @@ def app_router(app: FastAPI) -> None:
     app.include_router(edge_apps.router)
     app.include_router(deploy_configs.router)
     app.include_router(deploy_history.router)
+    app.include_router(rollouts.router)
     app.include_router(images.router)
     app.include_router(inferenceresults.router)
     app.include_router(interfaces.router)
     app.include_router(health.router)
+    app.include_router(storage.router)
     app.include_router(
         notifications.router,
         prefix="/ws",
@@ -81,30 +87,40 @@ def enable_cors(app: FastAPI) -> None:
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     devices = Config().get_device_configs()
-    async with (
-        trio.open_nursery() as nursery,
-        running_background_task(app),
-        added_file_manager(app),
-        AsyncWebserver(Config().data.config.webserver.port) as webserver,
-        messages_channel(nursery) as (send_ch, recv_ch),
-        send_ch,
-        recv_ch,
-    ):
-        add_websockets(app, nursery, recv_ch)
-        add_device_service(app, nursery, send_ch, webserver)
-        ds = device_service_from_app(app)
+    StorageBudget().configure(Config().data.config.storage)
+    Config().start_write_behind()
+    try:
+        async with (
+            trio.open_nursery() as nursery,
+            running_background_task(app),
+            added_file_manager(app),
+            AsyncWebserver(
+                Config().data.config.webserver.port,
+                max_transfers=Config().data.config.webserver.max_transfers,
+            ) as webserver,
+            messages_channel(nursery) as (send_ch, recv_ch),
+            send_ch,
+            recv_ch,
+        ):
+            add_websockets(app, nursery, recv_ch)
+            add_device_service(app, nursery, send_ch, webserver)
+            ds = device_service_from_app(app)
 
-        await nursery.start(ds.file_inbox.blobs_dispatch_task)
-        await ds.init_devices(devices)
-        logger.info("Server has started")
+            await nursery.start(ds.file_inbox.blobs_dispatch_task)
+            await ds.init_devices(devices)
+            logger.info("Server has started")
 
-        yield
+            yield
 
-        logger.debug("Entering shutdown phase")
-        ds.shutdown()
-        await stop_background_task(app)
-        # FIXME: Some tasks remain running and nursery gets blocked
-        nursery.cancel_scope.cancel()
+            logger.debug("Entering shutdown phase")
+            ds.shutdown()
+            await stop_background_task(app)
+            # FIXME: Some tasks remain running and nursery gets blocked
+            nursery.cancel_scope.cancel()
+    finally:
+        # Flush the pending configuration changes, even if startup failed
+        Config().stop_write_behind()
+        DecodingPool().shutdown()
 
     logger.info("Server has stopped")
 
@@ -16,7 +16,10 @@
 import abc
 import logging
 from abc import ABC
+from collections.abc import Iterator
+from itertools import islice
 from typing import Any
+from typing import Protocol
 from typing import TypeVar
 
 from local_console.core.edge_apps import EdgeApp
@@ -25,6 +28,19 @@ from local_console.core.firmwares import Firmware
 logger = logging.getLogger(__name__)
 
 LIST_ITEM = TypeVar("LIST_ITEM")
+SOURCE_ITEM = TypeVar("SOURCE_ITEM", covariant=True)
+
+
+class KeysetSource(Protocol[SOURCE_ITEM]):
+    """
+    A collection kept in a stable order, which can be resumed
+    right after the element identified by a given key without
+    traversing the preceding elements.
+    """
+
+    def __contains__(self, key: str) -> bool: ...
+
+    def iter_after(self, key: str | None) -> Iterator[SOURCE_ITEM]: ...
 
 
 class Paginator(ABC):
@@ -42,6 +58,37 @@ class Paginator(ABC):
             continuation_token = self._get_element_key(list_elements[ending_index - 1])
         return paginated_elements, continuation_token
 
+    def paginate_from(
+        self,
+        elements: Iterator[LIST_ITEM],
+        limit: int,
+    ) -> tuple[list[LIST_ITEM], str | None]:
+        """
+        Variant of `paginate` for sources that already yield the elements
+        located after the continuation token. At most `limit + 1` elements
+        are consumed from them.
+        """
+        paginated_elements = list(islice(elements, limit + 1))
+        continuation_token = None
+        if limit and len(paginated_elements) > limit:
+            continuation_token = self._get_element_key(paginated_elements[limit - 1])
+        return paginated_elements[:limit], continuation_token
+
+    def paginate_after(
+        self,
+        source: KeysetSource[LIST_ITEM],
+        limit: int,
+        continuation_token: str | None = None,
+    ) -> tuple[list[LIST_ITEM], str | None]:
+        """
+        Keyset variant of `paginate`: the continuation token is looked up
+        in the source, so that only the returned page is visited.
+        """
+        if continuation_token and continuation_token not in source:
+            logger.warning(f"invalid continuation token {continuation_token}")
+            continuation_token = None
+        return self.paginate_from(source.iter_after(continuation_token), limit)
+
     @abc.abstractmethod
     def _get_element_key(self, element: Any) -> str: ...
 
@@ -26,8 +26,8 @@ from local_console.fastapi.routes.deploy_history.dto import DeployHistoryList
 
 class DeployHistoryPaginator(Paginator):
     @classmethod
-    def _get_element_key(cls, element: DeployHistory) -> str:
-        return element.deploy_id
+    def _get_element_key(cls, element: TaskEntity) -> str:
+        return element.id
 
 
 class DeployHistoryController:
@@ -92,8 +92,11 @@ class DeployHistoryController:
     def get_list(
         self, limit: int = 10, starting_after: str | None = None
     ) -> DeployHistoryList:
+        tasks, continuation = self.paginator.paginate_after(
+            self.__tasks, limit, starting_after
+        )
         histories: list[DeployHistory] = []
-        for task in self.__tasks.list():
+        for task in tasks:
             deploy_history = self._to_deploy_history(task)
             deploy_history.devices = (
                 self._deployment_manager.get_device_history_for_deployment(
@@ -101,9 +104,6 @@ class DeployHistoryController:
                 )
             )
             histories.append(deploy_history)
-        paginated, continuation = self.paginator.paginate(
-            histories, limit, starting_after
-        )
         return DeployHistoryList(
-            deploy_history=paginated, continuation_token=continuation
+            deploy_history=histories, continuation_token=continuation
         )
@@ -108,6 +108,10 @@ class CameraConfigurationController:
         schema_file = config_obj.get_device_config(device_id).persist.vapp_schema_file
         return Path(schema_file) if schema_file else None
 
+    def get_labels_by_id(self, device_id: DeviceID) -> Path | None:
+        labels_file = config_obj.get_device_config(device_id).persist.vapp_labels_file
+        return Path(labels_file) if labels_file else None
+
     async def update(
         self, device_id: DeviceID, settings: CameraConfigurationDTO
     ) -> None:
@@ -115,7 +119,7 @@ class CameraConfigurationController:
         updated_config = self._create_updated_config(device_id, settings)
         camera.update_storage_config(updated_config)
         config_obj.get_device_config(device_id).persist = updated_config
-        config_obj.save_config()
+        config_obj.mark_dirty()
 
     def validate(
         self, device_id: DeviceID, settings: CameraConfigurationDTO
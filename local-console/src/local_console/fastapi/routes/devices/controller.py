@@ -19,6 +19,7 @@ import logging
 
 from fastapi import HTTPException
 from fastapi import status
+from local_console.clients.trio_paho_mqtt import MessageStats
 from local_console.core.camera.enums import ConnectionState
 from local_console.core.camera.schemas import DeviceStateInformation
 from local_console.core.commands.rpc_with_response import DirectCommandStatus
@@ -147,6 +148,16 @@ class DevicesController:
             )
         )
 
+    def mqtt_stats(self, device_id: DeviceID) -> MessageStats:
+        camera = self.device_service.get_camera(device_id)
+        stats = camera.mqtt_stats() if camera else None
+        if not stats:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Device {device_id} is not receiving MQTT messages",
+            )
+        return stats
+
     def _paginate(
         self,
         devices: list[DeviceStateInformation],
@@ -19,6 +19,7 @@ from fastapi import APIRouter
 from fastapi import HTTPException
 from fastapi import Query
 from fastapi import status
+from local_console.clients.trio_paho_mqtt import MessageStats
 from local_console.core.camera.enums import ConnectionState
 from local_console.core.camera.schemas import DeviceStateInformation
 from local_console.core.error.base import UserException
@@ -96,6 +97,16 @@ async def get_device(
     return controller.get_device(device_id)
 
 
+@router.get(
+    "/{device_id}/mqtt/stats",
+    description="Returns counters of the MQTT messages received from a device: received, dropped for lack of buffer space, currently queued and the highest number ever queued.",
+)
+async def get_mqtt_stats(
+    device_id: DeviceID, controller: InjectDeviceController
+) -> MessageStats:
+    return controller.mqtt_stats(device_id)
+
+
 @router.post("")
 async def create_device(
     controller: InjectDeviceController, device: DevicePostDTO
@@ -15,7 +15,6 @@
 # SPDX-License-Identifier: Apache-2.0
 from fastapi import APIRouter
 from fastapi import Query
-from local_console.core.edge_apps import EdgeApp
 from local_console.core.edge_apps import PostEdgeAppsRequestIn
 from local_console.fastapi.dependencies.deploy import InjectEdgeAppsManager
 from local_console.fastapi.pagination import EdgeAppsPaginator
@@ -64,10 +63,8 @@ async def get_edge_apps(
         None, description="A token to use in pagination."
     ),
 ) -> GetEdgeAppsRequestOutDTO:
-    list_all_edge_apps: list[EdgeApp] = edge_app_manager.get_all_edge_apps()
-
-    list_filtered_edge_apps, continuation_token = EdgeAppsPaginator().paginate(
-        list_all_edge_apps, limit=limit, continuation_token=starting_after
+    list_filtered_edge_apps, continuation_token = EdgeAppsPaginator().paginate_after(
+        edge_app_manager, limit=limit, continuation_token=starting_after
     )
 
     list_filtered_edge_apps_dto = [
@@ -20,7 +20,6 @@ from fastapi import APIRouter
 from fastapi import Depends
 from fastapi import Query
 from fastapi import Request
-from local_console.core.firmwares import Firmware
 from local_console.core.firmwares import FirmwareIn
 from local_console.core.firmwares import FirmwareManager
 from local_console.fastapi.dependencies.commons import InjectFilesManager
@@ -91,9 +90,8 @@ async def get_firmwares(
         None, description="A token to use in pagination."
     ),
 ) -> FirmwareOutDTO:
-    list_all_firmwares: list[Firmware] = firmware_manager.get_all()
-    list_filtered_firmwares, new_continuation_token = FirmwaresPaginator().paginate(
-        list_all_firmwares, limit, starting_after
+    list_filtered_firmwares, new_continuation_token = (
+        FirmwaresPaginator().paginate_after(firmware_manager, limit, starting_after)
     )
 
     list_firmware_return: list[FirmwareInfoDTO] = []
@@ -25,10 +25,18 @@ class HealthController:
         self.device_service = device_service
 
     def health(self) -> HealthDTO:
+        startup = self.device_service.startup
         if self.device_service.started:
-            return HealthDTO(status="OK")
+            return HealthDTO(
+                status="OK",
+                devices_ready=startup.ready,
+                devices_total=startup.total,
+            )
         else:
             raise HTTPException(
                 status_code=status.HTTP_425_TOO_EARLY,
-                detail="Local Console backend still starting up",
+                detail=(
+                    "Local Console backend still starting up "
+                    f"({startup.ready} of {startup.total} devices up)"
+                ),
             )
@@ -18,3 +18,5 @@ from pydantic import BaseModel
 
 class HealthDTO(BaseModel):
     status: str = "OK"
+    devices_ready: int = 0
+    devices_total: int = 0
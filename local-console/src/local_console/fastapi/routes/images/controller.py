@@ -49,8 +49,8 @@ class ImagesController:
     def list(
         self, device_id: DeviceID, limit: int, starting_after: str | None
     ) -> FileListDTO:
-        paths = self.image_manager.list_for(device_id)
-        trimmed, continuation = self.paginator.paginate(paths, limit, starting_after)
+        paths = self.image_manager.iter_for(device_id, starting_after)
+        trimmed, continuation = self.paginator.paginate_from(paths, limit)
         listing = FileListDTO(
             data=[self._to_file_dto(image, device_id) for image in trimmed],
             continuation_token=continuation,
@@ -13,6 +13,23 @@
 # limitations under the License.
 #
 # SPDX-License-Identifier: Apache-2.0
+import logging
+from collections.abc import Iterable
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+from typing import IO
+
+from local_console.core.files.decoded import DecodedInferences
+from local_console.core.files.decoding import archive_sources
+from local_console.core.files.decoding import decode_sources
+from local_console.core.files.decoding import DecodingPool
+from local_console.core.files.decoding import DecodingSettings
+from local_console.core.files.decoding import directory_sources
+from local_console.core.files.decoding import encode
+from local_console.core.files.decoding import ExportFormat
+from local_console.core.files.decoding import Source
+from local_console.core.files.decoding import TimeRange
 from local_console.core.files.inference import Inference
 from local_console.core.files.inference import InferenceDetail
 from local_console.core.files.inference import InferenceDetailOut
@@ -20,14 +37,22 @@ from local_console.core.files.inference import InferenceManager
 from local_console.core.files.inference import InferenceOut
 from local_console.core.files.inference import InferenceType
 from local_console.core.files.inference import InferenceWithSource
+from local_console.core.files.rollup import Bucket
+from local_console.core.files.rollup import InferenceRollups
+from local_console.core.files.rollup import SCORE_BINS
 from local_console.core.schemas.schemas import DeviceID
 from local_console.fastapi.pagination import Paginator
 from local_console.fastapi.routes.images.controller import ImagesController
+from local_console.fastapi.routes.inferenceresults.dto import AnalyticsWindowDTO
+from local_console.fastapi.routes.inferenceresults.dto import ClassCountDTO
+from local_console.fastapi.routes.inferenceresults.dto import InferenceAnalyticsDTO
 from local_console.fastapi.routes.inferenceresults.dto import InferenceElementDTO
 from local_console.fastapi.routes.inferenceresults.dto import InferenceImagePairDTO
 from local_console.fastapi.routes.inferenceresults.dto import InferenceListDTO
 from local_console.fastapi.routes.inferenceresults.dto import InferenceWithImageListDTO
 
+logger = logging.getLogger(__name__)
+
 
 def id(inf: InferenceWithSource) -> str:
     return inf.path.name
@@ -53,8 +78,13 @@ class InferencesController:
         self.paginator = paginator or InferencePaginator()
 
     def _to_inf_det_out(
-        self, infs_det: list[InferenceDetail]
+        self, infs_det: list[InferenceDetail], decoded: list[Any] | None = None
     ) -> list[InferenceDetailOut]:
+        if decoded is not None and len(decoded) == len(infs_det):
+            return [
+                InferenceDetailOut(time=inf_det.t, data=data, ftype=InferenceType.JSON)
+                for inf_det, data in zip(infs_det, decoded)
+            ]
         return [
             InferenceDetailOut(
                 time=inf_det.t,
@@ -64,63 +94,186 @@ class InferencesController:
             for inf_det in infs_det
         ]
 
-    def _to_inf_out(self, inf: Inference) -> InferenceOut:
+    def _to_inf_out(
+        self, inf: Inference, decoded: list[Any] | None = None
+    ) -> InferenceOut:
         return InferenceOut(
             device_id=inf.device_id,
             model_id=inf.model_id,
             image=inf.image,
-            inferences=self._to_inf_det_out(inf.inferences),
+            inferences=self._to_inf_det_out(inf.inferences, decoded),
         )
 
-    def _to_dto(self, inf: InferenceWithSource) -> InferenceElementDTO:
+    def _decoded_store(
+        self, device_id: DeviceID, decoded: bool
+    ) -> DecodedInferences | None:
+        return DecodedInferences.for_device(device_id) if decoded else None
+
+    def _to_decoded_inf_out(
+        self, inf: InferenceWithSource, store: DecodedInferences | None
+    ) -> InferenceOut:
+        """
+        Falls back to the raw inferences if they cannot be decoded.
+        """
+        decoded = None
+        if store is not None:
+            try:
+                decoded = store.get(inf.path)
+            except Exception as e:
+                logger.warning(f"Could not decode inference {inf.path}: {e}")
+        return self._to_inf_out(inf.inference, decoded)
+
+    def _to_dto(
+        self, inf: InferenceWithSource, store: DecodedInferences | None = None
+    ) -> InferenceElementDTO:
         return InferenceElementDTO(
             id=id(inf),
             model_id=inf.inference.model_id,
-            inference_result=self._to_inf_out(inf.inference),
+            inference_result=self._to_decoded_inf_out(inf, store),
         )
 
     def list(
-        self, device_id: DeviceID, limit: int, starting_after: str | None
+        self,
+        device_id: DeviceID,
+        limit: int,
+        starting_after: str | None,
+        decoded: bool = False,
     ) -> InferenceListDTO:
-        paths = self.manager.list(device_id)
-        trimmed, continuation = self.paginator.paginate(paths, limit, starting_after)
+        inferences = self.manager.iterate(device_id, starting_after)
+        trimmed, continuation = self.paginator.paginate_from(inferences, limit)
+        store = self._decoded_store(device_id, decoded)
         return InferenceListDTO(
-            data=[self._to_dto(inference) for inference in trimmed],
+            data=[self._to_dto(inference, store) for inference in trimmed],
             continuation_token=continuation,
         )
 
-    def list_with_images(
+    def _iterate_pairs(
         self,
         device_id: DeviceID,
         img_controller: ImagesController,
-        limit: int,
         starting_after: str | None,
-    ) -> InferenceWithImageListDTO:
-        paths_ifc = self.manager.list(device_id)
-        paths_img = img_controller.image_manager.list_for(device_id)
-
-        in_inferences = {ifc.path.stem: ifc for ifc in paths_ifc}
-        in_images = {img.stem: img for img in paths_img}
+        store: DecodedInferences | None = None,
+    ) -> Iterator[InferenceImagePairDTO]:
+        images: dict[str, Path] = {}
 
-        ts_in_images = set(in_images.keys())
-        ts_in_inferences = set(in_inferences.keys())
-        paired_ids = ts_in_images & ts_in_inferences
+        def has_image(inference_path: Path) -> bool:
+            stem = inference_path.stem
+            image = img_controller.image_manager.find_by_stem(device_id, stem)
+            if image:
+                images[stem] = image
+            return image is not None
 
-        pairs = [
-            InferenceImagePairDTO(
+        for inference in self.manager.iterate(device_id, starting_after, has_image):
+            pid = inference.path.stem
+            yield InferenceImagePairDTO(
                 id=pid,
-                image=img_controller._to_file_dto(in_images[pid], device_id),
-                inference=self._to_dto(in_inferences[pid]),
+                image=img_controller._to_file_dto(images.pop(pid), device_id),
+                inference=self._to_dto(inference, store),
             )
-            for pid in sorted(paired_ids, reverse=True)
-        ]
 
+    def list_with_images(
+        self,
+        device_id: DeviceID,
+        img_controller: ImagesController,
+        limit: int,
+        starting_after: str | None,
+        decoded: bool = False,
+    ) -> InferenceWithImageListDTO:
         paginator = InferenceImagePairPaginator()
-        trimmed, token = paginator.paginate(pairs, limit, starting_after)
+        store = self._decoded_store(device_id, decoded)
+        trimmed, token = paginator.paginate_from(
+            self._iterate_pairs(device_id, img_controller, starting_after, store),
+            limit,
+        )
         return InferenceWithImageListDTO(
             data=trimmed,
             continuation_token=token,
         )
 
-    def get(self, device_id: DeviceID, inference_id: str) -> InferenceOut:
-        return self._to_inf_out(self.manager.get(device_id, inference_id).inference)
+    def get(
+        self, device_id: DeviceID, inference_id: str, decoded: bool = False
+    ) -> InferenceOut:
+        inference = self.manager.get(device_id, inference_id)
+        store = self._decoded_store(device_id, decoded)
+        return self._to_decoded_inf_out(inference, store)
+
+    def _export(
+        self,
+        sources: Iterable[Source],
+        settings: DecodingSettings,
+        output_format: ExportFormat,
+    ) -> Iterator[bytes]:
+        records = decode_sources(sources, settings, pool=DecodingPool())
+        return encode(records, output_format)
+
+    def export(
+        self,
+        device_id: DeviceID,
+        settings: DecodingSettings,
+        time_range: TimeRange,
+        output_format: ExportFormat,
+    ) -> Iterator[bytes]:
+        """
+        Decodes the stored inferences of a device within a time range.
+        """
+        folder = self.manager.files.folder_for(device_id)
+        sources = directory_sources(folder, time_range)
+        return self._export(sources, settings, output_format)
+
+    def export_archive(
+        self,
+        archive: IO[bytes],
+        settings: DecodingSettings,
+        time_range: TimeRange,
+        output_format: ExportFormat,
+    ) -> Iterator[bytes]:
+        """
+        Decodes the inferences contained in a zip archive within a time range.
+        """
+        sources = archive_sources(archive, time_range)
+        return self._export(sources, settings, output_format)
+
+    def _to_window_dto(
+        self,
+        start: str,
+        bucket: Bucket,
+        window: int,
+        labels: dict[int, str] | None,
+    ) -> AnalyticsWindowDTO:
+        return AnalyticsWindowDTO(
+            start=start,
+            files=bucket.files,
+            frames=bucket.frames,
+            empty_frames=bucket.empty_frames,
+            ingestion_rate=bucket.files / window,
+            detections=[
+                ClassCountDTO(
+                    class_id=class_id,
+                    class_name=labels.get(class_id, "Unknown") if labels else None,
+                    count=count,
+                )
+                for class_id, count in sorted(bucket.detections.items())
+            ],
+            score_histogram=bucket.scores.tolist(),
+        )
+
+    def analytics(
+        self,
+        device_id: DeviceID,
+        settings: DecodingSettings,
+        time_range: TimeRange,
+        window: int,
+    ) -> InferenceAnalyticsDTO:
+        """
+        Aggregates the inferences of a device over windows of `window` minutes.
+        """
+        folder = self.manager.files.folder_for(device_id)
+        rollup = InferenceRollups().get(device_id, folder, settings.schema)
+        return InferenceAnalyticsDTO(
+            window=window,
+            score_bins=[i / SCORE_BINS for i in range(SCORE_BINS)],
+            data=[
+                self._to_window_dto(start, bucket, window, settings.labels)
+                for start, bucket in rollup.windows(time_range, window)
+            ],
+        )
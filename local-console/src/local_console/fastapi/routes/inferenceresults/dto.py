@@ -42,3 +42,25 @@ class InferenceImagePairDTO(BaseModel):
 class InferenceWithImageListDTO(BaseModel):
     data: list[InferenceImagePairDTO]
     continuation_token: str | None
+
+
+class ClassCountDTO(BaseModel):
+    class_id: int
+    class_name: str | None = None
+    count: int
+
+
+class AnalyticsWindowDTO(BaseModel):
+    start: str
+    files: int
+    frames: int
+    empty_frames: int
+    ingestion_rate: float
+    detections: list[ClassCountDTO]
+    score_histogram: list[int]
+
+
+class InferenceAnalyticsDTO(BaseModel):
+    window: int
+    score_bins: list[float]
+    data: list[AnalyticsWindowDTO]
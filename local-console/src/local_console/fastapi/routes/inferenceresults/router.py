@@ -13,17 +13,26 @@
 # limitations under the License.
 #
 # SPDX-License-Identifier: Apache-2.0
+import shutil
 from base64 import b64decode
+from collections.abc import Iterator
 from pathlib import Path as PathLib
+from tempfile import TemporaryFile
 from typing import Annotated
 
 from fastapi import APIRouter
+from fastapi import File
 from fastapi import HTTPException
 from fastapi import Path
 from fastapi import Query
 from fastapi import status
+from fastapi import UploadFile
 from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse
 from local_console.core.camera.flatbuffers import flatbuffer_binary_to_json
+from local_console.core.files.decoding import DecodingSettings
+from local_console.core.files.decoding import ExportFormat
+from local_console.core.files.decoding import TimeRange
 from local_console.core.files.inference import InferenceOut
 from local_console.core.schemas.schemas import DeviceID
 from local_console.fastapi.routes.devices.configuration.dependencies import (
@@ -33,18 +42,29 @@ from local_console.fastapi.routes.images.dependencies import InjectImagesControl
 from local_console.fastapi.routes.inferenceresults.dependencies import (
     InjectInferencesController,
 )
+from local_console.fastapi.routes.inferenceresults.dto import InferenceAnalyticsDTO
 from local_console.fastapi.routes.inferenceresults.dto import InferenceListDTO
 from local_console.fastapi.routes.inferenceresults.dto import InferenceWithImageListDTO
+from starlette.concurrency import run_in_threadpool
 
 
 router = APIRouter(prefix="/inferenceresults", tags=["Inferences"])
 
+# Routes taking this parameter are not coroutines, so that FastAPI runs
+# them in a worker thread, as decoding inferences is blocking.
+DecodedQuery = Annotated[
+    bool,
+    Query(
+        description="Return inferences decoded with the schema and labels configured for the device, when available. Default: false"
+    ),
+]
+
 
 @router.get(
     "/devices/{device_id}",
     description="Returns the model information and inference data from a specific device.",
 )
-async def list(
+def list(
     controller: InjectInferencesController,
     device_id: DeviceID,
     limit: Annotated[
@@ -61,15 +81,16 @@ async def list(
             description="Return objects strictly after the one identified by this value. Use it together with 'continuation_token' from previous calls in order to perform pagination."
         ),
     ] = None,
+    decoded: DecodedQuery = False,
 ) -> InferenceListDTO:
-    return controller.list(device_id, limit, starting_after)
+    return controller.list(device_id, limit, starting_after, decoded)
 
 
 @router.get(
     "/devices/{device_id}/withimage",
     description="Returns complete entries of (inference, image) data from a specific device.",
 )
-async def list_with_images(
+def list_with_images(
     controller: InjectInferencesController,
     img_controller: InjectImagesController,
     device_id: DeviceID,
@@ -87,8 +108,11 @@ async def list_with_images(
             description="Return objects strictly after the one identified by this value. Use it together with 'continuation_token' from previous calls in order to perform pagination."
         ),
     ] = None,
+    decoded: DecodedQuery = False,
 ) -> InferenceWithImageListDTO:
-    return controller.list_with_images(device_id, img_controller, limit, starting_after)
+    return controller.list_with_images(
+        device_id, img_controller, limit, starting_after, decoded
+    )
 
 
 @router.get(
@@ -137,11 +161,137 @@ async def flatbuffers_to_json(
     return JSONResponse(content=json_content, status_code=status.HTTP_200_OK)
 
 
+StartQuery = Annotated[
+    str | None,
+    Query(
+        pattern=r"^\d{1,17}$",
+        description="Only decode inferences taken at or after this time, as YYYYMMDDHHMMSSfff or any prefix of it.",
+    ),
+]
+EndQuery = Annotated[
+    str | None,
+    Query(
+        pattern=r"^\d{1,17}$",
+        description="Only decode inferences taken at or before this time, as YYYYMMDDHHMMSSfff or any prefix of it.",
+    ),
+]
+FormatQuery = Annotated[
+    ExportFormat,
+    Query(description="Output format. Default: jsonl"),
+]
+
+
+def _decoding_settings(
+    controller: InjectCameraConfigurationController, device_id: DeviceID
+) -> DecodingSettings:
+    return DecodingSettings.load(
+        controller.get_schema_by_id(device_id),
+        controller.get_labels_by_id(device_id),
+    )
+
+
+def _streaming_response(
+    content: Iterator[bytes], device_id: DeviceID, output_format: ExportFormat
+) -> StreamingResponse:
+    return StreamingResponse(
+        content,
+        media_type=output_format.media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{device_id}.{output_format}"'
+        },
+    )
+
+
+@router.get(
+    "/devices/{device_id}/export",
+    description="Decodes the stored inferences of a device within a time range, using its configured schema and labels, and streams them in the requested format.",
+)
+async def export(
+    controller: InjectInferencesController,
+    config_controller: InjectCameraConfigurationController,
+    device_id: DeviceID,
+    start: StartQuery = None,
+    end: EndQuery = None,
+    format: FormatQuery = ExportFormat.JSONL,
+) -> StreamingResponse:
+    settings = _decoding_settings(config_controller, device_id)
+    content = controller.export(device_id, settings, TimeRange(start, end), format)
+    return _streaming_response(content, device_id, format)
+
+
+@router.post(
+    "/devices/{device_id}/export",
+    description="Decodes the inferences in an uploaded zip archive within a time range, using the configured schema and labels of a device, and streams them in the requested format.",
+)
+async def export_archive(
+    controller: InjectInferencesController,
+    config_controller: InjectCameraConfigurationController,
+    device_id: DeviceID,
+    archive: Annotated[UploadFile, File()],
+    start: StartQuery = None,
+    end: EndQuery = None,
+    format: FormatQuery = ExportFormat.JSONL,
+) -> StreamingResponse:
+    settings = _decoding_settings(config_controller, device_id)
+    # The upload may be closed once this handler returns, before streaming ends
+    spool = TemporaryFile()
+    try:
+        await run_in_threadpool(shutil.copyfileobj, archive.file, spool)
+        spool.seek(0)
+        decoded = controller.export_archive(
+            spool, settings, TimeRange(start, end), format
+        )
+    except Exception:
+        spool.close()
+        raise
+
+    def content() -> Iterator[bytes]:
+        with spool:
+            yield from decoded
+
+    return _streaming_response(content(), device_id, format)
+
+
+@router.get(
+    "/devices/{device_id}/analytics",
+    description="Returns aggregates of the inferences of a device over consecutive time windows: detections per class, score histograms, frames without detections and ingestion rate.",
+)
+def analytics(
+    controller: InjectInferencesController,
+    config_controller: InjectCameraConfigurationController,
+    device_id: DeviceID,
+    start: Annotated[
+        str | None,
+        Query(
+            pattern=r"^\d{1,17}$",
+            description="Only aggregate inferences taken at or after this time, as YYYYMMDDHHMMSSfff or any prefix of it.",
+        ),
+    ] = None,
+    end: Annotated[
+        str | None,
+        Query(
+            pattern=r"^\d{1,17}$",
+            description="Only aggregate inferences taken at or before this time, as YYYYMMDDHHMMSSfff or any prefix of it.",
+        ),
+    ] = None,
+    window: Annotated[
+        int,
+        Query(
+            ge=1,
+            le=1440,
+            description="Length of each time window, in minutes. Windows are aligned to the start of the day. Default: 1",
+        ),
+    ] = 1,
+) -> InferenceAnalyticsDTO:
+    settings = _decoding_settings(config_controller, device_id)
+    return controller.analytics(device_id, settings, TimeRange(start, end), window)
+
+
 @router.get(
     "/devices/{device_id}/{id}",
     description="Returns a specific inference result from a specific device.",
 )
-async def get_by_id(
+def get_by_id(
     controller: InjectInferencesController,
     device_id: DeviceID,
     id: Annotated[
@@ -150,5 +300,6 @@ async def get_by_id(
             description="Unique ID identifying a single inference result from a device"
         ),
     ],
+    decoded: DecodedQuery = False,
 ) -> InferenceOut:
-    return controller.get(device_id, id)
+    return controller.get(device_id, id, decoded)
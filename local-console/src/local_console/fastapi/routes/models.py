@@ -66,8 +66,9 @@ class ModuleController:
         return EmptySuccess()
 
     def list(self, limit: int, starting_after: str | None) -> GetModelsOutDTO:
-        all: list[Model] = self.model_manager.get_all()
-        paginated, continuation = self.paginator.paginate(all, limit, starting_after)
+        paginated, continuation = self.paginator.paginate_after(
+            self.model_manager, limit, starting_after
+        )
         model_list = [self._to_model(m) for m in paginated]
         return GetModelsOutDTO(models=model_list, continuation_token=continuation)
 
@@ -15,6 +15,8 @@
 # SPDX-License-Identifier: Apache-2.0
 from fastapi import APIRouter
 from fastapi import WebSocket
+from local_console.core.notifications import HubStats
+from local_console.fastapi.dependencies.notifications import InjectWebSocketManager
 from local_console.fastapi.dependencies.notifications import websockets_from_app
 
 router = APIRouter(
@@ -31,3 +33,8 @@ async def notifications(websocket: WebSocket) -> None:
     app = websocket.app
     controller = websockets_from_app(app)
     await controller.loop_for(websocket)
+
+
+@router.get("/stats")
+async def notifications_stats(manager: InjectWebSocketManager) -> HubStats:
+    return manager.hub.stats()
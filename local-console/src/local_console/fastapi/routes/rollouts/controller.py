@@ -0,0 +1,94 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+from fastapi import HTTPException
+from fastapi import status
+from local_console.core.deploy.config_deployer import ConfigDeployer
+from local_console.core.deploy.deployment_manager import DeploymentManager
+from local_console.core.deploy.rollout import Rollout
+from local_console.core.deploy.rollout import RolloutProgress
+from local_console.core.deploy.rollout import Rollouts
+from local_console.core.deploy.rollout import select_devices
+from local_console.core.device_services import DeviceServices
+from local_console.fastapi.routes.rollouts.dto import RolloutRequestDTO
+
+
+class RolloutController:
+    def __init__(
+        self,
+        rollouts: Rollouts,
+        deployer: ConfigDeployer,
+        deployment_manager: DeploymentManager,
+        device_service: DeviceServices,
+    ) -> None:
+        self.rollouts = rollouts
+        self.deployer = deployer
+        self.deployment_manager = deployment_manager
+        self.device_service = device_service
+
+    def _get(self, rollout_id: str) -> Rollout:
+        rollout = self.rollouts.get(rollout_id)
+        if not rollout:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Could not find rollout {rollout_id}",
+            )
+        return rollout
+
+    def start(self, request: RolloutRequestDTO) -> RolloutProgress:
+        if not self.deployer.configs.get_by_id(request.config_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Could not find config {request.config_id}",
+            )
+        if request.device_ids is None:
+            device_ids = select_devices(self.device_service, request.selector)
+        else:
+            device_ids = list(dict.fromkeys(request.device_ids))
+        unknown = [d for d in device_ids if d not in self.device_service]
+        if unknown or not device_ids:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=(
+                    f"Could not find devices {unknown}"
+                    if unknown
+                    else "No device selected"
+                ),
+            )
+
+        rollout = Rollout(
+            request.config_id,
+            device_ids,
+            request.params,
+            self.deployer,
+            self.deployment_manager,
+        )
+        return self.rollouts.start(rollout).progress()
+
+    def list(self) -> list[RolloutProgress]:
+        return [rollout.progress() for rollout in self.rollouts.list()]
+
+    def get(self, rollout_id: str) -> RolloutProgress:
+        return self._get(rollout_id).progress()
+
+    def resume(self, rollout_id: str) -> RolloutProgress:
+        rollout = self._get(rollout_id)
+        rollout.resume()
+        return rollout.progress()
+
+    def cancel(self, rollout_id: str) -> RolloutProgress:
+        rollout = self._get(rollout_id)
+        rollout.cancel()
+        return rollout.progress()
@@ -0,0 +1,28 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+from local_console.core.deploy.rollout import RolloutParams
+from local_console.core.deploy.rollout import TargetSelector
+from local_console.core.schemas.schemas import DeviceID
+from pydantic import BaseModel
+
+
+class RolloutRequestDTO(BaseModel):
+    config_id: str
+    # Devices to deploy to, in order. Canaries are taken from the start
+    device_ids: list[DeviceID] | None = None
+    # Used instead when no device is listed
+    selector: TargetSelector = TargetSelector()
+    params: RolloutParams = RolloutParams()
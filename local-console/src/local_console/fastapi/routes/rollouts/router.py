@@ -0,0 +1,61 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+from fastapi import APIRouter
+from local_console.core.deploy.rollout import RolloutProgress
+from local_console.fastapi.routes.rollouts.dependencies import InjectRolloutController
+from local_console.fastapi.routes.rollouts.dto import RolloutRequestDTO
+
+
+router = APIRouter(prefix="/rollouts", tags=["Config"])
+
+
+@router.post("")
+async def start_rollout(
+    request: RolloutRequestDTO,
+    controller: InjectRolloutController,
+) -> RolloutProgress:
+    return controller.start(request)
+
+
+@router.get("")
+async def list_rollouts(
+    controller: InjectRolloutController,
+) -> list[RolloutProgress]:
+    return controller.list()
+
+
+@router.get("/{rollout_id}")
+async def get_rollout(
+    rollout_id: str,
+    controller: InjectRolloutController,
+) -> RolloutProgress:
+    return controller.get(rollout_id)
+
+
+@router.post("/{rollout_id}/resume")
+async def resume_rollout(
+    rollout_id: str,
+    controller: InjectRolloutController,
+) -> RolloutProgress:
+    return controller.resume(rollout_id)
+
+
+@router.post("/{rollout_id}/cancel")
+async def cancel_rollout(
+    rollout_id: str,
+    controller: InjectRolloutController,
+) -> RolloutProgress:
+    return controller.cancel(rollout_id)
@@ -0,0 +1,67 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+from typing import Annotated
+
+from fastapi import APIRouter
+from fastapi import Depends
+from local_console.core.schemas.schemas import DeviceID
+from local_console.core.schemas.schemas import EvictionPolicy
+from local_console.core.storage_budget import StorageBudget
+from pydantic import BaseModel
+
+router = APIRouter(prefix="/storage", tags=["Storage"])
+
+
+class DeviceStorageUsageDTO(BaseModel):
+    device_id: DeviceID
+    usage: int
+
+
+class StorageUsageOutDTO(BaseModel):
+    total_usage: int
+    limit: int | None = None
+    policy: EvictionPolicy | None = None
+    devices: list[DeviceStorageUsageDTO]
+
+
+class StorageController:
+    def __init__(self, budget: StorageBudget) -> None:
+        self.budget = budget
+
+    def usage(self) -> StorageUsageOutDTO:
+        usage = self.budget.usage()
+        config = self.budget.config
+        return StorageUsageOutDTO(
+            total_usage=sum(usage.values()),
+            limit=self.budget.limit,
+            policy=config.policy if config else None,
+            devices=[
+                DeviceStorageUsageDTO(device_id=device_id, usage=size)
+                for device_id, size in sorted(usage.items())
+            ],
+        )
+
+
+def storage_controller() -> StorageController:
+    return StorageController(StorageBudget())
+
+
+InjectStorageController = Annotated[StorageController, Depends(storage_controller)]
+
+
+@router.get("")
+def get_storage_usage(controller: InjectStorageController) -> StorageUsageOutDTO:
+    return controller.usage()
@@ -14,10 +14,21 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 from abc import ABC
+from functools import cache
 from importlib.metadata import entry_points
+from importlib.metadata import EntryPoint
 
+import click
 from local_console.core.enums import Config
 from typer import Typer
+from typer.core import TyperGroup
+from typer.main import get_command_from_info
+from typer.main import get_group
+
+PLUGIN_GROUP = "local_console.plugin"
+
+# Command classes of the plugins imported so far, by command name
+loaded_commands: dict[str, type["PluginBase"]] = {}
 
 
 class PluginBase(ABC):
@@ -38,30 +49,77 @@ class PluginBase(ABC):
         else:
             main_handle.registered_commands += cls.implementer.registered_commands
 
+    @classmethod
+    def click_command(cls, name: str) -> click.Command:
+        """
+        Builds the command exposed under `name`, the same way as
+        `register_me` would have had it built by the main CLI.
+        """
+        assert cls.implementer
+
+        if len(cls.implementer.registered_commands) > 1:
+            command: click.Command = get_group(cls.implementer)
+        else:
+            (info,) = cls.implementer.registered_commands
+            command = get_command_from_info(
+                info,
+                pretty_exceptions_short=cls.implementer.pretty_exceptions_short,
+                rich_markup_mode=cls.implementer.rich_markup_mode,
+            )
+        command.name = name
+        return command
+
     @classmethod
     def pre_setup_callback(cls, config_paths: Config) -> None:
         pass
 
 
+@cache
+def plugin_entry_points() -> dict[str, EntryPoint]:
+    return {
+        p.name: p
+        for p in entry_points(group=PLUGIN_GROUP)
+        if p.name != "base"  # ignore the PluginBase class
+    }
+
+
+class PluginGroup(TyperGroup):
+    """
+    Main CLI group, whose plugin commands are named after their entry
+    points and only imported when they are run, or when their help is
+    listed.
+    """
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        own = super().list_commands(ctx)
+        return own + [name for name in plugin_entry_points() if name not in own]
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        command = super().get_command(ctx, cmd_name)
+        if command is not None:
+            return command
+        entry_point = plugin_entry_points().get(cmd_name)
+        if entry_point is None:
+            return None
+        command_class = entry_point.load()
+        loaded_commands[cmd_name] = command_class
+        command = command_class.click_command(cmd_name)
+        self.add_command(command, cmd_name)
+        return command
+
+
 def populate_commands(main_handle: Typer) -> dict[str, type[PluginBase]]:
     """
-    Load all entry points defined by packages at the "local_console.plugin"
-    group in pyproject.toml, which shall inherit from PluginBase, and
-    invoke register_me on each of them, so as to populate the CLI
+    Make the commands of all entry points defined by packages at the
+    "local_console.plugin" group in pyproject.toml, which shall inherit
+    from PluginBase, available in the CLI. Plugins are imported on first
+    use, see PluginGroup.
 
     Args:
         main_handle: the Typer object that provides the main CLI
 
     Returns:
-        A dictionary with all resolved command classes
+        A dictionary with the command classes, filled as they get resolved
     """
-    plugin_entry_points = entry_points(group="local_console.plugin")
-    command_classes = {
-        p.name: p.load()
-        for p in plugin_entry_points
-        if p.name != "base"  # ignore the PluginBase class
-    }
-    for name, command_class in command_classes.items():
-        command_class.register_me(main_handle, name)
-
-    return command_classes
+    main_handle.info.cls = PluginGroup
+    return loaded_commands
@@ -17,16 +17,23 @@ import logging
 import re
 import subprocess
 from collections.abc import AsyncIterator
+from collections.abc import Iterator
 from contextlib import asynccontextmanager
+from contextlib import contextmanager
 from functools import partial
 from pathlib import Path
 from shutil import which
 from string import Template
 from tempfile import TemporaryDirectory
+from typing import Any
 
 import trio
+from local_console.clients.agent import Agent
+from local_console.clients.trio_paho_mqtt import MessageCounters
+from local_console.clients.trio_paho_mqtt import MessageStats
 from local_console.core.error.base import InternalException
 from local_console.core.error.code import ErrorCodes
+from local_console.utils.local_network import get_free_port
 from local_console.utils.local_network import is_port_open
 from trio import run_process
 
@@ -46,11 +53,7 @@ async def spawn_broker(
     port: int, nursery: trio.Nursery, verbose: bool
 ) -> AsyncIterator[trio.Process]:
 
-    broker_bin = which("mosquitto")
-    if not broker_bin:
-        raise ValueError(
-            "Could not find mosquitto in the PATH. Please add it and try again"
-        )
+    broker_bin = _broker_binary()
 
     if is_port_open(port):
         message = f"TCP port {port} configured for a registered device, is bound to a foreign process. Please stop the foreign process."
@@ -60,44 +63,61 @@ async def spawn_broker(
         config_file = Path(tmp_dir) / "broker.toml"
         populate_broker_conf(port, config_file)
 
-        cmd = [broker_bin, "-v", "-c", str(config_file)]
-        invocation = partial(
-            run_process,
-            command=cmd,
-            check=False,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
+        async with _run_broker(
+            broker_bin, config_file, nursery, f"port {port}"
+        ) as proc:
+            yield proc
+
+
+def _broker_binary() -> str:
+    broker_bin = which("mosquitto")
+    if not broker_bin:
+        raise ValueError(
+            "Could not find mosquitto in the PATH. Please add it and try again"
         )
-        broker_proc = await nursery.start(invocation)
-        # This is to check the broker start up.
-        # A (minor) enhancement would be to poll the broker.
-        pattern = re.compile(r"mosquitto version (\d+\.\d+\.\d+) running")
-        try:
-            while True:
-                data = await broker_proc.stdout.receive_some()
-                if data:
-                    data = data.decode("utf-8")
-                    logger.debug(f"Received data from mosquitto: {data}")
-                    for line in data.splitlines():
-                        logger.debug(line)
-
-                    if "error" in data.lower():
-                        line = next(
-                            line
-                            for line in data.splitlines()
-                            if "error" in line.lower()
-                        )
-                        raise BrokerException(
-                            f"{line} (On port {port}).\nPlease check and restart Local Console."
-                        )
-                    elif pattern.search(data):
-                        break
-
-            nursery.start_soon(get_broker_logs, broker_proc.stdout)
-            yield broker_proc
-        finally:
-            broker_proc.kill()
-            await broker_proc.wait()
+    return broker_bin
+
+
+@asynccontextmanager
+async def _run_broker(
+    broker_bin: str, config_file: Path, nursery: trio.Nursery, where: str
+) -> AsyncIterator[trio.Process]:
+    cmd = [broker_bin, "-v", "-c", str(config_file)]
+    invocation = partial(
+        run_process,
+        command=cmd,
+        check=False,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    broker_proc = await nursery.start(invocation)
+    # This is to check the broker start up.
+    # A (minor) enhancement would be to poll the broker.
+    pattern = re.compile(r"mosquitto version (\d+\.\d+\.\d+) running")
+    try:
+        while True:
+            data = await broker_proc.stdout.receive_some()
+            if data:
+                data = data.decode("utf-8")
+                logger.debug(f"Received data from mosquitto: {data}")
+                for line in data.splitlines():
+                    logger.debug(line)
+
+                if "error" in data.lower():
+                    line = next(
+                        line for line in data.splitlines() if "error" in line.lower()
+                    )
+                    raise BrokerException(
+                        f"{line} (On {where}).\nPlease check and restart Local Console."
+                    )
+                elif pattern.search(data):
+                    break
+
+        nursery.start_soon(get_broker_logs, broker_proc.stdout)
+        yield broker_proc
+    finally:
+        broker_proc.kill()
+        await broker_proc.wait()
 
 
 def populate_broker_conf(port: int, config_file: Path) -> None:
@@ -110,7 +130,217 @@ def populate_broker_conf(port: int, config_file: Path) -> None:
     config_file.write_text(rendered)
 
 
+def populate_shared_broker_conf(
+    ports: list[int], hub_port: int, config_file: Path
+) -> None:
+    logger.info(f"Shared MQTT broker at ports {ports}")
+    header = Template((broker_assets / "config.shared.toml.tpl").read_text())
+    listener = Template((broker_assets / "config.listener.toml.tpl").read_text())
+    rendered = header.substitute({"hub_port": str(hub_port)}) + "".join(
+        listener.substitute(
+            {"mqtt_port": str(port), "mount_point": mount_point_for(port)}
+        )
+        for port in ports
+    )
+    config_file.write_text(rendered)
+
+
+def mount_point_for(port: int) -> str:
+    return f"port-{port}/"
+
+
+def _port_of(mount: str) -> int | None:
+    try:
+        return int(mount.removeprefix("port-"))
+    except ValueError:
+        return None
+
+
 async def get_broker_logs(proc_stdout: trio.abc.ReceiveStream) -> None:
     async for chunk in proc_stdout:
         for line in chunk.decode().splitlines():
             logger.debug(line)
+
+
+# Time to wait for further devices to be added or removed, before
+# restarting the shared broker with the updated set of listeners.
+BROKER_RELOAD_DELAY: float = 0.5
+
+# Time to wait before starting the shared broker again, after it failed
+BROKER_RESTART_DELAY: float = 2.0
+
+# Time that a device waits for the shared broker to listen on its port
+BROKER_LISTEN_TIMEOUT: float = 30.0
+
+# Number of received messages that may wait for processing, per device
+DEVICE_QUEUE_SIZE = 100
+
+# Incoming MQTT messages, as (topic, payload)
+MQTTMessageChannel = trio.MemoryReceiveChannel[tuple[str, bytes]]
+
+
+class SharedBroker:
+    """
+    Single mosquitto instance serving all devices, as an alternative
+    to running one broker per device. Each device port is a listener
+    of its own, with a mount point that isolates the topics of the
+    device from those of the others. Clients connecting to a device
+    port (such as the ones used for RPC) are thus unaffected.
+
+    A single client, connected to an internal listener that sees all
+    mount points, demultiplexes the incoming messages to each device
+    and publishes on their behalf.
+
+    As mosquitto cannot add listeners on the fly, the broker is
+    restarted when devices are added or removed. Devices reconnect
+    on their own afterwards.
+    """
+
+    def __init__(self, topics: list[str]) -> None:
+        self._topics = topics
+        self._queues: dict[int, trio.MemorySendChannel[tuple[str, bytes]]] = {}
+        self._counters: dict[int, MessageCounters] = {}
+        self._changed = trio.Event()
+        self._reloaded = trio.Event()
+        self._live: set[int] = set()
+        self._hub: Agent | None = None
+
+    @contextmanager
+    def serve(self, port: int) -> Iterator[MQTTMessageChannel]:
+        """
+        Includes a device port in the broker for the scope of the
+        context, yielding the messages received from the device.
+        """
+        if port in self._queues:
+            raise BrokerException(f"Port {port} is already served by the broker")
+        if port not in self._live and is_port_open(port):
+            message = f"TCP port {port} configured for a registered device, is bound to a foreign process. Please stop the foreign process."
+            raise InternalException(code=ErrorCodes.INTERNAL_MQTT, message=message)
+
+        queue, messages = trio.open_memory_channel[tuple[str, bytes]](DEVICE_QUEUE_SIZE)
+        self._queues[port] = queue
+        self._counters[port] = MessageCounters()
+        self._changed.set()
+        try:
+            with messages:
+                yield messages
+        finally:
+            del self._queues[port]
+            del self._counters[port]
+            queue.close()
+            self._changed.set()
+
+    def stats_for(self, port: int) -> MessageStats | None:
+        """
+        Counters of the messages received for a device port.
+        """
+        queue = self._queues.get(port)
+        counters = self._counters.get(port)
+        if queue is None or counters is None:
+            return None
+        return counters.stats(queue.statistics().current_buffer_used)
+
+    async def listening(self, port: int) -> None:
+        """
+        Waits until the broker is listening on a device port.
+        """
+        while port not in self._live:
+            await self._reloaded.wait()
+
+    async def hub_for(self, port: int) -> Agent:
+        """
+        Returns the client for publishing to a device, once the
+        broker is listening on its port.
+        """
+        while not (self._hub and port in self._live):
+            await self._reloaded.wait()
+        return self._hub
+
+    async def run(self, *, task_status: Any = trio.TASK_STATUS_IGNORED) -> None:
+        broker_bin = _broker_binary()
+        task_status.started()
+        while True:
+            await self._changed.wait()
+            # Let further changes accumulate, so that bringing up many
+            # devices at once restarts the broker only once.
+            await trio.sleep(BROKER_RELOAD_DELAY)
+            self._changed = trio.Event()
+            if self._queues:
+                await self._supervise(broker_bin, sorted(self._queues))
+
+    async def _supervise(self, broker_bin: str, ports: list[int]) -> None:
+        # Failures of the broker or of its client must not reach the
+        # nursery of the server, so they are logged and the broker is
+        # started again, unless it is cancelled.
+        failed = False
+        try:
+            await self._serve_until_changed(broker_bin, ports)
+        except* (Exception, SystemExit) as group:
+            logger.error(
+                f"Shared MQTT broker at ports {ports} failed, restarting it",
+                exc_info=group,
+            )
+            failed = True
+        if failed:
+            await trio.sleep(BROKER_RESTART_DELAY)
+            self._changed.set()
+
+    async def _serve_until_changed(self, broker_bin: str, ports: list[int]) -> None:
+        hub_port = get_free_port()
+        with TemporaryDirectory() as tmp_dir:
+            config_file = Path(tmp_dir) / "broker.toml"
+            populate_shared_broker_conf(ports, hub_port, config_file)
+
+            async with (
+                trio.open_nursery() as nursery,
+                _run_broker(broker_bin, config_file, nursery, f"ports {ports}"),
+            ):
+                hub = Agent(hub_port)
+                async with hub.mqtt_scope([f"+/{topic}" for topic in self._topics]):
+                    nursery.start_soon(self._demultiplex, hub)
+                    self._hub = hub
+                    self._live = set(ports)
+                    reloaded, self._reloaded = self._reloaded, trio.Event()
+                    reloaded.set()
+                    try:
+                        await self._changed.wait()
+                    finally:
+                        self._hub = None
+                        self._live = set()
+                nursery.cancel_scope.cancel()
+
+    async def _demultiplex(self, hub: Agent) -> None:
+        assert hub.client
+        async with hub.client.messages() as mgen:
+            async for msg in mgen:
+                mount, _, topic = msg.topic.partition("/")
+                port = _port_of(mount)
+                queue = self._queues.get(port) if port is not None else None
+                counters = self._counters.get(port) if port is not None else None
+                if not queue or not counters:
+                    continue
+                try:
+                    queue.send_nowait((topic, msg.payload))
+                except trio.WouldBlock:
+                    counters.dropped += 1
+                    logger.warning(f"Discarding message on {msg.topic}, queue is full")
+                except trio.ClosedResourceError:
+                    pass
+                counters.record(queue.statistics().current_buffer_used)
+
+
+class MountedAgent(Agent):
+    """
+    Client for a device served by a `SharedBroker`, which publishes
+    into the mount point of the device through the client of the
+    broker. It does not hold a connection of its own, so that only
+    `publish()` is supported.
+    """
+
+    def __init__(self, port: int, broker: SharedBroker) -> None:
+        super().__init__(port)
+        self._broker = broker
+
+    async def publish(self, topic: str, payload: str) -> None:
+        hub = await self._broker.hub_for(self.port)
+        await hub.publish(f"{mount_point_for(self.port)}{topic}", payload)
@@ -15,6 +15,9 @@
 # SPDX-License-Identifier: Apache-2.0
 import http.server
 import logging
+import os
+import shutil
+import tempfile
 import threading
 from abc import ABC
 from abc import abstractmethod
@@ -25,21 +28,65 @@ from pathlib import Path
 from pathlib import PurePosixPath
 from types import TracebackType
 from typing import Any
+from typing import BinaryIO
 from typing import Callable
 from typing import Optional
 from typing import Self
+from uuid import uuid4
 
 import trio
 from local_console.core.config import Config
-from local_console.core.files.files import file_hash
+from local_console.core.files.digests import file_digest
 from local_console.core.schemas.schemas import DeviceID
 from local_console.utils.singleton import Singleton
 
 logger = logging.getLogger(__name__)
 
 
-FileIncomingFn = Callable[[bytes, str], None]
-FileIncomingAsyncFn = Callable[[bytes, str], Awaitable[None]]
+# Time that a download waits for a transfer slot before being rejected
+TRANSFER_SLOT_TIMEOUT: float = 30.0
+
+# Size of the chunks in which upload bodies are written to disk
+UPLOAD_CHUNK_SIZE = 64 * 1024
+# Number of received uploads that may wait for being dispatched
+INBOX_CAPACITY = 16
+# Number of dispatched uploads that may wait for processing, per device,
+# beyond which further uploads of the device are held back
+DEVICE_QUEUE_CAPACITY = 4
+
+
+class IncomingFile:
+    """
+    Body of an upload, which has been spooled into a temporary file
+    while it was being received. Whoever processes it must either
+    `move_to()` its final location, or `discard()` it.
+    """
+
+    def __init__(self, path: Path, size: int) -> None:
+        self.path = path
+        self.size = size
+        self._moved = False
+
+    def read_bytes(self) -> bytes:
+        return self.path.read_bytes()
+
+    def move_to(self, target: Path) -> None:
+        """
+        Moves the file into `target`, which is atomic as long as it
+        lies in the same filesystem as the temporary file.
+        """
+        shutil.move(self.path, target)
+        self.path = target
+        self._moved = True
+
+    def discard(self) -> None:
+        if not self._moved:
+            self.path.unlink(missing_ok=True)
+
+
+FileIncomingFn = Callable[[IncomingFile, str], None]
+FileIncomingAsyncFn = Callable[[IncomingFile, str], Awaitable[None]]
+SpoolDirFn = Callable[[str], Optional[Path]]
 
 
 def get_range(range_header: str, file_size: int) -> tuple[int, int]:
@@ -55,11 +102,15 @@ def get_range(range_header: str, file_size: int) -> tuple[int, int]:
 class URLMap(metaclass=Singleton):
     """
     A singleton class for managing URL -> file path mappings in a thread-safe manner.
+    Mappings are reference counted, so that a file enlisted by several
+    concurrent deployments stays available until all of them forget it.
     """
 
     def __init__(self) -> None:
         self._lock = threading.RLock()
         self._map: dict[str, Path] = {}
+        self._etags: dict[str, str] = {}
+        self._refs: dict[str, int] = {}
 
     def get(self, url_path: str) -> Path | None:
         """
@@ -68,19 +119,36 @@ class URLMap(metaclass=Singleton):
         with self._lock:
             return self._map.get(url_path)
 
-    def add(self, url_path: str, file_path: Path) -> None:
+    def etag(self, url_path: str) -> str | None:
+        """
+        Retrieve the entity tag of the file for a given url_path, if known.
+        """
+        with self._lock:
+            return self._etags.get(url_path)
+
+    def add(self, url_path: str, file_path: Path, etag: str | None = None) -> None:
         """
         Add or update a mapping from url_path to file_path.
         """
         with self._lock:
             self._map[url_path] = file_path
+            self._refs[url_path] = self._refs.get(url_path, 0) + 1
+            if etag:
+                self._etags[url_path] = etag
+            else:
+                self._etags.pop(url_path, None)
 
     def forget(self, url_path: str) -> None:
         """
-        Remove an entry in the mapping
+        Remove an entry in the mapping, once forgotten as many times as added
         """
         with self._lock:
+            refs = self._refs.pop(url_path, 1) - 1
+            if refs > 0:
+                self._refs[url_path] = refs
+                return
             del self._map[url_path]
+            self._etags.pop(url_path, None)
 
 
 class LocalConsoleRequestsHandler(http.server.BaseHTTPRequestHandler):
@@ -90,10 +158,14 @@ class LocalConsoleRequestsHandler(http.server.BaseHTTPRequestHandler):
         *args: Any,
         on_incoming: Optional[FileIncomingFn] = None,
         max_upload_size: Optional[int] = None,
+        transfer_slots: Optional[threading.Semaphore] = None,
+        spool_dir_for: Optional[SpoolDirFn] = None,
         **kwargs: Any,
     ):
         self.on_incoming = on_incoming
         self.max_upload_size = max_upload_size
+        self.transfer_slots = transfer_slots
+        self.spool_dir_for = spool_dir_for
         super().__init__(*args, **kwargs)
 
     def log_message(self, _format: str, *args: Sequence[str]) -> None:
@@ -107,45 +179,81 @@ class LocalConsoleRequestsHandler(http.server.BaseHTTPRequestHandler):
             self.send_error(404, "File Not Found")
             return
 
-        file_size = file_path.stat().st_size
+        etag = url_map.etag(self.path)
+        if etag and self._etag_matches(etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        slots = self.transfer_slots
+        if slots and not slots.acquire(timeout=TRANSFER_SLOT_TIMEOUT):
+            self.send_error(503, "Too Many Concurrent Transfers")
+            return
+        try:
+            with file_path.open("rb") as f:
+                self._send_file(f, etag)
+        finally:
+            if slots:
+                slots.release()
+
+    def _etag_matches(self, etag: str) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        candidates = (
+            tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+        )
+        return etag in candidates
+
+    def _send_file(self, f: BinaryIO, etag: str | None) -> None:
+        """
+        Sends the requested range of the file, which is streamed from
+        the file into the socket (by means of `sendfile` where supported),
+        so that it never gets to be read into memory as a whole.
+        """
+        file_size = os.fstat(f.fileno()).st_size
         header_range = self.headers.get("Range")
         logger.debug(f"Header range: {header_range}")
 
-        with file_path.open("rb") as f:
-            if header_range:
-                # https://www.rfc-editor.org/rfc/rfc9110.html#name-range-requests
-                try:
-                    start, end = get_range(header_range, file_size)
-                    content_range = f"bytes {start}-{end}/{file_size}"
-
-                    logger.debug(f"Content range: {content_range}")
-                    if start > end or start >= file_size:
-                        self.send_error(416, "Range Not Satisfiable")
-                        return
-                    f.seek(start)
-                    data = f.read(end - start + 1)
-                    content_range = f"bytes {start}-{end}/{file_size}"
-                    # Partial Content
-                    self.send_response(206)
-                    self.send_header("Content-Range", content_range)
-                    self.send_header("Accept-Ranges", "bytes")
-                except ValueError:
-                    self.send_error(416, "Range Not Satisfiable")
-                    return
-            else:
-                data = f.read()
-                self.send_response(200)
+        start = 0
+        length = file_size
+        if header_range:
+            # https://www.rfc-editor.org/rfc/rfc9110.html#name-range-requests
+            try:
+                start, end = get_range(header_range, file_size)
+            except ValueError:
+                self.send_error(416, "Range Not Satisfiable")
+                return
+            content_range = f"bytes {start}-{end}/{file_size}"
+
+            logger.debug(f"Content range: {content_range}")
+            if start > end or start >= file_size:
+                self.send_error(416, "Range Not Satisfiable")
+                return
+            length = end - start + 1
+            # Partial Content
+            self.send_response(206)
+            self.send_header("Content-Range", content_range)
+            self.send_header("Accept-Ranges", "bytes")
+        else:
+            self.send_response(200)
 
-        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Content-Length", str(length))
         self.send_header("Content-Type", "application/octet-stream")
+        if etag:
+            self.send_header("ETag", etag)
         self.end_headers()
-        self.wfile.write(data)
+        if length:
+            self.connection.sendfile(f, offset=start, count=length)
 
     def do_PUT(self) -> None:
         response_code: int = 200
         response_msg: Optional[str] = None
 
-        data: Optional[bytes] = None
+        incoming: Optional[IncomingFile] = None
         try:
             content_length = int(self.headers["Content-Length"])
             if (
@@ -153,12 +261,14 @@ class LocalConsoleRequestsHandler(http.server.BaseHTTPRequestHandler):
                 and content_length > self.max_upload_size
             ):
                 raise BufferError(content_length)
-            data = self.rfile.read(content_length)
+            incoming = self._spool(content_length)
 
             # Notify of new file when the callback is set
-            if data and self.on_incoming:
+            if incoming.size and self.on_incoming:
                 try:
-                    self.on_incoming(data, self.path)
+                    self.on_incoming(incoming, self.path)
+                    # The callback has taken ownership of the file
+                    incoming = None
                 except Exception as e:
                     logger.error("Error while invoking callback", exc_info=e)
 
@@ -173,11 +283,39 @@ class LocalConsoleRequestsHandler(http.server.BaseHTTPRequestHandler):
         except Exception as e:
             logger.error("Error while receiving data", exc_info=e)
         finally:
+            if incoming:
+                incoming.discard()
             self.send_response(response_code, response_msg)
             self.end_headers()
 
     do_POST = do_PUT
 
+    def _spool(self, content_length: int) -> IncomingFile:
+        """
+        Streams the request body into a temporary file, so that
+        uploads are never held in memory as a whole.
+        """
+        spool_dir = self.spool_dir_for(self.path) if self.spool_dir_for else None
+        # Unlike mkstemp, which makes it private, this creates the file with
+        # the permissions of the umask, which it keeps once moved into place
+        path = Path(spool_dir or tempfile.gettempdir()) / f".upload-{uuid4()}.part"
+        f = open(path, "xb")
+        try:
+            with f:
+                remaining = content_length
+                while remaining > 0:
+                    chunk = self.rfile.read(min(UPLOAD_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise ConnectionError(
+                            f"Upload ended {remaining} bytes short of its length"
+                        )
+                    f.write(chunk)
+                    remaining -= len(chunk)
+        except BaseException:
+            path.unlink(missing_ok=True)
+            raise
+        return IncomingFile(path, content_length)
+
 
 class GenericWebserver(ABC):
     """
@@ -252,16 +390,25 @@ class SyncWebserver(GenericWebserver):
         port: int = 0,
         on_incoming: Optional[FileIncomingFn] = None,
         max_upload_size: Optional[int] = None,
+        max_transfers: Optional[int] = None,
     ) -> None:
         super().__init__(port)
         self.on_incoming = on_incoming
         self.max_upload_size = max_upload_size
+        # Tells the directory in which to spool the upload to a URL path
+        self.spool_dir_for: Optional[SpoolDirFn] = None
+        # Bounds the number of files being downloaded at the same time
+        self.transfer_slots = (
+            threading.BoundedSemaphore(max_transfers) if max_transfers else None
+        )
 
     def handler(self, *args: Any, **kwargs: Any) -> LocalConsoleRequestsHandler:
         return LocalConsoleRequestsHandler(
             *args,
             on_incoming=self.on_incoming,
             max_upload_size=self.max_upload_size,
+            transfer_slots=self.transfer_slots,
+            spool_dir_for=self.spool_dir_for,
             **kwargs,
         )
 
@@ -269,8 +416,9 @@ class SyncWebserver(GenericWebserver):
         """
         Make a file available for GET at deterministic URL.
         """
-        url = SyncWebserver.url_path_for(target_file)
-        URLMap().add(url, target_file)
+        digest = file_digest(target_file).hex
+        url = SyncWebserver._url_path(digest, target_file.name)
+        URLMap().add(url, target_file, etag=f'"{digest}"')
         return url
 
     def delist_file(self, target_file: Path) -> None:
@@ -282,8 +430,13 @@ class SyncWebserver(GenericWebserver):
 
     @staticmethod
     def url_path_for(target_file: Path) -> str:
-        prefix = file_hash(target_file.read_bytes())[:12]
-        url = f"/{prefix}/{target_file.name}"
+        digest = file_digest(target_file).hex
+        return SyncWebserver._url_path(digest, target_file.name)
+
+    @staticmethod
+    def _url_path(digest: str, file_name: str) -> str:
+        prefix = digest[:12]
+        url = f"/{prefix}/{file_name}"
         return url
 
     def url_root_at(self, device_id: DeviceID) -> str:
@@ -324,38 +477,52 @@ class AsyncWebserver(SyncWebserver):
     This makes use of a channel for quickly switching processing
     of incoming payloads from the internal sync context
     (of the base SyncWebserver) back to the calling async context.
+    The channel is buffered, so that the webserver threads are not
+    held back by the processing of the uploads. Alternatively, a
+    consumer may set `deliver` to take over each upload as it
+    arrives, from a task of its own.
     """
 
     def __init__(
         self,
         port: int = 0,
         max_upload_size: Optional[int] = None,
+        max_transfers: Optional[int] = None,
     ) -> None:
-        super().__init__(port, self._to_async, max_upload_size)
+        super().__init__(port, self._to_async, max_upload_size, max_transfers)
 
         chparts: tuple[
-            trio.MemorySendChannel[tuple[bytes, str]],
-            trio.MemoryReceiveChannel[tuple[bytes, str]],
-        ] = trio.open_memory_channel(0)
+            trio.MemorySendChannel[tuple[IncomingFile, str]],
+            trio.MemoryReceiveChannel[tuple[IncomingFile, str]],
+        ] = trio.open_memory_channel(INBOX_CAPACITY)
         self._recv_channel, self._proc_channel = chparts
         self._trio_token = trio.lowlevel.current_trio_token()
+        self.deliver: Optional[FileIncomingAsyncFn] = None
 
-    def _to_async(self, data: bytes, url_path: str) -> None:
-        # Push the received data to the async side via the channel
+    def _to_async(self, incoming: IncomingFile, url_path: str) -> None:
+        # Push the received file to the async side. Each call runs as
+        # a trio task of its own, which only holds back this upload.
         trio.from_thread.run(
-            self._recv_channel.send,
-            (data, url_path),
+            self._deliver,
+            incoming,
+            url_path,
             trio_token=self._trio_token,
         )
 
-    async def receive(self) -> AsyncGenerator[tuple[bytes, str], None]:
+    async def _deliver(self, incoming: IncomingFile, url_path: str) -> None:
+        if self.deliver:
+            await self.deliver(incoming, url_path)
+        else:
+            await self._recv_channel.send((incoming, url_path))
+
+    async def receive(self) -> AsyncGenerator[tuple[IncomingFile, str], None]:
         async with (
             self._recv_channel,
             self._proc_channel,
         ):
             # Receive uploaded files over the memory channel
-            async for data, url_path in self._proc_channel:
-                yield data, url_path
+            async for incoming, url_path in self._proc_channel:
+                yield incoming, url_path
 
     async def __aenter__(self) -> Self:
         self.__enter__()
@@ -382,6 +549,10 @@ class FileInbox:
     per-device processing functions for incoming blobs. This
     enables sharing blob processing for multiple cameras with
     a single webserver instance.
+
+    Blobs are processed in order of arrival for each device, but
+    concurrently across devices, so that a slow consumer does not
+    hold back the uploads of other cameras.
     """
 
     def __init__(
@@ -390,14 +561,31 @@ class FileInbox:
     ):
         self.webserver = webserver
         self._map: dict[DeviceID, FileIncomingAsyncFn] = {}
+        self._spool_dirs: dict[DeviceID, Path] = {}
+        self._queues: dict[
+            DeviceID, trio.MemorySendChannel[tuple[PurePosixPath, IncomingFile]]
+        ] = {}
+        self._nursery: trio.Nursery | None = None
+        webserver.spool_dir_for = self._spool_dir_for
 
     def set_file_incoming_callable(
-        self, device_id: DeviceID, afunc: FileIncomingAsyncFn
+        self,
+        device_id: DeviceID,
+        afunc: FileIncomingAsyncFn,
+        spool_dir: Optional[Path] = None,
     ) -> str:
+        """
+        Registers the processing function for the blobs of a device. If
+        `spool_dir` is given, uploads are received into temporary files
+        within it, so that they can be moved into any directory of the
+        same filesystem by just renaming them.
+        """
         assert (
             device_id not in self._map
         ), f"Device ID {device_id} already has a registered blob function."
         self._map[device_id] = afunc
+        if spool_dir:
+            self._spool_dirs[device_id] = spool_dir
 
         url_root = self.webserver.url_root_at(device_id)
         upload_url = f"{url_root}{device_id}"
@@ -406,28 +594,111 @@ class FileInbox:
     def reset_file_incoming_callable(self, device_id: DeviceID) -> None:
         if device_id in self._map:
             del self._map[device_id]
+        self._spool_dirs.pop(device_id, None)
+        queue = self._queues.pop(device_id, None)
+        if queue:
+            # Its dispatch task discards what is left, and finishes
+            queue.close()
+
+    def _spool_dir_for(self, url_path: str) -> Path | None:
+        # Called from the webserver threads
+        device_id = _target_device(PurePosixPath(url_path))
+        if device_id is None:
+            return None
+        spool_dir = self._spool_dirs.get(device_id)
+        return spool_dir if spool_dir and spool_dir.is_dir() else None
 
     async def blobs_dispatch_task(
         self, *, task_status: Any = trio.TASK_STATUS_IGNORED
     ) -> None:
         assert self.webserver.is_running()
 
-        task_status.started()
-        async for data, url_path in self.webserver.receive():
-            await self.dispatch_blob(PurePosixPath(url_path), data)
-
-    async def dispatch_blob(self, url_path: PurePosixPath, data: bytes) -> None:
-        assert url_path.parts[0] == "/"
-        anchor = url_path.parts[1]
-        try:
-            device_id = DeviceID(int(anchor))
-        except ValueError:
-            logger.warning(f"Received blob at path {url_path} without a target prefix.")
+        async with trio.open_nursery() as nursery:
+            self._nursery = nursery
+            # Uploads are handed over to their device from their own task,
+            # so that a device whose queue is full only holds back itself
+            self.webserver.deliver = self._deliver
+            try:
+                task_status.started()
+                async for incoming, url_path in self.webserver.receive():
+                    await self._enqueue(PurePosixPath(url_path), incoming)
+            finally:
+                self.webserver.deliver = None
+                for queue in self._queues.values():
+                    queue.close()
+                self._queues.clear()
+                self._nursery = None
+
+    def _queue_for(
+        self, device_id: DeviceID | None
+    ) -> trio.MemorySendChannel[tuple[PurePosixPath, IncomingFile]] | None:
+        if device_id is None or device_id not in self._map:
+            return None
+        assert self._nursery
+        queue = self._queues.get(device_id)
+        if queue is None:
+            queue, pending = trio.open_memory_channel[
+                tuple[PurePosixPath, IncomingFile]
+            ](DEVICE_QUEUE_CAPACITY)
+            self._queues[device_id] = queue
+            self._nursery.start_soon(self._device_dispatch, pending)
+        return queue
+
+    async def _deliver(self, incoming: IncomingFile, url_path: str) -> None:
+        path = PurePosixPath(url_path)
+        queue = self._queue_for(_target_device(path))
+        if queue is None:
+            # Nothing to wait for, as it is going to be discarded
+            await self.dispatch_blob(path, incoming)
             return
+        await queue.send((path, incoming))
 
-        if device_id in self._map:
-            await self._map[device_id](data, str(url_path))
-        else:
+    async def _enqueue(self, url_path: PurePosixPath, incoming: IncomingFile) -> None:
+        queue = self._queue_for(_target_device(url_path))
+        if queue is None:
+            await self.dispatch_blob(url_path, incoming)
+            return
+        try:
+            # Never waits, so that other devices are not held back
+            queue.send_nowait((url_path, incoming))
+        except trio.WouldBlock:
             logger.warning(
-                f"Received blob at path {url_path} which has no function registered."
+                f"Rejected blob at path {url_path}, as its device is falling behind."
             )
+            incoming.discard()
+
+    async def _device_dispatch(
+        self, pending: trio.MemoryReceiveChannel[tuple[PurePosixPath, IncomingFile]]
+    ) -> None:
+        async with pending:
+            async for url_path, incoming in pending:
+                await self.dispatch_blob(url_path, incoming)
+
+    async def dispatch_blob(
+        self, url_path: PurePosixPath, incoming: IncomingFile
+    ) -> None:
+        try:
+            device_id = _target_device(url_path)
+            if device_id is None:
+                logger.warning(
+                    f"Received blob at path {url_path} without a target prefix."
+                )
+                return
+
+            if device_id in self._map:
+                await self._map[device_id](incoming, str(url_path))
+            else:
+                logger.warning(
+                    f"Received blob at path {url_path} which has no function registered."
+                )
+        finally:
+            # Unless the processing function has moved it elsewhere
+            incoming.discard()
+
+
+def _target_device(url_path: PurePosixPath) -> DeviceID | None:
+    assert url_path.parts[0] == "/"
+    try:
+        return DeviceID(int(url_path.parts[1]))
+    except (IndexError, ValueError):
+        return None
@@ -0,0 +1,39 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import json
+import logging
+from typing import Any
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+
+    _loads: Callable[[bytes | bytearray | str], Any] = orjson.loads
+except ImportError:
+    logger.debug("orjson is not available, using the standard JSON decoder")
+    _loads = json.loads
+
+
+def loads(data: bytes | bytearray | str) -> Any:
+    """
+    Decodes a JSON document with orjson if it is installed, which is
+    several times faster than the standard decoder for the payloads
+    exchanged with devices, falling back to the standard decoder.
+    Errors are raised as `json.JSONDecodeError` in both cases.
+    """
+    return _loads(data)
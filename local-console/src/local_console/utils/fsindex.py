@@ -0,0 +1,178 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import logging
+import os
+import threading
+from collections.abc import Iterator
+from itertools import islice
+from pathlib import Path
+
+from local_console.utils.singleton import Singleton
+from sortedcontainers import SortedList
+
+logger = logging.getLogger(__name__)
+
+# Number of names copied out of an index at a time while iterating it
+SCAN_CHUNK = 256
+
+
+class DirectoryIndex:
+    """
+    Sorted index of the names of the regular files directly
+    contained in a directory. It allows listing a directory page
+    by page in O(log n + page), instead of traversing and sorting
+    the whole directory on every request.
+
+    The index is seeded with a single scan of the directory, and
+    then kept up to date by the code paths that write files into it
+    and prune files from it, by means of `add()` and `discard()`.
+    Changes made by anyone else are detected by comparing the
+    modification time of the directory, triggering a new scan.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self._names: SortedList = SortedList()
+        self._mtime_ns: int | None = None
+        self._lock = threading.RLock()
+
+    def _sync(self) -> None:
+        # Raises FileNotFoundError if the directory does not exist
+        mtime_ns = os.stat(self.directory).st_mtime_ns
+        if mtime_ns == self._mtime_ns:
+            return
+
+        logger.debug(f"Indexing contents of {self.directory}")
+        with os.scandir(self.directory) as entries:
+            self._names = SortedList(e.name for e in entries if e.is_file())
+        self._mtime_ns = mtime_ns
+
+    def _refresh_mtime(self) -> None:
+        try:
+            self._mtime_ns = os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            self._mtime_ns = None
+
+    def add(self, name: str) -> None:
+        """
+        Register a file that has just been written into the directory.
+        """
+        with self._lock:
+            if self._mtime_ns is None:
+                # Not seeded yet, so the file will be found when scanning
+                return
+            if name not in self._names:
+                self._names.add(name)
+            self._refresh_mtime()
+
+    def discard(self, name: str) -> None:
+        """
+        Unregister a file that has just been removed from the directory.
+        """
+        with self._lock:
+            if self._mtime_ns is None:
+                return
+            self._names.discard(name)
+            self._refresh_mtime()
+
+    def _scan(self, bound: str | None, inclusive: bool, reverse: bool) -> Iterator[str]:
+        # Raises FileNotFoundError upon the call, not when iterating
+        with self._lock:
+            self._sync()
+        return self._chunks(bound, inclusive, reverse)
+
+    def _chunks(
+        self, bound: str | None, inclusive: bool, reverse: bool
+    ) -> Iterator[str]:
+        # Names are copied a chunk at a time while holding the lock, so
+        # that iterating never observes the list being changed by writers
+        while True:
+            with self._lock:
+                self._sync()
+                if reverse:
+                    ranged = self._names.irange(
+                        maximum=bound, inclusive=(True, inclusive), reverse=True
+                    )
+                else:
+                    ranged = self._names.irange(
+                        minimum=bound, inclusive=(inclusive, True)
+                    )
+                chunk = list(islice(ranged, SCAN_CHUNK))
+            yield from chunk
+            if len(chunk) < SCAN_CHUNK:
+                return
+            bound, inclusive = chunk[-1], False
+
+    def newest(self, starting_after: str | None = None) -> Iterator[str]:
+        """
+        Iterates file names in descending order. If `starting_after`
+        is given, only names strictly lower than it are yielded.
+        """
+        return self._scan(starting_after, False, reverse=True)
+
+    def oldest(self, starting_at: str | None = None) -> Iterator[str]:
+        """
+        Iterates file names in ascending order. If `starting_at`
+        is given, only names greater than or equal to it are yielded.
+        """
+        return self._scan(starting_at, True, reverse=False)
+
+    def with_stem(self, stem: str) -> str | None:
+        """
+        Returns the name of a file whose stem is the given one, if any.
+        """
+        with self._lock:
+            self._sync()
+            for name in self._names.irange(minimum=stem):
+                if not name.startswith(stem):
+                    break
+                if Path(name).stem == stem:
+                    return str(name)
+        return None
+
+    def __contains__(self, name: str) -> bool:
+        with self._lock:
+            self._sync()
+            return name in self._names
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._sync()
+            return len(self._names)
+
+
+class DirectoryIndexes(metaclass=Singleton):
+    """
+    Process-wide registry of directory indexes, so that writers,
+    pruners and readers of a directory share the same index.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._indexes: dict[Path, DirectoryIndex] = {}
+
+    def get(self, directory: Path) -> DirectoryIndex:
+        key = Path(os.path.abspath(directory))
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is None:
+                index = DirectoryIndex(key)
+                self._indexes[key] = index
+            return index
+
+
+def directory_index(directory: Path) -> DirectoryIndex:
+    return DirectoryIndexes().get(directory)
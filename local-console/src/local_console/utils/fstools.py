@@ -18,6 +18,7 @@ import enum
 import heapq
 import logging
 import os
+import stat
 import threading
 from collections.abc import Iterator
 from dataclasses import dataclass
@@ -31,7 +32,9 @@ from local_console.core.error.base import UserException
 from local_console.core.error.code import ErrorCodes
 from local_console.core.schemas.schemas import DeviceID
 from local_console.core.schemas.schemas import Persist
+from local_console.utils.fsindex import directory_index
 from watchdog.events import DirDeletedEvent
+from watchdog.events import FileSystemEvent
 from watchdog.events import FileSystemEventHandler
 from watchdog.observers import Observer
 from watchdog.observers.api import ObservedWatch
@@ -56,43 +59,103 @@ def size_unit_to_bytes(size: int, unit: UnitScale) -> int:
 
 
 class FileInfoContainer:
-    def __init__(self) -> None:
+    """
+    Bookkeeping of the files subject to size limiting. Files are kept
+    in a binary min-heap ordered by age, which is indexed by path so
+    that any file can be updated or removed in O(log n).
+
+    Optionally, the files for which `in_subset` holds are also kept in
+    a heap of their own, so that the oldest of them can be found fast.
+    """
+
+    def __init__(self, in_subset: Callable[[Path], bool] | None = None) -> None:
         self.unique: dict[Path, FileInfo] = {}
         self.older: list[tuple[int, int, FileInfo]] = []
         self.older_id = 0
         self.size = 0
         self.lock = threading.Lock()
+        self._position: dict[Path, int] = {}
+        self._in_subset = in_subset
+        self.subset: FileInfoContainer | None = (
+            FileInfoContainer() if in_subset else None
+        )
+
+    def _swap(self, i: int, j: int) -> None:
+        older = self.older
+        older[i], older[j] = older[j], older[i]
+        self._position[older[i][2].path] = i
+        self._position[older[j][2].path] = j
+
+    def _sift_up(self, i: int) -> None:
+        while i > 0:
+            parent = (i - 1) // 2
+            if self.older[parent] <= self.older[i]:
+                return
+            self._swap(i, parent)
+            i = parent
+
+    def _sift_down(self, i: int) -> None:
+        length = len(self.older)
+        while True:
+            smallest = i
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < length and self.older[child] < self.older[smallest]:
+                    smallest = child
+            if smallest == i:
+                return
+            self._swap(i, smallest)
+            i = smallest
+
+    def _entry(self, file: FileInfo) -> tuple[int, int, FileInfo]:
+        entry = (file.age, self.older_id, file)
+        self.older_id += 1
+        return entry
 
     def _accept(self, file: FileInfo) -> None:
-        heapq.heappush(self.older, (file.age, self.older_id, file))
+        self.older.append(self._entry(file))
+        self._position[file.path] = len(self.older) - 1
         self.unique[file.path] = file
-        self.older_id += 1
         self.size += file.size
+        self._sift_up(len(self.older) - 1)
+        if self.subset is not None and self._in_subset:
+            if self._in_subset(file.path):
+                self.subset._accept(file)
+
+    def _remove_at(self, i: int) -> FileInfo:
+        last = len(self.older) - 1
+        if i != last:
+            self._swap(i, last)
+        _, _, removed = self.older.pop()
+        del self._position[removed.path]
+        del self.unique[removed.path]
+        self.size -= removed.size
+        if i < len(self.older):
+            self._sift_down(i)
+            self._sift_up(i)
+        if self.subset is not None and removed.path in self.subset._position:
+            self.subset._remove_at(self.subset._position[removed.path])
+        return removed
 
     def _discard(self) -> FileInfo:
-        _, _, older = heapq.heappop(self.older)
-        del self.unique[older.path]
-        self.size -= older.size
-        return older
-
-    def _replace_by_newer(self, new: FileInfo) -> None:
-        temporal: list[FileInfo] = []
-        while self.older:
-            curr = self._discard()
-            if curr.path == new.path:
-                self._accept(new)
-                for missing in temporal:
-                    self._accept(missing)
-                return
-            else:
-                temporal.append(curr)
+        if not self.older:
+            raise IndexError("No files in the container")
+        return self._remove_at(0)
+
+    def _replace(self, new: FileInfo) -> None:
+        i = self._position[new.path]
+        self.size += new.size - self.older[i][2].size
+        self.older[i] = self._entry(new)
+        self.unique[new.path] = new
+        self._sift_down(i)
+        self._sift_up(i)
+        if self.subset is not None and new.path in self.subset._position:
+            self.subset._replace(new)
 
     def _resolve_duplicate(self, prev: FileInfo, new: FileInfo) -> FileInfo:
-        if prev.age < new.age:
-            logger.error(
-                f"File {new.path} already registered. It will be replaced as new file age is {new.age} and previous is {prev.age}"
-            )
-            self._replace_by_newer(new)
+        if prev.age <= new.age:
+            # e.g. a file stat'ed while being written, and again once complete
+            logger.debug(f"Updating {new.path}, which is now {new.size} bytes")
+            self._replace(new)
             return prev
         else:
             logger.error(
@@ -109,31 +172,77 @@ class FileInfoContainer:
             if prev is None:
                 self._accept(file)
                 return None
+            elif prev == file:
+                # Already registered, e.g. both on arrival and by a filesystem event
+                return file
             else:
                 older = self._resolve_duplicate(prev, file)
                 return older
 
-    def pop(self) -> FileInfo | None:
+    def update(self, file: FileInfo) -> None:
+        """
+        Add file, or replace its entry regardless of age, e.g. with
+        the latest stat taken upon a filesystem event.
+        """
+        with self.lock:
+            if file.path in self.unique:
+                self._replace(file)
+            else:
+                self._accept(file)
+
+    def remove(self, path: Path) -> FileInfo | None:
+        """
+        Remove the file at the given path and return it, if it was registered
+        """
+        with self.lock:
+            i = self._position.get(path)
+            if i is None:
+                return None
+            return self._remove_at(i)
+
+    def pop(self, from_subset: bool = False) -> FileInfo | None:
         """
         Remove the older from container and returns it. But returns None if empty
         """
         with self.lock:
+            if from_subset:
+                older_in_subset = self._oldest_in_subset()
+                if not older_in_subset:
+                    return None
+                return self._remove_at(self._position[older_in_subset.path])
             try:
                 older = self._discard()
                 return older
             except IndexError:
                 return None
 
+    def oldest(self, from_subset: bool = False) -> FileInfo | None:
+        with self.lock:
+            if from_subset:
+                return self._oldest_in_subset()
+            return self.older[0][2] if self.older else None
+
+    def _oldest_in_subset(self) -> FileInfo | None:
+        if self.subset is None or not self.subset.older:
+            return None
+        return self.subset.older[0][2]
+
     def paths(self) -> set[Path]:
-        return {f.path for f in self.unique.values()}
+        with self.lock:
+            return set(self.unique)
 
     def clear(self) -> None:
-        self.older.clear()
-        self.unique.clear()
-        self.size = 0
+        with self.lock:
+            self.older.clear()
+            self.unique.clear()
+            self._position.clear()
+            self.size = 0
+            if self.subset is not None:
+                self.subset.clear()
 
 
 OnDeleteCallable = Callable[[Path], None]
+OnChangeCallable = Callable[[Path, bool], None]
 
 
 class StorageSizeWatcher:
@@ -154,9 +263,11 @@ class StorageSizeWatcher:
         the total storage usage within the directory under a given limit size,
         pruning the oldest files when necessary.
 
-        Bookkeeping is made in-memory for it to remain fast, however consistency
-        is checked against the filesystem once every given number of incoming
-        files.
+        Bookkeeping is made in-memory for it to remain fast. While the directory
+        monitor is running, it is kept up to date by filesystem events, and the
+        directories are only scanned again once a drift from the filesystem is
+        detected. Otherwise, consistency is checked against the filesystem once
+        every given number of incoming files.
 
         Args:
                 config: (Persist) size limit settings ('unit' and 'size' must be set)
@@ -166,54 +277,72 @@ class StorageSizeWatcher:
         assert config.unit
 
         self._paths: set[Path] = set()
+        self._image_root: Path | None = None
         self._size_limit = size_unit_to_bytes(config.size, config.unit)
         self.check_frequency = check_frequency
-        self.content = FileInfoContainer()
+        self.content = FileInfoContainer(in_subset=self._is_image)
         self._remaining_before_check = self.check_frequency
-        self.monitor = DirectoryMonitor(on_delete_cb)
+        self._drift = False
+        # Serializes bookkeeping updates from the worker threads storing
+        # files, from filesystem events and from the storage budget
+        self._lock = threading.RLock()
+        self.monitor = DirectoryMonitor(on_delete_cb, self._on_change)
         self.state = self.State.Initialized
 
     def apply(self, config: Persist, device_id: DeviceID) -> None:
         assert isinstance(config.size, int)
         assert config.unit
 
-        for path in self._paths:
+        with self._lock:
+            previous = self._paths
+            self._paths = set()
+            self._image_root = None
+            self._size_limit = size_unit_to_bytes(config.size, config.unit)
+        # Not under the lock, as the monitor holds its own while dispatching events
+        for path in previous:
             self.monitor.unwatch(path)
-        self._paths.clear()
-        self._size_limit = size_unit_to_bytes(config.size, config.unit)
 
         if config.device_dir_path:
             image_dir = image_dir_for(device_id, config.device_dir_path)
             assert image_dir
             self._set_path(image_dir)
+            with self._lock:
+                self._image_root = image_dir.resolve()
 
             inference_dir = inference_dir_for(device_id, config.device_dir_path)
             assert inference_dir
             self._set_path(inference_dir)
 
-        self.state = self.State.Configured
+        with self._lock:
+            self.state = self.State.Configured
         logger.debug("New configuration applied to storage size watcher")
 
     def gather(self, prune_enabled: bool = True) -> None:
-        self._consistency_check()
-        if prune_enabled:
-            self._prune()
-        self.state = self.State.Accumulating
+        with self._lock:
+            self._consistency_check()
+            if prune_enabled:
+                self._prune()
+            self.state = self.State.Accumulating
 
     def _set_path(self, path: Path) -> None:
         check_and_create_directory(path)
 
         p = path.resolve()
-        if p in self._paths:
-            return
+        with self._lock:
+            if p in self._paths:
+                return
+            self._paths.add(p)
 
         logger.debug(f"Including path {p} in size limiting watchlist.")
-        self._paths.add(p)
         self.monitor.watch(path)
 
     def incoming(self, path: Path, prune_enabled: bool = True) -> None:
         assert path.is_file()
 
+        with self._lock:
+            self._incoming(path, prune_enabled)
+
+    def _incoming(self, path: Path, prune_enabled: bool) -> None:
         if not self._paths:
             return
 
@@ -228,12 +357,20 @@ class StorageSizeWatcher:
 
         # Steady-state operation occurs in Accumulating state
         if self.state == self.State.Accumulating:
-            self._register_file(path)
+            try:
+                self._register_file(path)
+            except FileNotFoundError:
+                # Evicted on behalf of another incoming file in the meantime
+                logger.debug(f"Incoming file {path} was deleted before tracking it")
+                return
 
             self._remaining_before_check -= 1
             if self._remaining_before_check <= 0:
-                self._consistency_check()
                 self._remaining_before_check = self.check_frequency
+                if not self._is_tracking():
+                    self._consistency_check()
+            elif self._drift:
+                self._consistency_check()
 
             if prune_enabled:
                 self._prune()
@@ -243,9 +380,10 @@ class StorageSizeWatcher:
             )
 
     def size(self) -> int:
-        # NOTE: consider performance
-        self._consistency_check()
-        return self.content.size
+        with self._lock:
+            if self.state != self.State.Accumulating or not self._is_tracking():
+                self._consistency_check()
+            return self.content.size
 
     @property
     def current_limit(self) -> int:
@@ -263,6 +401,56 @@ class StorageSizeWatcher:
     def stop(self) -> None:
         self.monitor.stop()
 
+    def oldest(self, images_only: bool = False) -> FileInfo | None:
+        return self.content.oldest(from_subset=images_only)
+
+    def evict(self, images_only: bool = False) -> FileInfo | None:
+        """
+        Deletes the oldest file (or image) regardless of the size limit,
+        as commanded by a storage budget shared with other watchers.
+        """
+        with self._lock:
+            entry = self.content.pop(from_subset=images_only)
+            if entry:
+                self._delete(entry)
+            return entry
+
+    def _is_image(self, path: Path) -> bool:
+        return self._image_root is not None and path.is_relative_to(self._image_root)
+
+    def _is_tracking(self) -> bool:
+        """
+        Whether bookkeeping is being kept up to date by filesystem events
+        """
+        return self.monitor.is_running() and not self._drift
+
+    def _on_change(self, path: Path, is_directory: bool) -> None:
+        """
+        Called from the directory monitor thread for every change
+        within the watched directories.
+        """
+        with self._lock:
+            self._track_change(path, is_directory)
+
+    def _track_change(self, path: Path, is_directory: bool) -> None:
+        if self.state != self.State.Accumulating:
+            # Bookkeeping will be set up by the next gather()
+            return
+
+        if is_directory:
+            # Files moved or removed along with a directory are not notified
+            self._drift = True
+            return
+
+        try:
+            stats = os.stat(path)
+        except FileNotFoundError:
+            self.content.remove(path)
+            return
+        if stat.S_ISREG(stats.st_mode):
+            # Taken under the lock, this stat is the latest view of the file
+            self.content.update(entry_from_stats(path, stats))
+
     def _register_file(self, path: Path) -> None:
         entry = walk_entry(path)
         logger.debug(f"Registering for size limiting: {entry}")
@@ -270,37 +458,42 @@ class StorageSizeWatcher:
         self.content.add(entry)
 
     def _prune(self) -> None:
-        # In order to make this class thread-safe,
-        # the following would be required:
-        # self.state == self.State.Checking
         has_been_pruned = False
         while self.content.size > self._size_limit:
-            try:
-                entry = self.content.pop()
-                if not entry:
-                    logger.error(
-                        "There are no more files in the content, but the usage limits have been exceeded."
-                    )
-                    self._consistency_check()
-                    return
-                path = entry.path
-                path.unlink()
-                has_been_pruned = True
-                logger.debug(f"Removed {path} for pruning, freed {entry.size} bytes")
-            except FileNotFoundError as e:
-                logger.warning(f"File {path} was already removed", exc_info=e)
-            except Exception as e:
-                logger.warning("Unexpected exception while pruning", exc_info=e)
+            entry = self.content.pop()
+            if not entry:
+                logger.error(
+                    "There are no more files in the content, but the usage limits have been exceeded."
+                )
+                self._consistency_check()
+                return
+            has_been_pruned |= self._delete(entry)
 
         if has_been_pruned:
             logger.debug(
                 f"Prune has been applied. Current storage usage is {self.content.size}"
             )
-        # In order to make this class thread-safe,
-        # the following would be required:
-        # self.state == self.State.Accumulating
+
+    def _delete(self, entry: FileInfo) -> bool:
+        path = entry.path
+        try:
+            path.unlink()
+            directory_index(path.parent).discard(path.name)
+            logger.debug(f"Removed {path} for pruning, freed {entry.size} bytes")
+            return True
+        except FileNotFoundError as e:
+            logger.warning(f"File {path} was already removed", exc_info=e)
+            self._drift = True
+        except Exception as e:
+            logger.warning("Unexpected exception while pruning", exc_info=e)
+        return False
 
     def _consistency_check(self) -> bool:
+        with self._lock:
+            return self._check_consistency()
+
+    def _check_consistency(self) -> bool:
+        self._drift = False
         in_memory = self.content.paths()
         valid_paths = (root for root in self._paths if root.is_dir())
         files_in_paths = [p for root in valid_paths for p in walk_files(root)]
@@ -376,29 +569,55 @@ def check_and_create_directory(directory: Path) -> None:
 class DirectoryMonitor:
 
     class EventHandler(FileSystemEventHandler):
-        def __init__(self, on_delete_cb: OnDeleteCallable) -> None:
+        def __init__(
+            self, on_delete_cb: OnDeleteCallable, on_change_cb: OnChangeCallable
+        ) -> None:
             self._on_delete_cb = on_delete_cb
+            self._on_change_cb = on_change_cb
+
+        def _changed(self, src_path: str | bytes, is_directory: bool) -> None:
+            self._on_change_cb(Path(os.fsdecode(src_path)), is_directory)
+
+        def on_created(self, event: FileSystemEvent) -> None:
+            self._changed(event.src_path, event.is_directory)
+
+        def on_modified(self, event: FileSystemEvent) -> None:
+            # Directories are reported as modified whenever their files change
+            if not event.is_directory:
+                self._changed(event.src_path, False)
+
+        def on_moved(self, event: FileSystemEvent) -> None:
+            self._changed(event.src_path, event.is_directory)
+            self._changed(event.dest_path, event.is_directory)
 
         def on_deleted(self, event: DirDeletedEvent) -> None:
+            self._changed(event.src_path, event.is_directory)
             if event.is_directory:
                 self._on_delete_cb(event)
 
-    def __init__(self, on_delete_cb: OnDeleteCallable = lambda dir: None) -> None:
+    def __init__(
+        self,
+        on_delete_cb: OnDeleteCallable = lambda dir: None,
+        on_change_cb: OnChangeCallable = lambda path, is_dir: None,
+    ) -> None:
         self._obs = Observer()
         self._watches: dict[Path, ObservedWatch] = dict()
         self.on_delete_cb = on_delete_cb
+        self.on_change_cb = on_change_cb
 
     def start(self) -> None:
         self._obs.start()
 
+    def is_running(self) -> bool:
+        return self._obs.is_alive()
+
     def watch(self, directory: Path) -> None:
         assert directory.is_dir()
         resolved = directory.resolve()
-        handler = self.EventHandler(self._watch_decorator(self.on_delete_cb))
-        watch = self._obs.schedule(
-            handler,
-            str(resolved),
+        handler = self.EventHandler(
+            self._watch_decorator(self.on_delete_cb), self.on_change_cb
         )
+        watch = self._obs.schedule(handler, str(resolved), recursive=True)
         self._watches[resolved] = watch
 
     def _on_delete_action(self, path: Path) -> None:
@@ -409,7 +628,10 @@ class DirectoryMonitor:
     def _watch_decorator(self, on_delete_cb: OnDeleteCallable) -> Callable:
 
         def complete_callback(event: DirDeletedEvent) -> None:
-            path = Path(event.src_path)
+            path = Path(os.fsdecode(event.src_path))
+            if path.resolve() not in self._watches:
+                # A subdirectory of a watched directory
+                return
             self._on_delete_action(path)
             on_delete_cb(path)
 
@@ -0,0 +1,117 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import logging
+import threading
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import TypeVar
+
+import trio
+from local_console.utils.fsindex import directory_index
+from local_console.utils.fstools import check_and_create_directory
+from trio.lowlevel import RunVar
+
+logger = logging.getLogger(__name__)
+
+WRITER_THREADS = 4
+
+_T = TypeVar("_T")
+
+
+class StorageWriter:
+    """
+    Performs the filesystem work of storing the files uploaded by
+    cameras in worker threads, so that a slow disk does not stall
+    the trio loop, which also drives the MQTT traffic of every camera.
+
+    At most `threads` jobs run at the same time. Further jobs wait
+    for a thread to become available, which applies backpressure on
+    the blob dispatching from the webserver.
+    """
+
+    def __init__(self, threads: int = WRITER_THREADS) -> None:
+        self._limiter = trio.CapacityLimiter(threads)
+        self._validated: set[Path] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        Number of jobs either running or waiting for a thread.
+        """
+        stats = self._limiter.statistics()
+        return int(stats.borrowed_tokens + stats.tasks_waiting)
+
+    async def run(self, fn: Callable[..., _T], *args: Any) -> _T:
+        if self._limiter.available_tokens == 0:
+            logger.debug(f"Storage writer busy, queue depth is {self.queue_depth}")
+        return await trio.to_thread.run_sync(fn, *args, limiter=self._limiter)
+
+    def ensure_directory(self, directory: Path) -> None:
+        """
+        Validates a directory as a target for writing files. The
+        outcome is remembered, so that the costly validation is
+        only repeated after `forget_directory()`.
+        """
+        with self._lock:
+            if directory in self._validated:
+                return
+        check_and_create_directory(directory)
+        with self._lock:
+            self._validated.add(directory)
+
+    def forget_directory(self, directory: Path) -> None:
+        with self._lock:
+            self._validated.discard(directory)
+
+    def write(self, path: Path, content: bytes) -> None:
+        """
+        Blocking write of a file, meant to be called from `run()`.
+        """
+        self.store(path, lambda target: target.write_bytes(content))
+
+    def store(self, path: Path, save: Callable[[Path], Any]) -> None:
+        """
+        Blocking storage of a file by means of `save`, which gets
+        the path to store the file at (e.g. by moving an already
+        received file there). Meant to be called from `run()`.
+        """
+        directory = path.parent
+        self.ensure_directory(directory)
+        try:
+            save(path)
+        except FileNotFoundError:
+            # The directory has been removed since it was validated
+            self.forget_directory(directory)
+            self.ensure_directory(directory)
+            save(path)
+        directory_index(directory).add(path.name)
+
+
+_storage_writer: RunVar[StorageWriter] = RunVar("storage_writer")
+
+
+def storage_writer() -> StorageWriter:
+    """
+    Returns the storage writer of the current trio run.
+    """
+    try:
+        return _storage_writer.get()
+    except LookupError:
+        writer = StorageWriter()
+        _storage_writer.set(writer)
+        return writer
@@ -90,3 +90,13 @@ def is_port_open(port: int) -> bool:
             return True
         except OSError:
             return False
+
+
+def get_free_port() -> int:
+    """
+    Returns a TCP port on the loopback interface that is not in use.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        port: int = s.getsockname()[1]
+        return port
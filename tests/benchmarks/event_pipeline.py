@@ -0,0 +1,147 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+"""
+Messages per second and per device that the camera states can take in,
+for attribute reports of a v2 device, before and after parsing each
+message once into a typed event. Usage:
+
+    python -m tests.benchmarks.event_pipeline [messages] [devices]
+
+`before` decodes the payload with the standard decoder and validates the
+system report again in each handler, as the states used to. `after`
+goes through `MQTTEvent`, whose report is parsed on first access and
+shared by the handlers.
+"""
+import json
+import sys
+import time
+from collections.abc import Callable
+
+import trio
+from local_console.core.camera.enums import MQTTTopics
+from local_console.core.camera.states.base import MQTTEvent
+from local_console.core.camera.v2.edge_system_common import EdgeSystemCommon
+from local_console.utils import fastjson
+
+TOPIC = MQTTTopics.ATTRIBUTES.value
+# Handlers reading the report of each message, as in the connected
+# state, a state deriving from it, and the properties of the camera
+HANDLERS = 3
+
+PAYLOAD = json.dumps(
+    {
+        "state/$agent/report-status-interval-min": 3,
+        "state/$agent/report-status-interval-max": 180,
+        "state/$system/device_info": json.dumps(
+            {
+                "device_manifest": "",
+                "chips": [
+                    {
+                        "name": "main_chip",
+                        "id": "",
+                        "hardware_version": "",
+                        "temperature": 0,
+                        "loader_version": "010300",
+                        "loader_hash": "",
+                        "update_date_loader": "",
+                        "firmware_version": "0.6.5",
+                        "firmware_hash": "",
+                        "update_date_firmware": "",
+                        "ai_models": [],
+                    },
+                    {
+                        "name": "sensor_chip",
+                        "id": "100A50500A2012062364012000000000",
+                        "hardware_version": "1",
+                        "temperature": 34,
+                        "loader_version": "020301",
+                        "loader_hash": "",
+                        "update_date_loader": "1970-01-01T00:00:06.000Z",
+                        "firmware_version": "820204",
+                        "firmware_hash": "",
+                        "update_date_firmware": "1970-01-01T00:00:06.000Z",
+                        "ai_models": [{"version": "", "hash": "", "update_date": ""}]
+                        * 4,
+                    },
+                ],
+            }
+        ),
+        "state/$system/device_states": json.dumps(
+            {
+                "power_states": {
+                    "source": [{"type": 0, "level": 100}],
+                    "in_use": 0,
+                    "is_battery_low": False,
+                },
+                "process_state": "Idle",
+                "hours_meter": 12,
+                "bootup_reason": 0,
+                "last_bootup_time": "2025-03-03T17:19:36.597Z",
+            }
+        ),
+        "state/$system/device_capabilities": json.dumps(
+            {
+                "is_battery_supported": False,
+                "supported_wireless_mode": 3,
+                "is_periodic_supported": False,
+                "is_sensor_postprocess_supported": True,
+            }
+        ),
+        "state/node/edge_app": json.dumps({"res_info": {"code": 0}}),
+    }
+).encode()
+
+
+def before(topic: str, payload: bytes) -> None:
+    decoded = json.loads(payload)
+    for _ in range(HANDLERS):
+        EdgeSystemCommon.model_validate(dict(decoded))
+
+
+def after(topic: str, payload: bytes) -> None:
+    event = MQTTEvent(topic=topic, payload=fastjson.loads(payload))
+    for _ in range(HANDLERS):
+        event.edge_system
+
+
+async def device(pipeline: Callable[[str, bytes], None], count: int) -> None:
+    for _ in range(count):
+        pipeline(TOPIC, PAYLOAD)
+        # Let the other devices take their turn
+        await trio.lowlevel.checkpoint()
+
+
+async def run(pipeline: Callable[[str, bytes], None], count: int, devices: int) -> None:
+    started = time.perf_counter()
+    async with trio.open_nursery() as nursery:
+        for _ in range(devices):
+            nursery.start_soon(device, pipeline, count)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{pipeline.__name__:<8} {count / elapsed:>10.0f} msg/s per device "
+        f"devices={devices} messages={count * devices}"
+    )
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    devices = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    for pipeline in (before, after):
+        trio.run(run, pipeline, count, devices)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+"""
+Throughput of the trio MQTT client against a local mosquitto broker,
+for each overflow policy. Requires mosquitto in the PATH. Usage:
+
+    python -m tests.benchmarks.mqtt_throughput [messages] [payload bytes]
+"""
+import sys
+import time
+
+import paho.mqtt.client as paho
+import trio
+from local_console.clients.trio_paho_mqtt import AsyncClient
+from local_console.clients.trio_paho_mqtt import MQTTOverflowPolicy
+from local_console.servers.broker import spawn_broker
+from local_console.utils.local_network import get_free_port
+
+TOPIC = "v1/devices/me/telemetry"
+# Time without messages after which the run is considered finished
+IDLE_TIMEOUT = 2.0
+
+
+def publish(port: int, count: int, payload: bytes) -> None:
+    publisher = paho.Client(client_id="benchmark-publisher")
+    publisher.connect("localhost", port)
+    publisher.loop_start()
+    for _ in range(count):
+        # Retry while paho's outgoing queue is full
+        while publisher.publish(TOPIC, payload).rc == paho.MQTT_ERR_QUEUE_SIZE:
+            time.sleep(0.001)
+    publisher.loop_stop()
+    publisher.disconnect()
+
+
+async def run(policy: MQTTOverflowPolicy, count: int, payload: bytes) -> None:
+    port = get_free_port()
+    async with trio.open_nursery() as nursery:
+        async with spawn_broker(port, nursery, False):
+            client = AsyncClient(paho.Client(), nursery, overflow=policy)
+            client.connect("localhost", port)
+            client.subscribe(TOPIC)
+            await trio.sleep(0.5)
+
+            nursery.start_soon(trio.to_thread.run_sync, publish, port, count, payload)
+            started = time.perf_counter()
+            finished = started
+            consumed = 0
+            async with client.messages() as mgen:
+                while consumed < count:
+                    with trio.move_on_after(IDLE_TIMEOUT) as idle:
+                        await mgen.__anext__()
+                    if idle.cancelled_caught:
+                        break
+                    consumed += 1
+                    finished = time.perf_counter()
+                    # Emulate some processing per message
+                    await trio.lowlevel.checkpoint()
+
+                stats = client.stats()
+                elapsed = finished - started
+                print(
+                    f"{policy:<12} {consumed / elapsed:>10.0f} msg/s "
+                    f"consumed={consumed} received={stats.received} "
+                    f"dropped={stats.dropped} high_water={stats.high_water}"
+                )
+                client.disconnect()
+                nursery.cancel_scope.cancel()
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    payload = b"x" * (int(sys.argv[2]) if len(sys.argv) > 2 else 256)
+    for policy in MQTTOverflowPolicy:
+        trio.run(run, policy, count, payload)
+
+
+if __name__ == "__main__":
+    main()
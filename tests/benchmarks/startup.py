@@ -0,0 +1,71 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+"""
+Import time of the CLI entry point, which every command pays before
+doing anything, in fresh interpreters. Usage:
+
+    python -m tests.benchmarks.startup [runs]
+
+Reports the median over the runs and the slowest modules of the last
+one, and fails if the median exceeds IMPORT_BUDGET_SECONDS.
+"""
+import statistics
+import subprocess
+import sys
+
+MODULE = "local_console.__main__"
+# Generous, to catch regressions rather than machine speed
+IMPORT_BUDGET_SECONDS = 1.0
+SLOWEST = 10
+
+
+def import_times(module: str) -> dict[str, int]:
+    """
+    Cumulative import time in microseconds of every module imported by
+    `module`, in a fresh interpreter.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main() -> None:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    samples = []
+    for _ in range(runs):
+        times = import_times(MODULE)
+        samples.append(times[MODULE])
+    median = statistics.median(samples) / 1e6
+
+    print(f"{MODULE:<40} {median * 1e3:>8.1f} ms median of {runs} runs")
+    for name, cumulative in sorted(times.items(), key=lambda t: -t[1])[1:SLOWEST]:
+        print(f"  {name:<38} {cumulative / 1e3:>8.1f} ms")
+    if median > IMPORT_BUDGET_SECONDS:
+        sys.exit(f"Over the budget of {IMPORT_BUDGET_SECONDS:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,13 +13,16 @@
 # limitations under the License.
 #
 # SPDX-License-Identifier: Apache-2.0
+import tempfile
 from collections.abc import Generator
 from contextlib import contextmanager
+from pathlib import Path
 from typing import Any
 from unittest.mock import Mock
 from unittest.mock import patch
 
 from local_console.servers.webserver import AsyncWebserver
+from local_console.servers.webserver import IncomingFile
 
 MOCKED_WEBSERVER_PORT = 1234
 
@@ -30,9 +33,12 @@ class TestAsyncWebserver(AsyncWebserver):
     """
 
     async def receives_file(self, path: str, data: bytes) -> None:
+        fd, name = tempfile.mkstemp(suffix=".part")
+        with open(fd, "wb") as f:
+            f.write(data)
         await self._recv_channel.send(
             (
-                data,
+                IncomingFile(Path(name), len(data)),
                 path,
             )
         )
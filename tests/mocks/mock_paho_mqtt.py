@@ -18,6 +18,7 @@ from unittest.mock import AsyncMock
 from unittest.mock import MagicMock
 
 import trio
+from local_console.core.camera.enums import MQTTTopics
 from local_console.core.schemas.schemas import OnWireProtocol
 
 from tests.strategies.samplers.mqtt_message import MockMQTTMessage
@@ -105,3 +106,20 @@ class MockMqttAgent:
 
     async def wait_message_to_be_read(self) -> None:
         await self._msg_in.iterator.wait_to_be_read()
+
+    def replies_to_rpc(self, response: bytes) -> None:
+        """
+        Makes the agent receive `response` for the RPC requests it publishes
+        """
+
+        async def publish(topic: str, payload: str) -> None:
+            if MQTTTopics.topic_matches_pattern(topic, MQTTTopics.RPC_REQUESTS.value):
+                reqid = topic.rsplit("/", 1)[-1]
+                self.receives(
+                    MockMQTTMessage(
+                        topic=MQTTTopics.RPC_RESPONSES.value.replace("+", reqid),
+                        payload=response,
+                    )
+                )
+
+        self.agent.publish.side_effect = publish
@@ -0,0 +1,109 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import paho.mqtt.client as mqtt
+import pytest
+import trio
+from local_console.clients.trio_paho_mqtt import AsyncClient
+from local_console.clients.trio_paho_mqtt import MQTTOverflowPolicy
+
+
+def client(nursery, policy: MQTTOverflowPolicy, buffer: int = 2) -> AsyncClient:
+    return AsyncClient(MagicMock(), nursery, max_buffer=buffer, overflow=policy)
+
+
+def message(n: int) -> mqtt.MQTTMessage:
+    msg = mqtt.MQTTMessage(topic=b"topic")
+    msg.payload = str(n).encode()
+    return msg
+
+
+def receive(aclient: AsyncClient, count: int) -> list[bytes]:
+    return [aclient._msg_receive_channel.receive_nowait().payload for _ in range(count)]
+
+
+@pytest.mark.trio
+async def test_drop_oldest(nursery) -> None:
+    aclient = client(nursery, MQTTOverflowPolicy.DROP_OLDEST)
+    for n in range(4):
+        aclient._on_message(None, None, message(n))
+
+    assert receive(aclient, 2) == [b"2", b"3"]
+    stats = aclient.stats()
+    assert (stats.received, stats.dropped, stats.high_water) == (4, 2, 2)
+
+
+@pytest.mark.trio
+async def test_drop_newest(nursery) -> None:
+    aclient = client(nursery, MQTTOverflowPolicy.DROP_NEWEST)
+    for n in range(4):
+        aclient._on_message(None, None, message(n))
+
+    assert receive(aclient, 2) == [b"0", b"1"]
+    assert aclient.stats().dropped == 2
+
+
+@pytest.mark.trio
+async def test_block_holds_messages_back(nursery) -> None:
+    aclient = client(nursery, MQTTOverflowPolicy.BLOCK)
+    for n in range(4):
+        aclient._on_message(None, None, message(n))
+
+    assert not aclient._event_should_read.is_set()
+    stats = aclient.stats()
+    assert (stats.dropped, stats.queued, stats.high_water) == (0, 4, 4)
+
+    received = []
+    with trio.CancelScope() as cs:
+        async with aclient.messages() as mgen:
+            async for msg in mgen:
+                received.append(msg.payload)
+                if len(received) == 4:
+                    cs.cancel()
+    assert received == [b"0", b"1", b"2", b"3"]
+    assert aclient._event_should_read.is_set()
+    assert aclient.stats().queued == 0
+
+
+@pytest.mark.trio
+async def test_reads_many_packets_per_wakeup(nursery) -> None:
+    aclient = client(nursery, MQTTOverflowPolicy.DROP_OLDEST)
+    aclient._read_batch = 5
+    aclient._client.loop_read.return_value = mqtt.MQTT_ERR_SUCCESS
+
+    with patch(
+        "local_console.clients.trio_paho_mqtt._readable", side_effect=[True, False]
+    ):
+        aclient._read_available()
+    assert aclient._client.loop_read.call_count == 2
+
+    aclient._client.loop_read.reset_mock()
+    with patch("local_console.clients.trio_paho_mqtt._readable", return_value=True):
+        aclient._read_available()
+    assert aclient._client.loop_read.call_count == 5
+
+
+@pytest.mark.trio
+async def test_send_buffer_left_to_the_os(nursery) -> None:
+    sock = MagicMock()
+    client(nursery, MQTTOverflowPolicy.DROP_OLDEST)._on_socket_open(None, None, sock)
+    sock.setsockopt.assert_not_called()
+
+    aclient = AsyncClient(MagicMock(), nursery, send_buffer=4096)
+    aclient._on_socket_open(None, None, sock)
+    sock.setsockopt.assert_called_once()
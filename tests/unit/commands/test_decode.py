@@ -0,0 +1,68 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import json
+import zipfile
+
+from local_console.commands.decode import app
+from local_console.core.config import Config
+from typer.testing import CliRunner
+
+from tests.unit.core.files.test_decoding import inference_file
+from tests.unit.core.files.test_decoding import populate
+from tests.unit.core.files.test_decoding import SCHEMA
+
+runner = CliRunner()
+
+
+def test_decode_device_inferences(single_device_config, tmp_path):
+    device = single_device_config.devices[0]
+    folder = tmp_path / f"{device.id}/Metadata"
+    folder.mkdir(parents=True)
+    populate(folder, ["20241216110000000", "20241216120000000"])
+    persist = Config().get_device_config(device.id).persist
+    persist.device_dir_path = tmp_path
+    persist.vapp_schema_file = str(SCHEMA)
+
+    output = tmp_path / "out.jsonl"
+    result = runner.invoke(app, ["--end", "2024121611", "-o", str(output)])
+
+    assert result.exit_code == 0
+    (line,) = output.read_text().splitlines()
+    assert json.loads(line)["time"] == "20241216110000000"
+
+
+def test_decode_archive_to_stdout(single_device_config, tmp_path):
+    archive = tmp_path / "inferences.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("20241216110000000.txt", inference_file("20241216110000000"))
+
+    result = runner.invoke(
+        app, ["--archive", str(archive), "--schema", str(SCHEMA), "-f", "csv"]
+    )
+
+    assert result.exit_code == 0
+    assert len(result.stdout.splitlines()) == 6
+
+
+def test_decode_without_schema(single_device_config):
+    Config().get_device_config(
+        single_device_config.devices[0].id
+    ).persist.vapp_schema_file = None
+
+    result = runner.invoke(app, [])
+
+    assert result.exit_code == 1
+    assert "schema" in result.stdout
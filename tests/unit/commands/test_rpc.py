@@ -14,9 +14,11 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 import json
+from unittest.mock import ANY
 from unittest.mock import patch
 
 from hypothesis import given
+from hypothesis import settings
 from local_console.commands.rpc import app
 from local_console.core.config import Config
 from local_console.core.schemas.schemas import OnWireProtocol
@@ -28,6 +30,18 @@ from tests.strategies.configs import generate_text
 runner = CliRunner()
 
 
+def fresh_connection():
+    # The MQTT client mock of the autouse fixture is shared by all the
+    # examples, and records the exceptions its scopes exit with, along
+    # with the frames of the driver. Using a fresh mock per example
+    # keeps the heap, and so garbage collection times, from growing.
+    return patch("local_console.clients.agent.AsyncClient")
+
+
+# Each run spins up a device with its mocks, leaving garbage behind.
+# A full collection of the garbage of earlier tests can then take
+# longer than the deadline, for any single example.
+@settings(deadline=None)
 @given(
     generate_text(),
     generate_text(),
@@ -37,6 +51,7 @@ def test_v1_rpc_command(instance_id: str, method: str, params: str):
     set_configuration()
     Config().get_first_device_config().onwire_schema = OnWireProtocol.EVP1
     with (
+        fresh_connection(),
         patch(
             "local_console.core.camera.states.v1.common.run_rpc_with_response"
         ) as mock_v1_run_rpc_with_response,
@@ -45,11 +60,16 @@ def test_v1_rpc_command(instance_id: str, method: str, params: str):
         params = {"key": params}
         result = runner.invoke(app, [instance_id, method, json.dumps(params)])
         mock_v1_run_rpc_with_response.assert_called_with(
-            Config().get_first_device_config().id, instance_id, method, params
+            Config().get_first_device_config().id,
+            instance_id,
+            method,
+            params,
+            channel=ANY,
         )
         assert result.exit_code == 0
 
 
+@settings(deadline=None)
 @given(
     generate_text(),
     generate_text(),
@@ -58,7 +78,10 @@ def test_v1_rpc_command(instance_id: str, method: str, params: str):
 def test_v1_rpc_command_exception(instance_id: str, method: str, params: str):
     set_configuration()
     Config().get_first_device_config().onwire_schema = OnWireProtocol.EVP1
-    with (patch("local_console.core.camera.states.v1.common.run_rpc_with_response"),):
+    with (
+        fresh_connection(),
+        patch("local_console.core.camera.states.v1.common.run_rpc_with_response"),
+    ):
         # Format params not to be a valid JSON
         params = params + "}"
         result = runner.invoke(app, [instance_id, method, params])
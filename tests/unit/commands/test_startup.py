@@ -0,0 +1,53 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import click
+from local_console.__main__ import app
+from local_console.plugin import plugin_entry_points
+from local_console.plugin import PluginGroup
+from typer.main import get_command
+
+from tests.benchmarks.startup import import_times
+
+HEAVY_MODULES = {
+    "cryptography",
+    "fastapi",
+    "hypercorn",
+    "numpy",
+    "paho",
+    "qrcode",
+    "trio",
+    "watchdog",
+}
+
+
+def test_cli_startup_imports() -> None:
+    # How long they take is measured by tests.benchmarks.startup
+    times = import_times("local_console.__main__")
+
+    loaded = {name.split(".")[0] for name in times}
+    assert not loaded & HEAVY_MODULES
+
+
+def test_commands_resolved_from_entry_points() -> None:
+    group = get_command(app)
+    assert isinstance(group, PluginGroup)
+
+    ctx = click.Context(group)
+    assert group.list_commands(ctx) == list(plugin_entry_points())
+    for name in group.list_commands(ctx):
+        command = group.get_command(ctx, name)
+        assert command.name == name
+        assert command.help
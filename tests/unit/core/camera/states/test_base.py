@@ -0,0 +1,80 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import json
+from base64 import b64decode
+from unittest.mock import patch
+
+import pytest
+from local_console.core.camera.enums import MQTTTopics
+from local_console.core.camera.states.base import MQTTEvent
+from local_console.core.camera.states.base import V1_EA_STATE_TOPIC
+from local_console.core.camera.v2.edge_system_common import EdgeSystemCommon
+from pydantic import ValidationError
+
+from tests.strategies.samplers.mqtt_message import MockMQTTMessage
+
+
+def test_edge_system_parsed_once() -> None:
+    payload = {
+        "state/$agent/report-status-interval-min": 3,
+        "state/node/edge_app": json.dumps({"res_info": {}}),
+    }
+    event = MQTTEvent(topic=MQTTTopics.ATTRIBUTES.value, payload=payload)
+
+    with patch.object(
+        EdgeSystemCommon, "model_validate", wraps=EdgeSystemCommon.model_validate
+    ) as mock_validate:
+        first = event.edge_system
+        second = event.edge_system
+
+    assert first is second
+    mock_validate.assert_called_once()
+    assert first.report_status_interval_min == 3
+    assert first.edge_app == {"node": {"res_info": {}}}
+    # The payload remains intact for other handlers
+    assert "state/node/edge_app" in event.payload
+
+
+def test_device_configuration() -> None:
+    message = MockMQTTMessage.config_status(sensor_id="SENSOR")
+    event = MQTTEvent(topic=message.topic, payload=json.loads(message.payload))
+
+    report = event.device_configuration
+    assert report is not None
+    assert report.Hardware.SensorId == "SENSOR"
+    assert event.device_configuration is report
+
+
+def test_device_configuration_not_base64() -> None:
+    message = MockMQTTMessage.config_status(sensor_id="SENSOR")
+    encoded = json.loads(message.payload)[V1_EA_STATE_TOPIC]
+    plain = json.loads(message.payload)
+    plain[V1_EA_STATE_TOPIC] = b64decode(encoded).decode()
+
+    event = MQTTEvent(topic=message.topic, payload=plain)
+
+    assert event.device_configuration.Hardware.SensorId == "SENSOR"
+
+
+def test_device_configuration_absent_or_malformed() -> None:
+    event = MQTTEvent(topic=MQTTTopics.ATTRIBUTES.value, payload={"systemInfo": {}})
+    assert event.device_configuration is None
+
+    event = MQTTEvent(
+        topic=MQTTTopics.ATTRIBUTES.value, payload={V1_EA_STATE_TOPIC: "{}"}
+    )
+    with pytest.raises(ValidationError):
+        event.device_configuration
@@ -83,6 +83,7 @@ async def test_streaming_enter(single_device_config, mocked_webserver, nursery):
             "backdoor-EA_Main",
             "StartUploadInferenceData",
             body.model_dump(),
+            channel=state._mqtt.rpc,
         )
 
 
@@ -122,6 +123,10 @@ async def test_streaming_exit(single_device_config, nursery):
         await camera._transition_to_state(DisconnectedCamera(camera._common_properties))
 
         mock_run_rpc_with_response.assert_awaited_once_with(
-            state._mqtt._mqtt_port, "backdoor-EA_Main", "StopUploadInferenceData", {}
+            state._mqtt._mqtt_port,
+            "backdoor-EA_Main",
+            "StopUploadInferenceData",
+            {},
+            channel=state._mqtt.rpc,
         )
         mock_file_inbox.reset_file_incoming_callable.assert_called_once_with(config.id)
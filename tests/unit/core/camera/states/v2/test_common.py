@@ -81,48 +81,41 @@ async def test_run_command_no_response(
 
 @pytest.mark.trio
 @patch("local_console.core.commands.rpc_with_response.random_id", return_value="1111")
-async def test_run_command_with_response(mock_random_id, nursery, camera):
-    agent_class_mock = MagicMock()
-    mocked_agent = MockMqttAgent(agent_class_mock)
-
-    with (
-        patch("local_console.core.commands.rpc_with_response.Agent", agent_class_mock),
-    ):
-        await nursery.start(camera.setup)
-
-        state = ConnectedCameraStateV2(camera._common_properties)
-        await camera._transition_to_state(state)
-
-        rpc_id = mock_random_id()
-        response = "direct command specific response"
-
-        mocked_agent.receives(
-            MockMQTTMessage(
-                topic=MQTTTopics.RPC_RESPONSES.value.replace("+", rpc_id),
-                payload=json.dumps(
-                    {
-                        "direct-command-response": {
-                            "response": response,
-                            "reqid": rpc_id,
-                            "status": "ok",
-                            "errorMessage": "",
-                        }
-                    }
-                ).encode("utf-8"),
-            )
-        )
+async def test_run_command_with_response(
+    mock_random_id, nursery, camera, mocked_agent_fixture
+):
+    await nursery.start(camera.setup)
 
-        res = await camera.run_command("node", "dummy_command", {}, {})
+    state = ConnectedCameraStateV2(camera._common_properties)
+    await camera._transition_to_state(state)
 
-        assert (
-            DirectCommandResponseBody(
-                response=response,
-                reqid=rpc_id,
-                status=DirectCommandStatus.OK,
-                errorMessage="",
-            )
-            == res.direct_command_response
+    rpc_id = mock_random_id()
+    response = "direct command specific response"
+
+    mocked_agent_fixture.replies_to_rpc(
+        json.dumps(
+            {
+                "direct-command-response": {
+                    "response": response,
+                    "reqid": rpc_id,
+                    "status": "ok",
+                    "errorMessage": "",
+                }
+            }
+        ).encode("utf-8")
+    )
+
+    res = await camera.run_command("node", "dummy_command", {}, {})
+
+    assert (
+        DirectCommandResponseBody(
+            response=response,
+            reqid=rpc_id,
+            status=DirectCommandStatus.OK,
+            errorMessage="",
         )
+        == res.direct_command_response
+    )
 
 
 @pytest.mark.trio
@@ -15,6 +15,8 @@
 # SPDX-License-Identifier: Apache-2.0
 import json
 from base64 import b64encode
+from datetime import datetime
+from itertools import count
 from unittest.mock import ANY
 from unittest.mock import AsyncMock
 from unittest.mock import MagicMock
@@ -78,29 +80,24 @@ def camera_will_return_image(
         {"res_info": {"code": 0, "detail_msg": ""}, "image": image_data}
     )
     rpc_id_mock.return_value = req_id
-    mocked_agent.receives(
-        MockMQTTMessage(
-            topic=MQTTTopics.RPC_RESPONSES.value.replace("+", req_id),
-            payload=json.dumps(
-                {
-                    "direct-command-response": {
-                        "response": response,
-                        "reqid": req_id,
-                        "status": "ok",
-                        "errorMessage": "",
-                    }
+    mocked_agent.replies_to_rpc(
+        json.dumps(
+            {
+                "direct-command-response": {
+                    "response": response,
+                    "reqid": req_id,
+                    "status": "ok",
+                    "errorMessage": "",
                 }
-            ).encode("utf-8"),
-        )
+            }
+        ).encode("utf-8")
     )
 
 
 @pytest.mark.trio
-@patch("local_console.core.commands.rpc_with_response.Agent")
-async def test_preview_start(rpc_agent_class_mock, ready_camera, monkeypatch):
+async def test_preview_start(ready_camera, monkeypatch):
     from local_console.core.camera.states.v2.imagecap import ImageCapturingCameraV2
 
-    rpc_mocked_agent = MockMqttAgent(rpc_agent_class_mock)
     camera, config, mocked_agent, mock_random_id, mock_preview, mock_save = ready_camera
 
     obs_exit = MethodObserver(monkeypatch)
@@ -109,9 +106,7 @@ async def test_preview_start(rpc_agent_class_mock, ready_camera, monkeypatch):
     # Prepare expected camera response
     raw_image_data = b"fake_image_data1"
     encoded_image_data = b64encode(raw_image_data).decode()
-    camera_will_return_image(
-        rpc_mocked_agent, mock_random_id, "resp1", encoded_image_data
-    )
+    camera_will_return_image(mocked_agent, mock_random_id, "resp1", encoded_image_data)
     res = await camera.run_command(
         "$system", "direct_get_image", DirectGetImageParameters(), {"preview": True}
     )
@@ -128,9 +123,7 @@ async def test_preview_start(rpc_agent_class_mock, ready_camera, monkeypatch):
     mock_preview.reset_mock()
     raw_image_data = b"fake_image_data2"
     encoded_image_data = b64encode(raw_image_data).decode()
-    camera_will_return_image(
-        rpc_mocked_agent, mock_random_id, "resp2", encoded_image_data
-    )
+    camera_will_return_image(mocked_agent, mock_random_id, "resp2", encoded_image_data)
     res = await camera.run_command(
         "$system", "direct_get_image", DirectGetImageParameters(), {"preview": True}
     )
@@ -144,11 +137,9 @@ async def test_preview_start(rpc_agent_class_mock, ready_camera, monkeypatch):
 
 
 @pytest.mark.trio
-@patch("local_console.core.commands.rpc_with_response.Agent")
-async def test_image_streaming_start(rpc_agent_class_mock, ready_camera, monkeypatch):
+async def test_image_streaming_start(ready_camera, monkeypatch):
     from local_console.core.camera.states.v2.imagecap import ImageCapturingCameraV2
 
-    rpc_mocked_agent = MockMqttAgent(rpc_agent_class_mock)
     camera, config, mocked_agent, mock_random_id, mock_preview, mock_save = ready_camera
 
     obs_exit = MethodObserver(monkeypatch)
@@ -157,9 +148,7 @@ async def test_image_streaming_start(rpc_agent_class_mock, ready_camera, monkeyp
     # Prepare expected camera response
     raw_image_data = b"fake_image_data1"
     encoded_image_data = b64encode(raw_image_data).decode()
-    camera_will_return_image(
-        rpc_mocked_agent, mock_random_id, "resp1", encoded_image_data
-    )
+    camera_will_return_image(mocked_agent, mock_random_id, "resp1", encoded_image_data)
     res = await camera.run_command(
         "$system", "direct_get_image", DirectGetImageParameters(), {"preview": False}
     )
@@ -176,9 +165,7 @@ async def test_image_streaming_start(rpc_agent_class_mock, ready_camera, monkeyp
     mock_save.reset_mock()
     raw_image_data = b"fake_image_data2"
     encoded_image_data = b64encode(raw_image_data).decode()
-    camera_will_return_image(
-        rpc_mocked_agent, mock_random_id, "resp2", encoded_image_data
-    )
+    camera_will_return_image(mocked_agent, mock_random_id, "resp2", encoded_image_data)
     res = await camera.run_command(
         "$system", "direct_get_image", DirectGetImageParameters(), {"preview": False}
     )
@@ -215,3 +202,97 @@ async def test_streaming_stop_trigger(rpc_agent_class_mock, ready_camera, monkey
     await obs_exit.wait_for()
     assert camera.current_state is ReadyCameraV2
     assert res.direct_command_response.status == DirectCommandStatus.OK
+
+
+@pytest.mark.trio
+async def test_continuous_capture(ready_camera, monkeypatch):
+    from local_console.core.camera.states.v2.imagecap import ImageCapturingCameraV2
+
+    camera, config, mocked_agent, mock_random_id, mock_preview, mock_save = ready_camera
+    mock_random_id.side_effect = (str(i) for i in count())
+
+    obs_exit = MethodObserver(monkeypatch)
+    obs_exit.hook(ReadyCameraV2, "exit")
+
+    raw_image_data = b"fake_image_data"
+    camera_will_return_image(
+        mocked_agent, Mock(), "", b64encode(raw_image_data).decode()
+    )
+    res = await camera.run_command(
+        "$system",
+        "direct_get_image",
+        DirectGetImageParameters(),
+        {"preview": True, "continuous": True, "in_flight": 2},
+    )
+    await obs_exit.wait_for()
+    assert camera.current_state is ImageCapturingCameraV2
+    assert json.loads(res.direct_command_response.response)["frames"] == 0
+
+    # Frames keep arriving without further requests from the frontend
+    while mock_preview.call_count < 5:
+        assert camera._state._mqtt.rpc.in_flight <= 2
+        await trio.sleep(0.01)
+    mock_preview.assert_called_with(raw_image_data)
+    mock_save.assert_not_called()
+
+    res = await camera.run_command(
+        "$system", "direct_get_image", DirectGetImageParameters(), {}
+    )
+    stats = json.loads(res.direct_command_response.response)
+    assert stats["frames"] >= 5
+    assert stats["errors"] == 0
+
+    await camera.run_command(
+        "$system", "direct_get_image", DirectGetImageParameters(), {"stop": True}
+    )
+    assert camera.current_state is ReadyCameraV2
+
+
+@pytest.mark.trio
+async def test_continuous_capture_names_are_unique(ready_camera, monkeypatch):
+    camera, config, mocked_agent, mock_random_id, mock_preview, mock_save = ready_camera
+    mock_random_id.side_effect = (str(i) for i in count())
+    # Frames stored within the same millisecond
+    monkeypatch.setattr(
+        "local_console.core.camera.states.v2.imagecap.now",
+        lambda: datetime(2024, 12, 16, 11, 0, 0),
+    )
+
+    camera_will_return_image(mocked_agent, Mock(), "", b64encode(b"frame").decode())
+    await camera.run_command(
+        "$system",
+        "direct_get_image",
+        DirectGetImageParameters(),
+        {"preview": False, "continuous": True, "in_flight": 2},
+    )
+    while mock_save.call_count < 5:
+        await trio.sleep(0.01)
+    await camera.run_command(
+        "$system", "direct_get_image", DirectGetImageParameters(), {"stop": True}
+    )
+
+    names = [c.args[0] for c in mock_save.call_args_list]
+    assert len(set(names)) == len(names)
+    assert all(name.startswith("20241216110000000_") for name in names)
+
+
+@pytest.mark.trio
+async def test_capture_meter(autojump_clock):
+    from local_console.core.camera.states.v2.imagecap import CaptureMeter
+
+    meter = CaptureMeter(window=3)
+    assert meter.stats(0).fps == 0
+
+    for _ in range(4):
+        await trio.sleep(0.5)
+        meter.record(0.1, 0.002, 0.01)
+    meter.failed()
+
+    stats = meter.stats(1)
+    assert stats.frames == 4
+    assert stats.errors == 1
+    assert stats.in_flight == 1
+    assert stats.fps == pytest.approx(2)
+    assert stats.rpc_ms == pytest.approx(100)
+    assert stats.decode_ms == pytest.approx(2)
+    assert stats.store_ms == pytest.approx(10)
@@ -0,0 +1,129 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import numpy as np
+import pytest
+from local_console.core.camera.detections import decode_detections
+from local_console.core.camera.detections import Detections
+from local_console.core.camera.detections import iou
+from local_console.core.camera.fbs_decoder import DecodeError
+from local_console.core.camera.fbs_decoder import get_decoder
+from local_console.core.camera.fbs_decoder import SchemaError
+from tests.unit.core.camera.test_fbs_decoder import Builder
+from tests.unit.core.camera.test_fbs_decoder import CLASSIFICATION
+from tests.unit.core.camera.test_fbs_decoder import SCHEMAS
+
+DETECTION_SCHEMA = SCHEMAS / "objectdetection.fbs"
+
+
+def object_detection(detections: list[tuple]) -> bytes:
+    """
+    Serializes (class_id, score, bbox or None) tuples.
+    """
+    b = Builder()
+
+    def detection(class_id, score, bbox):
+        def box():
+            return b.table([("<i", v) for v in bbox])
+
+        def write():
+            if bbox is None:
+                return b.table([("<I", class_id), None, None, ("<f", score)])
+            return b.table([("<I", class_id), ("<B", 1), box, ("<f", score)])
+
+        return write
+
+    def data():
+        return b.table([lambda: b.vector([detection(*d) for d in detections])])
+
+    return b.finish(lambda: b.table([data]))
+
+
+def detections(class_ids: list, scores: list, boxes: list) -> Detections:
+    return Detections(
+        np.array(class_ids, np.uint32),
+        np.array(scores, np.float32),
+        np.array(boxes, np.int32).reshape(-1, 4),
+    )
+
+
+def test_decode_matches_decoder() -> None:
+    payload = object_detection(
+        [(7, 0.5, (1, 2, 3, 4)), (2, 0.25, None), (3, 0.75, (-5, 0, 10, 20))]
+    )
+
+    result = decode_detections(DETECTION_SCHEMA, payload)
+
+    assert result.class_id.tolist() == [7, 2, 3]
+    assert result.score.tolist() == [0.5, 0.25, 0.75]
+    assert result.bbox.tolist() == [[1, 2, 3, 4], [0, 0, 0, 0], [-5, 0, 10, 20]]
+    decoded = get_decoder(DETECTION_SCHEMA).decode(payload)
+    from_json = Detections.from_json(decoded)
+    assert from_json.class_id.tolist() == result.class_id.tolist()
+    assert from_json.bbox.tolist() == result.bbox.tolist()
+
+
+def test_decode_empty() -> None:
+    b = Builder()
+    payload = b.finish(lambda: b.table([lambda: b.table([])]))
+
+    assert len(decode_detections(DETECTION_SCHEMA, payload)) == 0
+
+
+def test_decode_errors() -> None:
+    payload = object_detection([(7, 0.5, (1, 2, 3, 4))])
+    with pytest.raises(DecodeError):
+        decode_detections(DETECTION_SCHEMA, payload[:-8])
+    with pytest.raises(SchemaError):
+        decode_detections(SCHEMAS / "classification.fbs", CLASSIFICATION)
+
+
+def test_filter_and_counts() -> None:
+    result = detections([1, 2, 1, 3], [0.9, 0.2, 0.5, 0.6], [[0, 0, 1, 1]] * 4)
+
+    assert result.counts() == {1: 2, 2: 1, 3: 1}
+    assert result.filter(0.5).counts() == {1: 2, 3: 1}
+
+
+def test_class_names() -> None:
+    result = detections([0, 2, 9], [0.5] * 3, [[0, 0, 1, 1]] * 3)
+
+    assert result.class_names({0: "person", 2: "car"}).tolist() == [
+        "person",
+        "car",
+        "Unknown",
+    ]
+    assert result.class_names(None).tolist() == ["Unknown"] * 3
+
+
+def test_iou() -> None:
+    a = np.array([[0, 0, 10, 10]])
+    b = np.array([[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30], [0, 0, 0, 0]])
+
+    assert iou(a, b).tolist() == [[1.0, 1 / 3, 0.0, 0.0]]
+
+
+def test_dedup_per_class() -> None:
+    result = detections(
+        [1, 1, 2, 1],
+        [0.6, 0.9, 0.8, 0.7],
+        [[0, 0, 10, 10], [1, 1, 10, 10], [0, 0, 10, 10], [50, 50, 60, 60]],
+    )
+
+    deduped = result.dedup(0.5)
+
+    # The lower scoring duplicate goes, the other class and far box stay
+    assert deduped.score.tolist() == pytest.approx([0.9, 0.8, 0.7])
+    assert deduped.class_id.tolist() == [1, 2, 1]
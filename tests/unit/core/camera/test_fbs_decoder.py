@@ -0,0 +1,254 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import os
+import struct
+from base64 import b64decode
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from local_console.core.enums import ApplicationConfiguration
+from local_console.core.camera.fbs_decoder import DecodeError
+from local_console.core.camera.fbs_decoder import get_decoder
+from local_console.core.camera.fbs_decoder import SchemaError
+from local_console.core.camera.flatbuffers import flatbuffer_binary_to_json
+from local_console.core.camera.flatbuffers import FlatbufferError
+
+SCHEMAS = ApplicationConfiguration.FB_SCHEMA_PATH
+
+# Extracted from a real inference result
+CLASSIFICATION = b64decode(
+    "DAAAAAAABgAKAAQABgAAAAwAAAAAAAYACAAEAAYAAAAEAAAABQAAAFAAAAA4AAAAKAAAABwAAAAEAAAAz"
+    "P///wIAAAAAAKA9CAAIAAAABAAIAAAAAAAsPuj///8EAAAAAABAPvT///8BAAAAAABcPggADAAEAAgACA"
+    "AAAAMAAAAAALQ+"
+)
+
+
+class Builder:
+    """
+    Minimal flatbuffer writer, laying out objects front to back.
+    Table fields are given by slot, as (struct format, value) for
+    inline data, or as a callable writing the referenced object.
+    """
+
+    def __init__(self) -> None:
+        self.buf = bytearray(4)
+
+    def _align(self, n: int) -> None:
+        self.buf += bytes(-len(self.buf) % n)
+
+    def table(self, fields: list) -> int:
+        self._align(4)
+        inline = [(slot, f) for slot, f in enumerate(fields) if f is not None]
+        layout, size = {}, 4
+        for slot, f in inline:
+            layout[slot] = size
+            size += struct.calcsize(f[0]) if isinstance(f, tuple) else 4
+        vtable = len(self.buf)
+        offsets = [layout.get(slot, 0) for slot in range(len(fields))]
+        self.buf += struct.pack(
+            f"<HH{len(fields)}H", 4 + 2 * len(fields), size, *offsets
+        )
+        self._align(4)
+        table = len(self.buf)
+        self.buf += struct.pack("<i", table - vtable) + bytes(size - 4)
+        for slot, f in inline:
+            pos = table + layout[slot]
+            if isinstance(f, tuple):
+                struct.pack_into(f[0], self.buf, pos, *f[1:])
+            else:
+                target = f()
+                struct.pack_into("<I", self.buf, pos, target - pos)
+        return table
+
+    def vector(self, items: list) -> int:
+        self._align(4)
+        start = len(self.buf)
+        self.buf += struct.pack("<I", len(items)) + bytes(4 * len(items))
+        for i, item in enumerate(items):
+            pos = start + 4 + 4 * i
+            struct.pack_into("<I", self.buf, pos, item() - pos)
+        return start
+
+    def string(self, value: str) -> int:
+        self._align(4)
+        start = len(self.buf)
+        self.buf += struct.pack("<I", len(value)) + value.encode() + b"\0"
+        return start
+
+    def finish(self, root) -> bytes:
+        struct.pack_into("<I", self.buf, 0, root())
+        return bytes(self.buf)
+
+
+def test_decode_classification() -> None:
+    decoder = get_decoder(SCHEMAS / "classification.fbs")
+    assert decoder.decode(CLASSIFICATION) == {
+        "perception": {
+            "classification_list": [
+                {"class_id": 3, "score": 0.351562},
+                {"class_id": 1, "score": 0.214844},
+                {"class_id": 4, "score": 0.1875},
+                {"class_id": 0, "score": 0.167969},
+                {"class_id": 2, "score": 0.078125},
+            ]
+        }
+    }
+
+
+def test_decode_object_detection_union() -> None:
+    b = Builder()
+
+    def box():
+        return b.table([("<i", 1), ("<i", 2), ("<i", 3), ("<i", 4)])
+
+    def detection():
+        # class_id, bounding_box_type, bounding_box, score
+        return b.table([("<I", 7), ("<B", 1), box, ("<f", 0.5)])
+
+    def undetected():
+        return b.table([None, None, None, ("<f", 0.25)])
+
+    def data():
+        return b.table([lambda: b.vector([detection, undetected])])
+
+    payload = b.finish(lambda: b.table([data]))
+    decoder = get_decoder(SCHEMAS / "objectdetection.fbs")
+    assert decoder.decode(payload) == {
+        "perception": {
+            "object_detection_list": [
+                {
+                    "class_id": 7,
+                    "bounding_box_type": "BoundingBox2d",
+                    "bounding_box": {"left": 1, "top": 2, "right": 3, "bottom": 4},
+                    "score": 0.5,
+                },
+                {"class_id": 0, "bounding_box_type": "NONE", "score": 0.25},
+            ]
+        }
+    }
+
+
+def test_decode_user_schema(tmp_path: Path) -> None:
+    schema = tmp_path / "custom.fbs"
+    schema.write_text(
+        """
+        namespace Custom.Schema;
+        enum Color : byte { Red = 1, Green, Blue }
+        enum Flags : ubyte (bit_flags) { A, B, C }
+        struct Point { x: short; y: double; }
+        table Item { name: string; where: Point; }
+        table Top {
+            color: Color = Green;
+            flags: Flags;
+            ratio: float = 1.5;
+            missing: int = null;
+            items: [Item];
+            points: [Point];
+            tags: [string];
+        }
+        root_type Top;
+        """
+    )
+    b = Builder()
+
+    def item():
+        return b.table([lambda: b.string("first"), ("<h6xd", -2, 0.25)])
+
+    def points():
+        b._align(8)
+        b.buf += bytes(4)
+        start = len(b.buf)
+        b.buf += struct.pack("<Ih6xd", 1, 5, 1.0 / 3)
+        return start
+
+    payload = b.finish(
+        lambda: b.table(
+            [
+                None,
+                ("<B", 5),
+                None,
+                None,
+                lambda: b.vector([item]),
+                points,
+                lambda: b.vector([lambda: b.string("a"), lambda: b.string("b")]),
+            ]
+        )
+    )
+    assert get_decoder(schema).decode(payload) == {
+        "color": "Green",
+        "flags": "A C",
+        "ratio": 1.5,
+        "items": [{"name": "first", "where": {"x": -2, "y": 0.25}}],
+        "points": [{"x": 5, "y": 0.333333333333}],
+        "tags": ["a", "b"],
+    }
+
+
+def test_decoder_is_cached_until_schema_changes(tmp_path: Path) -> None:
+    schema = tmp_path / "schema.fbs"
+    schema.write_text("table A { a: int; } root_type A;")
+    first = get_decoder(schema)
+    assert get_decoder(schema) is first
+
+    schema.write_text("table B { b: int; } root_type B;")
+    stats = schema.stat()
+    os.utime(schema, ns=(stats.st_atime_ns, stats.st_mtime_ns + 1))
+    assert get_decoder(schema) is not first
+
+
+def test_decode_malformed_payload() -> None:
+    decoder = get_decoder(SCHEMAS / "classification.fbs")
+    with pytest.raises(DecodeError):
+        decoder.decode(b"\xff\xff\x00\x00")
+    with pytest.raises(DecodeError):
+        decoder.decode(CLASSIFICATION[:40])
+
+
+def test_schema_errors(tmp_path: Path) -> None:
+    schema = tmp_path / "schema.fbs"
+    schema.write_text("table A { a: Unknown; } root_type A;")
+    with pytest.raises(SchemaError, match="Unknown type"):
+        get_decoder(schema)
+
+    schema.write_text("table A { a: int; }")
+    with pytest.raises(SchemaError, match="root_type"):
+        get_decoder(schema)
+
+
+def test_flatbuffer_binary_to_json_native() -> None:
+    with patch("local_console.core.camera.flatbuffers.subprocess") as mock_subprocess:
+        decoded = flatbuffer_binary_to_json(
+            SCHEMAS / "classification.fbs", CLASSIFICATION
+        )
+    assert decoded["perception"]["classification_list"][0]["class_id"] == 3
+    mock_subprocess.run.assert_not_called()
+
+
+def test_flatbuffer_binary_to_json_native_error() -> None:
+    with pytest.raises(FlatbufferError):
+        flatbuffer_binary_to_json(SCHEMAS / "classification.fbs", b"\x00")
+
+
+def test_flatbuffer_binary_to_json_fallback(tmp_path: Path) -> None:
+    schema = tmp_path / "schema.fbs"
+    schema.write_text("table A { a: [Unsupported]; } root_type A;")
+    with patch(
+        "local_console.core.camera.flatbuffers.flatc_binary_to_json",
+        return_value={"a": 1},
+    ) as mock_flatc:
+        assert flatbuffer_binary_to_json(schema, b"payload") == {"a": 1}
+    mock_flatc.assert_called_once_with(schema, b"payload")
@@ -21,6 +21,8 @@ from local_console.core.camera.enums import OTAUpdateModule
 from local_console.core.camera.firmware import FirmwareHeader
 from local_console.core.camera.firmware import FirmwareInfo
 from local_console.core.camera.firmware import FirmwareValidationStatus
+from local_console.core.camera.firmware import prepared_firmware
+from local_console.core.camera.firmware import PreparedFirmwares
 from local_console.core.camera.firmware import process_firmware_file
 from local_console.core.camera.firmware import validate_firmware_file
 from local_console.core.camera.states.v1.common import populate_properties
@@ -128,6 +130,48 @@ def test_header_just_copy_without_header():
         assert processed_file == expected_file
 
 
+def test_prepared_firmware_is_shared():
+    firmware_file = Path(__file__).parent / "firmware_with_header.bin"
+    without_header = Path(__file__).parent / "firmware_without_header.bin"
+    firmware_info = FirmwareInfo(
+        path=firmware_file,
+        hash="",
+        version="willBeOverwritten",
+        type=OTAUpdateModule.APFW,
+        is_valid=True,
+    )
+    store = PreparedFirmwares()
+
+    with prepared_firmware(firmware_info) as first:
+        with prepared_firmware(firmware_info) as second:
+            assert second is first
+            assert store.references(first) == 2
+        assert first.header.firmware_version == "0700FAPD"
+        assert first.path.read_bytes() == without_header.read_bytes()
+        assert store.references(first) == 1
+
+    # Removed once the last update finishes with it
+    assert store.references(first) == 0
+    assert not first.path.exists()
+    assert firmware_file.exists()
+
+
+def test_prepared_firmware_without_header_is_not_copied():
+    firmware_file = Path(__file__).parent / "firmware_without_header.bin"
+    firmware_info = FirmwareInfo(
+        path=firmware_file,
+        hash="",
+        version="willBeOverwritten",
+        type=OTAUpdateModule.APFW,
+        is_valid=True,
+    )
+
+    with prepared_firmware(firmware_info) as prepared:
+        assert prepared.path == firmware_file
+        assert prepared.header is None
+    assert firmware_file.exists()
+
+
 def test_header_of_small_file():
     with TemporaryDirectory() as first_tmp, TemporaryDirectory() as temporal:
         tmp = Path(temporal)
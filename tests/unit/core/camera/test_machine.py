@@ -14,6 +14,7 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 from unittest.mock import Mock
+from unittest.mock import patch
 
 import pytest
 from local_console.core.camera.machine import Camera
@@ -28,3 +29,19 @@ async def test_camera_initialization(nursery, single_device_config) -> None:
     assert isinstance(camera._state, Uninitialized)
     assert camera.id == config.id
     assert camera.device_type == "Unknown"
+
+
+@pytest.mark.trio
+async def test_shutdown_after_failed_setup(nursery, single_device_config) -> None:
+    config: DeviceConnection = single_device_config.devices[0]
+    camera = Camera(config, Mock(), Mock(), Mock(), Mock(), lambda *args: None)
+    watcher = camera._common_properties.dirs_watcher
+
+    with patch.object(
+        camera, "_transition_to_state", side_effect=RuntimeError("failed")
+    ), pytest.raises(ExceptionGroup):
+        await nursery.start(camera.setup)
+
+    camera.shutdown()
+
+    assert not watcher.monitor.is_running()
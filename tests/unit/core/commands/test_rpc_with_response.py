@@ -0,0 +1,90 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+from unittest.mock import AsyncMock
+from unittest.mock import MagicMock
+
+import pytest
+import trio
+from local_console.core.camera.enums import MQTTTopics
+from local_console.core.commands.rpc_with_response import RPCChannel
+from trio.testing import wait_all_tasks_blocked
+
+
+def response_topic(reqid: str) -> str:
+    return MQTTTopics.RPC_RESPONSES.value.replace("+", reqid)
+
+
+@pytest.mark.trio
+async def test_concurrent_rpcs_correlated_by_reqid() -> None:
+    client = MagicMock()
+    client.publish = AsyncMock()
+    channel = RPCChannel(client)
+    results: dict[str, bytes | None] = {}
+
+    async def request(reqid: str) -> None:
+        results[reqid] = await channel.request(reqid, f"req/{reqid}", "{}", 10)
+
+    async with trio.open_nursery() as nursery:
+        nursery.start_soon(request, "1")
+        nursery.start_soon(request, "2")
+        await wait_all_tasks_blocked()
+        assert channel.in_flight == 2
+
+        assert channel.feed(response_topic("2"), b"second")
+        assert channel.feed(response_topic("1"), b"first")
+
+    assert results == {"1": b"first", "2": b"second"}
+    assert channel.in_flight == 0
+    assert client.publish.await_count == 2
+
+
+def test_feed_ignores_other_topics() -> None:
+    channel = RPCChannel(MagicMock())
+
+    assert not channel.feed(MQTTTopics.ATTRIBUTES.value, b"{}")
+    assert channel.feed(response_topic("unknown"), b"{}")
+
+
+@pytest.mark.trio
+async def test_deadline_expires(autojump_clock) -> None:
+    channel = RPCChannel(MagicMock(publish=AsyncMock()))
+
+    assert await channel.request("1", "req/1", "{}", 5) is None
+    assert channel.in_flight == 0
+
+
+@pytest.mark.trio
+async def test_close_fails_rpcs(autojump_clock) -> None:
+    channel = RPCChannel(MagicMock(publish=AsyncMock()))
+    results = []
+
+    async def request() -> None:
+        results.append(await channel.request("1", "req/1", "{}", 60))
+
+    with trio.move_on_after(1) as scope:
+        async with trio.open_nursery() as nursery:
+            nursery.start_soon(request)
+            await wait_all_tasks_blocked()
+            channel.close()
+
+    assert not scope.cancelled_caught
+    assert results == [None]
+    assert await channel.request("2", "req/2", "{}", 60) is None
+
+    channel.open()
+    with trio.move_on_after(1):
+        await channel.request("3", "req/3", "{}", 60)
+    assert channel.in_flight == 0
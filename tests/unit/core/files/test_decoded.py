@@ -0,0 +1,110 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import Mock
+from unittest.mock import patch
+
+import pytest
+from local_console.core.camera.states.accepting_files import AcceptingFilesMixin
+from local_console.core.config import Config
+from local_console.core.files.decoded import decoded_path_for
+from local_console.core.files.decoded import DecodedInferences
+from local_console.utils.fsindex import directory_index
+from tests.unit.core.files.test_decoding import populate
+from tests.unit.core.files.test_decoding import SCHEMA
+
+
+def top_class(decoded: list) -> dict:
+    return decoded[0]["perception"]["classification_list"][0]
+
+
+def test_decodes_once(tmp_path: Path) -> None:
+    populate(tmp_path, ["20241216110000000"])
+    inference = tmp_path / "20241216110000000.txt"
+    store = DecodedInferences(SCHEMA, None)
+
+    decoded = store.decode(inference)
+
+    assert top_class(decoded) == {"class_id": 3, "score": 0.351562}
+    assert decoded_path_for(inference).is_file()
+    with patch("local_console.core.files.decoded.decode_source") as mock_decode:
+        assert store.get(inference) == decoded
+        mock_decode.assert_not_called()
+    # Decoded forms are not listed among inference files
+    assert list(directory_index(tmp_path).newest()) == [inference.name]
+
+
+def test_invalidated_by_labels_change(tmp_path: Path) -> None:
+    folder = tmp_path / "Metadata"
+    folder.mkdir()
+    populate(folder, ["20241216110000000"])
+    inference = folder / "20241216110000000.txt"
+    labels = tmp_path / "labels.txt"
+    labels.write_text("zero\none\ntwo\nthree")
+    DecodedInferences(SCHEMA, labels).decode(inference)
+
+    labels.write_text("cero\nuno\ndos\ntres\ncuatro")
+    stat = labels.stat()
+    os.utime(labels, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    store = DecodedInferences(SCHEMA, labels)
+
+    assert store.load(inference) is None
+    assert top_class(store.get(inference))["class_name"] == "tres"
+    assert top_class(store.load(inference))["class_name"] == "tres"
+
+
+def test_undecodable_is_not_stored(tmp_path: Path) -> None:
+    inference = tmp_path / "20241216110000000.txt"
+    inference.write_text("not json")
+    store = DecodedInferences(SCHEMA, None)
+
+    assert store.get(inference) is None
+    assert not decoded_path_for(inference).exists()
+
+
+def test_concurrent_decoding(tmp_path: Path) -> None:
+    populate(tmp_path, ["20241216110000000"])
+    inference = tmp_path / "20241216110000000.txt"
+    store = DecodedInferences(SCHEMA, None)
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: store.decode(inference), range(32)))
+
+    assert all(top_class(decoded)["class_id"] == 3 for decoded in results)
+    assert [p.name for p in decoded_path_for(inference).parent.iterdir()] == [
+        decoded_path_for(inference).name
+    ]
+
+
+@pytest.mark.trio
+async def test_decode_on_ingest(single_device_config, tmp_path: Path) -> None:
+    device = single_device_config.devices[0]
+    populate(tmp_path, ["20241216110000000"])
+    inference = tmp_path / "20241216110000000.txt"
+    state = Mock(_id=device.id)
+
+    await AcceptingFilesMixin._decode_on_ingest(state, inference)
+    assert not decoded_path_for(inference).exists()
+
+    Config().data.config.inference.decode_on_ingest = True
+    await AcceptingFilesMixin._decode_on_ingest(state, inference)
+    assert not decoded_path_for(inference).exists()  # No schema configured
+
+    Config().get_device_config(device.id).persist.vapp_schema_file = str(SCHEMA)
+    await AcceptingFilesMixin._decode_on_ingest(state, inference)
+    assert decoded_path_for(inference).is_file()
@@ -0,0 +1,235 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import csv
+import io
+import json
+import sys
+import zipfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from local_console.core.enums import ApplicationConfiguration
+from local_console.core.error.base import UserException
+from local_console.core.files.decoding import archive_sources
+from local_console.core.files.decoding import decode_sources
+from local_console.core.files.decoding import DecodingPool
+from local_console.core.files.decoding import DecodingSettings
+from local_console.core.files.decoding import directory_sources
+from local_console.core.files.decoding import encode
+from local_console.core.files.decoding import ExportFormat
+from local_console.core.files.decoding import TimeRange
+from local_console.core.files.decoding import to_rows
+
+SCHEMA = ApplicationConfiguration.FB_SCHEMA_PATH / "classification.fbs"
+
+# Classification of 5 classes, extracted from a real inference result
+CLASSIFICATION = (
+    "DAAAAAAABgAKAAQABgAAAAwAAAAAAAYACAAEAAYAAAAEAAAABQAAAFAAAAA4AAAAKAAAABwAAAAEAAAAz"
+    "P///wIAAAAAAKA9CAAIAAAABAAIAAAAAAAsPuj///8EAAAAAABAPvT///8BAAAAAABcPggADAAEAAgACA"
+    "AAAAMAAAAAALQ+"
+)
+
+
+def inference_file(timestamp: str) -> str:
+    return json.dumps(
+        {
+            "DeviceID": "Aid-00010001-0000-2000-9002-0000000001d1",
+            "ModelID": "0300009999990100",
+            "Image": True,
+            "Inferences": [{"T": timestamp, "O": CLASSIFICATION}],
+        }
+    )
+
+
+def populate(folder: Path, timestamps: list[str]) -> None:
+    for timestamp in timestamps:
+        (folder / f"{timestamp}.txt").write_text(inference_file(timestamp))
+
+
+def test_time_range() -> None:
+    time_range = TimeRange("20241216", "2024121612")
+    assert "20241216000000000.txt" in time_range
+    assert "20241216125959999.txt" in time_range
+    assert "20241215235959999.txt" not in time_range
+    assert "20241216130000000.txt" not in time_range
+    assert "20241216130000000.txt" in TimeRange()
+
+
+def test_decode_directory_within_range(tmp_path: Path) -> None:
+    populate(tmp_path, ["20241216110000000", "20241216120000000", "20241216130000000"])
+    settings = DecodingSettings.load(SCHEMA, None)
+
+    sources = directory_sources(tmp_path, TimeRange(end="202412161259"))
+    records = list(decode_sources(sources, settings))
+
+    assert [r["time"] for r in records] == ["20241216110000000", "20241216120000000"]
+    assert records[0]["model_id"] == "0300009999990100"
+    top = records[0]["inference"]["perception"]["classification_list"][0]
+    assert top == {"class_id": 3, "score": 0.351562}
+
+
+def test_decode_with_labels(tmp_path: Path) -> None:
+    folder = tmp_path / "Metadata"
+    folder.mkdir()
+    populate(folder, ["20241216110000000"])
+    labels = tmp_path / "labels.txt"
+    labels.write_text("zero\none\ntwo\nthree")
+    settings = DecodingSettings.load(SCHEMA, labels)
+
+    (record,) = decode_sources(directory_sources(folder, TimeRange()), settings)
+
+    classes = record["inference"]["perception"]["classification_list"]
+    assert [c["class_name"] for c in classes] == [
+        "three",
+        "one",
+        "Unknown",
+        "zero",
+        "two",
+    ]
+
+
+def test_decode_reports_broken_files(tmp_path: Path) -> None:
+    (tmp_path / "20241216110000000.txt").write_text("not json")
+    settings = DecodingSettings.load(SCHEMA, None)
+
+    (record,) = decode_sources(directory_sources(tmp_path, TimeRange()), settings)
+
+    assert record["id"] == "20241216110000000.txt"
+    assert "Could not parse" in record["error"]
+
+
+def test_decode_in_process_pool(tmp_path: Path) -> None:
+    timestamps = [f"20241216{i:09d}" for i in range(150)]
+    populate(tmp_path, timestamps)
+    settings = DecodingSettings.load(SCHEMA, None)
+
+    sources = directory_sources(tmp_path, TimeRange())
+    records = list(decode_sources(sources, settings, workers=2))
+
+    assert [r["time"] for r in records] == timestamps
+    assert all("inference" in r for r in records)
+
+
+def test_decode_in_shared_pool(tmp_path: Path) -> None:
+    timestamps = [f"20241216{i:09d}" for i in range(150)]
+    populate(tmp_path, timestamps)
+    settings = DecodingSettings.load(SCHEMA, None)
+    pool = DecodingPool()
+
+    try:
+        sources = directory_sources(tmp_path, TimeRange())
+        records = list(decode_sources(sources, settings, pool=pool))
+        executor = pool.executor()
+        sources = directory_sources(tmp_path, TimeRange())
+        again = list(decode_sources(sources, settings, pool=pool))
+        assert pool.executor() is executor
+    finally:
+        pool.shutdown()
+
+    assert [r["time"] for r in records] == timestamps
+    assert again == records
+
+
+def test_decode_archive() -> None:
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("b/20241216120000000.txt", inference_file("20241216120000000"))
+        zf.writestr("a/20241216110000000.txt", inference_file("20241216110000000"))
+    archive.seek(0)
+    settings = DecodingSettings.load(SCHEMA, None)
+
+    sources = archive_sources(archive, TimeRange())
+    records = list(decode_sources(sources, settings))
+
+    assert [r["id"] for r in records] == [
+        "20241216110000000.txt",
+        "20241216120000000.txt",
+    ]
+
+
+def test_decode_invalid_archive() -> None:
+    with pytest.raises(UserException, match="Invalid archive"):
+        archive_sources(io.BytesIO(b"not a zip"), TimeRange())
+
+
+def test_settings_require_schema(tmp_path: Path) -> None:
+    with pytest.raises(UserException, match="schema"):
+        DecodingSettings.load(None, None)
+    with pytest.raises(UserException, match="schema"):
+        DecodingSettings.load(tmp_path / "missing.fbs", None)
+    with pytest.raises(UserException, match="labels"):
+        DecodingSettings.load(SCHEMA, tmp_path / "missing.txt")
+
+
+def test_to_rows() -> None:
+    record = {
+        "id": "1.txt",
+        "inference": {
+            "perception": {
+                "object_detection_list": [
+                    {"class_id": 1, "bounding_box": {"left": 2}},
+                    {"class_id": 3},
+                ]
+            },
+            "area_count": [{"class_id": 1, "count": 1}],
+            "raw": [1, 2],
+        },
+    }
+    area_count = '[{"class_id": 1, "count": 1}]'
+    assert list(to_rows(record)) == [
+        {
+            "id": "1.txt",
+            "inference.raw": "[1, 2]",
+            "inference.area_count": area_count,
+            "inference.perception.object_detection_list.class_id": 1,
+            "inference.perception.object_detection_list.bounding_box.left": 2,
+        },
+        {
+            "id": "1.txt",
+            "inference.raw": "[1, 2]",
+            "inference.area_count": area_count,
+            "inference.perception.object_detection_list.class_id": 3,
+        },
+    ]
+
+
+def test_encode_jsonl_and_csv(tmp_path: Path) -> None:
+    populate(tmp_path, ["20241216110000000", "20241216120000000"])
+    settings = DecodingSettings.load(SCHEMA, None)
+
+    def records():
+        return decode_sources(directory_sources(tmp_path, TimeRange()), settings)
+
+    lines = b"".join(encode(records(), ExportFormat.JSONL)).decode().splitlines()
+    assert [json.loads(line)["time"] for line in lines] == [
+        "20241216110000000",
+        "20241216120000000",
+    ]
+
+    text = b"".join(encode(records(), ExportFormat.CSV)).decode()
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert len(rows) == 10
+    assert rows[0]["inference.perception.classification_list.class_id"] == "3"
+    assert rows[0]["inference.perception.classification_list.score"] == "0.351562"
+
+
+def test_encode_parquet_requires_pyarrow() -> None:
+    with (
+        patch.dict(sys.modules, {"pyarrow": None}),
+        pytest.raises(UserException, match="pyarrow"),
+    ):
+        encode(iter([]), ExportFormat.PARQUET)
@@ -0,0 +1,76 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import hashlib
+import os
+from base64 import b64encode
+from unittest.mock import patch
+
+from local_console.core.files.digests import _compute
+from local_console.core.files.digests import DigestCache
+from local_console.core.files.digests import file_digest
+
+
+def test_digest_forms(tmp_path) -> None:
+    target = tmp_path / "module.wasm"
+    data = os.urandom(300 * 1024)
+    target.write_bytes(data)
+
+    digest = file_digest(target)
+
+    assert digest.hex == hashlib.sha256(data).hexdigest()
+    assert digest.base64 == b64encode(hashlib.sha256(data).digest()).decode()
+
+
+def test_digest_computed_once(tmp_path) -> None:
+    target = tmp_path / "module.wasm"
+    target.write_bytes(b"data")
+
+    with patch(
+        "local_console.core.files.digests._compute", wraps=_compute
+    ) as mock_compute:
+        for _ in range(3):
+            file_digest(target)
+        file_digest(tmp_path / "." / "module.wasm")
+
+    mock_compute.assert_called_once()
+
+
+def test_digest_invalidated_on_change(tmp_path) -> None:
+    target = tmp_path / "module.wasm"
+    target.write_bytes(b"data")
+    first = file_digest(target)
+
+    target.write_bytes(b"other data")
+    assert file_digest(target).hex == hashlib.sha256(b"other data").hexdigest()
+
+    # Replacing the file keeps its size, but not its inode
+    replacement = tmp_path / "replacement"
+    replacement.write_bytes(b"DATA")
+    replacement.replace(target)
+    assert file_digest(target) != first
+
+
+def test_digest_cache_bounded(tmp_path) -> None:
+    cache = DigestCache()
+    cache.clear()
+
+    files = [tmp_path / f"{i}.bin" for i in range(3)]
+    with patch.object(cache, "_entries", 2):
+        for i, path in enumerate(files):
+            path.write_bytes(bytes([i]))
+            cache.get(path)
+
+    assert list(cache._cache) == [path.resolve() for path in files[1:]]
@@ -14,18 +14,17 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 import json
-from unittest.mock import MagicMock
+import os
+from unittest.mock import patch
 
 import pytest
 from local_console.core.camera.streaming import inference_dir_for
-from local_console.core.config import Config
 from local_console.core.files.device import InferenceFileManager
 from local_console.core.files.exceptions import FileNotFound
 from local_console.core.files.inference import Inference
 from local_console.core.files.inference import InferenceManager
 from local_console.core.files.inference import InferenceType
 
-from tests.strategies.samplers.configs import DeviceConnectionSampler
 from tests.unit.core.files.test_devices import device_services_and_state
 
 
@@ -160,26 +159,6 @@ async def test_get_inference_not_found(tmp_path) -> None:
         assert str(error.value) == "Inference file 'file_does_not_exists' not found"
 
 
-def test_get_inference_inconsistency(tmp_path) -> None:
-    inference_path = tmp_path / "20241003093439234.txt"
-    inference_path.write_text(INFERENCE_CONTENT_SAMPLE)
-    device = DeviceConnectionSampler().sample()
-    device.persist.device_dir_path = tmp_path
-    Config().data.devices = [device]
-
-    fm = MagicMock(spec=InferenceFileManager)
-    fm.list_for.return_value = [inference_path, inference_path]
-    manager = InferenceManager(fm)
-
-    with pytest.raises(AssertionError) as error:
-        manager.get(device.id, "20241003093439234.txt")
-
-    assert (
-        str(error.value)
-        == "Multiple inference files with id '20241003093439234.txt' exist"
-    )
-
-
 @pytest.mark.trio
 async def test_get_inference_invalid_file(tmp_path) -> None:
     async with device_services_and_state(tmp_path) as (
@@ -203,3 +182,94 @@ async def test_get_inference_invalid_file(tmp_path) -> None:
             INFERENCE_CONTENT_SAMPLE
         )
         assert infs[0].path == files[0]
+
+
+@pytest.mark.trio
+async def test_iterate_inferences(tmp_path) -> None:
+    async with device_services_and_state(tmp_path) as (
+        device_services,
+        dev_id,
+    ):
+        base = inference_dir_for(dev_id)
+        names = [f"2024100309343923{i}.txt" for i in range(5)]
+        for name in names:
+            base.joinpath(name).write_text(INFERENCE_CONTENT_SAMPLE)
+        base.joinpath("20241003093439232.5.txt").write_text("Not even a json")
+
+        fm = InferenceFileManager(device_services)
+        manager = InferenceManager(fm)
+
+        assert [i.path.name for i in manager.iterate(dev_id)] == names[::-1]
+        assert [i.path.name for i in manager.iterate(dev_id, names[3])] == [
+            names[2],
+            names[1],
+            names[0],
+        ]
+        assert [
+            i.path.name
+            for i in manager.iterate(dev_id, where=lambda p: p.name != names[2])
+        ] == [names[4], names[3], names[1], names[0]]
+
+
+@pytest.mark.trio
+async def test_get_inference_does_not_list(tmp_path) -> None:
+    async with device_services_and_state(tmp_path) as (
+        device_services,
+        dev_id,
+    ):
+        base = inference_dir_for(dev_id)
+        inference_id = "20241003093439234.txt"
+        base.joinpath(inference_id).write_text(INFERENCE_CONTENT_SAMPLE)
+        base.joinpath("20241003093439235.txt").write_text(INFERENCE_CONTENT_SAMPLE)
+
+        fm = InferenceFileManager(device_services)
+        manager = InferenceManager(fm)
+        with (
+            patch.object(fm, "list_for") as mock_list_for,
+            patch.object(fm, "iter_for") as mock_iter_for,
+        ):
+            inf = manager.get(dev_id, inference_id)
+
+        assert inf.path == base / inference_id
+        mock_list_for.assert_not_called()
+        mock_iter_for.assert_not_called()
+
+
+@pytest.mark.trio
+async def test_get_inference_cache_invalidation(tmp_path) -> None:
+    async with device_services_and_state(tmp_path) as (
+        device_services,
+        dev_id,
+    ):
+        inference_id = "20241003093439234.txt"
+        inference_file = inference_dir_for(dev_id) / inference_id
+        inference_file.write_text(INFERENCE_CONTENT_SAMPLE)
+
+        manager = InferenceManager(InferenceFileManager(device_services))
+        first = manager.get(dev_id, inference_id)
+        assert manager.get(dev_id, inference_id).inference is first.inference
+
+        inference_file.write_text(
+            INFERENCE_CONTENT_SAMPLE.replace("a-fake-timestamp", "another-timestamp")
+        )
+        stats = inference_file.stat()
+        os.utime(inference_file, ns=(stats.st_atime_ns, stats.st_mtime_ns + 1000))
+
+        updated = manager.get(dev_id, inference_id)
+        assert updated.inference.inferences[0].t == "another-timestamp"
+
+
+@pytest.mark.trio
+async def test_get_inference_invalid_content(tmp_path) -> None:
+    async with device_services_and_state(tmp_path) as (
+        device_services,
+        dev_id,
+    ):
+        inference_id = "20241003093439234.txt"
+        inference_dir_for(dev_id).joinpath(inference_id).write_text("Not even a json")
+
+        manager = InferenceManager(InferenceFileManager(device_services))
+        with pytest.raises(FileNotFound) as error:
+            manager.get(dev_id, inference_id)
+
+        assert str(error.value) == f"Inference file '{inference_id}' not found"
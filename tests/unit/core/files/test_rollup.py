@@ -0,0 +1,173 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import json
+from base64 import b64encode
+from pathlib import Path
+
+from unittest.mock import Mock
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from local_console.core.camera.states.accepting_files import AcceptingFilesMixin
+from local_console.core.files.decoding import TimeRange
+from local_console.core.files.rollup import InferenceRollup
+from local_console.core.files.rollup import InferenceRollups
+from local_console.core.files.rollup import score_histogram
+from tests.unit.core.camera.test_detections import DETECTION_SCHEMA
+from tests.unit.core.camera.test_detections import object_detection
+from tests.unit.core.files.test_decoding import populate
+from tests.unit.core.files.test_decoding import SCHEMA
+
+
+def write_detections(folder: Path, timestamp: str, detections: list) -> Path:
+    path = folder / f"{timestamp}.txt"
+    payload = b64encode(object_detection(detections)).decode()
+    path.write_text(
+        json.dumps(
+            {
+                "DeviceID": "Aid-00010001-0000-2000-9002-0000000001d1",
+                "ModelID": "0300009999990100",
+                "Image": True,
+                "Inferences": [{"T": timestamp, "O": payload}],
+            }
+        )
+    )
+    return path
+
+
+def test_score_histogram() -> None:
+    histogram = score_histogram(np.array([0.0, 0.05, 0.55, 1.0], np.float32))
+
+    assert histogram.tolist() == [2, 0, 0, 0, 0, 1, 0, 0, 0, 1]
+
+
+def test_windows(tmp_path: Path) -> None:
+    box = (0, 0, 10, 10)
+    write_detections(tmp_path, "20241216110000000", [(1, 0.9, box), (2, 0.4, box)])
+    write_detections(tmp_path, "20241216110130000", [(1, 0.8, box)])
+    write_detections(tmp_path, "20241216110500000", [])
+    rollup = InferenceRollup(tmp_path, DETECTION_SCHEMA)
+
+    by_minute = dict(rollup.windows(TimeRange(), 1))
+    assert list(by_minute) == ["202412161100", "202412161101", "202412161105"]
+    assert by_minute["202412161100"].detections == {1: 1, 2: 1}
+    assert by_minute["202412161105"].empty_frames == 1
+
+    ((start, bucket), (later, _)) = rollup.windows(TimeRange(), 5)
+    assert (start, later) == ("202412161100", "202412161105")
+    assert bucket.files == bucket.frames == 2
+    assert bucket.detections == {1: 2, 2: 1}
+    assert bucket.scores.tolist() == [0, 0, 0, 0, 1, 0, 0, 0, 1, 1]
+
+
+def test_range_is_covered_once(tmp_path: Path) -> None:
+    box = (0, 0, 10, 10)
+    write_detections(tmp_path, "20241216100000000", [(1, 0.9, box)])
+    write_detections(tmp_path, "20241216110000000", [(1, 0.9, box)])
+    rollup = InferenceRollup(tmp_path, DETECTION_SCHEMA)
+
+    assert len(rollup.windows(TimeRange(start="2024121611"), 60)) == 1
+    # Earlier files are only scanned when asked for
+    assert [s for s, _ in rollup.windows(TimeRange(), 60)] == [
+        "202412161000",
+        "202412161100",
+    ]
+    (_, bucket), _ = rollup.windows(TimeRange(), 60)
+    assert bucket.files == 1
+
+
+def test_ingest(tmp_path: Path) -> None:
+    box = (0, 0, 10, 10)
+    write_detections(tmp_path, "20241216110000000", [(1, 0.9, box)])
+    rollups = InferenceRollups()
+    rollup = rollups.get(1883, tmp_path, DETECTION_SCHEMA)
+
+    # Left to the first query, which scans it without counting it twice
+    later = write_detections(tmp_path, "20241216110010000", [(3, 0.5, box)])
+    rollups.ingest(1883, later)
+    ((_, bucket),) = rollup.windows(TimeRange(), 1)
+    assert bucket.detections == {1: 1, 3: 1}
+
+    newest = write_detections(tmp_path, "20241216110020000", [(3, 0.5, box)])
+    rollups.ingest(1883, newest)
+    rollups.ingest(1883, newest)
+    ((_, bucket),) = rollup.windows(TimeRange(), 1)
+    assert bucket.detections == {1: 1, 3: 2}
+    assert 1883 in rollups
+    assert rollups.get(1883, tmp_path, DETECTION_SCHEMA) is rollup
+
+
+def test_ingest_out_of_order(tmp_path: Path) -> None:
+    box = (0, 0, 10, 10)
+    write_detections(tmp_path, "20241216110000000", [(1, 0.9, box)])
+    rollup = InferenceRollup(tmp_path, DETECTION_SCHEMA)
+    rollup.windows(TimeRange(), 1)
+
+    newer = write_detections(tmp_path, "20241216110020000", [(2, 0.5, box)])
+    late = write_detections(tmp_path, "20241216110010000", [(3, 0.5, box)])
+    rollup.ingest(newer.name)
+    rollup.ingest(late.name)
+    rollup.ingest(late.name)
+
+    ((_, bucket),) = rollup.windows(TimeRange(), 1)
+    assert bucket.files == 3
+    assert bucket.detections == {1: 1, 2: 1, 3: 1}
+
+
+def test_ingest_while_covering(tmp_path: Path) -> None:
+    box = (0, 0, 10, 10)
+    write_detections(tmp_path, "20241216110000000", [(1, 0.9, box)])
+    rollup = InferenceRollup(tmp_path, DETECTION_SCHEMA)
+    read = rollup._read
+    ingested = []
+
+    def ingest_during_scan(name: str) -> dict:
+        # The scan does not hold the lock that ingest takes
+        if not ingested:
+            path = write_detections(tmp_path, "20241216110010000", [(2, 0.5, box)])
+            ingested.append(path)
+            rollup.ingest(path.name)
+        return read(name)
+
+    with patch.object(rollup, "_read", ingest_during_scan):
+        rollup.windows(TimeRange(), 1)
+
+    ((_, bucket),) = rollup.windows(TimeRange(), 1)
+    assert bucket.files == 2
+    assert bucket.detections == {1: 1, 2: 1}
+
+
+def test_classification_counts_top_class(tmp_path: Path) -> None:
+    populate(tmp_path, ["20241216110000000"])
+    rollup = InferenceRollup(tmp_path, SCHEMA)
+
+    ((_, bucket),) = rollup.windows(TimeRange(), 1)
+
+    assert bucket.detections == {3: 1}
+
+
+@pytest.mark.trio
+async def test_ingest_from_camera_state(tmp_path: Path) -> None:
+    box = (0, 0, 10, 10)
+    rollup = InferenceRollups().get(1884, tmp_path, DETECTION_SCHEMA)
+    assert rollup.windows(TimeRange(), 1) == []
+
+    path = write_detections(tmp_path, "20241216110000000", [(1, 0.9, box)])
+    await AcceptingFilesMixin._rollup_on_ingest(Mock(_id=1884), path)
+
+    ((_, bucket),) = rollup.windows(TimeRange(), 1)
+    assert bucket.detections == {1: 1}
@@ -13,13 +13,19 @@
 # limitations under the License.
 #
 # SPDX-License-Identifier: Apache-2.0
+import json
+from unittest.mock import patch
+
 import pytest
 from local_console.core.config import Config
+from local_console.core.config import OnDisk
 from local_console.core.error.base import UserException
 from local_console.core.error.code import ErrorCodes
+from local_console.core.files.exceptions import FileNotFound
 from local_console.core.schemas.schemas import DeviceConnection
 
 from tests.mocks.config import set_configuration
+from tests.strategies.samplers.configs import DeviceConnectionSampler
 from tests.strategies.samplers.configs import GlobalConfigurationSampler
 
 
@@ -74,3 +80,77 @@ def test_persistent_attribute_methods(tmp_path, single_device_config):
 
     assert new_value != first_value
     assert new_value == tmp_path
+
+
+def test_lookups_follow_changes_to_the_devices():
+    set_configuration(GlobalConfigurationSampler(num_of_devices=3).sample())
+    config_obj = Config()
+    first, second, third = config_obj.data.devices
+    assert config_obj.get_device_config(third.id) is third
+
+    config_obj.remove_device(first.id)
+    assert config_obj.get_device_config(third.id) is third
+    with pytest.raises(FileNotFound):
+        config_obj.get_device_config(first.id)
+
+    second.mqtt.port = 9999
+    assert config_obj.find_device_config_by_port(9999) is second
+    config_obj.rename_entry(third.id, "renamed")
+    assert config_obj.get_device_config_by_name("renamed") is third
+
+    replacement = DeviceConnectionSampler().sample()
+    config_obj.data.devices[0] = replacement
+    assert config_obj.find_device_config(second.id) is None
+    assert config_obj.get_device_config(replacement.id) is replacement
+
+
+def test_write_behind_coalesces_changes(tmp_path, single_device_config):
+    config_obj = Config()
+    persist = config_obj._persistency_obj
+    device = single_device_config.devices[0]
+
+    config_obj.start_write_behind(delay=60)
+    try:
+        for n in range(1, 6):
+            config_obj.update_persistent_attr(device.id, "size", n)
+        config_obj.rename_entry(device.id, "renamed")
+        assert persist.write_count == 0
+    finally:
+        config_obj.stop_write_behind()
+
+    assert persist.write_count == 1
+    assert persist.persistent_conf.devices[0].persist.size == 5
+    assert persist.persistent_conf.devices[0].name == "renamed"
+
+
+def test_read_config_keeps_pending_changes(single_device_config):
+    config_obj = Config()
+    device = single_device_config.devices[0]
+
+    config_obj.start_write_behind(delay=60)
+    try:
+        config_obj.update_persistent_attr(device.id, "size", 42)
+        config_obj.read_config()
+        assert config_obj.get_persistent_attr(device.id, "size") == 42
+    finally:
+        config_obj.stop_write_behind()
+
+
+def test_on_disk_save_is_atomic(tmp_path, single_device_config):
+    with patch("local_console.core.config.config_paths") as paths:
+        paths.config_path = tmp_path / "config.json"
+        OnDisk().save_config(single_device_config)
+        original = paths.config_path.read_text()
+
+        with (
+            patch("local_console.core.config.os.fsync", side_effect=OSError),
+            pytest.raises(Exception),
+        ):
+            OnDisk().save_config(Config.get_default_config())
+
+        assert paths.config_path.read_text() == original
+        assert (
+            json.loads(original)["devices"][0]["id"]
+            == single_device_config.devices[0].id
+        )
+        assert [p.name for p in tmp_path.iterdir()] == ["config.json"]
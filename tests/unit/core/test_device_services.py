@@ -19,6 +19,7 @@ from unittest.mock import Mock
 from unittest.mock import patch
 
 import pytest
+import trio
 from local_console.core.camera.enums import UnitScale
 from local_console.core.camera.machine import Camera
 from local_console.core.camera.states.v1.common import ConnectedCameraStateV1
@@ -33,8 +34,11 @@ from local_console.core.schemas.schemas import DeviceListItem
 from local_console.core.schemas.schemas import OnWireProtocol
 from local_console.core.schemas.utils import get_default_device_dir_path
 
+from tests.mocks.config import set_configuration
 from tests.mocks.devices import mocked_device_services
+from tests.strategies.samplers.configs import DeviceConnectionSampler
 from tests.strategies.samplers.configs import DeviceListItemSampler
+from tests.strategies.samplers.configs import GlobalConfigurationSampler
 from tests.strategies.samplers.device_config import DeviceConfigurationSampler
 from tests.strategies.samplers.qr import QRInfoSampler
 
@@ -126,11 +130,12 @@ async def test_remove_non_existent_device(single_device_config) -> None:
     previous_states = copy(service.get_cameras())
     previous_config_devices = {conn.id for conn in this_config.data.devices}
 
-    with patch(
-        "local_console.core.device_services.Camera.shutdown"
-    ) as mock_shutdown, patch(
-        "local_console.core.device_services.config_obj.save_config"
-    ) as mock_save_config:
+    with (
+        patch("local_console.core.device_services.Camera.shutdown") as mock_shutdown,
+        patch(
+            "local_console.core.device_services.config_obj.save_config"
+        ) as mock_save_config,
+    ):
         service.remove_device(DeviceID("non-existent"))
         assert previous_states == service.get_cameras()
         assert previous_config_devices == {conn.id for conn in this_config.data.devices}
@@ -296,3 +301,52 @@ async def test_reset_device_dir_path(single_device_config, tmp_path):
     )
     assert tmp_path == Config().get_persistent_attr(device.id, "device_dir_path")
     assert Config().get_persistent_attr(device.id, "auto_deletion")
+
+
+@pytest.mark.trio
+async def test_failed_setup_leaves_no_camera(single_device_config) -> None:
+    device = single_device_config.devices[0]
+    service = mocked_device_services()
+
+    with (
+        patch.object(
+            service.nursery, "start", side_effect=RuntimeError("broker did not start")
+        ),
+        patch("local_console.core.device_services.Camera.shutdown") as mock_shutdown,
+        pytest.raises(RuntimeError),
+    ):
+        await service.add_device_to_internals(device, persist=False)
+
+    mock_shutdown.assert_called_once()
+    assert service.get_camera(device.id) is None
+
+
+@pytest.mark.trio
+async def test_parallel_startup() -> None:
+    devices = DeviceConnectionSampler().list_of_samples()
+    set_configuration(GlobalConfigurationSampler(num_of_devices=len(devices)).sample())
+    Config().data.config.startup.parallelism = 2
+    service = mocked_device_services()
+    running = 0
+    peak = 0
+
+    async def bring_up(device: DeviceConnection, persist: bool) -> None:
+        nonlocal running, peak
+        assert not persist
+        running += 1
+        peak = max(peak, running)
+        await trio.sleep(0.01)
+        running -= 1
+        if device is devices[0]:
+            raise RuntimeError("broker did not start")
+
+    with patch.object(service, "add_device_to_internals", side_effect=bring_up):
+        await service.init_devices(devices)
+
+    assert peak == 2
+    assert service.started
+    assert service.startup.total == len(devices)
+    assert service.startup.failed == 1
+    assert service.startup.ready == len(devices) - 1
+    assert set(service.startup.durations) == {d.id for d in devices[1:]}
+    assert Config()._persistency_obj.write_count == 1
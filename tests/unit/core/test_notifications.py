@@ -0,0 +1,126 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import pytest
+import trio
+from local_console.core.notifications import Notification
+from local_console.core.notifications import NotificationHub
+from local_console.core.notifications import OverflowPolicy
+from trio.testing import wait_all_tasks_blocked
+
+
+def notification(kind: str, device_id: int | None = None, seq: int = 0) -> Notification:
+    data = {"seq": seq} if device_id is None else {"device_id": device_id, "seq": seq}
+    return Notification(kind=kind, data=data)
+
+
+@pytest.mark.trio
+async def test_broadcast_to_all_subscribers() -> None:
+    hub = NotificationHub()
+    msg = notification("what", 1883)
+
+    with hub.subscribe() as first, hub.subscribe() as second:
+        hub.publish(msg)
+
+        assert await first.receive() == msg.model_dump_json()
+        assert await second.receive() == msg.model_dump_json()
+
+
+@pytest.mark.trio
+async def test_serialized_once(monkeypatch) -> None:
+    hub = NotificationHub()
+    msg = notification("what")
+    calls = []
+    monkeypatch.setattr(
+        Notification, "model_dump_json", lambda self: calls.append(self) or "{}"
+    )
+
+    with hub.subscribe(), hub.subscribe(), hub.subscribe():
+        hub.publish(msg)
+
+    assert len(calls) == 1
+
+
+@pytest.mark.trio
+async def test_filters() -> None:
+    hub = NotificationHub()
+
+    with (
+        hub.subscribe(device_ids={"1883"}) as by_device,
+        hub.subscribe(kinds={"storage-limit-hit"}) as by_kind,
+    ):
+        hub.publish(notification("what", 1884))
+        hub.publish(notification("storage-limit-hit", 1883))
+        hub.publish(notification("global"))
+
+        assert by_device.stats().queued == 2
+        assert "storage-limit-hit" in await by_device.receive()
+        assert "global" in await by_device.receive()
+
+        assert by_kind.stats().queued == 1
+        assert "storage-limit-hit" in await by_kind.receive()
+
+
+@pytest.mark.trio
+async def test_drop_oldest() -> None:
+    hub = NotificationHub()
+
+    with hub.subscribe(capacity=2) as subscription:
+        for seq in range(5):
+            hub.publish(notification("what", 1883, seq))
+
+        assert '"seq":3' in await subscription.receive()
+        assert '"seq":4' in await subscription.receive()
+        assert subscription.stats().dropped == 3
+
+    assert hub.stats().dropped == 3
+    assert hub.stats().published == 5
+
+
+@pytest.mark.trio
+async def test_coalesce_by_kind() -> None:
+    hub = NotificationHub()
+
+    with hub.subscribe(policy=OverflowPolicy.COALESCE) as subscription:
+        for seq in range(3):
+            hub.publish(notification("progress", 1883, seq))
+        hub.publish(notification("progress", 1884))
+        hub.publish(notification("done", 1883))
+
+        received = [await subscription.receive() for _ in range(3)]
+        assert '"seq":2' in received[0] and "1883" in received[0]
+        assert "1884" in received[1]
+        assert "done" in received[2]
+        assert subscription.stats().dropped == 2
+
+        # Once delivered, a new notification of the kind is queued again
+        hub.publish(notification("progress", 1883, 3))
+        assert '"seq":3' in await subscription.receive()
+
+
+@pytest.mark.trio
+async def test_slow_subscriber_does_not_block(nursery) -> None:
+    hub = NotificationHub()
+    sender, receiver = trio.open_memory_channel(0)
+    await nursery.start(hub.run, receiver)
+
+    with hub.subscribe(capacity=1) as subscription:
+        with trio.fail_after(1):
+            for seq in range(10):
+                await sender.send(notification("what", 1883, seq))
+            await wait_all_tasks_blocked()
+
+        assert '"seq":9' in await subscription.receive()
+        assert subscription.stats().dropped == 9
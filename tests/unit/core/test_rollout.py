@@ -0,0 +1,133 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+from unittest.mock import MagicMock
+
+import pytest
+import trio
+from local_console.core.deploy.rollout import plan_waves
+from local_console.core.deploy.rollout import Rollout
+from local_console.core.deploy.rollout import RolloutParams
+from local_console.core.deploy.rollout import RolloutStatus
+from local_console.core.deploy.tasks.base_task import Status
+from local_console.core.deploy.tasks.base_task import TaskState
+from local_console.core.deploy.tasks.task_executors import TaskEntity
+from local_console.core.error.base import UserException
+
+
+class FakeDeployer:
+    """
+    Deployments that take `duration` seconds, failing for `failing` devices.
+    """
+
+    def __init__(self, duration: float = 0.02, failing: set[int] | None = None) -> None:
+        self.duration = duration
+        self.failing = failing or set()
+        self.started: list[int] = []
+        self.running = 0
+        self.peak = 0
+
+    async def deploy(self, device_id: int, config_id: str) -> TaskEntity:
+        self.started.append(device_id)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        task = MagicMock()
+        task.get_state.return_value = TaskState(status=Status.RUNNING)
+
+        async def finish() -> None:
+            await trio.sleep(self.duration)
+            failed = device_id in self.failing
+            status = Status.ERROR if failed else Status.SUCCESS
+            task.get_state.return_value = TaskState(status=status)
+            self.running -= 1
+
+        self.nursery.start_soon(finish)
+        return TaskEntity(f"config_task_for_device_{device_id}", task)
+
+
+def rollout(deployer: FakeDeployer, devices: list[int], **params) -> Rollout:
+    return Rollout(
+        "config",
+        devices,
+        RolloutParams(**params),
+        deployer,
+        MagicMock(),
+        poll_interval=0.005,
+    )
+
+
+def test_plan_waves() -> None:
+    waves = plan_waves(list(range(10)), RolloutParams(canaries=2, wave_size=3))
+
+    assert [w.pending for w in waves] == [[0, 1], [2, 3, 4], [5, 6, 7], [8, 9]]
+    assert [w.canary for w in waves] == [True, False, False, False]
+    assert len(plan_waves([1, 2], RolloutParams(canaries=0))) == 1
+
+
+@pytest.mark.trio
+async def test_waves_with_bounded_parallelism(nursery) -> None:
+    deployer = FakeDeployer()
+    deployer.nursery = nursery
+    devices = list(range(1, 11))
+    job = rollout(deployer, devices, max_parallel=3, canaries=1)
+
+    await job.run()
+
+    assert job.status == RolloutStatus.COMPLETED
+    assert deployer.started[0] == 1
+    assert deployer.peak == 3
+    canary, rest = job.progress().waves
+    assert (canary.canary, canary.succeeded) == (True, 1)
+    assert (rest.succeeded, rest.failed, rest.pending) == (9, 0, 0)
+
+
+@pytest.mark.trio
+async def test_pauses_on_failures_until_resumed(nursery) -> None:
+    deployer = FakeDeployer(failing={1})
+    deployer.nursery = nursery
+    job = rollout(deployer, [1, 2, 3], canaries=1)
+
+    with pytest.raises(UserException):
+        job.resume()
+    nursery.start_soon(job.run)
+    while job.status != RolloutStatus.PAUSED:
+        await trio.sleep(0.01)
+
+    # The canary failed, so the other devices are held back
+    assert deployer.started == [1]
+    assert job.progress().waves[0].failed_devices == [1]
+
+    job.resume()
+    with trio.fail_after(5):
+        while job.status != RolloutStatus.COMPLETED:
+            await trio.sleep(0.01)
+    assert sorted(deployer.started) == [1, 2, 3]
+
+
+@pytest.mark.trio
+async def test_cancel_lets_started_deployments_finish(nursery) -> None:
+    deployer = FakeDeployer(duration=0.05)
+    deployer.nursery = nursery
+    job = rollout(deployer, list(range(1, 7)), max_parallel=2, canaries=0)
+
+    nursery.start_soon(job.run)
+    await trio.sleep(0.01)
+    job.cancel()
+    while job.status == RolloutStatus.RUNNING:
+        await trio.sleep(0.01)
+
+    assert job.status == RolloutStatus.CANCELLED
+    (wave,) = job.progress().waves
+    assert (wave.succeeded, wave.failed, wave.pending) == (2, 0, 4)
@@ -0,0 +1,164 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import os
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+from local_console.core.camera.enums import UnitScale
+from local_console.core.camera.streaming import image_dir_for
+from local_console.core.camera.streaming import inference_dir_for
+from local_console.core.config import Config
+from local_console.core.schemas.schemas import DeviceID
+from local_console.core.schemas.schemas import EvictionPolicy
+from local_console.core.schemas.schemas import Persist
+from local_console.core.schemas.schemas import StorageBudgetConfig
+from local_console.core.storage_budget import StorageBudget
+from local_console.utils.fstools import StorageSizeWatcher
+
+from tests.mocks.config import set_configuration
+from tests.strategies.samplers.configs import GlobalConfigurationSampler
+
+
+@pytest.fixture
+def budget() -> Generator[StorageBudget, None, None]:
+    budget = StorageBudget()
+    budget.reset()
+    yield budget
+    budget.reset()
+
+
+class Devices:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.age = 0
+        self.watchers: dict[DeviceID, StorageSizeWatcher] = {}
+
+    def add(self, device_id: DeviceID, auto_deletion: bool = True) -> None:
+        Config().update_persistent_attr(device_id, "auto_deletion", auto_deletion)
+        conf = Persist(device_dir_path=self.root, size=100, unit=UnitScale.KB)
+        watcher = StorageSizeWatcher(conf)
+        watcher.apply(conf, device_id)
+        watcher.gather()
+        self.watchers[device_id] = watcher
+        StorageBudget().register(device_id, watcher)
+
+    def incoming(self, device_id: DeviceID, image: bool = True) -> Path:
+        dir_for = image_dir_for if image else inference_dir_for
+        target = dir_for(device_id, self.root)
+        assert target
+        path = target / f"{self.age}"
+        path.write_bytes(b"0" * 1024)
+        os.utime(path, ns=(self.age, self.age))
+        self.age += 1
+
+        self.watchers[device_id].incoming(path)
+        StorageBudget().enforce()
+        return path
+
+
+@pytest.fixture
+def devices(tmp_path, budget) -> tuple[Devices, list[DeviceID]]:
+    set_configuration(GlobalConfigurationSampler(num_of_devices=2).sample())
+    ids = [device.id for device in Config().get_device_configs()]
+    devices = Devices(tmp_path)
+    for device_id in ids:
+        devices.add(device_id)
+    return devices, ids
+
+
+def budget_config(policy: EvictionPolicy, size_kb: int = 3) -> StorageBudgetConfig:
+    return StorageBudgetConfig(size=size_kb, unit=UnitScale.KB, policy=policy)
+
+
+def test_unconfigured_budget(devices, budget) -> None:
+    devs, (a, b) = devices
+    for _ in range(5):
+        devs.incoming(a)
+
+    assert budget.usage() == {a: 5 * 1024, b: 0}
+    assert budget.can_accept()
+
+
+def test_oldest_first(devices, budget) -> None:
+    devs, (a, b) = devices
+    budget.configure(budget_config(EvictionPolicy.OLDEST_FIRST))
+
+    first = devs.incoming(a)
+    second = devs.incoming(b)
+    devs.incoming(a)
+    devs.incoming(b)
+
+    assert not first.exists()
+    assert second.exists()
+    assert budget.total() == 3 * 1024
+    assert budget.usage() == {a: 1024, b: 2 * 1024}
+
+
+def test_fair_share(devices, budget) -> None:
+    devs, (a, b) = devices
+    budget.configure(budget_config(EvictionPolicy.FAIR_SHARE, size_kb=4))
+
+    for _ in range(4):
+        devs.incoming(a)
+    devs.incoming(b)
+    devs.incoming(b)
+
+    assert budget.usage() == {a: 2 * 1024, b: 2 * 1024}
+
+
+def test_images_first(devices, budget) -> None:
+    devs, (a, b) = devices
+    budget.configure(budget_config(EvictionPolicy.IMAGES_FIRST))
+
+    metadata = devs.incoming(a, image=False)
+    image = devs.incoming(b)
+    devs.incoming(a, image=False)
+    devs.incoming(b, image=False)
+
+    assert metadata.exists()
+    assert not image.exists()
+    assert budget.usage() == {a: 2 * 1024, b: 1024}
+
+    # No images left, so the oldest metadata goes
+    devs.incoming(b, image=False)
+    assert not metadata.exists()
+
+
+def test_devices_without_auto_deletion_are_kept(devices, budget) -> None:
+    devs, (a, b) = devices
+    Config().update_persistent_attr(a, "auto_deletion", False)
+    budget.configure(budget_config(EvictionPolicy.OLDEST_FIRST, size_kb=2))
+
+    first = devs.incoming(a)
+    devs.incoming(a)
+    devs.incoming(b)
+
+    # Only the file of device b could be deleted
+    assert first.exists()
+    assert budget.usage() == {a: 2 * 1024, b: 0}
+    assert budget.can_accept()
+
+    devs.incoming(a)
+    assert not budget.can_accept()
+
+
+def test_unregister(devices, budget) -> None:
+    devs, (a, b) = devices
+    devs.incoming(a)
+    budget.unregister(a)
+
+    assert budget.usage() == {b: 0}
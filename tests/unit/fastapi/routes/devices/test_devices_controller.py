@@ -19,6 +19,8 @@ from unittest.mock import MagicMock
 from unittest.mock import patch
 
 import pytest
+from fastapi import HTTPException
+from local_console.clients.trio_paho_mqtt import MessageStats
 from local_console.core.camera.enums import ConnectionState
 from local_console.core.camera.schemas import DeviceStateInformation
 from local_console.core.config import Config
@@ -325,3 +327,17 @@ async def test_create_raise_error_port_already_in_use() -> None:
                 await controller.create(input_spec)
 
             assert error.value.code == ErrorCodes.EXTERNAL_DEVICE_PORT_ALREADY_IN_USE
+
+
+def test_mqtt_stats() -> None:
+    stats = MessageStats(received=10, dropped=1, queued=2, high_water=5)
+    device_service = MagicMock()
+    device_service.get_camera.return_value.mqtt_stats.return_value = stats
+    controller = DevicesController(MagicMock(), device_service=device_service)
+
+    assert controller.mqtt_stats(DeviceID(1883)) == stats
+
+    device_service.get_camera.return_value.mqtt_stats.return_value = None
+    with pytest.raises(HTTPException) as error:
+        controller.mqtt_stats(DeviceID(1883))
+    assert error.value.status_code == 404
@@ -30,6 +30,7 @@ async def test_health_check(fa_client_async: AsyncClient) -> None:
     assert not device_service.started
     result = await fa_client_async.get("/health")
     assert result.status_code == status.HTTP_425_TOO_EARLY
+    assert "(0 of 0 devices up)" in result.json()["message"]
 
     expected_devices = DeviceConnectionSampler().list_of_samples()
     async with stored_devices(expected_devices, device_service):
@@ -38,3 +39,5 @@ async def test_health_check(fa_client_async: AsyncClient) -> None:
         assert device_service.started
         result = await fa_client_async.get("/health")
         assert result.status_code == status.HTTP_200_OK
+        assert result.json()["devices_ready"] == len(expected_devices)
+        assert result.json()["devices_total"] == len(expected_devices)
@@ -148,7 +148,7 @@ def test_ignore_subdir(fa_client: TestClient) -> None:
     from local_console.fastapi.routes.images.dependencies import device_image_manager
 
     mock_manager = MagicMock()
-    mock_manager.list_for.return_value = []
+    mock_manager.iter_for.return_value = iter([])
     mock_manager.with_preview.return_value = False
 
     fa_client.app.dependency_overrides[device_image_manager] = lambda: mock_manager
@@ -156,7 +156,7 @@ def test_ignore_subdir(fa_client: TestClient) -> None:
 
     assert result.status_code == status.HTTP_200_OK
     assert result.json()["data"] == []
-    mock_manager.list_for.assert_called_once_with(1)
+    mock_manager.iter_for.assert_called_once_with(1, None)
 
 
 def test_download_device_not_int(fa_client: TestClient) -> None:
@@ -198,7 +198,14 @@ def test_download_image_not_found(image_setup: ImageSetupArgs) -> None:
 def test_image_pagination(mock_ts, with_preview: bool, fa_client: TestClient) -> None:
     manager = MagicMock()
     manager.with_preview.return_value = with_preview
-    manager.list_for.return_value = [Path(f"image{i+1}.jpg") for i in range(10)]
+    mocked_images = [Path(f"image{i+1}.jpg") for i in range(10)]
+
+    def iter_for(device_id, starting_after=None):
+        names = [i.name for i in mocked_images]
+        start = names.index(starting_after) + 1 if starting_after else 0
+        return iter(mocked_images[start:])
+
+    manager.iter_for.side_effect = iter_for
 
     fa_client.app.dependency_overrides[device_image_manager] = lambda: manager
     result = fa_client.get("/images/devices/1/directories?limit=2")
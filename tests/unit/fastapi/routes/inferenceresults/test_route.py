@@ -13,6 +13,9 @@
 # limitations under the License.
 #
 # SPDX-License-Identifier: Apache-2.0
+import io
+import json
+import zipfile
 from operator import itemgetter
 from pathlib import Path
 from unittest.mock import MagicMock
@@ -26,6 +29,7 @@ from local_console.core.camera.states.v1.streaming import StreamingCameraV1
 from local_console.core.camera.streaming import image_dir_for
 from local_console.core.camera.streaming import inference_dir_for
 from local_console.core.config import Config
+from local_console.core.error.code import ErrorCodes
 from local_console.core.files.inference import InferenceWithSource
 from local_console.core.schemas.schemas import DeviceConnection
 from local_console.fastapi.routes.inferenceresults.dependencies import (
@@ -33,6 +37,8 @@ from local_console.fastapi.routes.inferenceresults.dependencies import (
 )
 
 from tests.strategies.samplers.files import InferenceWithSourceSampler
+from tests.unit.core.files.test_decoding import inference_file
+from tests.unit.core.files.test_decoding import SCHEMA
 from tests.unit.core.files.test_inference import INFERENCE_CONTENT_SAMPLE
 from tests.unit.core.files.test_inference import INFERENCE_FLATBUFFER_SAMPLE
 
@@ -140,7 +146,12 @@ def test_inference_pagination(fa_client: TestClient) -> None:
         sampler.inference.device_id = f"device_{i}"
         mocked_inferences.append(sampler.sample())
 
-    manager.list.return_value = mocked_inferences
+    def iterate(device_id, starting_after=None):
+        ids = [i.path.name for i in mocked_inferences]
+        start = ids.index(starting_after) + 1 if starting_after else 0
+        return iter(mocked_inferences[start:])
+
+    manager.iterate.side_effect = iterate
 
     result = fa_client.get("/inferenceresults/devices/1?limit=2")
 
@@ -313,3 +324,151 @@ def test_get_inferences_paired_with_images(
         result = fa_client.get(pair["image"]["sas_url"])
         assert result.status_code == status.HTTP_200_OK
         assert result.read() == IMAGE_SAMPLE_DATA
+
+
+def test_export_inferences(
+    fa_client: TestClient, single_device_config, tmp_path
+) -> None:
+    device_id = 1883
+
+    inference_path = tmp_path / f"{device_id}/Metadata"
+    inference_path.mkdir(parents=True)
+    for timestamp in ["20241216110000000", "20241216120000000", "20241216130000000"]:
+        (inference_path / f"{timestamp}.txt").write_text(inference_file(timestamp))
+
+    persist = Config().get_device_config(device_id).persist
+    persist.device_dir_path = tmp_path
+    persist.vapp_schema_file = str(SCHEMA)
+
+    config: DeviceConnection = single_device_config.devices[0]
+    camera = Camera(
+        config, MagicMock(), MagicMock(), MagicMock(), MagicMock(), lambda *args: None
+    )
+    fa_client.app.state.device_service.set_camera(config.id, camera)
+
+    result = fa_client.get(
+        f"/inferenceresults/devices/{device_id}/export?start=2024121612&format=jsonl"
+    )
+
+    assert result.status_code == status.HTTP_200_OK
+    assert result.headers["content-type"].startswith("application/jsonl")
+    records = [json.loads(line) for line in result.text.splitlines()]
+    assert [r["time"] for r in records] == ["20241216120000000", "20241216130000000"]
+    assert records[0]["inference"]["perception"]["classification_list"][0] == {
+        "class_id": 3,
+        "score": 0.351562,
+    }
+
+
+def test_export_inferences_archive(
+    fa_client: TestClient, single_device_config, tmp_path
+) -> None:
+    device_id = 1883
+    persist = Config().get_device_config(device_id).persist
+    persist.vapp_schema_file = str(SCHEMA)
+
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("20241216110000000.txt", inference_file("20241216110000000"))
+
+    result = fa_client.post(
+        f"/inferenceresults/devices/{device_id}/export?format=csv",
+        files={"archive": ("inferences.zip", archive.getvalue())},
+    )
+
+    assert result.status_code == status.HTTP_200_OK
+    assert result.headers["content-type"].startswith("text/csv")
+    assert len(result.text.splitlines()) == 6
+
+
+def test_export_inferences_without_schema(
+    fa_client: TestClient, single_device_config
+) -> None:
+    persist = Config().get_device_config(1883).persist
+    persist.vapp_schema_file = None
+
+    result = fa_client.get("/inferenceresults/devices/1883/export")
+
+    assert result.status_code == status.HTTP_400_BAD_REQUEST
+    assert result.json()["code"] == ErrorCodes.EXTERNAL_INFERENCE_DECODING.value
+
+
+def test_get_decoded_inferences(
+    fa_client: TestClient, single_device_config, tmp_path
+) -> None:
+    device_id = 1883
+
+    inference_path = tmp_path / f"{device_id}/Metadata"
+    inference_path.mkdir(parents=True)
+    (inference_path / "20241216110000000.txt").write_text(
+        inference_file("20241216110000000")
+    )
+    labels = tmp_path / "labels.txt"
+    labels.write_text("zero\none\ntwo\nthree")
+
+    persist = Config().get_device_config(device_id).persist
+    persist.device_dir_path = tmp_path
+    persist.vapp_schema_file = str(SCHEMA)
+    persist.vapp_labels_file = str(labels)
+
+    config: DeviceConnection = single_device_config.devices[0]
+    camera = Camera(
+        config, MagicMock(), MagicMock(), MagicMock(), MagicMock(), lambda *args: None
+    )
+    fa_client.app.state.device_service.set_camera(config.id, camera)
+
+    result = fa_client.get(f"/inferenceresults/devices/{device_id}?decoded=true")
+
+    assert result.status_code == status.HTTP_200_OK
+    (inference,) = result.json()["data"][0]["inference_result"]["Inferences"]
+    assert inference["F"] == 1
+    assert inference["O"]["perception"]["classification_list"][0] == {
+        "class_id": 3,
+        "score": 0.351562,
+        "class_name": "three",
+    }
+    assert (inference_path / ".decoded/20241216110000000.json").is_file()
+
+    result = fa_client.get(
+        f"/inferenceresults/devices/{device_id}/20241216110000000.txt"
+    )
+    (inference,) = result.json()["Inferences"]
+    assert inference["F"] == 0
+
+
+def test_inference_analytics(
+    fa_client: TestClient, single_device_config, tmp_path
+) -> None:
+    device_id = 1883
+
+    inference_path = tmp_path / f"{device_id}/Metadata"
+    inference_path.mkdir(parents=True)
+    for timestamp in ["20241216110000000", "20241216110100000", "20241216120000000"]:
+        (inference_path / f"{timestamp}.txt").write_text(inference_file(timestamp))
+    labels = tmp_path / "labels.txt"
+    labels.write_text("zero\none\ntwo\nthree")
+
+    persist = Config().get_device_config(device_id).persist
+    persist.device_dir_path = tmp_path
+    persist.vapp_schema_file = str(SCHEMA)
+    persist.vapp_labels_file = str(labels)
+
+    config: DeviceConnection = single_device_config.devices[0]
+    camera = Camera(
+        config, MagicMock(), MagicMock(), MagicMock(), MagicMock(), lambda *args: None
+    )
+    fa_client.app.state.device_service.set_camera(config.id, camera)
+
+    result = fa_client.get(
+        f"/inferenceresults/devices/{device_id}/analytics?end=2024121611&window=60"
+    )
+
+    assert result.status_code == status.HTTP_200_OK
+    body = result.json()
+    assert body["window"] == 60
+    (window,) = body["data"]
+    assert window["start"] == "202412161100"
+    assert window["files"] == window["frames"] == 2
+    assert window["ingestion_rate"] == pytest.approx(2 / 60)
+    assert window["detections"] == [{"class_id": 3, "class_name": "three", "count": 2}]
+    assert window["score_histogram"][3] == 2
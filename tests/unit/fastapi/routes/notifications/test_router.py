@@ -13,14 +13,17 @@
 # limitations under the License.
 #
 # SPDX-License-Identifier: Apache-2.0
+from unittest.mock import MagicMock
 from unittest.mock import patch
 
 import pytest
+from fastapi.testclient import TestClient
 from httpx import AsyncClient
 from httpx_ws import aconnect_ws
 from httpx_ws.transport import ASGIWebSocketTransport
 from local_console.core.camera.machine import Camera
 from local_console.core.notifications import Notification
+from local_console.fastapi.dependencies.notifications import WebSocketManager
 from local_console.fastapi.main import generate_server
 from local_console.fastapi.main import lifespan
 
@@ -84,3 +87,21 @@ async def test_send_message_from_multiple_devices() -> None:
             # and there should be nothing else awaiting
             with pytest.raises(TimeoutError):
                 await websocket.receive_text(timeout=0.5)
+
+
+def test_notifications_stats(fa_client: TestClient) -> None:
+    manager = WebSocketManager(MagicMock(), MagicMock())
+    fa_client.app.state.websockets = manager
+
+    with manager.hub.subscribe(capacity=1):
+        for _ in range(3):
+            manager.hub.publish(Notification(kind="what", data="some-data"))
+
+        response = fa_client.get("/ws/stats")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "published": 3,
+        "dropped": 2,
+        "subscribers": [{"delivered": 0, "dropped": 2, "queued": 1}],
+    }
@@ -0,0 +1,31 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+from starlette.testclient import TestClient
+
+
+def test_rollout_of_unknown_config(fa_client: TestClient) -> None:
+    response = fa_client.post(
+        "/rollouts", json={"config_id": "missing", "device_ids": [1883]}
+    )
+
+    assert response.status_code == 404
+    assert response.json()["message"] == "Could not find config missing"
+
+
+def test_unknown_rollout(fa_client: TestClient) -> None:
+    assert fa_client.get("/rollouts").json() == []
+    assert fa_client.get("/rollouts/123").status_code == 404
+    assert fa_client.post("/rollouts/123/resume").status_code == 404
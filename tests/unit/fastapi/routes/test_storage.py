@@ -0,0 +1,57 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+from unittest.mock import MagicMock
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from local_console.core.camera.enums import UnitScale
+from local_console.core.schemas.schemas import DeviceID
+from local_console.core.schemas.schemas import EvictionPolicy
+from local_console.core.schemas.schemas import StorageBudgetConfig
+from local_console.core.storage_budget import StorageBudget
+
+
+def test_get_storage_usage(fa_client: TestClient) -> None:
+    budget = StorageBudget()
+    budget.reset()
+    try:
+        for device_id, size in ((1884, 2048), (1883, 1024)):
+            watcher = MagicMock()
+            watcher.content.size = size
+            budget.register(DeviceID(device_id), watcher)
+
+        response = fa_client.get("/storage")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            "total_usage": 3072,
+            "limit": None,
+            "policy": None,
+            "devices": [
+                {"device_id": 1883, "usage": 1024},
+                {"device_id": 1884, "usage": 2048},
+            ],
+        }
+
+        budget.configure(
+            StorageBudgetConfig(
+                size=1, unit=UnitScale.MB, policy=EvictionPolicy.FAIR_SHARE
+            )
+        )
+        response = fa_client.get("/storage")
+        assert response.json()["limit"] == 1024 * 1024
+        assert response.json()["policy"] == "fair_share"
+    finally:
+        budget.reset()
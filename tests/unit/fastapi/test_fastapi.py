@@ -18,6 +18,7 @@ from unittest.mock import patch
 import pytest
 from fastapi import FastAPI
 from httpx import AsyncClient
+from local_console.core.config import Config
 from local_console.core.device_services import DeviceServices
 
 from tests.mocks.config import set_configuration
@@ -65,3 +66,24 @@ async def test_cleanup() -> None:
 
         mock_shutdown.assert_called()
         assert mock_shutdown.call_count == num_of_devices
+
+
+@pytest.mark.trio
+async def test_write_behind_stopped_on_failed_startup() -> None:
+
+    from local_console.fastapi.main import lifespan
+
+    app = FastAPI(title="Local console Web UI", lifespan=lifespan)
+    set_configuration(GlobalConfigurationSampler(num_of_devices=1).sample())
+    with (
+        patch("local_console.fastapi.main.running_background_task"),
+        patch.object(
+            DeviceServices, "init_devices", side_effect=RuntimeError("failed")
+        ),
+        patch.object(Config(), "stop_write_behind") as mock_stop,
+        pytest.raises(ExceptionGroup),
+    ):
+        async with lifespan(app):
+            pass
+
+    mock_stop.assert_called_once()
@@ -15,9 +15,11 @@
 # SPDX-License-Identifier: Apache-2.0
 import pytest
 from fastapi import FastAPI
+from fastapi import status
 from fastapi import WebSocket
 from httpx import AsyncClient
 from httpx_ws import aconnect_ws
+from httpx_ws import WebSocketDisconnect
 from httpx_ws.transport import ASGIWebSocketTransport
 from local_console.core.notifications import Notification
 from local_console.fastapi.dependencies.notifications import messages_channel
@@ -98,3 +100,25 @@ async def test_core_notification_mechanism(infrastructure):
         # ... and receive it over the websocket
         data = await websocket.receive_text()
         assert data == msg.model_dump_json()
+
+
+@pytest.mark.trio
+async def test_invalid_policy_is_rejected(nursery):
+    async with messages_channel(nursery) as (sender, receiver):
+        ws_man = WebSocketManager(nursery, receiver.clone())
+        app = FastAPI()
+
+        @app.websocket("/ws")
+        async def websocket(websocket: WebSocket):
+            await ws_man.loop_for(websocket)
+
+        async with AsyncClient(
+            transport=ASGIWebSocketTransport(app), base_url="http://test"
+        ) as client:
+            with pytest.raises(WebSocketDisconnect) as error:
+                async with aconnect_ws("/ws?policy=bogus", client):
+                    pass
+
+        assert error.value.code == status.WS_1008_POLICY_VIOLATION
+
+        assert ws_man.active_connections == []
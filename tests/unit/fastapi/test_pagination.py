@@ -0,0 +1,99 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+from unittest.mock import MagicMock
+
+import pytest
+from local_console.core.deploy.tasks.task_executors import TaskEntity
+from local_console.core.deploy.tasks.task_executors import TrioBackgroundTasks
+from local_console.core.models import ModelManager
+from local_console.core.models import PostModelsIn
+from local_console.fastapi.routes.deploy_history.controller import (
+    DeployHistoryPaginator,
+)
+from local_console.fastapi.routes.models import ModelsPaginator
+
+from tests.strategies.samplers.files import FileInfoSampler
+
+
+def model_manager(model_ids: list[str]) -> ModelManager:
+    file_manager = MagicMock()
+    file_manager.get_file.return_value = FileInfoSampler().sample()
+    manager = ModelManager(file_manager)
+    for model_id in model_ids:
+        manager.register(PostModelsIn(model_id=model_id, model_file_id="file"))
+    return manager
+
+
+def ids(page: list) -> list[str]:
+    return [m.info.model_id for m in page]
+
+
+def test_paginate_after_walks_all_pages() -> None:
+    manager = model_manager(["c", "a", "e", "b", "d"])
+    paginator = ModelsPaginator()
+
+    page, token = paginator.paginate_after(manager, 2)
+    assert ids(page) == ["a", "b"]
+    assert token == "b"
+
+    page, token = paginator.paginate_after(manager, 2, token)
+    assert ids(page) == ["c", "d"]
+    assert token == "d"
+
+    page, token = paginator.paginate_after(manager, 2, token)
+    assert ids(page) == ["e"]
+    assert token is None
+
+
+@pytest.mark.parametrize("limit", [1, 3, 10])
+def test_paginate_after_matches_paginate(limit: int) -> None:
+    manager = model_manager([f"model_{i}" for i in range(7)])
+    paginator = ModelsPaginator()
+
+    for token in [None, "model_0", "model_3", "model_6", "unknown"]:
+        assert paginator.paginate_after(manager, limit, token) == paginator.paginate(
+            manager.get_all(), limit, token
+        )
+
+
+def test_paginate_after_does_not_visit_previous_elements() -> None:
+    manager = model_manager([f"model_{i:03}" for i in range(100)])
+    source = MagicMock(wraps=manager)
+    source.__contains__.side_effect = manager.__contains__
+
+    page, token = ModelsPaginator().paginate_after(source, 2, "model_049")
+
+    assert ids(page) == ["model_050", "model_051"]
+    assert token == "model_051"
+    source.get_all.assert_not_called()
+    source.iter_after.assert_called_once_with("model_049")
+
+
+@pytest.mark.trio
+async def test_task_history_keyset() -> None:
+    executor = TrioBackgroundTasks()
+    for task_id in ["t1", "t2", "t1", "t3"]:
+        task = MagicMock()
+        task.id.return_value = task_id
+        await executor.add_task(task)
+
+    assert "t2" in executor
+    assert "t4" not in executor
+
+    page, token = DeployHistoryPaginator().paginate_after(executor, 2, "t1")
+    assert [entity.id for entity in page] == ["t2", "t1"]
+    assert token == "t1"
+    assert page == [TaskEntity("t2", MagicMock()), TaskEntity("t1", MagicMock())]
@@ -0,0 +1,168 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+from unittest.mock import patch
+
+import pytest
+import trio
+from local_console.core.camera.states.base import MQTTDriver
+from local_console.servers.broker import BrokerException
+from local_console.servers.broker import MountedAgent
+from local_console.servers.broker import populate_shared_broker_conf
+from local_console.servers.broker import SharedBroker
+
+TELEMETRY = "v1/devices/me/telemetry"
+
+
+class FakeHub:
+    """
+    Stands for the client connected to the internal listener
+    """
+
+    instances: list["FakeHub"] = []
+
+    def __init__(self, port: int) -> None:
+        self.port = port
+        self.client = self
+        self.publish = AsyncMock()
+        self.incoming, self._incoming = trio.open_memory_channel(10)
+        FakeHub.instances.append(self)
+
+    @asynccontextmanager
+    async def mqtt_scope(self, subs_topics):
+        self.topics = subs_topics
+        yield
+
+    @asynccontextmanager
+    async def messages(self):
+        yield self._incoming
+
+
+@asynccontextmanager
+async def fake_run_broker(*args):
+    yield None
+
+
+@pytest.fixture
+def shared_broker():
+    FakeHub.instances.clear()
+    with (
+        patch("local_console.servers.broker._broker_binary"),
+        patch("local_console.servers.broker._run_broker", fake_run_broker),
+        patch("local_console.servers.broker.Agent", FakeHub),
+        patch("local_console.servers.broker.is_port_open", return_value=False),
+        patch("local_console.servers.broker.BROKER_RELOAD_DELAY", 0),
+        patch(
+            "local_console.servers.broker.populate_shared_broker_conf"
+        ) as mock_populate,
+    ):
+        yield SharedBroker([TELEMETRY]), mock_populate
+
+
+def test_shared_broker_conf(tmp_path):
+    config_file = tmp_path / "broker.toml"
+    populate_shared_broker_conf([1883, 1884], 5000, config_file)
+
+    rendered = config_file.read_text()
+    assert "listener 5000 127.0.0.1" in rendered
+    assert "listener 1883\nsocket_domain ipv4\nmount_point port-1883/" in rendered
+    assert "listener 1884\nsocket_domain ipv4\nmount_point port-1884/" in rendered
+
+
+@pytest.mark.trio
+async def test_shared_broker_demultiplexing(nursery, shared_broker):
+    broker, _ = shared_broker
+    await nursery.start(broker.run)
+
+    with broker.serve(1883) as messages_a, broker.serve(1884) as messages_b:
+        agent = MountedAgent(1883, broker)
+        with trio.fail_after(5):
+            await agent.publish("v1/devices/me/attributes", "{}")
+
+        hub = FakeHub.instances[-1]
+        assert hub.topics == [f"+/{TELEMETRY}"]
+        hub.publish.assert_awaited_once_with("port-1883/v1/devices/me/attributes", "{}")
+
+        for topic in (f"port-9999/{TELEMETRY}", f"port-1884/{TELEMETRY}"):
+            await hub.incoming.send(SimpleNamespace(topic=topic, payload=b"{}"))
+        with trio.fail_after(5):
+            assert await messages_b.receive() == (TELEMETRY, b"{}")
+        with pytest.raises(trio.WouldBlock):
+            messages_a.receive_nowait()
+
+
+@pytest.mark.trio
+async def test_shared_broker_restarts_on_changes(nursery, shared_broker):
+    broker, mock_populate = shared_broker
+    await nursery.start(broker.run)
+
+    with broker.serve(1883):
+        # Both ports are served by a single broker instance
+        with broker.serve(1884):
+            with trio.fail_after(5):
+                await broker.hub_for(1884)
+            assert mock_populate.call_args_list[-1].args[0] == [1883, 1884]
+            started = mock_populate.call_count
+
+            with pytest.raises(BrokerException):
+                with broker.serve(1884):
+                    pass
+
+        with trio.fail_after(5):
+            while mock_populate.call_count == started:
+                await trio.sleep(0.01)
+            await broker.hub_for(1883)
+        assert mock_populate.call_args_list[-1].args[0] == [1883]
+
+
+@pytest.mark.trio
+async def test_shared_broker_survives_failures(nursery, shared_broker):
+    broker, mock_populate = shared_broker
+    attempts = []
+
+    @asynccontextmanager
+    async def failing_once(*args):
+        attempts.append(args)
+        if len(attempts) == 1:
+            raise BrokerException("Address already in use")
+        yield None
+
+    with (
+        patch("local_console.servers.broker._run_broker", failing_once),
+        patch("local_console.servers.broker.BROKER_RESTART_DELAY", 0),
+    ):
+        await nursery.start(broker.run)
+        with broker.serve(1883):
+            with trio.fail_after(5):
+                await broker.listening(1883)
+    assert len(attempts) == 2
+
+
+@pytest.mark.trio
+async def test_device_setup_waits_for_listener(nursery, shared_broker):
+    broker, _ = shared_broker
+    config = SimpleNamespace(mqtt=SimpleNamespace(port=1883))
+
+    with patch("local_console.core.camera.states.base.BROKER_LISTEN_TIMEOUT", 0.1):
+        with pytest.raises(BrokerException):
+            await nursery.start(MQTTDriver(config, broker).setup)
+
+    await nursery.start(broker.run)
+    with trio.fail_after(5):
+        await nursery.start(MQTTDriver(config, broker).setup)
+    assert 1883 in broker._live
@@ -14,17 +14,23 @@
 #
 # SPDX-License-Identifier: Apache-2.0
 import logging
+import os
+import stat
 from pathlib import PurePosixPath
 from unittest.mock import Mock
+from unittest.mock import patch
 
 import pytest
 import requests
 import trio
 from httpx import AsyncClient
+from local_console.core.files.files import file_hash
 from local_console.core.schemas.schemas import DeviceID
 from local_console.servers.webserver import AsyncWebserver
 from local_console.servers.webserver import combine_url_components
+from local_console.servers.webserver import DEVICE_QUEUE_CAPACITY
 from local_console.servers.webserver import FileInbox
+from local_console.servers.webserver import IncomingFile
 from local_console.servers.webserver import SyncWebserver
 
 from tests.mocks.config import set_configuration
@@ -55,10 +61,11 @@ def test_PUT_happy_path(sync_webserver):
     recvd_data = b""
     recvd_path = ""
 
-    def put_callback(data: bytes, path: str) -> None:
+    def put_callback(incoming: IncomingFile, path: str) -> None:
         nonlocal recvd_data, recvd_path
-        recvd_data = data
+        recvd_data = incoming.read_bytes()
         recvd_path = path
+        incoming.discard()
 
     sync_webserver.on_incoming = put_callback
     sync_webserver.max_upload_size = 1024
@@ -72,6 +79,49 @@ def test_PUT_happy_path(sync_webserver):
     assert recvd_path == f"/{file_name}"
 
 
+def test_PUT_spooled_to_directory(sync_webserver, tmp_path):
+    spool_dir = tmp_path / "spool"
+    spool_dir.mkdir()
+    target = tmp_path / "final.bin"
+    url = f"http://localhost:{sync_webserver.port}/final.bin"
+    data = bytes(range(256)) * 1024  # Spans several chunks
+
+    spooled_at = None
+
+    def put_callback(incoming: IncomingFile, path: str) -> None:
+        nonlocal spooled_at
+        spooled_at = incoming.path
+        incoming.move_to(target)
+        incoming.discard()
+
+    sync_webserver.on_incoming = put_callback
+    sync_webserver.spool_dir_for = lambda url_path: spool_dir
+
+    response = requests.put(url, data=data)
+    assert response.status_code == 200
+
+    assert spooled_at.parent == spool_dir
+    assert target.read_bytes() == data
+    assert not any(spool_dir.iterdir())
+    # Stored files follow the umask, like any other file written
+    umask = os.umask(0)
+    os.umask(umask)
+    assert stat.S_IMODE(target.stat().st_mode) == 0o666 & ~umask
+
+
+def test_PUT_spool_discarded_on_error(sync_webserver, tmp_path):
+    url = f"http://localhost:{sync_webserver.port}/testfile.txt"
+
+    sync_webserver.on_incoming = Mock(side_effect=IOError("Some error"))
+    sync_webserver.spool_dir_for = lambda url_path: tmp_path
+
+    response = requests.put(url, data=b"data")
+    assert response.status_code == 200
+
+    sync_webserver.on_incoming.assert_called_once()
+    assert not any(tmp_path.iterdir())
+
+
 def test_PUT_size_limit_hit(sync_webserver):
     file_name = "testfile.txt"
     url = f"http://localhost:{sync_webserver.port}/{file_name}"
@@ -126,6 +176,20 @@ def test_GET_file_not_found(sync_webserver):
     assert response.status_code == 404
 
 
+def test_GET_file_shared_by_deployments(sync_webserver, tmp_path):
+    file_path = tmp_path / "shared.bin"
+    file_path.write_bytes(b"FW")
+
+    sub_url = sync_webserver.enlist_file(file_path)
+    assert sync_webserver.enlist_file(file_path) == sub_url
+    url = f"http://localhost:{sync_webserver.port}/{sub_url}"
+
+    sync_webserver.delist_file(file_path)
+    assert requests.get(url).status_code == 200
+    sync_webserver.delist_file(file_path)
+    assert requests.get(url).status_code == 404
+
+
 def test_GET_file_lifecycle(sync_webserver, tmp_path):
     file_name = "testfile.txt"
     file_path = tmp_path / file_name
@@ -208,6 +272,52 @@ def test_GET_no_range_headers_by_default(sync_webserver, tmp_path):
     assert "Accept-Ranges" not in response.headers
 
 
+def test_GET_etag_revalidation(sync_webserver, tmp_path):
+    file_path = tmp_path / "testfile.txt"
+    data = b"This is a test file with an entity tag."
+    file_path.write_bytes(data)
+
+    sub_url = sync_webserver.enlist_file(file_path)
+    url = f"http://localhost:{sync_webserver.port}/{sub_url}"
+
+    response = requests.get(url)
+    etag = response.headers["ETag"]
+    assert etag == f'"{file_hash(data)}"'
+
+    response = requests.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+    response = requests.get(url, headers={"If-None-Match": f'"other", W/{etag}'})
+    assert response.status_code == 304
+
+    response = requests.get(url, headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+    assert response.content == data
+
+
+def test_GET_transfer_cap(tmp_path):
+    file_path = tmp_path / "testfile.txt"
+    data = b"This is a test file."
+    file_path.write_bytes(data)
+
+    with SyncWebserver(max_transfers=1) as server:
+        sub_url = server.enlist_file(file_path)
+        url = f"http://localhost:{server.port}/{sub_url}"
+
+        # Hold the only transfer slot, as an ongoing download would
+        server.transfer_slots.acquire()
+        with patch("local_console.servers.webserver.TRANSFER_SLOT_TIMEOUT", 0.1):
+            response = requests.get(url)
+        assert response.status_code == 503
+
+        server.transfer_slots.release()
+        response = requests.get(url)
+        assert response.status_code == 200
+        assert response.content == data
+
+
 @pytest.mark.trio
 async def test_async_process_via_channel(nursery, tmp_path):
     received = trio.Event()
@@ -218,9 +328,10 @@ async def test_async_process_via_channel(nursery, tmp_path):
                 assert server.port
                 task_status.started((server.port, cs))
 
-                async for data, url_path in server.receive():
-                    assert data == b"data"
+                async for incoming, url_path in server.receive():
+                    assert incoming.read_bytes() == b"data"
                     assert url_path == "/testfile.txt"
+                    incoming.discard()
                     received.set()
 
     port, cancel_scope = await nursery.start(webserver_loop)
@@ -294,8 +405,8 @@ async def test_file_inbox(nursery, tmp_path, caplog):
     test_file_name = "testfile.txt"
     test_data = b"data"
 
-    async def test_blob_function(data: bytes, url: str) -> None:
-        assert data == test_data
+    async def test_blob_function(incoming: IncomingFile, url: str) -> None:
+        assert incoming.read_bytes() == test_data
         assert DeviceID(int(PurePosixPath(url).parts[1])) == test_target
         received.set()
 
@@ -345,3 +456,125 @@ async def test_file_inbox(nursery, tmp_path, caplog):
         )
 
         should_finish.set()
+
+
+@pytest.mark.trio
+async def test_file_inbox_dispatch_per_device(nursery, tmp_path):
+    configuration = GlobalConfigurationSampler(num_of_devices=2).sample()
+    for device in configuration.devices:
+        device.mqtt.host = "localhost"
+    set_configuration(configuration)
+    slow_device, fast_device = (device.id for device in configuration.devices)
+
+    should_finish = trio.Event()
+    release_slow = trio.Event()
+    fast_received = trio.Event()
+    slow_received: list[str] = []
+
+    async def webserver_loop(*, task_status=trio.TASK_STATUS_IGNORED):
+        async with AsyncWebserver(port=0) as server:
+            task_status.started(server)
+            await should_finish.wait()
+
+    server = await nursery.start(webserver_loop)
+    inbox = FileInbox(server)
+    await nursery.start(inbox.blobs_dispatch_task)
+
+    spool_dir = tmp_path / "spool"
+    spool_dir.mkdir()
+
+    async def slow_function(incoming: IncomingFile, url: str) -> None:
+        assert incoming.path.parent == spool_dir
+        await release_slow.wait()
+        slow_received.append(url)
+
+    async def fast_function(incoming: IncomingFile, url: str) -> None:
+        fast_received.set()
+
+    slow_root = inbox.set_file_incoming_callable(
+        slow_device, slow_function, spool_dir=spool_dir
+    )
+    fast_root = inbox.set_file_incoming_callable(fast_device, fast_function)
+
+    async with AsyncClient() as client:
+        for i in range(2):
+            response = await client.put(f"{slow_root}/{i}.jpg", content=b"data")
+            assert response.status_code == 200
+
+        # The blocked device does not hold back the other one
+        response = await client.put(f"{fast_root}/0.jpg", content=b"data")
+        assert response.status_code == 200
+        with trio.fail_after(5):
+            await fast_received.wait()
+        assert not slow_received
+
+        # Blobs for the same device keep their order
+        release_slow.set()
+        with trio.fail_after(5):
+            while len(slow_received) < 2:
+                await trio.sleep(0.01)
+        assert slow_received == [f"/{slow_device}/0.jpg", f"/{slow_device}/1.jpg"]
+
+    # Processed blobs are removed from the spool directory
+    assert not any(spool_dir.iterdir())
+    should_finish.set()
+
+
+@pytest.mark.trio
+async def test_file_inbox_full_device_queue(nursery, tmp_path):
+    configuration = GlobalConfigurationSampler(num_of_devices=2).sample()
+    for device in configuration.devices:
+        device.mqtt.host = "localhost"
+    set_configuration(configuration)
+    slow_device, fast_device = (device.id for device in configuration.devices)
+
+    should_finish = trio.Event()
+    fast_received = trio.Event()
+    uploaded: list[int] = []
+
+    async def webserver_loop(*, task_status=trio.TASK_STATUS_IGNORED):
+        async with AsyncWebserver(port=0) as server:
+            task_status.started(server)
+            await should_finish.wait()
+
+    server = await nursery.start(webserver_loop)
+    inbox = FileInbox(server)
+    await nursery.start(inbox.blobs_dispatch_task)
+
+    async def stuck_function(incoming: IncomingFile, url: str) -> None:
+        await trio.sleep_forever()
+
+    async def fast_function(incoming: IncomingFile, url: str) -> None:
+        fast_received.set()
+
+    slow_root = inbox.set_file_incoming_callable(slow_device, stuck_function)
+    fast_root = inbox.set_file_incoming_callable(fast_device, fast_function)
+
+    async with AsyncClient(timeout=10) as client:
+
+        async def upload(i: int) -> None:
+            await client.put(f"{slow_root}/{i}.jpg", content=b"data")
+            uploaded.append(i)
+
+        # One being processed, the queue full, and the rest held back
+        uploads = DEVICE_QUEUE_CAPACITY + 3
+        async with trio.open_nursery() as uploaders:
+            for i in range(uploads):
+                uploaders.start_soon(upload, i)
+            with trio.fail_after(5):
+                while len(uploaded) < DEVICE_QUEUE_CAPACITY + 1:
+                    await trio.sleep(0.01)
+
+            response = await client.put(f"{fast_root}/0.jpg", content=b"data")
+            assert response.status_code == 200
+            with trio.fail_after(5):
+                await fast_received.wait()
+            assert len(uploaded) < uploads
+
+            # Held back uploads are released once the device is removed
+            inbox.reset_file_incoming_callable(slow_device)
+            assert slow_device not in inbox._queues
+
+        assert len(uploaded) == uploads
+
+    should_finish.set()
@@ -0,0 +1,126 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import os
+from unittest.mock import patch
+
+import pytest
+from local_console.utils.fsindex import directory_index
+from local_console.utils.fsindex import DirectoryIndex
+
+
+def populate(root, names: list[str]) -> None:
+    for name in names:
+        (root / name).write_bytes(b"0")
+
+
+def test_newest_first(tmp_path) -> None:
+    populate(tmp_path, ["2.txt", "1.txt", "3.txt"])
+    (tmp_path / "subdir").mkdir()
+
+    index = DirectoryIndex(tmp_path)
+
+    assert list(index.newest()) == ["3.txt", "2.txt", "1.txt"]
+    assert list(index.newest("3.txt")) == ["2.txt", "1.txt"]
+    assert list(index.newest("1.txt")) == []
+    # Tokens which are not in the index keep their relative order
+    assert list(index.newest("2.z")) == ["2.txt", "1.txt"]
+    assert "subdir" not in index
+
+
+def test_oldest_first(tmp_path) -> None:
+    populate(tmp_path, ["2.txt", "1.txt", "3.txt"])
+
+    index = DirectoryIndex(tmp_path)
+
+    assert list(index.oldest()) == ["1.txt", "2.txt", "3.txt"]
+    assert list(index.oldest("2.txt")) == ["2.txt", "3.txt"]
+    assert list(index.oldest("2")) == ["2.txt", "3.txt"]
+    assert list(index.oldest("4")) == []
+
+
+def test_missing_directory(tmp_path) -> None:
+    index = DirectoryIndex(tmp_path / "missing")
+
+    with pytest.raises(FileNotFoundError):
+        list(index.newest())
+
+
+def test_tracks_own_changes_without_rescan(tmp_path) -> None:
+    populate(tmp_path, ["1.txt", "2.txt"])
+    index = DirectoryIndex(tmp_path)
+    assert len(index) == 2
+
+    with patch("local_console.utils.fsindex.os.scandir") as mock_scandir:
+        populate(tmp_path, ["3.txt"])
+        index.add("3.txt")
+        (tmp_path / "1.txt").unlink()
+        index.discard("1.txt")
+
+        assert list(index.newest()) == ["3.txt", "2.txt"]
+        mock_scandir.assert_not_called()
+
+
+def test_detects_external_changes(tmp_path) -> None:
+    populate(tmp_path, ["1.txt"])
+    index = DirectoryIndex(tmp_path)
+    assert list(index.newest()) == ["1.txt"]
+
+    populate(tmp_path, ["2.txt"])
+    # Ensure the directory mtime differs despite filesystem granularity
+    stat = os.stat(tmp_path)
+    os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert list(index.newest()) == ["2.txt", "1.txt"]
+
+
+def test_add_before_seeding(tmp_path) -> None:
+    index = DirectoryIndex(tmp_path)
+    populate(tmp_path, ["1.txt"])
+    index.add("1.txt")
+
+    assert list(index.newest()) == ["1.txt"]
+
+
+def test_with_stem(tmp_path) -> None:
+    populate(tmp_path, ["20241003093439234.jpg", "202410030934392345.jpg", "a.b.jpg"])
+    index = DirectoryIndex(tmp_path)
+
+    assert index.with_stem("20241003093439234") == "20241003093439234.jpg"
+    assert index.with_stem("a.b") == "a.b.jpg"
+    assert index.with_stem("a") is None
+    assert index.with_stem("20241003093439233") is None
+
+
+def test_registry_shares_instances(tmp_path) -> None:
+    assert directory_index(tmp_path) is directory_index(tmp_path / "." / "")
+    assert directory_index(tmp_path) is not directory_index(tmp_path / "other")
+
+
+def test_iteration_copes_with_concurrent_changes(tmp_path) -> None:
+    populate(tmp_path, [f"{n:02}.txt" for n in range(10)])
+    index = DirectoryIndex(tmp_path)
+
+    with patch("local_console.utils.fsindex.SCAN_CHUNK", 3):
+        names = index.newest()
+        seen = [next(names) for _ in range(3)]
+        # Changes made by writers while iterating
+        index.discard("05.txt")
+        index.add("99.txt")
+        seen += list(names)
+
+    assert seen == ["09.txt", "08.txt", "07.txt", "06.txt", "04.txt"] + [
+        f"{n:02}.txt" for n in range(3, -1, -1)
+    ]
@@ -17,6 +17,7 @@ import contextlib
 import logging
 import os
 import random
+import shutil
 import threading
 import time
 from collections import OrderedDict
@@ -38,6 +39,7 @@ from local_console.utils.fstools import FileInfo
 from local_console.utils.fstools import FileInfoContainer
 from local_console.utils.fstools import size_unit_to_bytes
 from local_console.utils.fstools import StorageSizeWatcher
+from local_console.utils.fstools import walk_files
 from watchdog.events import FileSystemEvent
 from watchdog.events import FileSystemEventHandler
 from watchdog.observers import Observer
@@ -690,3 +692,148 @@ def test_relative_paths(tmp_path) -> None:
         assert w.content.size == 1024
     finally:
         os.chdir(curdir)
+
+
+def test_container_remove_and_update() -> None:
+    files = [_file(ref) for ref in (5, 3, 8, 1, 9, 2)]
+    container = FileInfoContainer()
+    for file in files:
+        container.add(file)
+
+    assert container.remove(files[1].path) == files[1]
+    assert container.remove(files[1].path) is None
+    assert container.size == 25
+
+    newer = FileInfo(age=10, path=files[3].path, size=4)
+    assert container.add(newer) is files[3]
+    assert container.size == 28
+
+    assert [container.pop().age for _ in range(5)] == [2, 5, 8, 9, 10]
+    assert container.pop() is None
+
+
+def test_container_update_regardless_of_age() -> None:
+    files = [_file(ref) for ref in (5, 3, 8)]
+    container = FileInfoContainer()
+    for file in files:
+        container.add(file)
+
+    # e.g. the modification time was set back after writing the file
+    container.update(FileInfo(age=1, path=files[2].path, size=2))
+    container.update(FileInfo(age=4, path=Path("new"), size=1))
+
+    assert container.size == 11
+    assert [container.pop().age for _ in range(4)] == [1, 3, 4, 5]
+
+
+def wait_for(condition, timeout: float = 5) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_tracking_by_filesystem_events(dir_layout, file_creator) -> None:
+    dir_base, size, _id = dir_layout
+    conf = persist(base=dir_base, size=100)
+    w = StorageSizeWatcher(conf)
+    w.apply(conf, _id)
+    w.start()
+    try:
+        w.gather()
+        assert w.content.size == size
+
+        with patch.object(
+            w, "_consistency_check", wraps=w._consistency_check
+        ) as mock_check:
+            # Files written and removed without being notified
+            new_file = create_new(dir_base / f"{_id}/Images", file_creator)
+            assert wait_for(lambda: w.size() == size + 1024)
+            new_file.unlink()
+            assert wait_for(lambda: w.size() == size)
+
+            mock_check.assert_not_called()
+
+            # A directory removed along with its files triggers a rescan
+            shutil.rmtree(dir_base / f"{_id}/Images/sub")
+            assert wait_for(lambda: w.size() == size - 2048)
+            mock_check.assert_called()
+    finally:
+        w.stop()
+
+
+def test_files_written_while_tracked_are_updated_quietly(
+    dir_layout, caplog, file_creator
+) -> None:
+    dir_base, size, _id = dir_layout
+    conf = persist(base=dir_base, size=100)
+    w = StorageSizeWatcher(conf)
+    w.apply(conf, _id)
+    w.start()
+    try:
+        w.gather()
+        new_file = dir_base / f"{_id}/Images/partial.jpg"
+        with new_file.open("wb") as f:
+            f.write(b"0" * 512)
+            f.flush()
+            time.sleep(0.2)
+            f.write(b"0" * 512)
+        w.incoming(new_file)
+
+        assert wait_for(lambda: w.size() == size + 1024)
+        assert not [r for r in caplog.records if r.levelno >= logging.ERROR]
+    finally:
+        w.stop()
+
+
+def test_concurrent_incoming_files(dir_layout) -> None:
+    dir_base, _, _id = dir_layout
+    conf = persist(base=dir_base, size=20)
+    w = StorageSizeWatcher(conf, check_frequency=3)
+    w.apply(conf, _id)
+    w.start()
+    errors: list[Exception] = []
+
+    def store(worker: int) -> None:
+        try:
+            for n in range(25):
+                path = dir_base / f"{_id}/Images/{worker}-{n}.jpg"
+                path.write_bytes(b"0" * 1024)
+                w.incoming(path)
+        except Exception as e:
+            errors.append(e)
+
+    try:
+        threads = [threading.Thread(target=store, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        on_disk = sum(f.size for root in w._paths for f in walk_files(root))
+        assert wait_for(lambda: w.size() == on_disk)
+        assert w.size() <= 20 * 1024
+    finally:
+        w.stop()
+
+
+def test_subdirectory_deletion_is_not_notified(tmp_path) -> None:
+    on_delete_cb = Mock()
+    directory_monitor = DirectoryMonitor(on_delete_cb)
+    directory_monitor.start()
+    try:
+        sub = tmp_path / "sub"
+        sub.mkdir()
+        directory_monitor.watch(tmp_path)
+
+        sub.rmdir()
+        time.sleep(0.5)
+        on_delete_cb.assert_not_called()
+
+        tmp_path.rmdir()
+        assert wait_for(lambda: on_delete_cb.called)
+    finally:
+        directory_monitor.stop()
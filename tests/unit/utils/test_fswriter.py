@@ -0,0 +1,103 @@
+# Copyright 2024 Sony Semiconductor Solutions Corp.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+import shutil
+import threading
+from unittest.mock import patch
+
+import pytest
+import trio
+from local_console.utils.fsindex import directory_index
+from local_console.utils.fswriter import storage_writer
+from local_console.utils.fswriter import StorageWriter
+from trio.testing import wait_all_tasks_blocked
+
+
+@pytest.mark.trio
+async def test_write_off_the_loop(tmp_path) -> None:
+    writer = StorageWriter()
+    target = tmp_path / "images" / "1.jpg"
+
+    loop_thread = threading.get_ident()
+    write_threads = []
+
+    def write(path, content) -> None:
+        write_threads.append(threading.get_ident())
+        writer.write(path, content)
+
+    await writer.run(write, target, b"data")
+
+    assert target.read_bytes() == b"data"
+    assert write_threads and write_threads[0] != loop_thread
+    assert "1.jpg" in directory_index(target.parent)
+    assert writer.queue_depth == 0
+
+
+def test_directory_validated_once(tmp_path) -> None:
+    writer = StorageWriter()
+
+    with patch("local_console.utils.fswriter.check_and_create_directory") as mock_check:
+        for i in range(3):
+            writer.write(tmp_path / f"{i}.txt", b"0")
+
+    mock_check.assert_called_once_with(tmp_path)
+
+
+def test_directory_removed_after_validation(tmp_path) -> None:
+    writer = StorageWriter()
+    directory = tmp_path / "images"
+
+    writer.write(directory / "1.jpg", b"0")
+    shutil.rmtree(directory)
+    writer.write(directory / "2.jpg", b"0")
+
+    assert (directory / "2.jpg").is_file()
+
+
+def test_store_by_moving(tmp_path) -> None:
+    writer = StorageWriter()
+    received = tmp_path / "upload.part"
+    received.write_bytes(b"data")
+    target = tmp_path / "images" / "1.jpg"
+
+    writer.store(target, received.rename)
+
+    assert target.read_bytes() == b"data"
+    assert not received.exists()
+    assert "1.jpg" in directory_index(target.parent)
+
+
+@pytest.mark.trio
+async def test_bounded_concurrency(tmp_path) -> None:
+    writer = StorageWriter(threads=1)
+    release = threading.Event()
+
+    def blocked() -> None:
+        release.wait()
+
+    async with trio.open_nursery() as nursery:
+        nursery.start_soon(writer.run, blocked)
+        nursery.start_soon(writer.run, blocked)
+        await wait_all_tasks_blocked()
+
+        assert writer.queue_depth == 2
+        release.set()
+
+    assert writer.queue_depth == 0
+
+
+@pytest.mark.trio
+async def test_writer_per_run() -> None:
+    assert storage_writer() is storage_writer()